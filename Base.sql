@@ -40,6 +40,9 @@ CREATE TABLE docentes (
     fecha_nacimiento DATE NULL,
     id_campus INT NOT NULL,
     password VARCHAR(255) NULL,
+    -- Nombre para mostrar y ordenar las tablas del panel admin por páginas (tablas_admin.py)
+    nombre_completo VARCHAR(768) GENERATED ALWAYS AS (LEFT(CONCAT_WS(' ', nombre, apellidop, apellidom), 768)) VIRTUAL,
+    KEY idx_docentes_nombre_completo (nombre_completo),
     FOREIGN KEY (id_campus) REFERENCES campus(id_campus)
 );
 
@@ -66,6 +69,8 @@ CREATE TABLE materias_impartidas (
     fecha_fin DATE,
     id_campus INT NULL,
     id_carrera INT NULL,
+    KEY idx_materias_campus_numero (id_campus, numero),
+    KEY idx_materias_docente_campus_numero (id_docente, id_campus, numero),
     FOREIGN KEY (id_docente) REFERENCES docentes(id_docente),
     FOREIGN KEY (id_campus) REFERENCES campus(id_campus),
     FOREIGN KEY (id_carrera) REFERENCES carreras(id_carrera)
@@ -85,6 +90,12 @@ CREATE TABLE alumnos (
     fecha_nacimiento DATE NULL,
     password VARCHAR(255) NULL,
     tipo_alumno ENUM('regular', 'intercambio') NOT NULL DEFAULT 'regular',
+    -- Nombre para mostrar y ordenar las tablas del panel admin por páginas (tablas_admin.py)
+    nombre_completo VARCHAR(513) GENERATED ALWAYS AS (CONCAT_WS(' ', nombre, apellidop)) VIRTUAL,
+    KEY idx_alumnos_campus_semestre (id_campus, numero_semestre),
+    KEY idx_alumnos_nombre_completo (nombre_completo),
+    KEY idx_alumnos_campus_matricula (id_campus, matricula),
+    KEY idx_alumnos_carrera_matricula (id_carrera, matricula),
     FOREIGN KEY (id_campus) REFERENCES campus(id_campus),
     FOREIGN KEY (id_carrera) REFERENCES carreras(id_carrera)
 );
@@ -96,18 +107,38 @@ CREATE TABLE evaluacion (
     id_materia_impartida INT NOT NULL,   
     id_alumno INT NOT NULL,
     fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Un alumno sólo puede evaluar una vez cada materia impartida
+    UNIQUE KEY uq_evaluacion_alumno_materia (id_alumno, id_materia_impartida),
+    KEY idx_evaluacion_alumno_docente (id_alumno, id_docente, id_materia_impartida),
     FOREIGN KEY (id_docente) REFERENCES docentes(id_docente),
     FOREIGN KEY (id_materia_impartida) REFERENCES materias_impartidas(id_materia_impartida),
     FOREIGN KEY (id_alumno) REFERENCES alumnos(id_alumno)
 );
 
--- Tabla de respuestas
+-- Catálogo versionado de preguntas (define los formularios de las encuestas).
+-- Para cambiar un cuestionario se agregan filas con la siguiente versión y se desactivan las
+-- anteriores; las respuestas ya registradas siguen apuntando a su pregunta original.
+CREATE TABLE preguntas (
+    id_pregunta SMALLINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+    tipo ENUM('docente','servicios') NOT NULL,
+    version SMALLINT UNSIGNED NOT NULL DEFAULT 1,
+    orden SMALLINT UNSIGNED NOT NULL,
+    texto VARCHAR(500) NOT NULL,
+    activa TINYINT(1) NOT NULL DEFAULT 1,
+    UNIQUE KEY uq_preguntas_tipo_version_orden (tipo, version, orden),
+    KEY idx_preguntas_tipo_activa (tipo, activa, orden)
+);
+
+-- Tabla de respuestas (una fila por pregunta del catálogo; escala 1..5 o NULL si no se contestó)
 CREATE TABLE respuestas (
-    id_respuesta INT AUTO_INCREMENT PRIMARY KEY,
     id_evaluacion INT NOT NULL,
-    pregunta TEXT NOT NULL,
-    escala ENUM('1','2','3','4','5'),
-    FOREIGN KEY (id_evaluacion) REFERENCES evaluacion(id_evaluacion)
+    id_pregunta SMALLINT UNSIGNED NOT NULL,
+    escala TINYINT UNSIGNED NULL,
+    PRIMARY KEY (id_evaluacion, id_pregunta),
+    KEY idx_respuestas_pregunta (id_pregunta, escala),
+    CONSTRAINT chk_respuestas_escala CHECK (escala BETWEEN 1 AND 5),
+    FOREIGN KEY (id_evaluacion) REFERENCES evaluacion(id_evaluacion),
+    FOREIGN KEY (id_pregunta) REFERENCES preguntas(id_pregunta)
 );
 
 -- Tabla de comentarios
@@ -125,30 +156,40 @@ CREATE TABLE evaluacion_servicios (
     id_alumno INT NOT NULL,
     id_campus INT NOT NULL,
     fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_evaluacion_servicios_alumno (id_alumno),
     FOREIGN KEY (id_alumno) REFERENCES alumnos(id_alumno),
     FOREIGN KEY (id_campus) REFERENCES campus(id_campus)
 );
 
 -- Tabla de respuestas de los servicios
 CREATE TABLE respuestas_servicios (
-    id_respuesta INT AUTO_INCREMENT PRIMARY KEY,
     id_evaluacion_servicios INT NOT NULL,
-    pregunta TEXT NOT NULL,
-    escala ENUM('1','2','3','4','5'),
-    FOREIGN KEY (id_evaluacion_servicios) REFERENCES evaluacion_servicios(id_evaluacion_servicios)
+    id_pregunta SMALLINT UNSIGNED NOT NULL,
+    escala TINYINT UNSIGNED NULL,
+    PRIMARY KEY (id_evaluacion_servicios, id_pregunta),
+    KEY idx_respuestas_servicios_pregunta (id_pregunta, escala),
+    CONSTRAINT chk_respuestas_servicios_escala CHECK (escala BETWEEN 1 AND 5),
+    FOREIGN KEY (id_evaluacion_servicios) REFERENCES evaluacion_servicios(id_evaluacion_servicios),
+    FOREIGN KEY (id_pregunta) REFERENCES preguntas(id_pregunta)
 );
 
 -- Tabla para almacenar el historial de promedios
 CREATE TABLE historial_evaluacion (
     id_historial INT AUTO_INCREMENT PRIMARY KEY,
     id_docente INT,
+    id_evaluacion INT NULL,
     fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     promedio DECIMAL(4,2),
     total_evaluaciones INT,
+    UNIQUE KEY uq_historial_evaluacion (id_evaluacion),
+    KEY idx_historial_docente_fecha (id_docente, fecha_registro),
+    KEY idx_historial_fecha (fecha_registro),
     FOREIGN KEY (id_docente) REFERENCES docentes(id_docente)
 );
 
 -- Tabla para almacenar el historial de comentarios
+-- Búsqueda de comentarios (comentarios.py): índice FULLTEXT sobre el texto y, para los filtros,
+-- materia impartida y campus copiados por trg_historial_comentarios junto con índices por fecha
 CREATE TABLE historial_comentarios (
     id_historial_comentario INT AUTO_INCREMENT PRIMARY KEY,  
     id_docente INT,
@@ -156,21 +197,97 @@ CREATE TABLE historial_comentarios (
     comentario TEXT NOT NULL,
     fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     materia VARCHAR(256),
+    id_materia_impartida INT NULL,
+    id_campus INT NULL,
+    KEY idx_historial_comentarios_fecha (fecha_registro),
+    KEY idx_historial_comentarios_docente (id_docente, fecha_registro),
+    KEY idx_historial_comentarios_materia (id_materia_impartida, fecha_registro),
+    KEY idx_historial_comentarios_campus (id_campus, fecha_registro),
+    FULLTEXT KEY ft_historial_comentarios (comentario),
     FOREIGN KEY (id_docente) REFERENCES docentes(id_docente),
     FOREIGN KEY (id_alumno) REFERENCES alumnos(id_alumno)
 );
 
+-- Historial: las tablas "calientes" (historial_evaluacion, historial_comentarios) solo guardan el
+-- periodo reciente; sp_historial_mantenimiento mueve lo anterior a las tablas *_archivo,
+-- particionadas por semestre (pAAAA_1 = enero-junio, pAAAA_2 = julio-diciembre; p_anterior junta
+-- lo previo a 2024), donde un semestre completo se puede descartar con DROP PARTITION. Las tablas
+-- calientes no se particionan: las particionadas no admiten llaves foráneas.
+CREATE TABLE IF NOT EXISTS historial_evaluacion_archivo (
+    id_historial INT NOT NULL,
+    id_docente INT,
+    id_evaluacion INT NULL,
+    fecha_registro DATETIME NOT NULL,
+    promedio DECIMAL(4,2),
+    total_evaluaciones INT,
+    PRIMARY KEY (id_historial, fecha_registro),
+    KEY idx_historial_archivo_docente (id_docente, fecha_registro)
+) ENGINE=InnoDB
+PARTITION BY RANGE COLUMNS (fecha_registro) (
+    PARTITION p_anterior VALUES LESS THAN ('2024-01-01'),
+    PARTITION p2024_1 VALUES LESS THAN ('2024-07-01'),
+    PARTITION p2024_2 VALUES LESS THAN ('2025-01-01'),
+    PARTITION p2025_1 VALUES LESS THAN ('2025-07-01'),
+    PARTITION p2025_2 VALUES LESS THAN ('2026-01-01'),
+    PARTITION p2026_1 VALUES LESS THAN ('2026-07-01'),
+    PARTITION p2026_2 VALUES LESS THAN ('2027-01-01'),
+    PARTITION p2027_1 VALUES LESS THAN ('2027-07-01'),
+    PARTITION p_futuro VALUES LESS THAN (MAXVALUE)
+);
+
+CREATE TABLE IF NOT EXISTS historial_comentarios_archivo (
+    id_historial_comentario INT NOT NULL,
+    id_docente INT,
+    id_alumno INT,
+    comentario TEXT NOT NULL,
+    fecha_registro DATETIME NOT NULL,
+    materia VARCHAR(256),
+    id_materia_impartida INT NULL,
+    id_campus INT NULL,
+    PRIMARY KEY (id_historial_comentario, fecha_registro),
+    KEY idx_historial_comentarios_archivo_docente (id_docente, fecha_registro)
+) ENGINE=InnoDB
+PARTITION BY RANGE COLUMNS (fecha_registro) (
+    PARTITION p_anterior VALUES LESS THAN ('2024-01-01'),
+    PARTITION p2024_1 VALUES LESS THAN ('2024-07-01'),
+    PARTITION p2024_2 VALUES LESS THAN ('2025-01-01'),
+    PARTITION p2025_1 VALUES LESS THAN ('2025-07-01'),
+    PARTITION p2025_2 VALUES LESS THAN ('2026-01-01'),
+    PARTITION p2026_1 VALUES LESS THAN ('2026-07-01'),
+    PARTITION p2026_2 VALUES LESS THAN ('2027-01-01'),
+    PARTITION p2027_1 VALUES LESS THAN ('2027-07-01'),
+    PARTITION p_futuro VALUES LESS THAN (MAXVALUE)
+);
+
+-- Agregado diario del historial por docente (última instantánea del día y evaluaciones del día).
+-- Se actualiza en sp_registrar_historial_evaluacion y no se archiva: es la serie de tendencia.
+CREATE TABLE IF NOT EXISTS historial_evaluacion_diario (
+    id_docente INT NOT NULL,
+    fecha DATE NOT NULL,
+    promedio DECIMAL(4,2),
+    total_evaluaciones INT,
+    evaluaciones_dia INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (id_docente, fecha),
+    CONSTRAINT fk_historial_diario_docentes FOREIGN KEY (id_docente) REFERENCES docentes(id_docente)
+) ENGINE=InnoDB;
+
 -- Tabla de administradores
 CREATE TABLE admin_users (
     id_admin INT AUTO_INCREMENT PRIMARY KEY,
     username VARCHAR(100) NOT NULL UNIQUE,
-    password VARCHAR(255) NULL
+    password VARCHAR(255) NULL,
+    correo VARCHAR(256) NULL
 );
 
 -- Tablas de resumen (Sirven para la actualización constante)
+-- Los contadores (suma_puntos, total_calificadas, total_respuestas, total_evaluaciones) se actualizan
+-- de forma incremental en los triggers; promedio = suma_puntos / total_calificadas.
 CREATE TABLE IF NOT EXISTS resumen_docentes_vm (
     id_docente INT PRIMARY KEY,
+    suma_puntos BIGINT NOT NULL DEFAULT 0,
+    total_calificadas INT NOT NULL DEFAULT 0,
     total_respuestas INT NOT NULL DEFAULT 0,
+    total_evaluaciones INT NOT NULL DEFAULT 0,
     promedio DECIMAL(4,2) NOT NULL DEFAULT 0.00,
     ultima_actualizacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
         ON UPDATE CURRENT_TIMESTAMP,
@@ -179,13 +296,111 @@ CREATE TABLE IF NOT EXISTS resumen_docentes_vm (
 
 CREATE TABLE IF NOT EXISTS resumen_servicios_vm (
     id_campus INT PRIMARY KEY,
+    suma_puntos BIGINT NOT NULL DEFAULT 0,
+    total_calificadas INT NOT NULL DEFAULT 0,
     total_respuestas INT NOT NULL DEFAULT 0,
+    total_evaluaciones INT NOT NULL DEFAULT 0,
     promedio DECIMAL(4,2) NOT NULL DEFAULT 0.00,
     ultima_actualizacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
         ON UPDATE CURRENT_TIMESTAMP,
     CONSTRAINT fk_resumen_servicios_campus_vm FOREIGN KEY (id_campus) REFERENCES campus(id_campus)
 ) ENGINE=InnoDB;
 
+-- Contadores por pregunta del catálogo (docente y servicios), mantenidos por los triggers de
+-- respuestas. Cada pregunta se reparte en 16 filas (particion = id de la evaluación MOD 16) para
+-- que los envíos simultáneos, que contestan todas las mismas preguntas, no esperen por una sola
+-- fila; los reportes suman las 16.
+CREATE TABLE IF NOT EXISTS resumen_preguntas_vm (
+    id_pregunta SMALLINT UNSIGNED NOT NULL,
+    particion TINYINT UNSIGNED NOT NULL,
+    suma_puntos BIGINT NOT NULL DEFAULT 0,
+    total_calificadas INT NOT NULL DEFAULT 0,
+    total_respuestas INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (id_pregunta, particion),
+    CONSTRAINT fk_resumen_preguntas_preguntas FOREIGN KEY (id_pregunta) REFERENCES preguntas(id_pregunta)
+) ENGINE=InnoDB;
+
+-- Progreso por alumno (se mantiene con triggers): materias requeridas en su campus/semestre,
+-- materias distintas ya evaluadas, evaluaciones docentes registradas y encuesta de servicios
+CREATE TABLE IF NOT EXISTS progreso_alumnos (
+    id_alumno INT PRIMARY KEY,
+    total_requerido INT NOT NULL DEFAULT 0,
+    completadas INT NOT NULL DEFAULT 0,
+    evaluaciones_realizadas INT NOT NULL DEFAULT 0,
+    servicios_completado TINYINT(1) NOT NULL DEFAULT 0,
+    ultima_actualizacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ON UPDATE CURRENT_TIMESTAMP,
+    CONSTRAINT fk_progreso_alumnos_alumnos FOREIGN KEY (id_alumno) REFERENCES alumnos(id_alumno)
+) ENGINE=InnoDB;
+
+-- Reporte del docente precalculado (página /profesor). Los contadores por materia se acumulan en
+-- el trigger de respuestas; el documento JSON (reporte + tendencia) se reconstruye una vez por
+-- evaluación enviada en sp_registrar_historial_evaluacion y se lee por llave primaria.
+CREATE TABLE IF NOT EXISTS reporte_docente_materias_vm (
+    id_docente INT NOT NULL,
+    id_materia_impartida INT NOT NULL,
+    suma_puntos BIGINT NOT NULL DEFAULT 0,
+    total_calificadas INT NOT NULL DEFAULT 0,
+    total_respuestas INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (id_docente, id_materia_impartida),
+    CONSTRAINT fk_reporte_materias_docente FOREIGN KEY (id_docente) REFERENCES docentes(id_docente),
+    CONSTRAINT fk_reporte_materias_materia FOREIGN KEY (id_materia_impartida) REFERENCES materias_impartidas(id_materia_impartida)
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS reporte_docentes_vm (
+    id_docente INT PRIMARY KEY,
+    reporte JSON NOT NULL,
+    tendencia JSON NOT NULL,
+    ultima_actualizacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ON UPDATE CURRENT_TIMESTAMP,
+    CONSTRAINT fk_reporte_docentes_docentes FOREIGN KEY (id_docente) REFERENCES docentes(id_docente)
+) ENGINE=InnoDB;
+
+-- Versión del catálogo de materias (una sola fila; la incrementan los triggers trg_catalogo_*)
+CREATE TABLE IF NOT EXISTS catalogo_version (
+    id TINYINT PRIMARY KEY,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0
+) ENGINE=InnoDB;
+
+INSERT INTO catalogo_version (id, version) VALUES (1, 0);
+
+-- Último resultado de la analítica (analitica.py), compartido por todos los workers: lo calcula
+-- uno solo (el que reclama calculando_desde) y los demás lo leen (una sola fila)
+CREATE TABLE IF NOT EXISTS analitica_resultado (
+    id TINYINT PRIMARY KEY,
+    resultado JSON NULL,
+    generado TIMESTAMP NULL,
+    calculando_desde TIMESTAMP NULL
+) ENGINE=InnoDB;
+
+INSERT INTO analitica_resultado (id) VALUES (1);
+
+-- Trabajos de envío de reportes por correo (cola persistente) y su estado por destinatario
+CREATE TABLE IF NOT EXISTS trabajos_correo (
+    id_trabajo INT AUTO_INCREMENT PRIMARY KEY,
+    estado ENUM('pendiente','enviando','enviado','parcial','error') NOT NULL DEFAULT 'pendiente',
+    solicitado_por VARCHAR(100) NULL,
+    total_destinatarios INT NOT NULL DEFAULT 0,
+    enviados INT NOT NULL DEFAULT 0,
+    fallidos INT NOT NULL DEFAULT 0,
+    error TEXT NULL,
+    fecha_creacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    ultima_actualizacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ON UPDATE CURRENT_TIMESTAMP,
+    KEY idx_trabajos_correo_estado (estado)
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS trabajos_correo_destinatarios (
+    id_trabajo INT NOT NULL,
+    correo VARCHAR(256) NOT NULL,
+    -- 'enviando': un hilo lo reclamó y le está enviando (evita que dos hilos le envíen al mismo destinatario)
+    estado ENUM('pendiente','enviando','enviado','error') NOT NULL DEFAULT 'pendiente',
+    intentos INT NOT NULL DEFAULT 0,
+    ultimo_error TEXT NULL,
+    PRIMARY KEY (id_trabajo, correo),
+    CONSTRAINT fk_destinatarios_trabajo FOREIGN KEY (id_trabajo) REFERENCES trabajos_correo(id_trabajo)
+) ENGINE=InnoDB;
+
 -- PROCEDIMIENTOS ALMACENADOS
 
 DELIMITER $$
@@ -328,15 +543,15 @@ BEGIN
             'curso', s.curso,
             'fecha_i', DATE_FORMAT(s.fecha_i, '%Y-%m-%d'),
             'fecha_fin', DATE_FORMAT(s.fecha_fin, '%Y-%m-%d'),
-            'total_puntos', COALESCE(SUM(CAST(r.escala AS UNSIGNED)), 0),
-            'total_respuestas', COUNT(r.id_respuesta),
-            'promedio', ROUND(AVG(CAST(r.escala AS UNSIGNED)),2),
+            'total_puntos', COALESCE(SUM(r.escala), 0),
+            'total_respuestas', COUNT(r.id_pregunta),
+            'promedio', ROUND(AVG(r.escala),2),
             'evaluacion_final',
                 CASE
-                    WHEN AVG(CAST(r.escala AS UNSIGNED)) >= 4.5 THEN 'Excelente profesor'
-                    WHEN AVG(CAST(r.escala AS UNSIGNED)) >= 4.0 THEN 'Muy buen profesor'
-                    WHEN AVG(CAST(r.escala AS UNSIGNED)) >= 3.0 THEN 'Buen profesor'
-                    WHEN AVG(CAST(r.escala AS UNSIGNED)) >= 2.0 THEN 'Profesor regular'
+                    WHEN AVG(r.escala) >= 4.5 THEN 'Excelente profesor'
+                    WHEN AVG(r.escala) >= 4.0 THEN 'Muy buen profesor'
+                    WHEN AVG(r.escala) >= 3.0 THEN 'Buen profesor'
+                    WHEN AVG(r.escala) >= 2.0 THEN 'Profesor regular'
                     ELSE 'Mal profesor'
                 END
         ) AS obj
@@ -366,12 +581,12 @@ END$$
 -- Procedimiento para insertar respuestas
 CREATE PROCEDURE insertar_respuesta(
     IN p_id_evaluacion INT,
-    IN p_pregunta TEXT,
-    IN p_escala ENUM('1','2','3','4','5')
+    IN p_id_pregunta SMALLINT UNSIGNED,
+    IN p_escala TINYINT UNSIGNED
 )
 BEGIN
-    INSERT INTO respuestas (id_evaluacion, pregunta, escala)
-    VALUES (p_id_evaluacion, p_pregunta, p_escala);
+    INSERT INTO respuestas (id_evaluacion, id_pregunta, escala)
+    VALUES (p_id_evaluacion, p_id_pregunta, p_escala);
 END$$
 
 -- Procedimiento para insertar comentarios
@@ -398,12 +613,12 @@ BEGIN
         s.fecha_i,
         s.fecha_fin,
         c.nombre AS campus_nombre,
-        SUM(CAST(r.escala AS UNSIGNED)) AS total_puntos,
-        COUNT(r.id_respuesta) AS total_respuestas,
-        ROUND(AVG(CAST(r.escala AS UNSIGNED)),2) AS promedio,
+        SUM(r.escala) AS total_puntos,
+        COUNT(r.id_pregunta) AS total_respuestas,
+        ROUND(AVG(r.escala),2) AS promedio,
         CASE
-            WHEN AVG(CAST(r.escala AS UNSIGNED)) >= 4.5 THEN 'Asignación de materias'
-            WHEN AVG(CAST(r.escala AS UNSIGNED)) >= 3.0 THEN 'En valoración'
+            WHEN AVG(r.escala) >= 4.5 THEN 'Asignación de materias'
+            WHEN AVG(r.escala) >= 3.0 THEN 'En valoración'
             ELSE 'Sin asignación'
         END AS estatus_docente
     FROM docentes d
@@ -420,10 +635,10 @@ BEGIN
     SELECT 
         c.nombre AS campus_nombre,
         COUNT(DISTINCT es.id_alumno) AS total_evaluaciones,
-        ROUND(AVG(CAST(rs.escala AS UNSIGNED)), 2) AS promedio,
+        ROUND(AVG(rs.escala), 2) AS promedio,
         CASE
-            WHEN AVG(CAST(rs.escala AS UNSIGNED)) >= 4.5 THEN 'Excelente'
-            WHEN AVG(CAST(rs.escala AS UNSIGNED)) >= 3.5 THEN 'Satisfactorio'
+            WHEN AVG(rs.escala) >= 4.5 THEN 'Excelente'
+            WHEN AVG(rs.escala) >= 3.5 THEN 'Satisfactorio'
             ELSE 'Requiere Atención'
         END AS estatus_servicios
     FROM evaluacion_servicios es
@@ -432,66 +647,66 @@ BEGIN
     GROUP BY c.id_campus;
 END$$
 
--- Procedimiento para estadísticas generales
-CREATE PROCEDURE estadisticas_evaluacion()
+-- Procedimiento para reporte por pregunta del catálogo (suma los contadores de resumen_preguntas_vm)
+CREATE PROCEDURE reporte_preguntas()
+BEGIN
+    SELECT p.id_pregunta, p.tipo, p.version, p.orden, p.texto, p.activa,
+           t.total_calificadas AS total_respuestas,
+           ROUND(t.suma_puntos / NULLIF(t.total_calificadas, 0), 2) AS promedio
+    FROM preguntas p
+    JOIN (
+        SELECT id_pregunta, SUM(suma_puntos) AS suma_puntos, SUM(total_calificadas) AS total_calificadas
+        FROM resumen_preguntas_vm GROUP BY id_pregunta
+    ) t ON t.id_pregunta = p.id_pregunta
+    ORDER BY p.tipo, p.version, p.orden;
+END$$
+
+-- Procedimiento con los contadores del panel admin (lee progreso_alumnos, sin subconsultas por alumno).
+-- Devuelve 4 result sets acotados por el número de campus y carreras.
+CREATE PROCEDURE estadisticas_resumen()
 BEGIN
     -- Total de campus que evalúan (solo alumnos que completaron todo, incluyendo servicios)
     SELECT COUNT(DISTINCT a.id_campus) as total_campus 
-    FROM alumnos a
-    WHERE NOT EXISTS (
-        SELECT 1 FROM materias_impartidas m 
-        WHERE m.id_campus = a.id_campus 
-        AND m.numero = a.numero_semestre
-        AND NOT EXISTS (
-            SELECT 1 FROM evaluacion e 
-            WHERE e.id_materia_impartida = m.id_materia_impartida 
-            AND e.id_alumno = a.id_alumno
-        )
-    )
-    AND EXISTS (
-        SELECT 1 FROM evaluacion_servicios es 
-        WHERE es.id_alumno = a.id_alumno
-    );
+    FROM progreso_alumnos p
+    JOIN alumnos a ON a.id_alumno = p.id_alumno
+    WHERE p.completadas >= p.total_requerido
+      AND p.servicios_completado = 1;
     
     -- Total de alumnos que han completado todas las evaluaciones (docentes + servicios)
     SELECT COUNT(*) as total_alumnos 
-    FROM alumnos a
-    WHERE NOT EXISTS (
-        SELECT 1 FROM materias_impartidas m 
-        WHERE m.id_campus = a.id_campus 
-        AND m.numero = a.numero_semestre
-        AND NOT EXISTS (
-            SELECT 1 FROM evaluacion e 
-            WHERE e.id_materia_impartida = m.id_materia_impartida 
-            AND e.id_alumno = a.id_alumno
-        )
-    )
-    AND EXISTS (
-        SELECT 1 FROM evaluacion_servicios es 
-        WHERE es.id_alumno = a.id_alumno
-    );
+    FROM progreso_alumnos p
+    WHERE p.completadas >= p.total_requerido
+      AND p.servicios_completado = 1;
     
     -- Alumnos por campus que han evaluado (sólo con evaluaciones docentes)
-    SELECT c.nombre as campus, COUNT(DISTINCT e.id_alumno) as alumnos
-    FROM evaluacion e
-    JOIN alumnos a ON e.id_alumno = a.id_alumno
+    SELECT c.nombre as campus, COUNT(*) as alumnos
+    FROM progreso_alumnos p
+    JOIN alumnos a ON a.id_alumno = p.id_alumno
     JOIN campus c ON a.id_campus = c.id_campus
+    WHERE p.evaluaciones_realizadas > 0
     GROUP BY a.id_campus;
     
     -- Alumnos por carrera que han evaluado
-    SELECT ca.nombre as carrera, COUNT(DISTINCT e.id_alumno) as alumnos
-    FROM evaluacion e
-    JOIN alumnos a ON e.id_alumno = a.id_alumno
+    SELECT ca.nombre as carrera, COUNT(*) as alumnos
+    FROM progreso_alumnos p
+    JOIN alumnos a ON a.id_alumno = p.id_alumno
     JOIN carreras ca ON a.id_carrera = ca.id_carrera
+    WHERE p.evaluaciones_realizadas > 0
     GROUP BY a.id_carrera;
-    
+END$$
+
+-- Procedimiento para estadísticas generales: contadores + listados por alumno
+CREATE PROCEDURE estadisticas_evaluacion()
+BEGIN
+    CALL estadisticas_resumen();
+
     -- Alumnos que no han evaluado (sin evaluacion docente alguna)
     SELECT a.*, c.nombre as campus, ca.nombre as carrera
-    FROM alumnos a
-    LEFT JOIN evaluacion e ON a.id_alumno = e.id_alumno
+    FROM progreso_alumnos p
+    JOIN alumnos a ON a.id_alumno = p.id_alumno
     JOIN campus c ON a.id_campus = c.id_campus
     JOIN carreras ca ON a.id_carrera = ca.id_carrera
-    WHERE e.id_evaluacion IS NULL;
+    WHERE p.evaluaciones_realizadas = 0;
 
     -- Estado por alumno: total requerido / completadas / pendientes 
     SELECT 
@@ -499,33 +714,14 @@ BEGIN
         a.matricula,
         a.nombre,
         a.apellidop,
-        a.correo,                       -- << agregado: incluir correo del alumno
+        a.correo,
         c.nombre as campus,
         ca.nombre as carrera,
-        COALESCE((
-            SELECT COUNT(*) FROM materias_impartidas m 
-            WHERE m.id_campus = a.id_campus AND m.numero = a.numero_semestre
-        ),0) AS total_requerido,
-        COALESCE(((
-            SELECT COUNT(DISTINCT e.id_materia_impartida) 
-            FROM evaluacion e 
-            JOIN materias_impartidas m2 ON e.id_materia_impartida = m2.id_materia_impartida
-            WHERE e.id_alumno = a.id_alumno 
-              AND m2.id_campus = a.id_campus 
-              AND m2.numero = a.numero_semestre
-        )),0) AS completadas,
-        (COALESCE((
-            SELECT COUNT(*) FROM materias_impartidas m 
-            WHERE m.id_campus = a.id_campus AND m.numero = a.numero_semestre
-        ),0) - COALESCE((
-            SELECT COUNT(DISTINCT e.id_materia_impartida) 
-            FROM evaluacion e 
-            JOIN materias_impartidas m2 ON e.id_materia_impartida = m2.id_materia_impartida
-            WHERE e.id_alumno = a.id_alumno 
-              AND m2.id_campus = a.id_campus 
-              AND m2.numero = a.numero_semestre
-        ),0)) AS pendientes
+        COALESCE(p.total_requerido, 0) AS total_requerido,
+        COALESCE(p.completadas, 0) AS completadas,
+        COALESCE(p.total_requerido, 0) - COALESCE(p.completadas, 0) AS pendientes
     FROM alumnos a
+    LEFT JOIN progreso_alumnos p ON p.id_alumno = a.id_alumno
     LEFT JOIN campus c ON a.id_campus = c.id_campus
     LEFT JOIN carreras ca ON a.id_carrera = ca.id_carrera;
 END$$
@@ -561,53 +757,185 @@ END$$
 
 DELIMITER ;
 
--- Procedimiento granular (actualiza los datos para 1 docente)
+-- Las reconciliaciones no sobrescriben los contadores: calculan en UNA sola sentencia
+-- (INSERT ... SELECT con READ COMMITTED, una sola instantánea y sin bloquear las respuestas)
+-- la diferencia entre el recálculo y el contador y la suman. Lo que los triggers acumulan
+-- mientras corren se conserva. El candado con nombre evita que dos reconciliaciones sumen
+-- dos veces la misma diferencia. READ COMMITTED requiere binlog_format ROW o MIXED (el predeterminado).
+DELIMITER $$
+CREATE PROCEDURE sp_vm_iniciar_reconciliacion(OUT p_aislamiento VARCHAR(32))
+BEGIN
+    IF GET_LOCK('evaluacion_d.reconciliar_resumen', 0) <> 1 THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Ya hay una reconciliación de los resúmenes en curso.';
+    END IF;
+    SET p_aislamiento = @@SESSION.transaction_isolation;
+    SET SESSION transaction_isolation = 'READ-COMMITTED';
+END$$
+
+CREATE PROCEDURE sp_vm_terminar_reconciliacion(IN p_aislamiento VARCHAR(32))
+BEGIN
+    IF p_aislamiento IS NOT NULL THEN
+        SET SESSION transaction_isolation = p_aislamiento;
+    END IF;
+    DO RELEASE_LOCK('evaluacion_d.reconciliar_resumen');
+END$$
+DELIMITER ;
+
+-- Procedimiento granular (reconcilia los datos de 1 docente; los triggers usan contadores incrementales)
 DELIMITER $$
 CREATE PROCEDURE sp_vm_refrescar_docente_individual(IN p_id_docente INT)
 BEGIN
-    DECLARE v_total INT DEFAULT 0;
-    DECLARE v_prom DECIMAL(4,2) DEFAULT 0.00;
+    DECLARE v_aislamiento VARCHAR(32);
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        CALL sp_vm_terminar_reconciliacion(v_aislamiento);
+        RESIGNAL;
+    END;
+    CALL sp_vm_iniciar_reconciliacion(v_aislamiento);
+
+    INSERT INTO resumen_docentes_vm (id_docente, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    SELECT p_id_docente,
+           t.suma_puntos - COALESCE(rd.suma_puntos, 0),
+           t.total_calificadas - COALESCE(rd.total_calificadas, 0),
+           t.total_respuestas - COALESCE(rd.total_respuestas, 0),
+           t.total_evaluaciones - COALESCE(rd.total_evaluaciones, 0),
+           IF(t.total_calificadas = 0, 0.00, ROUND(t.suma_puntos / t.total_calificadas, 2))
+    FROM (
+        SELECT COALESCE(SUM(r.escala),0) AS suma_puntos, COUNT(r.escala) AS total_calificadas,
+               COUNT(r.id_pregunta) AS total_respuestas, COUNT(DISTINCT e.id_evaluacion) AS total_evaluaciones
+        FROM evaluacion e
+        JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+        WHERE e.id_docente = p_id_docente
+    ) t
+    LEFT JOIN resumen_docentes_vm rd ON rd.id_docente = p_id_docente
+    WHERE t.total_respuestas > 0 OR rd.id_docente IS NOT NULL
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + VALUES(total_respuestas),
+        total_evaluaciones = total_evaluaciones + VALUES(total_evaluaciones),
+        promedio = IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2));
 
-    SELECT COUNT(r.id_respuesta), ROUND(AVG(CAST(r.escala AS UNSIGNED)),2)
-    INTO v_total, v_prom
-    FROM evaluacion e
-    JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
-    WHERE e.id_docente = p_id_docente;
+    DELETE FROM resumen_docentes_vm WHERE id_docente = p_id_docente AND total_respuestas = 0;
 
-    IF v_total IS NULL OR v_total = 0 THEN
-        DELETE FROM resumen_docentes_vm WHERE id_docente = p_id_docente;
-    ELSE
-        INSERT INTO resumen_docentes_vm (id_docente, total_respuestas, promedio)
-        VALUES (p_id_docente, v_total, COALESCE(v_prom,0.00))
-        ON DUPLICATE KEY UPDATE
-            total_respuestas = VALUES(total_respuestas),
-            promedio = VALUES(promedio);
-    END IF;
+    CALL sp_vm_terminar_reconciliacion(v_aislamiento);
 END$$
 DELIMITER ;
 
--- Procedimiento granular para servicios por campus
+-- Procedimiento granular para servicios por campus (reconcilia con la misma diferencia)
 DELIMITER $$
 CREATE PROCEDURE sp_vm_refrescar_campus_servicio_individual(IN p_id_campus INT)
 BEGIN
-    DECLARE v_total INT DEFAULT 0;
-    DECLARE v_prom DECIMAL(4,2) DEFAULT 0.00;
+    DECLARE v_aislamiento VARCHAR(32);
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        CALL sp_vm_terminar_reconciliacion(v_aislamiento);
+        RESIGNAL;
+    END;
+    CALL sp_vm_iniciar_reconciliacion(v_aislamiento);
+
+    INSERT INTO resumen_servicios_vm (id_campus, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    SELECT p_id_campus,
+           t.suma_puntos - COALESCE(rs.suma_puntos, 0),
+           t.total_calificadas - COALESCE(rs.total_calificadas, 0),
+           t.total_respuestas - COALESCE(rs.total_respuestas, 0),
+           t.total_evaluaciones - COALESCE(rs.total_evaluaciones, 0),
+           IF(t.total_calificadas = 0, 0.00, ROUND(t.suma_puntos / t.total_calificadas, 2))
+    FROM (
+        SELECT COALESCE(SUM(r.escala),0) AS suma_puntos, COUNT(r.escala) AS total_calificadas,
+               COUNT(r.id_pregunta) AS total_respuestas, COUNT(DISTINCT es.id_evaluacion_servicios) AS total_evaluaciones
+        FROM evaluacion_servicios es
+        JOIN respuestas_servicios r ON es.id_evaluacion_servicios = r.id_evaluacion_servicios
+        WHERE es.id_campus = p_id_campus
+    ) t
+    LEFT JOIN resumen_servicios_vm rs ON rs.id_campus = p_id_campus
+    WHERE t.total_respuestas > 0 OR rs.id_campus IS NOT NULL
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + VALUES(total_respuestas),
+        total_evaluaciones = total_evaluaciones + VALUES(total_evaluaciones),
+        promedio = IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2));
 
-    SELECT COUNT(rs.id_respuesta), ROUND(AVG(CAST(rs.escala AS UNSIGNED)),2)
-    INTO v_total, v_prom
-    FROM evaluacion_servicios es
-    JOIN respuestas_servicios rs ON es.id_evaluacion_servicios = rs.id_evaluacion_servicios
-    WHERE es.id_campus = p_id_campus;
+    DELETE FROM resumen_servicios_vm WHERE id_campus = p_id_campus AND total_respuestas = 0;
 
-    IF v_total IS NULL OR v_total = 0 THEN
-        DELETE FROM resumen_servicios_vm WHERE id_campus = p_id_campus;
-    ELSE
-        INSERT INTO resumen_servicios_vm (id_campus, total_respuestas, promedio)
-        VALUES (p_id_campus, v_total, COALESCE(v_prom,0.00))
-        ON DUPLICATE KEY UPDATE
-            total_respuestas = VALUES(total_respuestas),
-            promedio = VALUES(promedio);
-    END IF;
+    CALL sp_vm_terminar_reconciliacion(v_aislamiento);
+END$$
+DELIMITER ;
+
+-- Reconcilia resumen_preguntas_vm con las respuestas (carga inicial en la migración 011 o
+-- reconciliación manual). Suma la diferencia, así que puede correr con envíos en curso.
+DELIMITER $$
+CREATE PROCEDURE sp_refrescar_resumen_preguntas()
+BEGIN
+    DECLARE v_aislamiento VARCHAR(32);
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        CALL sp_vm_terminar_reconciliacion(v_aislamiento);
+        RESIGNAL;
+    END;
+    CALL sp_vm_iniciar_reconciliacion(v_aislamiento);
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_preg_dif;
+    CREATE TEMPORARY TABLE tmp_vm_preg_dif (
+        id_pregunta INT NOT NULL,
+        particion TINYINT UNSIGNED NOT NULL,
+        suma_puntos BIGINT NOT NULL,
+        total_calificadas INT NOT NULL,
+        total_respuestas INT NOT NULL,
+        PRIMARY KEY (id_pregunta, particion)
+    );
+
+    INSERT INTO tmp_vm_preg_dif
+    WITH recalculo AS (
+        SELECT id_pregunta, particion,
+               SUM(suma_puntos) AS suma_puntos,
+               SUM(total_calificadas) AS total_calificadas,
+               SUM(total_respuestas) AS total_respuestas
+        FROM (
+            SELECT id_pregunta, id_evaluacion % 16 AS particion,
+                   COALESCE(SUM(escala), 0) AS suma_puntos,
+                   COUNT(escala) AS total_calificadas,
+                   COUNT(*) AS total_respuestas
+            FROM respuestas
+            GROUP BY id_pregunta, id_evaluacion % 16
+            UNION ALL
+            SELECT id_pregunta, id_evaluacion_servicios % 16,
+                   COALESCE(SUM(escala), 0), COUNT(escala), COUNT(*)
+            FROM respuestas_servicios
+            GROUP BY id_pregunta, id_evaluacion_servicios % 16
+        ) x
+        GROUP BY id_pregunta, particion
+    )
+    SELECT t.id_pregunta, t.particion,
+           t.suma_puntos - COALESCE(rp.suma_puntos, 0),
+           t.total_calificadas - COALESCE(rp.total_calificadas, 0),
+           t.total_respuestas - COALESCE(rp.total_respuestas, 0)
+    FROM recalculo t
+    LEFT JOIN resumen_preguntas_vm rp ON rp.id_pregunta = t.id_pregunta AND rp.particion = t.particion
+    UNION ALL
+    SELECT rp.id_pregunta, rp.particion, -rp.suma_puntos, -rp.total_calificadas, -rp.total_respuestas
+    FROM resumen_preguntas_vm rp
+    LEFT JOIN recalculo t ON t.id_pregunta = rp.id_pregunta AND t.particion = rp.particion
+    WHERE t.id_pregunta IS NULL;
+
+    DELETE FROM tmp_vm_preg_dif
+    WHERE suma_puntos = 0 AND total_calificadas = 0 AND total_respuestas = 0;
+
+    INSERT INTO resumen_preguntas_vm (id_pregunta, particion, suma_puntos, total_calificadas, total_respuestas)
+    SELECT id_pregunta, particion, suma_puntos, total_calificadas, total_respuestas
+    FROM tmp_vm_preg_dif
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + VALUES(total_respuestas);
+
+    DELETE rp FROM resumen_preguntas_vm rp
+    JOIN tmp_vm_preg_dif t ON t.id_pregunta = rp.id_pregunta AND t.particion = rp.particion
+    WHERE rp.total_respuestas = 0;
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_preg_dif;
+    CALL sp_vm_terminar_reconciliacion(v_aislamiento);
 END$$
 DELIMITER ;
 
@@ -615,49 +943,592 @@ DELIMITER ;
 DELIMITER $$
 CREATE PROCEDURE sp_vm_refrescar_resumen_completo()
 BEGIN
-    -- Docentes: resumen completo
-    DROP TEMPORARY TABLE IF EXISTS tmp_vm_doc;
-    CREATE TEMPORARY TABLE tmp_vm_doc AS
-    SELECT e.id_docente,
-           COUNT(r.id_respuesta) AS total_respuestas,
-           ROUND(AVG(CAST(r.escala AS UNSIGNED)),2) AS promedio
-    FROM evaluacion e
-    JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
-    GROUP BY e.id_docente;
+    DECLARE v_aislamiento VARCHAR(32);
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        CALL sp_vm_terminar_reconciliacion(v_aislamiento);
+        RESIGNAL;
+    END;
+    CALL sp_vm_iniciar_reconciliacion(v_aislamiento);
+
+    -- Docentes: un solo recorrido de las respuestas por (docente, materia); el resumen por docente
+    -- se suma desde ahí (cada evaluación es de una sola materia). Las diferencias por materia las
+    -- aplica sp_reconciliar_reportes_docentes
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_doc_dif;
+    CREATE TEMPORARY TABLE tmp_vm_doc_dif (
+        tipo ENUM('docente', 'materia') NOT NULL,
+        id_docente INT NOT NULL,
+        id_materia_impartida INT NOT NULL,          -- 0 en las filas por docente
+        suma_puntos BIGINT NOT NULL,
+        total_calificadas INT NOT NULL,
+        total_respuestas INT NOT NULL,
+        total_evaluaciones INT NOT NULL,
+        PRIMARY KEY (tipo, id_docente, id_materia_impartida)
+    );
+
+    INSERT INTO tmp_vm_doc_dif
+    WITH por_materia AS (
+        SELECT e.id_docente, e.id_materia_impartida,
+               COALESCE(SUM(r.escala),0) AS suma_puntos,
+               COUNT(r.escala) AS total_calificadas,
+               COUNT(r.id_pregunta) AS total_respuestas,
+               COUNT(DISTINCT e.id_evaluacion) AS total_evaluaciones
+        FROM evaluacion e
+        JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+        GROUP BY e.id_docente, e.id_materia_impartida
+    ), por_docente AS (
+        SELECT id_docente,
+               SUM(suma_puntos) AS suma_puntos,
+               SUM(total_calificadas) AS total_calificadas,
+               SUM(total_respuestas) AS total_respuestas,
+               SUM(total_evaluaciones) AS total_evaluaciones
+        FROM por_materia
+        GROUP BY id_docente
+    )
+    SELECT 'materia', t.id_docente, t.id_materia_impartida,
+           t.suma_puntos - COALESCE(rm.suma_puntos, 0),
+           t.total_calificadas - COALESCE(rm.total_calificadas, 0),
+           t.total_respuestas - COALESCE(rm.total_respuestas, 0),
+           0
+    FROM por_materia t
+    LEFT JOIN reporte_docente_materias_vm rm
+        ON rm.id_docente = t.id_docente AND rm.id_materia_impartida = t.id_materia_impartida
+    UNION ALL
+    SELECT 'materia', rm.id_docente, rm.id_materia_impartida,
+           -rm.suma_puntos, -rm.total_calificadas, -rm.total_respuestas, 0
+    FROM reporte_docente_materias_vm rm
+    LEFT JOIN por_materia t
+        ON t.id_docente = rm.id_docente AND t.id_materia_impartida = rm.id_materia_impartida
+    WHERE t.id_docente IS NULL
+    UNION ALL
+    SELECT 'docente', t.id_docente, 0,
+           t.suma_puntos - COALESCE(rd.suma_puntos, 0),
+           t.total_calificadas - COALESCE(rd.total_calificadas, 0),
+           t.total_respuestas - COALESCE(rd.total_respuestas, 0),
+           t.total_evaluaciones - COALESCE(rd.total_evaluaciones, 0)
+    FROM por_docente t
+    LEFT JOIN resumen_docentes_vm rd ON rd.id_docente = t.id_docente
+    UNION ALL
+    SELECT 'docente', rd.id_docente, 0,
+           -rd.suma_puntos, -rd.total_calificadas, -rd.total_respuestas, -rd.total_evaluaciones
+    FROM resumen_docentes_vm rd
+    LEFT JOIN por_docente t ON t.id_docente = rd.id_docente
+    WHERE t.id_docente IS NULL;
+
+    DELETE FROM tmp_vm_doc_dif
+    WHERE suma_puntos = 0 AND total_calificadas = 0 AND total_respuestas = 0 AND total_evaluaciones = 0;
 
-    INSERT INTO resumen_docentes_vm (id_docente, total_respuestas, promedio)
-    SELECT id_docente, total_respuestas, COALESCE(promedio,0.00) FROM tmp_vm_doc
+    INSERT INTO resumen_docentes_vm (id_docente, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    SELECT id_docente, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones,
+           IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2))
+    FROM tmp_vm_doc_dif
+    WHERE tipo = 'docente'
     ON DUPLICATE KEY UPDATE
-        total_respuestas = VALUES(total_respuestas),
-        promedio = VALUES(promedio);
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + VALUES(total_respuestas),
+        total_evaluaciones = total_evaluaciones + VALUES(total_evaluaciones),
+        promedio = IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2));
 
     DELETE rd FROM resumen_docentes_vm rd
-    LEFT JOIN tmp_vm_doc t ON rd.id_docente = t.id_docente
-    WHERE t.id_docente IS NULL;
-
-    DROP TEMPORARY TABLE IF EXISTS tmp_vm_doc;
+    JOIN tmp_vm_doc_dif t ON t.tipo = 'docente' AND t.id_docente = rd.id_docente
+    WHERE rd.total_respuestas = 0;
 
     -- Servicios: resumen completo por campus
-    DROP TEMPORARY TABLE IF EXISTS tmp_vm_serv;
-    CREATE TEMPORARY TABLE tmp_vm_serv AS
-    SELECT es.id_campus,
-           COUNT(rs.id_respuesta) AS total_respuestas,
-           ROUND(AVG(CAST(rs.escala AS UNSIGNED)),2) AS promedio
-    FROM evaluacion_servicios es
-    JOIN respuestas_servicios rs ON es.id_evaluacion_servicios = rs.id_evaluacion_servicios
-    GROUP BY es.id_campus;
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_serv_dif;
+    CREATE TEMPORARY TABLE tmp_vm_serv_dif (
+        id_campus INT PRIMARY KEY,
+        suma_puntos BIGINT NOT NULL,
+        total_calificadas INT NOT NULL,
+        total_respuestas INT NOT NULL,
+        total_evaluaciones INT NOT NULL
+    );
+
+    INSERT INTO tmp_vm_serv_dif
+    WITH por_campus AS (
+        SELECT es.id_campus,
+               COALESCE(SUM(rs.escala),0) AS suma_puntos,
+               COUNT(rs.escala) AS total_calificadas,
+               COUNT(rs.id_pregunta) AS total_respuestas,
+               COUNT(DISTINCT es.id_evaluacion_servicios) AS total_evaluaciones
+        FROM evaluacion_servicios es
+        JOIN respuestas_servicios rs ON es.id_evaluacion_servicios = rs.id_evaluacion_servicios
+        GROUP BY es.id_campus
+    )
+    SELECT t.id_campus,
+           t.suma_puntos - COALESCE(r.suma_puntos, 0),
+           t.total_calificadas - COALESCE(r.total_calificadas, 0),
+           t.total_respuestas - COALESCE(r.total_respuestas, 0),
+           t.total_evaluaciones - COALESCE(r.total_evaluaciones, 0)
+    FROM por_campus t
+    LEFT JOIN resumen_servicios_vm r ON r.id_campus = t.id_campus
+    UNION ALL
+    SELECT r.id_campus, -r.suma_puntos, -r.total_calificadas, -r.total_respuestas, -r.total_evaluaciones
+    FROM resumen_servicios_vm r
+    LEFT JOIN por_campus t ON t.id_campus = r.id_campus
+    WHERE t.id_campus IS NULL;
+
+    DELETE FROM tmp_vm_serv_dif
+    WHERE suma_puntos = 0 AND total_calificadas = 0 AND total_respuestas = 0 AND total_evaluaciones = 0;
 
-    INSERT INTO resumen_servicios_vm (id_campus, total_respuestas, promedio)
-    SELECT id_campus, total_respuestas, COALESCE(promedio,0.00) FROM tmp_vm_serv
+    INSERT INTO resumen_servicios_vm (id_campus, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    SELECT id_campus, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones,
+           IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2))
+    FROM tmp_vm_serv_dif
     ON DUPLICATE KEY UPDATE
-        total_respuestas = VALUES(total_respuestas),
-        promedio = VALUES(promedio);
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + VALUES(total_respuestas),
+        total_evaluaciones = total_evaluaciones + VALUES(total_evaluaciones),
+        promedio = IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2));
 
-    DELETE rs FROM resumen_servicios_vm rs
-    LEFT JOIN tmp_vm_serv t ON rs.id_campus = t.id_campus
-    WHERE t.id_campus IS NULL;
+    DELETE r FROM resumen_servicios_vm r
+    JOIN tmp_vm_serv_dif t ON t.id_campus = r.id_campus
+    WHERE r.total_respuestas = 0;
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_serv_dif;
+
+    -- Reporte precalculado por docente (página /profesor)
+    CALL sp_reconciliar_reportes_docentes();
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_doc_dif;
+
+    CALL sp_vm_terminar_reconciliacion(v_aislamiento);
+END$$
+DELIMITER ;
+
+-- Verificación de consistencia: compara los contadores incrementales contra el mismo recálculo
+-- que hace sp_vm_refrescar_resumen_completo. Devuelve 2 result sets (docentes, servicios)
+-- con las filas que difieren; si ambos vienen vacíos el resumen está reconciliado.
+DELIMITER $$
+CREATE PROCEDURE sp_vm_verificar_resumen()
+BEGIN
+    SELECT t.id_docente,
+           rd.suma_puntos, t.suma_puntos AS suma_esperada,
+           rd.total_respuestas, t.total_respuestas AS total_respuestas_esperado,
+           rd.total_evaluaciones, t.total_evaluaciones AS total_evaluaciones_esperado
+    FROM (
+        SELECT e.id_docente,
+               COALESCE(SUM(r.escala),0) AS suma_puntos,
+               COUNT(r.escala) AS total_calificadas,
+               COUNT(r.id_pregunta) AS total_respuestas,
+               COUNT(DISTINCT e.id_evaluacion) AS total_evaluaciones
+        FROM evaluacion e
+        JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+        GROUP BY e.id_docente
+    ) t
+    LEFT JOIN resumen_docentes_vm rd ON rd.id_docente = t.id_docente
+    WHERE rd.id_docente IS NULL
+       OR rd.suma_puntos <> t.suma_puntos
+       OR rd.total_calificadas <> t.total_calificadas
+       OR rd.total_respuestas <> t.total_respuestas
+       OR rd.total_evaluaciones <> t.total_evaluaciones
+    UNION ALL
+    SELECT rd.id_docente, rd.suma_puntos, 0, rd.total_respuestas, 0, rd.total_evaluaciones, 0
+    FROM resumen_docentes_vm rd
+    WHERE NOT EXISTS (
+        SELECT 1 FROM evaluacion e
+        JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+        WHERE e.id_docente = rd.id_docente
+    );
+
+    SELECT t.id_campus,
+           rs.suma_puntos, t.suma_puntos AS suma_esperada,
+           rs.total_respuestas, t.total_respuestas AS total_respuestas_esperado,
+           rs.total_evaluaciones, t.total_evaluaciones AS total_evaluaciones_esperado
+    FROM (
+        SELECT es.id_campus,
+               COALESCE(SUM(rsv.escala),0) AS suma_puntos,
+               COUNT(rsv.escala) AS total_calificadas,
+               COUNT(rsv.id_pregunta) AS total_respuestas,
+               COUNT(DISTINCT es.id_evaluacion_servicios) AS total_evaluaciones
+        FROM evaluacion_servicios es
+        JOIN respuestas_servicios rsv ON es.id_evaluacion_servicios = rsv.id_evaluacion_servicios
+        GROUP BY es.id_campus
+    ) t
+    LEFT JOIN resumen_servicios_vm rs ON rs.id_campus = t.id_campus
+    WHERE rs.id_campus IS NULL
+       OR rs.suma_puntos <> t.suma_puntos
+       OR rs.total_calificadas <> t.total_calificadas
+       OR rs.total_respuestas <> t.total_respuestas
+       OR rs.total_evaluaciones <> t.total_evaluaciones
+    UNION ALL
+    SELECT rs.id_campus, rs.suma_puntos, 0, rs.total_respuestas, 0, rs.total_evaluaciones, 0
+    FROM resumen_servicios_vm rs
+    WHERE NOT EXISTS (
+        SELECT 1 FROM evaluacion_servicios es
+        JOIN respuestas_servicios rsv ON es.id_evaluacion_servicios = rsv.id_evaluacion_servicios
+        WHERE es.id_campus = rs.id_campus
+    );
+END$$
+DELIMITER ;
+
+-- Procedimiento que registra una sola instantánea en el historial por evaluación enviada.
+-- Lee el promedio ya acumulado en resumen_docentes_vm (lectura por llave primaria), lo acumula en
+-- el agregado diario y reconstruye el reporte precalculado del docente.
+DELIMITER $$
+CREATE PROCEDURE sp_registrar_historial_evaluacion(IN p_id_evaluacion INT)
+BEGIN
+    DECLARE v_id_docente INT;
+
+    -- Solo si la instantánea es nueva (una llamada repetida no cuenta dos veces en el día)
+    IF NOT EXISTS (SELECT 1 FROM historial_evaluacion WHERE id_evaluacion = p_id_evaluacion) THEN
+        INSERT INTO historial_evaluacion (id_docente, id_evaluacion, promedio, total_evaluaciones)
+        SELECT e.id_docente, e.id_evaluacion, rd.promedio, rd.total_evaluaciones
+        FROM evaluacion e
+        JOIN resumen_docentes_vm rd ON rd.id_docente = e.id_docente
+        WHERE e.id_evaluacion = p_id_evaluacion
+        ON DUPLICATE KEY UPDATE id_historial = id_historial;
+
+        INSERT INTO historial_evaluacion_diario (id_docente, fecha, promedio, total_evaluaciones, evaluaciones_dia)
+        SELECT e.id_docente, CURDATE(), rd.promedio, rd.total_evaluaciones, 1
+        FROM evaluacion e
+        JOIN resumen_docentes_vm rd ON rd.id_docente = e.id_docente
+        WHERE e.id_evaluacion = p_id_evaluacion
+        ON DUPLICATE KEY UPDATE
+            promedio = VALUES(promedio),
+            total_evaluaciones = VALUES(total_evaluaciones),
+            evaluaciones_dia = evaluaciones_dia + 1;
+    END IF;
+
+    SELECT id_docente INTO v_id_docente FROM evaluacion WHERE id_evaluacion = p_id_evaluacion;
+    IF v_id_docente IS NOT NULL THEN
+        CALL sp_refrescar_reporte_docente(v_id_docente);
+    END IF;
+END$$
+DELIMITER ;
 
-    DROP TEMPORARY TABLE IF EXISTS tmp_vm_serv;
+-- Reconstruye el documento de reporte_docentes_vm de un docente. Lee sus contadores por materia
+-- (una fila por materia impartida) y los últimos 30 días con evaluaciones del agregado diario,
+-- sin recorrer las respuestas.
+DELIMITER $$
+CREATE PROCEDURE sp_refrescar_reporte_docente(IN p_id_docente INT)
+BEGIN
+    DECLARE v_reporte JSON;
+    DECLARE v_tendencia JSON;
+
+    -- Mismos campos y umbrales que fn_reporte_evaluacion
+    SELECT JSON_ARRAYAGG(obj) INTO v_reporte
+    FROM (
+        SELECT JSON_OBJECT(
+            'id_docente', d.id_docente,
+            'nombre_docente', d.nombre,
+            'apellidop', d.apellidop,
+            'apellidom', d.apellidom,
+            'id_materia_impartida', s.id_materia_impartida,
+            'semestre_numero', s.numero,
+            'materia', s.materia,
+            'curso', s.curso,
+            'fecha_i', DATE_FORMAT(s.fecha_i, '%Y-%m-%d'),
+            'fecha_fin', DATE_FORMAT(s.fecha_fin, '%Y-%m-%d'),
+            'total_puntos', rm.suma_puntos,
+            'total_respuestas', rm.total_respuestas,
+            'promedio', IF(rm.total_calificadas = 0, NULL, ROUND(rm.suma_puntos / rm.total_calificadas, 2)),
+            'evaluacion_final',
+                CASE
+                    WHEN rm.suma_puntos / rm.total_calificadas >= 4.5 THEN 'Excelente profesor'
+                    WHEN rm.suma_puntos / rm.total_calificadas >= 4.0 THEN 'Muy buen profesor'
+                    WHEN rm.suma_puntos / rm.total_calificadas >= 3.0 THEN 'Buen profesor'
+                    WHEN rm.suma_puntos / rm.total_calificadas >= 2.0 THEN 'Profesor regular'
+                    ELSE 'Mal profesor'
+                END
+        ) AS obj
+        FROM reporte_docente_materias_vm rm
+        JOIN docentes d ON d.id_docente = rm.id_docente
+        JOIN materias_impartidas s ON s.id_materia_impartida = rm.id_materia_impartida
+        WHERE rm.id_docente = p_id_docente
+        ORDER BY s.numero, s.fecha_i
+    ) AS sub;
+
+    SELECT JSON_ARRAYAGG(obj) INTO v_tendencia
+    FROM (
+        SELECT JSON_OBJECT(
+            'fecha', DATE_FORMAT(hd.fecha, '%Y-%m-%d'),
+            'promedio', hd.promedio,
+            'total_evaluaciones', hd.total_evaluaciones
+        ) AS obj
+        FROM (
+            SELECT fecha, promedio, total_evaluaciones
+            FROM historial_evaluacion_diario
+            WHERE id_docente = p_id_docente
+            ORDER BY fecha DESC
+            LIMIT 30
+        ) hd
+        ORDER BY hd.fecha
+    ) AS sub;
+
+    INSERT INTO reporte_docentes_vm (id_docente, reporte, tendencia)
+    VALUES (p_id_docente, COALESCE(v_reporte, JSON_ARRAY()), COALESCE(v_tendencia, JSON_ARRAY()))
+    ON DUPLICATE KEY UPDATE
+        reporte = VALUES(reporte),
+        tendencia = VALUES(tendencia);
+END$$
+DELIMITER ;
+
+-- Reconstruye desde cero los contadores por materia y el reporte de todos los docentes. Solo para
+-- la carga inicial en las migraciones: vacía la tabla, así que no debe correr con envíos en curso
+DELIMITER $$
+CREATE PROCEDURE sp_refrescar_reportes_docentes()
+BEGIN
+    DECLARE v_fin TINYINT DEFAULT 0;
+    DECLARE v_id_docente INT;
+    DECLARE cur_docentes CURSOR FOR SELECT id_docente FROM reporte_docente_materias_vm GROUP BY id_docente;
+    DECLARE CONTINUE HANDLER FOR NOT FOUND SET v_fin = 1;
+
+    DELETE FROM reporte_docente_materias_vm;
+    INSERT INTO reporte_docente_materias_vm (id_docente, id_materia_impartida, suma_puntos, total_calificadas, total_respuestas)
+    SELECT e.id_docente, e.id_materia_impartida,
+           COALESCE(SUM(r.escala), 0), COUNT(r.escala), COUNT(r.id_pregunta)
+    FROM evaluacion e
+    JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+    GROUP BY e.id_docente, e.id_materia_impartida;
+
+    DELETE rd FROM reporte_docentes_vm rd
+    LEFT JOIN reporte_docente_materias_vm rm ON rm.id_docente = rd.id_docente
+    WHERE rm.id_docente IS NULL;
+
+    OPEN cur_docentes;
+    docentes: LOOP
+        FETCH cur_docentes INTO v_id_docente;
+        IF v_fin THEN
+            LEAVE docentes;
+        END IF;
+        CALL sp_refrescar_reporte_docente(v_id_docente);
+    END LOOP;
+    CLOSE cur_docentes;
+END$$
+DELIMITER ;
+
+-- Reconciliación horaria de los contadores por materia (la llama sp_vm_refrescar_resumen_completo,
+-- que deja en tmp_vm_doc_dif las diferencias contra el recálculo y tiene el candado de la
+-- reconciliación). Suma la diferencia en lugar de sobrescribir, así que el trigger de respuestas
+-- puede seguir acumulando mientras corre. Solo reconstruye el documento de los docentes con diferencias.
+DELIMITER $$
+CREATE PROCEDURE sp_reconciliar_reportes_docentes()
+BEGIN
+    DECLARE v_fin TINYINT DEFAULT 0;
+    DECLARE v_id_docente INT;
+    DECLARE cur_cambios CURSOR FOR
+        SELECT DISTINCT id_docente FROM tmp_vm_doc_dif WHERE tipo = 'materia';
+    DECLARE CONTINUE HANDLER FOR NOT FOUND SET v_fin = 1;
+
+    INSERT INTO reporte_docente_materias_vm (id_docente, id_materia_impartida, suma_puntos, total_calificadas, total_respuestas)
+    SELECT id_docente, id_materia_impartida, suma_puntos, total_calificadas, total_respuestas
+    FROM tmp_vm_doc_dif
+    WHERE tipo = 'materia'
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + VALUES(total_respuestas);
+
+    DELETE rm FROM reporte_docente_materias_vm rm
+    JOIN tmp_vm_doc_dif t
+        ON t.tipo = 'materia' AND t.id_docente = rm.id_docente AND t.id_materia_impartida = rm.id_materia_impartida
+    WHERE rm.total_respuestas = 0;
+
+    DELETE rd FROM reporte_docentes_vm rd
+    LEFT JOIN reporte_docente_materias_vm rm ON rm.id_docente = rd.id_docente
+    WHERE rm.id_docente IS NULL;
+
+    OPEN cur_cambios;
+    docentes: LOOP
+        FETCH cur_cambios INTO v_id_docente;
+        IF v_fin THEN
+            LEAVE docentes;
+        END IF;
+        IF EXISTS (SELECT 1 FROM reporte_docente_materias_vm WHERE id_docente = v_id_docente) THEN
+            CALL sp_refrescar_reporte_docente(v_id_docente);
+        END IF;
+    END LOOP;
+    CLOSE cur_cambios;
+END$$
+DELIMITER ;
+
+-- Mueve al archivo (en lotes, una transacción por lote) las filas del historial con más de
+-- p_dias días. Las filas viejas son un prefijo por fecha_registro, así que cada lote se localiza
+-- con el índice de fecha sin recorrer la tabla.
+DELIMITER $$
+CREATE PROCEDURE sp_historial_archivar(IN p_dias INT)
+BEGIN
+    DECLARE v_limite DATETIME DEFAULT NOW() - INTERVAL p_dias DAY;
+    DECLARE v_hasta INT;
+
+    evaluaciones: LOOP
+        SELECT MAX(id_historial) INTO v_hasta
+        FROM (
+            SELECT id_historial FROM historial_evaluacion
+            WHERE fecha_registro < v_limite
+            ORDER BY fecha_registro
+            LIMIT 5000
+        ) lote;
+        IF v_hasta IS NULL THEN
+            LEAVE evaluaciones;
+        END IF;
+        START TRANSACTION;
+        INSERT INTO historial_evaluacion_archivo (id_historial, id_docente, id_evaluacion, fecha_registro, promedio, total_evaluaciones)
+        SELECT id_historial, id_docente, id_evaluacion, fecha_registro, promedio, total_evaluaciones
+        FROM historial_evaluacion
+        WHERE id_historial <= v_hasta AND fecha_registro < v_limite;
+        DELETE FROM historial_evaluacion
+        WHERE id_historial <= v_hasta AND fecha_registro < v_limite;
+        COMMIT;
+    END LOOP;
+
+    comentarios: LOOP
+        SELECT MAX(id_historial_comentario) INTO v_hasta
+        FROM (
+            SELECT id_historial_comentario FROM historial_comentarios
+            WHERE fecha_registro < v_limite
+            ORDER BY fecha_registro
+            LIMIT 5000
+        ) lote;
+        IF v_hasta IS NULL THEN
+            LEAVE comentarios;
+        END IF;
+        START TRANSACTION;
+        INSERT INTO historial_comentarios_archivo (id_historial_comentario, id_docente, id_alumno, comentario, fecha_registro, materia, id_materia_impartida, id_campus)
+        SELECT id_historial_comentario, id_docente, id_alumno, comentario, fecha_registro, materia, id_materia_impartida, id_campus
+        FROM historial_comentarios
+        WHERE id_historial_comentario <= v_hasta AND fecha_registro < v_limite;
+        DELETE FROM historial_comentarios
+        WHERE id_historial_comentario <= v_hasta AND fecha_registro < v_limite;
+        COMMIT;
+    END LOOP;
+END$$
+DELIMITER ;
+
+-- Crea en una tabla de archivo la partición del semestre que empieza en p_inicio (1 de enero o
+-- 1 de julio) si aún no existe, separándola de p_futuro.
+DELIMITER $$
+CREATE PROCEDURE sp_historial_crear_particion(IN p_tabla VARCHAR(64), IN p_inicio DATE)
+BEGIN
+    DECLARE v_nombre VARCHAR(64) DEFAULT CONCAT('p', YEAR(p_inicio), '_', IF(MONTH(p_inicio) <= 6, 1, 2));
+
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = p_tabla AND PARTITION_NAME = v_nombre
+    ) THEN
+        SET @sql_particion = CONCAT(
+            'ALTER TABLE ', p_tabla, ' REORGANIZE PARTITION p_futuro INTO (',
+            'PARTITION ', v_nombre, ' VALUES LESS THAN (''', p_inicio + INTERVAL 6 MONTH, '''), ',
+            'PARTITION p_futuro VALUES LESS THAN (MAXVALUE))');
+        PREPARE stmt FROM @sql_particion;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END$$
+DELIMITER ;
+
+-- Descarta de una tabla de archivo las particiones de semestres anteriores a p_antes_de
+-- (compactación de semestres pasados); p_anterior termina el 1 de enero de 2024.
+DELIMITER $$
+CREATE PROCEDURE sp_historial_descartar_particiones(IN p_tabla VARCHAR(64), IN p_antes_de DATE)
+BEGIN
+    DECLARE v_fin TINYINT DEFAULT 0;
+    DECLARE v_nombre VARCHAR(64);
+    -- pAAAA_S ordena igual que el semestre; la partición vence antes del semestre de p_antes_de
+    DECLARE cur_particiones CURSOR FOR
+        SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = p_tabla
+          AND (PARTITION_NAME = 'p_anterior' AND p_antes_de >= '2024-01-01'
+               OR PARTITION_NAME REGEXP '^p[0-9]{4}_[12]$'
+                  AND PARTITION_NAME < CONCAT('p', YEAR(p_antes_de), '_', IF(MONTH(p_antes_de) <= 6, 1, 2)));
+    DECLARE CONTINUE HANDLER FOR NOT FOUND SET v_fin = 1;
+
+    OPEN cur_particiones;
+    particiones: LOOP
+        FETCH cur_particiones INTO v_nombre;
+        IF v_fin THEN
+            LEAVE particiones;
+        END IF;
+        SET @sql_particion = CONCAT('ALTER TABLE ', p_tabla, ' DROP PARTITION ', v_nombre);
+        PREPARE stmt FROM @sql_particion;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END LOOP;
+    CLOSE cur_particiones;
+END$$
+DELIMITER ;
+
+-- Mantenimiento del historial: archiva lo que tenga más de p_dias_retencion días, prepara las
+-- particiones del semestre actual y el siguiente y, si p_semestres_archivo > 0, conserva en el
+-- archivo solo ese número de semestres anteriores al actual.
+DELIMITER $$
+CREATE PROCEDURE sp_historial_mantenimiento(IN p_dias_retencion INT, IN p_semestres_archivo INT)
+BEGIN
+    DECLARE v_semestre DATE DEFAULT MAKEDATE(YEAR(CURDATE()), 1) + INTERVAL IF(MONTH(CURDATE()) <= 6, 0, 6) MONTH;
+
+    CALL sp_historial_crear_particion('historial_evaluacion_archivo', v_semestre);
+    CALL sp_historial_crear_particion('historial_evaluacion_archivo', v_semestre + INTERVAL 6 MONTH);
+    CALL sp_historial_crear_particion('historial_comentarios_archivo', v_semestre);
+    CALL sp_historial_crear_particion('historial_comentarios_archivo', v_semestre + INTERVAL 6 MONTH);
+
+    CALL sp_historial_archivar(p_dias_retencion);
+
+    IF p_semestres_archivo > 0 THEN
+        CALL sp_historial_descartar_particiones('historial_evaluacion_archivo', v_semestre - INTERVAL 6 * p_semestres_archivo MONTH);
+        CALL sp_historial_descartar_particiones('historial_comentarios_archivo', v_semestre - INTERVAL 6 * p_semestres_archivo MONTH);
+    END IF;
+END$$
+DELIMITER ;
+
+-- Recalcula desde cero el progreso de un alumno
+DELIMITER $$
+CREATE PROCEDURE sp_refrescar_progreso_alumno(IN p_id_alumno INT)
+BEGIN
+    INSERT INTO progreso_alumnos (id_alumno, total_requerido, completadas, evaluaciones_realizadas, servicios_completado)
+    SELECT a.id_alumno,
+           (SELECT COUNT(*) FROM materias_impartidas m
+            WHERE m.id_campus = a.id_campus AND m.numero = a.numero_semestre),
+           (SELECT COUNT(DISTINCT e.id_materia_impartida) FROM evaluacion e
+            JOIN materias_impartidas m ON e.id_materia_impartida = m.id_materia_impartida
+            WHERE e.id_alumno = a.id_alumno AND m.id_campus = a.id_campus AND m.numero = a.numero_semestre),
+           (SELECT COUNT(*) FROM evaluacion e WHERE e.id_alumno = a.id_alumno),
+           EXISTS (SELECT 1 FROM evaluacion_servicios es WHERE es.id_alumno = a.id_alumno)
+    FROM alumnos a
+    WHERE a.id_alumno = p_id_alumno
+    ON DUPLICATE KEY UPDATE
+        total_requerido = VALUES(total_requerido),
+        completadas = VALUES(completadas),
+        evaluaciones_realizadas = VALUES(evaluaciones_realizadas),
+        servicios_completado = VALUES(servicios_completado);
+END$$
+DELIMITER ;
+
+-- Reconstruye progreso_alumnos completo con agregados por grupo (carga inicial / reconciliación)
+DELIMITER $$
+CREATE PROCEDURE sp_refrescar_progreso_alumnos()
+BEGIN
+    INSERT INTO progreso_alumnos (id_alumno, total_requerido, completadas, evaluaciones_realizadas, servicios_completado)
+    SELECT a.id_alumno,
+           COALESCE(req.total, 0),
+           COALESCE(comp.completadas, 0),
+           COALESCE(ev.total, 0),
+           es.id_alumno IS NOT NULL
+    FROM alumnos a
+    LEFT JOIN (
+        SELECT id_campus, numero, COUNT(*) AS total
+        FROM materias_impartidas
+        GROUP BY id_campus, numero
+    ) req ON req.id_campus = a.id_campus AND req.numero = a.numero_semestre
+    LEFT JOIN (
+        SELECT e.id_alumno, COUNT(DISTINCT e.id_materia_impartida) AS completadas
+        FROM evaluacion e
+        JOIN alumnos a2 ON a2.id_alumno = e.id_alumno
+        JOIN materias_impartidas m ON e.id_materia_impartida = m.id_materia_impartida
+        WHERE m.id_campus = a2.id_campus AND m.numero = a2.numero_semestre
+        GROUP BY e.id_alumno
+    ) comp ON comp.id_alumno = a.id_alumno
+    LEFT JOIN (
+        SELECT id_alumno, COUNT(*) AS total FROM evaluacion GROUP BY id_alumno
+    ) ev ON ev.id_alumno = a.id_alumno
+    LEFT JOIN (
+        SELECT DISTINCT id_alumno FROM evaluacion_servicios
+    ) es ON es.id_alumno = a.id_alumno
+    ON DUPLICATE KEY UPDATE
+        total_requerido = VALUES(total_requerido),
+        completadas = VALUES(completadas),
+        evaluaciones_realizadas = VALUES(evaluaciones_realizadas),
+        servicios_completado = VALUES(servicios_completado);
 END$$
 DELIMITER ;
 
@@ -668,36 +1539,66 @@ ON COMPLETION PRESERVE
 DO
   CALL sp_vm_refrescar_resumen_completo();
 
+-- Evento diario: mantenimiento del historial (retención de 180 días en las tablas calientes;
+-- el archivo conserva todos los semestres)
+CREATE EVENT IF NOT EXISTS ev_historial_mantenimiento_diario
+ON SCHEDULE EVERY 1 DAY
+STARTS CURRENT_DATE + INTERVAL 1 DAY + INTERVAL 3 HOUR
+ON COMPLETION PRESERVE
+DO
+  CALL sp_historial_mantenimiento(180, 0);
+
 DELIMITER $$
--- Trigger que registra el nuevo promedio cuando se inserta una respuesta
+-- Trigger que acumula la respuesta en el resumen del docente en tiempo constante
+-- (sin recorrer el resto de las respuestas). El historial se registra una vez por
+-- evaluación con sp_registrar_historial_evaluacion.
 CREATE TRIGGER trg_actualizar_historial_evaluacion 
 AFTER INSERT ON respuestas
 FOR EACH ROW
 BEGIN
     DECLARE v_id_docente INT;
-    DECLARE v_promedio DECIMAL(4,2);
-    DECLARE v_total_evaluaciones INT;
+    DECLARE v_id_materia INT;
+    DECLARE v_puntos INT;
+    DECLARE v_nueva_evaluacion TINYINT DEFAULT 0;
 
-    -- Obtener el id_docente de la evaluación
-    SELECT e.id_docente INTO v_id_docente
+    -- Obtener el docente y la materia de la evaluación
+    SELECT e.id_docente, e.id_materia_impartida INTO v_id_docente, v_id_materia
     FROM evaluacion e
     WHERE e.id_evaluacion = NEW.id_evaluacion;
 
-    -- Calcular el nuevo promedio del docente
-    SELECT 
-        ROUND(AVG(CAST(r.escala AS UNSIGNED)),2),
-        COUNT(DISTINCT e.id_evaluacion)
-    INTO v_promedio, v_total_evaluaciones
-    FROM respuestas r
-    JOIN evaluacion e ON r.id_evaluacion = e.id_evaluacion
-    WHERE e.id_docente = v_id_docente;
-
-    -- Insertar el registro en el historial
-    INSERT INTO historial_evaluacion (id_docente, promedio, total_evaluaciones)
-    VALUES (v_id_docente, v_promedio, v_total_evaluaciones);
-
-    -- Actualizar resumen del docente (llama al procedimiento granular)
-    CALL sp_vm_refrescar_docente_individual(v_id_docente);
+    SET v_puntos = COALESCE(NEW.escala, 0);
+
+    -- Primera respuesta de la evaluación -> cuenta como una evaluación más del docente
+    SET v_nueva_evaluacion = NOT EXISTS (
+        SELECT 1 FROM respuestas r
+        WHERE r.id_evaluacion = NEW.id_evaluacion AND r.id_pregunta <> NEW.id_pregunta
+    );
+
+    -- Actualizar contadores del docente (las asignaciones se evalúan en orden, promedio usa los nuevos valores)
+    INSERT INTO resumen_docentes_vm (id_docente, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    VALUES (v_id_docente, v_puntos, NEW.escala IS NOT NULL, 1, v_nueva_evaluacion, v_puntos)
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + 1,
+        total_evaluaciones = total_evaluaciones + VALUES(total_evaluaciones),
+        promedio = IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2));
+
+    -- Contadores por materia del reporte precalculado del docente
+    INSERT INTO reporte_docente_materias_vm (id_docente, id_materia_impartida, suma_puntos, total_calificadas, total_respuestas)
+    VALUES (v_id_docente, v_id_materia, v_puntos, NEW.escala IS NOT NULL, 1)
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + 1;
+
+    -- Contadores de la pregunta (una de sus 16 filas)
+    INSERT INTO resumen_preguntas_vm (id_pregunta, particion, suma_puntos, total_calificadas, total_respuestas)
+    VALUES (NEW.id_pregunta, NEW.id_evaluacion % 16, v_puntos, NEW.escala IS NOT NULL, 1)
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + 1;
 END$$
 
 -- Trigger que registra el comentario en el historial cuando se inserta un nuevo comentario
@@ -708,16 +1609,22 @@ BEGIN
     DECLARE v_id_docente INT;
     DECLARE v_id_alumno INT;
     DECLARE v_materia VARCHAR(256);
+    DECLARE v_id_materia INT;
+    DECLARE v_id_campus INT;
     
     -- Obtener datos de la evaluación relacionada
     SELECT 
         e.id_docente,
         e.id_alumno,
-        m.materia
+        m.materia,
+        m.id_materia_impartida,
+        m.id_campus
     INTO 
         v_id_docente,
         v_id_alumno,
-        v_materia
+        v_materia,
+        v_id_materia,
+        v_id_campus
     FROM evaluacion e
     JOIN materias_impartidas m ON e.id_materia_impartida = m.id_materia_impartida
     WHERE e.id_evaluacion = NEW.id_evaluacion;
@@ -727,32 +1634,213 @@ BEGIN
         id_docente,
         id_alumno, 
         comentario,
-        materia
+        materia,
+        id_materia_impartida,
+        id_campus
     ) VALUES (
         v_id_docente,
         v_id_alumno,
         NEW.comentario,
-        v_materia
+        v_materia,
+        v_id_materia,
+        v_id_campus
     );
 END$$
 
--- Trigger que actualiza resumen de servicios por campus cuando se inserta una respuesta de servicio
+-- Trigger que acumula la respuesta de servicios en el resumen del campus en tiempo constante
 CREATE TRIGGER trg_refrescar_resumen_servicios
 AFTER INSERT ON respuestas_servicios
 FOR EACH ROW
 BEGIN
     DECLARE v_id_campus INT;
+    DECLARE v_puntos INT;
+    DECLARE v_nueva_evaluacion TINYINT DEFAULT 0;
 
     -- Obtener el id_campus de la evaluación de servicios
     SELECT es.id_campus INTO v_id_campus
     FROM evaluacion_servicios es
     WHERE es.id_evaluacion_servicios = NEW.id_evaluacion_servicios;
 
-    -- Actualizar resumen por campus (llama al procedimiento granular)
-    CALL sp_vm_refrescar_campus_servicio_individual(v_id_campus);
+    SET v_puntos = COALESCE(NEW.escala, 0);
+
+    SET v_nueva_evaluacion = NOT EXISTS (
+        SELECT 1 FROM respuestas_servicios rs
+        WHERE rs.id_evaluacion_servicios = NEW.id_evaluacion_servicios AND rs.id_pregunta <> NEW.id_pregunta
+    );
+
+    -- Actualizar contadores del campus
+    INSERT INTO resumen_servicios_vm (id_campus, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    VALUES (v_id_campus, v_puntos, NEW.escala IS NOT NULL, 1, v_nueva_evaluacion, v_puntos)
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + 1,
+        total_evaluaciones = total_evaluaciones + VALUES(total_evaluaciones),
+        promedio = IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2));
+
+    -- Contadores de la pregunta (una de sus 16 filas)
+    INSERT INTO resumen_preguntas_vm (id_pregunta, particion, suma_puntos, total_calificadas, total_respuestas)
+    VALUES (NEW.id_pregunta, NEW.id_evaluacion_servicios % 16, v_puntos, NEW.escala IS NOT NULL, 1)
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + 1;
+END$$
+
+-- Triggers que mantienen progreso_alumnos
+CREATE TRIGGER trg_progreso_alta_alumno
+AFTER INSERT ON alumnos
+FOR EACH ROW
+BEGIN
+    INSERT INTO progreso_alumnos (id_alumno, total_requerido)
+    VALUES (
+        NEW.id_alumno,
+        (SELECT COUNT(*) FROM materias_impartidas m
+         WHERE m.id_campus = NEW.id_campus AND m.numero = NEW.numero_semestre)
+    );
+END$$
+
+CREATE TRIGGER trg_progreso_cambio_alumno
+AFTER UPDATE ON alumnos
+FOR EACH ROW
+BEGIN
+    -- Sólo si cambió el campus o el semestre del alumno
+    IF NOT (NEW.id_campus <=> OLD.id_campus) OR NOT (NEW.numero_semestre <=> OLD.numero_semestre) THEN
+        CALL sp_refrescar_progreso_alumno(NEW.id_alumno);
+    END IF;
+END$$
+
+CREATE TRIGGER trg_progreso_alta_materia
+AFTER INSERT ON materias_impartidas
+FOR EACH ROW
+BEGIN
+    UPDATE progreso_alumnos p
+    JOIN alumnos a ON a.id_alumno = p.id_alumno
+    SET p.total_requerido = p.total_requerido + 1
+    WHERE a.id_campus = NEW.id_campus AND a.numero_semestre = NEW.numero;
+END$$
+
+CREATE TRIGGER trg_progreso_cambio_materia
+AFTER UPDATE ON materias_impartidas
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.id_campus <=> OLD.id_campus) OR NOT (NEW.numero <=> OLD.numero) THEN
+        UPDATE progreso_alumnos p
+        JOIN alumnos a ON a.id_alumno = p.id_alumno
+        SET p.total_requerido = (
+                SELECT COUNT(*) FROM materias_impartidas m
+                WHERE m.id_campus = a.id_campus AND m.numero = a.numero_semestre),
+            p.completadas = (
+                SELECT COUNT(DISTINCT e.id_materia_impartida) FROM evaluacion e
+                JOIN materias_impartidas m ON e.id_materia_impartida = m.id_materia_impartida
+                WHERE e.id_alumno = a.id_alumno AND m.id_campus = a.id_campus AND m.numero = a.numero_semestre)
+        WHERE (a.id_campus = OLD.id_campus AND a.numero_semestre = OLD.numero)
+           OR (a.id_campus = NEW.id_campus AND a.numero_semestre = NEW.numero);
+    END IF;
+END$$
+
+CREATE TRIGGER trg_progreso_baja_materia
+AFTER DELETE ON materias_impartidas
+FOR EACH ROW
+BEGIN
+    UPDATE progreso_alumnos p
+    JOIN alumnos a ON a.id_alumno = p.id_alumno
+    SET p.total_requerido = p.total_requerido - 1
+    WHERE a.id_campus = OLD.id_campus AND a.numero_semestre = OLD.numero;
+END$$
+
+CREATE TRIGGER trg_progreso_evaluacion
+AFTER INSERT ON evaluacion
+FOR EACH ROW
+BEGIN
+    DECLARE v_cuenta TINYINT DEFAULT 0;
+
+    -- La materia cuenta si es del campus/semestre del alumno y es la primera evaluación de esa materia
+    SELECT COALESCE(m.id_campus = a.id_campus AND m.numero = a.numero_semestre, 0) INTO v_cuenta
+    FROM alumnos a
+    JOIN materias_impartidas m ON m.id_materia_impartida = NEW.id_materia_impartida
+    WHERE a.id_alumno = NEW.id_alumno;
+
+    IF v_cuenta = 1 AND EXISTS (
+        SELECT 1 FROM evaluacion e
+        WHERE e.id_alumno = NEW.id_alumno
+          AND e.id_materia_impartida = NEW.id_materia_impartida
+          AND e.id_evaluacion <> NEW.id_evaluacion
+    ) THEN
+        SET v_cuenta = 0;
+    END IF;
+
+    UPDATE progreso_alumnos
+    SET completadas = completadas + v_cuenta,
+        evaluaciones_realizadas = evaluaciones_realizadas + 1
+    WHERE id_alumno = NEW.id_alumno;
+END$$
+
+CREATE TRIGGER trg_progreso_servicios
+AFTER INSERT ON evaluacion_servicios
+FOR EACH ROW
+BEGIN
+    UPDATE progreso_alumnos SET servicios_completado = 1 WHERE id_alumno = NEW.id_alumno;
+END$$
+
+-- Versión del catálogo de materias: la app guarda en memoria las materias de cada (campus, semestre)
+-- y las vuelve a leer cuando cambia este número (altas, cambios y bajas de materias o de docentes,
+-- vengan de insertar_semestre_con_vinculos, de la importación del padrón o de cualquier otro proceso)
+CREATE TRIGGER trg_catalogo_alta_materia
+AFTER INSERT ON materias_impartidas
+FOR EACH ROW FOLLOWS trg_progreso_alta_materia
+BEGIN
+    UPDATE catalogo_version SET version = version + 1 WHERE id = 1;
+END$$
+
+CREATE TRIGGER trg_catalogo_cambio_materia
+AFTER UPDATE ON materias_impartidas
+FOR EACH ROW FOLLOWS trg_progreso_cambio_materia
+BEGIN
+    UPDATE catalogo_version SET version = version + 1 WHERE id = 1;
+END$$
+
+CREATE TRIGGER trg_catalogo_baja_materia
+AFTER DELETE ON materias_impartidas
+FOR EACH ROW FOLLOWS trg_progreso_baja_materia
+BEGIN
+    UPDATE catalogo_version SET version = version + 1 WHERE id = 1;
+END$$
+
+CREATE TRIGGER trg_catalogo_cambio_docente
+AFTER UPDATE ON docentes
+FOR EACH ROW
+BEGIN
+    -- Solo cambia el catálogo si cambia el nombre que ven los alumnos
+    IF NOT (NEW.nombre <=> OLD.nombre) OR NOT (NEW.apellidop <=> OLD.apellidop) OR NOT (NEW.apellidom <=> OLD.apellidom) THEN
+        UPDATE catalogo_version SET version = version + 1 WHERE id = 1;
+    END IF;
 END$$
 DELIMITER ;
 
+-- Insertar catálogo de preguntas (versión 1)
+INSERT INTO preguntas (tipo, version, orden, texto) VALUES
+('docente', 1, 1, '¿Qué tan claro y comprensible explica los temas durante la clase?'),
+('docente', 1, 2, '¿En qué medida domina el contenido de la materia que imparte?'),
+('docente', 1, 3, '¿Qué tan bien responde a las dudas o preguntas de los estudiantes?'),
+('docente', 1, 4, '¿Qué tan organizado(a) es al estructurar y presentar los contenidos?'),
+('docente', 1, 5, '¿Qué tanto fomenta la participación activa de los alumnos en clase?'),
+('docente', 1, 6, '¿En qué medida utiliza ejemplos prácticos o aplicaciones reales para explicar los temas?'),
+('docente', 1, 7, '¿Qué tan efectivo(a) es al utilizar recursos didácticos o tecnológicos para apoyar su enseñanza?'),
+('docente', 1, 8, '¿Qué tan justo(a) y claro(a) es al evaluar el desempeño de los estudiantes?'),
+('docente', 1, 9, '¿Qué tanto motiva a los estudiantes a interesarse en la materia?'),
+('docente', 1, 10, '¿Qué tan accesible y disponible está fuera de clase para apoyar a los estudiantes?'),
+('servicios', 1, 1, '¿Cómo califica la limpieza general de las instalaciones?'),
+('servicios', 1, 2, '¿Qué tan adecuadas son las instalaciones para el desarrollo académico?'),
+('servicios', 1, 3, '¿Cómo evalúa el servicio de biblioteca?'),
+('servicios', 1, 4, '¿Qué tan eficiente es el servicio de control escolar?'),
+('servicios', 1, 5, '¿Cómo califica la atención del personal administrativo?'),
+('servicios', 1, 6, '¿Qué tan bueno es el servicio de cafetería?'),
+('servicios', 1, 7, '¿Cómo evalúa la seguridad dentro del campus?'),
+('servicios', 1, 8, '¿Qué tan adecuado es el equipamiento de los laboratorios?'),
+('servicios', 1, 9, '¿Cómo califica el servicio de internet y recursos tecnológicos?'),
+('servicios', 1, 10, '¿Qué tan eficiente es el proceso de inscripción y reinscripción?');
+
 -- Insertar campus
 INSERT INTO campus (nombre, direccion, telefono) VALUES
 ('Coyoacán - Tlalpan', 'Av. Insurgentes Sur 1760, Coyoacán, CDMX', '55-5689-1234'),
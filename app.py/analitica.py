@@ -0,0 +1,399 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Analítica de las evaluaciones docentes con NumPy. Las respuestas se leen por bloques
+con un cursor sin buffer y cada bloque se acumula en histogramas de la escala (0 = sin respuesta,
+1..5) por materia y por (docente, pregunta) con np.bincount, así que la memoria depende del número
+de docentes, materias y preguntas y no del de respuestas. Promedios, desviaciones, percentiles,
+tasas de respuesta y el ranking de campus salen de esos histogramas con operaciones vectorizadas.
+
+El recorrido de las respuestas lo hace un solo worker por vencimiento: el resultado se guarda en
+analitica_resultado y los demás workers lo leen de ahí (una fila). Cada worker lo trae a memoria
+en un hilo de fondo (al calentar o en la primera consulta) y vuelve a mirar la tabla cuando el
+resultado tiene más de ANALITICA_TTL segundos; si está vencido, el primero que reclama el cálculo
+lo rehace y los demás siguen sirviendo el anterior (o nada si todavía no hay uno).
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from mysql.connector import errors
+
+import conexion
+
+# Segundos que se sirve un resultado antes de recalcularlo en segundo plano
+TTL = float(os.environ.get("ANALITICA_TTL", "300"))
+# Filas leídas del servidor por bloque
+TAMANO_BLOQUE = int(os.environ.get("ANALITICA_BLOQUE", "100000"))
+# Segundos de espera antes de reintentar un cálculo que falló o de volver a leer el de otro worker
+REINTENTO = 30
+# Un cálculo reclamado hace más de estos segundos se considera abandonado (worker caído)
+SEGUNDOS_CALCULO_MAX = int(os.environ.get("ANALITICA_CALCULO_MAX", "600"))
+
+# Columna 0 = respuesta sin escala (NULL), 1..5 = escala
+ESCALAS = 6
+VALORES = np.arange(1, ESCALAS)
+PERCENTILES = (25, 50, 75, 90)
+
+SQL_RESPUESTAS = """
+    SELECT e.id_docente, e.id_materia_impartida, r.id_pregunta, COALESCE(r.escala, 0)
+    FROM respuestas r
+    JOIN evaluacion e ON e.id_evaluacion = r.id_evaluacion
+"""
+SQL_EVALUACIONES = "SELECT id_materia_impartida FROM evaluacion"
+
+# Resultado compartido entre workers (edad medida con el reloj del servidor)
+SQL_COMPARTIDO = """
+    SELECT resultado, TIMESTAMPDIFF(SECOND, generado, NOW()) AS edad
+    FROM analitica_resultado WHERE id = 1
+"""
+# Reclama el cálculo si el resultado venció y nadie más lo está calculando
+SQL_RECLAMAR = """
+    UPDATE analitica_resultado SET calculando_desde = NOW()
+    WHERE id = 1
+      AND (generado IS NULL OR generado < NOW() - INTERVAL %s SECOND)
+      AND (calculando_desde IS NULL OR calculando_desde < NOW() - INTERVAL %s SECOND)
+"""
+SQL_GUARDAR = """
+    UPDATE analitica_resultado SET resultado = %s, generado = NOW(), calculando_desde = NULL WHERE id = 1
+"""
+SQL_LIBERAR = "UPDATE analitica_resultado SET calculando_desde = NULL WHERE id = 1"
+
+log = logging.getLogger("evaluacion.analitica")
+
+_resultado = None
+_calculado = float("-inf")
+_calculando = False
+_lock = threading.Lock()
+
+
+def _indice(ids):
+    """Arreglo id -> posición densa (-1 para ids desconocidos)."""
+    ids = np.asarray(ids, dtype=np.int64)
+    mapa = np.full(int(ids.max()) + 1 if ids.size else 1, -1, dtype=np.int64)
+    mapa[ids] = np.arange(ids.size)
+    return mapa
+
+
+def _densos(mapa, ids):
+    """Posiciones densas de `ids` (-1 si no están en el mapa)."""
+    dentro = ids < mapa.size
+    return np.where(dentro, mapa[np.where(dentro, ids, 0)], -1)
+
+
+def _bloques(conn, sql, columnas):
+    """Genera arreglos int64 (filas x columnas) leídos por bloques con un cursor sin buffer."""
+    cur = conn.cursor(buffered=False)
+    try:
+        cur.execute(sql)
+        while True:
+            filas = cur.fetchmany(TAMANO_BLOQUE)
+            if not filas:
+                break
+            yield np.array(filas, dtype=np.int64).reshape(-1, columnas)
+    finally:
+        try:
+            conn.consume_results()
+            cur.close()
+        except errors.Error:
+            pass
+
+
+def estadisticas(hist):
+    """Estadísticas de histogramas (..., ESCALAS): dict de arreglos con la forma de los grupos.
+
+    tasa_respuesta = preguntas con escala / respuestas registradas. Los grupos sin respuestas
+    tienen NaN en promedio, desviación y percentiles.
+    """
+    conteos = hist[..., 1:]
+    n = conteos.sum(-1)
+    total = hist.sum(-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        promedio = (conteos * VALORES).sum(-1) / n
+        varianza = (conteos * VALORES ** 2).sum(-1) / n - promedio ** 2
+        tasa = n / total
+    acumulado = conteos.cumsum(-1)
+    resultado = {
+        'respuestas': total,
+        'calificadas': n,
+        'promedio': promedio,
+        'desviacion': np.sqrt(np.maximum(varianza, 0)),
+        'tasa_respuesta': tasa,
+    }
+    for p in PERCENTILES:
+        # Primer valor de la escala cuyo acumulado alcanza el p% de las respuestas
+        valor = (acumulado >= (p / 100) * n[..., None]).argmax(-1) + 1
+        resultado[f'p{p}'] = np.where(n > 0, valor, np.nan)
+    return resultado
+
+
+def _numero(valor, decimales=2):
+    return None if np.isnan(valor) else round(float(valor), decimales)
+
+
+def _fila(stats, hist, i):
+    """Estadísticas del grupo i como dict serializable a JSON."""
+    fila = {
+        'respuestas': int(stats['respuestas'][i]),
+        'promedio': _numero(stats['promedio'][i]),
+        'desviacion': _numero(stats['desviacion'][i]),
+        'tasa_respuesta': _numero(stats['tasa_respuesta'][i], 3),
+        'histograma': hist[i, 1:].tolist(),
+    }
+    for p in PERCENTILES:
+        fila[f'p{p}'] = _numero(stats[f'p{p}'][i], 0)
+    return fila
+
+
+def _percentil_rango(valores):
+    """Percentil (0-100) de cada valor dentro de los valores no NaN (empates cuentan la mitad)."""
+    validos = np.sort(valores[~np.isnan(valores)])
+    if not validos.size:
+        return np.full(valores.shape, np.nan)
+    debajo = np.searchsorted(validos, valores, side='left')
+    iguales = np.searchsorted(validos, valores, side='right') - debajo
+    return np.where(np.isnan(valores), np.nan, (debajo + iguales / 2) / validos.size * 100)
+
+
+def calcular(conn):
+    """Lee catálogos y respuestas de `conn` y devuelve la analítica completa (serializable a JSON)."""
+    inicio = time.perf_counter()
+    cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute("SELECT id_docente, nombre, apellidop, apellidom FROM docentes ORDER BY id_docente")
+        docentes = cur.fetchall()
+        cur.execute("""
+            SELECT id_materia_impartida, id_docente, id_campus, numero, materia
+            FROM materias_impartidas ORDER BY id_materia_impartida
+        """)
+        materias = cur.fetchall()
+        cur.execute("SELECT id_campus, nombre FROM campus ORDER BY id_campus")
+        campus = cur.fetchall()
+        cur.execute("SELECT id_pregunta, texto FROM preguntas WHERE tipo = 'docente' ORDER BY id_pregunta")
+        preguntas = cur.fetchall()
+        # Alumnos por grupo (campus, semestre): los posibles evaluadores de cada materia
+        cur.execute("""
+            SELECT id_campus, numero_semestre AS numero, COUNT(*) AS alumnos
+            FROM alumnos WHERE id_campus IS NOT NULL AND numero_semestre IS NOT NULL
+            GROUP BY id_campus, numero_semestre
+        """)
+        alumnos_grupo = {(f['id_campus'], f['numero']): f['alumnos'] for f in cur.fetchall()}
+    finally:
+        cur.close()
+
+    mapa_docente = _indice([d['id_docente'] for d in docentes])
+    mapa_materia = _indice([m['id_materia_impartida'] for m in materias])
+    mapa_campus = _indice([c['id_campus'] for c in campus])
+    mapa_pregunta = _indice([p['id_pregunta'] for p in preguntas])
+    D, M, C, P = len(docentes), len(materias), len(campus), len(preguntas)
+
+    hist_materia = np.zeros((M, ESCALAS), dtype=np.int64)
+    hist_docente_pregunta = np.zeros((D, P, ESCALAS), dtype=np.int64)
+    total_respuestas = 0
+    for bloque in _bloques(conn, SQL_RESPUESTAS, 4):
+        d = _densos(mapa_docente, bloque[:, 0])
+        m = _densos(mapa_materia, bloque[:, 1])
+        p = _densos(mapa_pregunta, bloque[:, 2])
+        escala = np.clip(bloque[:, 3], 0, ESCALAS - 1)
+        validas = (d >= 0) & (m >= 0) & (p >= 0)
+        d, m, p, escala = d[validas], m[validas], p[validas], escala[validas]
+        hist_materia += np.bincount(m * ESCALAS + escala, minlength=M * ESCALAS).reshape(M, ESCALAS)
+        hist_docente_pregunta += np.bincount((d * P + p) * ESCALAS + escala,
+                                             minlength=D * P * ESCALAS).reshape(D, P, ESCALAS)
+        total_respuestas += int(validas.sum())
+
+    evaluaciones = np.zeros(M, dtype=np.int64)
+    for bloque in _bloques(conn, SQL_EVALUACIONES, 1):
+        m = _densos(mapa_materia, bloque[:, 0])
+        evaluaciones += np.bincount(m[m >= 0], minlength=M)
+
+    # Agregados por docente, pregunta y campus a partir de los histogramas
+    hist_docente = hist_docente_pregunta.sum(1)
+    hist_pregunta = hist_docente_pregunta.sum(0)
+    campus_materia = _densos(mapa_campus, np.array([m['id_campus'] or -1 for m in materias], dtype=np.int64))
+    hist_campus = np.zeros((C, ESCALAS), dtype=np.int64)
+    con_campus = campus_materia >= 0
+    np.add.at(hist_campus, campus_materia[con_campus], hist_materia[con_campus])
+
+    st_materia = estadisticas(hist_materia)
+    st_docente = estadisticas(hist_docente)
+    st_docente_pregunta = estadisticas(hist_docente_pregunta)
+    st_pregunta = estadisticas(hist_pregunta)
+    st_campus = estadisticas(hist_campus)
+    percentil_docente = _percentil_rango(st_docente['promedio'])
+
+    # Ranking de campus por promedio (los que no tienen respuestas quedan al final, sin lugar)
+    promedios_campus = np.nan_to_num(st_campus['promedio'], nan=-1)
+    orden_campus = np.argsort(-promedios_campus, kind='stable')
+    ranking_campus = []
+    for lugar, i in enumerate(orden_campus, start=1):
+        fila = _fila(st_campus, hist_campus, i)
+        fila.update(id_campus=campus[i]['id_campus'], nombre=campus[i]['nombre'],
+                    lugar=lugar if fila['promedio'] is not None else None)
+        ranking_campus.append(fila)
+
+    preguntas_salida = []
+    for i, pregunta in enumerate(preguntas):
+        fila = _fila(st_pregunta, hist_pregunta, i)
+        fila.update(id_pregunta=pregunta['id_pregunta'], texto=pregunta['texto'])
+        preguntas_salida.append(fila)
+
+    materias_docente = {}
+    for i, materia in enumerate(materias):
+        fila = _fila(st_materia, hist_materia, i)
+        alumnos = alumnos_grupo.get((materia['id_campus'], materia['numero']), 0)
+        fila.update(id_materia_impartida=materia['id_materia_impartida'], materia=materia['materia'],
+                    evaluaciones=int(evaluaciones[i]), alumnos_grupo=alumnos,
+                    tasa_evaluacion=round(int(evaluaciones[i]) / alumnos, 3) if alumnos else None)
+        materias_docente.setdefault(materia['id_docente'], []).append(fila)
+
+    docentes_salida = {}
+    for i, docente in enumerate(docentes):
+        fila = _fila(st_docente, hist_docente, i)
+        fila.update(id_docente=docente['id_docente'],
+                    nombre=" ".join(filter(None, (docente['nombre'], docente['apellidop'], docente['apellidom']))),
+                    percentil=_numero(percentil_docente[i], 1),
+                    materias=materias_docente.get(docente['id_docente'], []),
+                    preguntas=[{'id_pregunta': pregunta['id_pregunta'], 'texto': pregunta['texto'],
+                                'promedio': _numero(st_docente_pregunta['promedio'][i, j]),
+                                'promedio_global': _numero(st_pregunta['promedio'][j])}
+                               for j, pregunta in enumerate(preguntas)
+                               if hist_docente_pregunta[i, j].sum()])
+        docentes_salida[docente['id_docente']] = fila
+
+    return {
+        'generado': datetime.now().isoformat(timespec='seconds'),
+        'segundos': round(time.perf_counter() - inicio, 3),
+        'respuestas': total_respuestas,
+        'campus': ranking_campus,
+        'preguntas': preguntas_salida,
+        'docentes': docentes_salida,
+    }
+
+
+def _desde_json(texto):
+    """Resultado guardado en analitica_resultado (las llaves de 'docentes' vuelven a ser enteros)."""
+    datos = json.loads(texto)
+    datos['docentes'] = {int(k): v for k, v in datos['docentes'].items()}
+    return datos
+
+
+def _ejecutar(sql, params=()):
+    """Ejecuta una sentencia en el primario con su propia conexión; devuelve filas afectadas."""
+    conn = conexion.tomar_conexion()
+    try:
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        conn.commit()
+        filas = cur.rowcount
+        cur.close()
+        return filas
+    finally:
+        conn.close()
+
+
+def _leer_compartido():
+    """(resultado, edad en segundos) guardado por algún worker, o (None, None) si todavía no hay."""
+    conn = conexion.tomar_conexion()
+    try:
+        cur = conn.cursor()
+        cur.execute(SQL_COMPARTIDO)
+        fila = cur.fetchone()
+        cur.close()
+    finally:
+        conn.close()
+    if not fila or fila[0] is None:
+        return None, None
+    return _desde_json(fila[0]), fila[1]
+
+
+def _reclamar():
+    """True si este worker se queda con el cálculo (venció y nadie lo está haciendo)."""
+    return _ejecutar(SQL_RECLAMAR, (TTL, SEGUNDOS_CALCULO_MAX)) == 1
+
+
+def _calcular_y_guardar():
+    """Recorre las respuestas (de la réplica si está disponible) y guarda el resultado para los demás workers."""
+    try:
+        conn = conexion.tomar_conexion_lectura()
+        try:
+            datos = calcular(conn)
+        finally:
+            conn.close()
+        _ejecutar(SQL_GUARDAR, (json.dumps(datos, ensure_ascii=False),))
+    except Exception:
+        # Liberar el reclamo para que otro worker lo intente sin esperar SEGUNDOS_CALCULO_MAX
+        try:
+            _ejecutar(SQL_LIBERAR)
+        except Exception:
+            log.warning("No se pudo liberar el cálculo de la analítica", exc_info=True)
+        raise
+    return datos
+
+
+def _publicar(datos, edad):
+    global _resultado, _calculado
+    with _lock:
+        _resultado, _calculado = datos, time.monotonic() - edad
+
+
+def _recalcular():
+    global _resultado, _calculado, _calculando
+    try:
+        datos, edad = _leer_compartido()
+        if datos is not None and edad < TTL:
+            _publicar(datos, edad)
+        elif _reclamar():
+            datos = _calcular_y_guardar()
+            _publicar(datos, 0)
+            log.info("Analítica recalculada: %s respuestas en %s s", datos['respuestas'], datos['segundos'])
+        else:
+            # Otro worker la está calculando: se sirve la anterior y se vuelve a leer en REINTENTO segundos
+            with _lock:
+                if datos is not None:
+                    _resultado = datos
+                _calculado = time.monotonic() - TTL + REINTENTO
+    except Exception:
+        log.exception("No se pudo recalcular la analítica")
+        # Reintentar después de REINTENTO segundos y no en cada petición
+        with _lock:
+            _calculado = time.monotonic() - TTL + REINTENTO
+    finally:
+        with _lock:
+            _calculando = False
+
+
+def resultado():
+    """Analítica vigente, o None si todavía no hay una. Nunca se calcula en la petición: si no hay
+    resultado o venció el TTL se lanza el cálculo en un hilo de fondo y se devuelve lo que haya."""
+    global _calculando
+    with _lock:
+        actual = _resultado
+        lanzar = not _calculando and time.monotonic() - _calculado >= TTL
+        if lanzar:
+            _calculando = True
+    if lanzar:
+        threading.Thread(target=_recalcular, name="analitica", daemon=True).start()
+    return actual
+
+
+def docente(id_docente):
+    """Analítica de un docente (o None si no hay datos)."""
+    datos = resultado()
+    return datos['docentes'].get(id_docente) if datos else None
+
+
+def resumen_admin():
+    """Analítica para el panel admin: ranking de campus, preguntas y docentes ordenados por promedio."""
+    datos = resultado()
+    if not datos:
+        return None
+    docentes = sorted(
+        ({k: v for k, v in d.items() if k not in ('materias', 'preguntas')} for d in datos['docentes'].values()),
+        key=lambda d: (d['promedio'] is None, -(d['promedio'] or 0))
+    )
+    return {k: datos[k] for k in ('generado', 'segundos', 'respuestas', 'campus', 'preguntas')} | {'docentes': docentes}
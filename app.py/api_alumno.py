@@ -0,0 +1,231 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: API asíncrona (ASGI) de solo lectura para las consultas que hace el alumno mientras
+contesta: materias pendientes de un docente, docentes pendientes y estado de avance. Usa un pool de
+aiomysql sobre el primario (el alumno debe ver de inmediato lo que acaba de enviar), el mismo
+catálogo en memoria por (campus, semestre) que la app Flask (materias.py) y la cookie de sesión de
+Flask para identificar al alumno. Las consultas idénticas que llegan a la vez (mismo alumno o
+mismo grupo) se resuelven con una sola ida a la BD.
+
+Se monta junto a la app Flask en asgi.py: `uvicorn asgi:app`.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+from datetime import date
+
+import aiomysql
+from itsdangerous import BadSignature
+from werkzeug.http import http_date
+
+import cola_envios
+import materias as catalogo_materias
+from conexion import DB_CONFIG
+
+PREFIJO = "/api"
+POOL_MIN = int(os.environ.get("API_POOL_MIN", "1"))
+POOL_MAX = int(os.environ.get("API_POOL_MAX", "20"))
+
+log = logging.getLogger("evaluacion.api")
+
+_RUTA_SEMESTRES = re.compile(r"^/semestres/(\d+)$")
+
+
+class NoAutorizado(Exception):
+    """La petición no trae una sesión de alumno válida."""
+
+
+class Coalescedor:
+    """Comparte una sola tarea entre las peticiones concurrentes con la misma clave."""
+
+    def __init__(self):
+        self._en_curso = {}
+
+    async def ejecutar(self, clave, fabrica):
+        tarea = self._en_curso.get(clave)
+        if tarea is None:
+            tarea = asyncio.ensure_future(fabrica())
+            self._en_curso[clave] = tarea
+            tarea.add_done_callback(lambda _: self._en_curso.pop(clave, None))
+        # shield: si un cliente se desconecta no se cancela la consulta de los demás
+        return await asyncio.shield(tarea)
+
+
+def _json_default(valor):
+    # Fechas con el mismo formato que jsonify de Flask
+    if isinstance(valor, date):
+        return http_date(valor)
+    raise TypeError(f"No serializable: {type(valor).__name__}")
+
+
+class ApiAlumno:
+    """Aplicación ASGI; `app_flask` aporta la clave y el nombre de la cookie de sesión."""
+
+    def __init__(self, app_flask):
+        self._serializador = app_flask.session_interface.get_signing_serializer(app_flask)
+        self._cookie = app_flask.config["SESSION_COOKIE_NAME"]
+        self._max_edad = int(app_flask.permanent_session_lifetime.total_seconds())
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+        self._coalescedor = Coalescedor()
+
+    async def _obtener_pool(self):
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    self._pool = await aiomysql.create_pool(
+                        host=DB_CONFIG["host"], port=DB_CONFIG["port"], user=DB_CONFIG["user"],
+                        password=DB_CONFIG["password"], db=DB_CONFIG["database"],
+                        minsize=POOL_MIN, maxsize=POOL_MAX, autocommit=True,
+                        cursorclass=aiomysql.DictCursor,
+                    )
+        return self._pool
+
+    async def _consultar(self, sql, params):
+        pool = await self._obtener_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(sql, params)
+                return await cur.fetchall()
+
+    async def cerrar(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    # --- Sesión ---
+
+    def _sesion(self, scope):
+        """Datos de la sesión de Flask del alumno (NoAutorizado si no hay una válida)."""
+        cookies = {}
+        for nombre, valor in scope.get("headers", []):
+            if nombre == b"cookie":
+                for parte in valor.decode("latin-1").split(";"):
+                    clave, _, contenido = parte.strip().partition("=")
+                    cookies[clave] = contenido
+        token = cookies.get(self._cookie)
+        if not token or self._serializador is None:
+            raise NoAutorizado()
+        try:
+            sesion = self._serializador.loads(token, max_age=self._max_edad)
+        except BadSignature:
+            raise NoAutorizado()
+        if sesion.get("tipo_usuario") != "alumno" or not sesion.get("id_alumno"):
+            raise NoAutorizado()
+        return sesion
+
+    async def _grupo_alumno(self, sesion):
+        """(id_campus, numero_semestre) de la sesión; las sesiones anteriores se completan con la BD."""
+        if "id_campus" in sesion and "numero_semestre" in sesion:
+            return sesion["id_campus"], sesion["numero_semestre"]
+        filas = await self._consultar("SELECT id_campus, numero_semestre FROM alumnos WHERE id_alumno = %s",
+                                      (sesion["id_alumno"],))
+        return (filas[0]["id_campus"], filas[0]["numero_semestre"]) if filas else (None, None)
+
+    # --- Datos (con coalescencia) ---
+
+    async def _estado(self, id_alumno):
+        filas = await self._coalescedor.ejecutar(
+            ("alumno", id_alumno),
+            lambda: self._consultar(catalogo_materias.SQL_ALUMNO, {"id_alumno": id_alumno}))
+        estado = catalogo_materias.estado_de_filas(filas)
+        if not cola_envios.ACTIVA:
+            return estado
+        # Las encuestas en la cola de envíos diferidos cuentan como contestadas. La cola es SQLite
+        # (bloqueante, con espera de hasta 10 s si hay contención): se consulta en un hilo para no
+        # detener el event loop
+        return await asyncio.to_thread(cola_envios.combinar, estado, id_alumno)
+
+    async def _grupo(self, id_campus, numero, version):
+        actual = catalogo_materias.vigente(id_campus, numero, version)
+        if actual is not None:
+            return actual
+
+        async def cargar():
+            filas = await self._consultar(catalogo_materias.SQL_GRUPO,
+                                          catalogo_materias.parametros_grupo(id_campus, numero))
+            return catalogo_materias.guardar(id_campus, numero, version, filas)
+        return await self._coalescedor.ejecutar(("grupo", int(id_campus), str(numero), version), cargar)
+
+    async def _panel(self, sesion):
+        """(grupo, materias evaluadas, servicios contestada) o None si el alumno no tiene grupo."""
+        id_campus, numero = await self._grupo_alumno(sesion)
+        if not id_campus or not numero:
+            return None
+        version, servicios_completado, evaluadas = await self._estado(sesion["id_alumno"])
+        grupo = await self._grupo(id_campus, numero, version)
+        return grupo, evaluadas, servicios_completado
+
+    # --- Rutas ---
+
+    async def semestres(self, sesion, id_docente):
+        """Como /semestres/<id_docente>: materias del docente que el alumno no ha evaluado."""
+        panel = await self._panel(sesion)
+        return panel[0].pendientes(id_docente, panel[1]) if panel else []
+
+    async def pendientes(self, sesion):
+        """Docentes con al menos una materia sin evaluar."""
+        panel = await self._panel(sesion)
+        return panel[0].docentes_pendientes(panel[1]) if panel else []
+
+    async def estado(self, sesion):
+        """Avance del alumno: materias del grupo, evaluadas y encuesta de servicios."""
+        panel = await self._panel(sesion)
+        if not panel:
+            return {'total': 0, 'completadas': 0, 'servicios_completado': False, 'docentes_completos': True}
+        grupo, evaluadas, servicios_completado = panel
+        completadas = len(evaluadas & grupo.materias.keys())
+        return {'total': len(grupo.materias), 'completadas': completadas,
+                'servicios_completado': servicios_completado,
+                'docentes_completos': completadas >= len(grupo.materias)}
+
+    async def _resolver(self, ruta, sesion):
+        coincidencia = _RUTA_SEMESTRES.match(ruta)
+        if coincidencia:
+            return await self.semestres(sesion, int(coincidencia.group(1)))
+        if ruta == "/pendientes":
+            return await self.pendientes(sesion)
+        if ruta == "/estado":
+            return await self.estado(sesion)
+        return None
+
+    # --- ASGI ---
+
+    async def _lifespan(self, receive, send):
+        while True:
+            mensaje = await receive()
+            if mensaje["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif mensaje["type"] == "lifespan.shutdown":
+                await self.cerrar()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        ruta = scope["path"][len(PREFIJO):] if scope["path"].startswith(PREFIJO) else scope["path"]
+        estado, cuerpo = 200, None
+        if scope["method"] != "GET":
+            estado, cuerpo = 405, {'error': 'Método no permitido'}
+        else:
+            try:
+                cuerpo = await self._resolver(ruta, self._sesion(scope))
+                if cuerpo is None:
+                    estado, cuerpo = 404, {'error': 'Ruta no encontrada'}
+            except NoAutorizado:
+                estado, cuerpo = 403, {'error': 'No autorizado'}
+            except (aiomysql.Error, asyncio.TimeoutError):
+                log.exception("Error de BD en %s", scope["path"])
+                estado, cuerpo = 503, {'error': 'Servicio no disponible'}
+        datos = json.dumps(cuerpo, default=_json_default, ensure_ascii=False).encode("utf-8")
+        await send({"type": "http.response.start", "status": estado, "headers": [
+            (b"content-type", b"application/json; charset=utf-8"),
+            (b"content-length", str(len(datos)).encode()),
+            (b"cache-control", b"no-store"),
+        ]})
+        await send({"type": "http.response.body", "body": datos})
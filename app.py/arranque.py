@@ -0,0 +1,98 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Arranque de los workers: calentamiento opcional (plantillas compiladas, pool de
+conexiones, catálogos en memoria y primer cálculo de la analítica) en un hilo de fondo y
+comprobaciones para /healthz y /readyz.
+Importar la app no hace I/O; la primera conexión se abre al calentar o en la primera petición.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from jinja2 import TemplateError
+from mysql.connector import errors
+
+import analitica
+import conexion
+import materias as catalogo_materias
+import preguntas as catalogo_preguntas
+
+# Calentar cada worker al crear la app (APP_CALENTAR=1)
+CALENTAR = os.environ.get("APP_CALENTAR", "0") == "1"
+
+log = logging.getLogger("evaluacion.arranque")
+
+# None = sin calentamiento solicitado; False = en curso; True = terminado (aunque haya fallado algo)
+_calentado = None
+
+
+def _compilar_plantillas(app):
+    compiladas = 0
+    for nombre in app.jinja_env.list_templates():
+        try:
+            app.jinja_env.get_template(nombre)
+            compiladas += 1
+        except TemplateError:
+            log.exception("No se pudo compilar la plantilla %s", nombre)
+    return compiladas
+
+
+def _cargar_catalogos():
+    """Abre el pool y deja en caché las preguntas activas y los grupos (campus, semestre)."""
+    conn = conexion.tomar_conexion()
+    try:
+        cur = conn.cursor(dictionary=True)
+        for tipo in ('docente', 'servicios'):
+            catalogo_preguntas.activas(cur, tipo)
+        cur.execute("SELECT version FROM catalogo_version WHERE id = 1")
+        fila = cur.fetchone()
+        version = fila['version'] if fila else None
+        cur.execute("""
+            SELECT DISTINCT id_campus, numero FROM materias_impartidas
+            WHERE id_campus IS NOT NULL AND numero IS NOT NULL
+        """)
+        grupos = cur.fetchall()
+        for g in grupos:
+            catalogo_materias.grupo(cur, g['id_campus'], g['numero'], version)
+        cur.close()
+        return len(grupos)
+    finally:
+        conn.close()
+
+
+def calentar(app):
+    """Compila las plantillas y carga los catálogos; los errores se registran y no detienen el worker."""
+    global _calentado
+    inicio = time.perf_counter()
+    plantillas = _compilar_plantillas(app)
+    grupos = None
+    try:
+        grupos = _cargar_catalogos()
+    except errors.Error:
+        log.exception("No se pudieron cargar los catálogos al calentar")
+    # Primer cálculo de la analítica (en su propio hilo; /profesor se muestra sin ella hasta entonces)
+    analitica.resultado()
+    _calentado = True
+    log.info("Worker calentado en %.2f s: %s plantillas, %s grupos", time.perf_counter() - inicio, plantillas, grupos)
+
+
+def iniciar_calentamiento(app):
+    """Calienta en un hilo para no retrasar el arranque; /readyz responde 503 hasta que termine."""
+    global _calentado
+    _calentado = False
+    threading.Thread(target=calentar, args=(app,), name="calentamiento", daemon=True).start()
+
+
+def estado_listo(cur):
+    """(listo, detalle) para /readyz: la BD responde y, si se pidió, el calentamiento terminó."""
+    detalle = {'calentado': _calentado is not False}
+    try:
+        cur.execute("SELECT 1 AS ok")
+        cur.fetchall()
+        detalle['bd'] = True
+    except errors.Error as e:
+        log.warning("readyz: la BD no responde: %s", e)
+        detalle['bd'] = False
+    return detalle['bd'] and detalle['calentado'], detalle
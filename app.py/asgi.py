@@ -0,0 +1,46 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Punto de entrada ASGI: /api/* va a la API asíncrona del alumno (api_alumno.py) y el
+resto a la app Flask. Cada petición de Flask corre en un grupo propio de ASGI_HILOS hilos (por
+defecto DB_POOL_SIZE: más hilos solo esperarían una conexión); WsgiToAsgi de asgiref, tal cual,
+las pasaría todas por un solo hilo. Uso: `uvicorn asgi:app --workers 2`.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+import api_alumno
+import conexion
+from evaluacion import app as app_flask
+
+HILOS = int(os.environ.get("ASGI_HILOS", str(conexion.POOL_SIZE)))
+
+_hilos = ThreadPoolExecutor(max_workers=HILOS, thread_name_prefix="flask")
+# Cuerpo síncrono de WsgiToAsgiInstance.run_wsgi_app (asgiref lo decora con sync_to_async de un solo hilo)
+_ejecutar_wsgi = WsgiToAsgiInstance.__dict__["run_wsgi_app"].func
+
+
+class _InstanciaEnHilos(WsgiToAsgiInstance):
+    async def run_wsgi_app(self, body):
+        return await sync_to_async(_ejecutar_wsgi, thread_sensitive=False, executor=_hilos)(self, body)
+
+
+class _FlaskEnHilos(WsgiToAsgi):
+    async def __call__(self, scope, receive, send):
+        await _InstanciaEnHilos(self.wsgi_application, self.duplicate_header_limit)(scope, receive, send)
+
+
+api = api_alumno.ApiAlumno(app_flask)
+flask_asgi = _FlaskEnHilos(app_flask)
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await api(scope, receive, send)
+    ruta = scope.get("path", "")
+    if ruta == api_alumno.PREFIJO or ruta.startswith(api_alumno.PREFIJO + "/"):
+        return await api(scope, receive, send)
+    return await flask_asgi(scope, receive, send)
@@ -0,0 +1,97 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Búsqueda unificada de identidades (alumno o docente) por matrícula y hashing de
+contraseñas con método (y costo) y longitud de sal configurables. La contraseña inicial de
+alumnos y docentes es su fecha de nacimiento (DDMMYY); herramientas/migrar_passwords.py la
+convierte a hash antes de abrir la encuesta para que el login solo tenga que verificar un hash.
+"""
+
+import os
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Método de hash de werkzeug con sus parámetros de costo (p. ej. "scrypt:32768:8:1" o
+# "pbkdf2:sha256:600000"); sin configurar se usa el método por defecto de werkzeug
+HASH_METODO = os.environ.get("PASSWORD_HASH_METODO") or None
+# Longitud de la sal (caracteres) que genera werkzeug para cada hash
+HASH_SAL = int(os.environ.get("PASSWORD_HASH_SAL", "16"))
+
+# Una sola consulta por los índices únicos de matrícula; si la matrícula existiera en ambas
+# tablas tiene prioridad el alumno (como en el login original)
+SQL_IDENTIDAD = """
+    SELECT 'alumno' AS rol, id_alumno AS id, password, fecha_nacimiento, id_campus, numero_semestre
+    FROM alumnos WHERE matricula = %(matricula)s
+    UNION ALL
+    SELECT 'docente' AS rol, id_docente AS id, password, fecha_nacimiento, id_campus, NULL
+    FROM docentes WHERE matricula = %(matricula)s
+    ORDER BY rol
+"""
+
+TABLAS = {
+    'alumno': ('alumnos', 'id_alumno'),
+    'docente': ('docentes', 'id_docente'),
+}
+
+
+def hashear(password):
+    """Hash de la contraseña con el método y la sal configurados."""
+    if HASH_METODO:
+        return generate_password_hash(password, method=HASH_METODO, salt_length=HASH_SAL)
+    return generate_password_hash(password, salt_length=HASH_SAL)
+
+
+def password_inicial(fecha_nacimiento):
+    """Contraseña inicial (DDMMYY) a partir de la fecha de nacimiento, o "" si no hay fecha."""
+    if not fecha_nacimiento:
+        return ""
+    try:
+        return fecha_nacimiento.strftime("%d%m%y")
+    except (AttributeError, ValueError):
+        return ""
+
+
+def buscar_identidad(cur, matricula):
+    """Rol, id, hash y datos de sesión de la matrícula (alumno o docente), o None si no existe."""
+    cur.execute(SQL_IDENTIDAD, {'matricula': matricula})
+    filas = cur.fetchall()
+    return filas[0] if filas else None
+
+
+def verificar(identidad, password):
+    """Devuelve (válida, hash_nuevo).
+
+    Si la cuenta ya tiene hash solo se verifica ese hash. Si aún no se migró se compara contra la
+    fecha de nacimiento y se devuelve el hash que hay que guardar.
+    """
+    if identidad.get('password'):
+        return check_password_hash(identidad['password'], password), None
+    esperado = password_inicial(identidad.get('fecha_nacimiento'))
+    if esperado and password == esperado:
+        return True, hashear(password)
+    return False, None
+
+
+def guardar_hash(cur, identidad, hash_nuevo):
+    """Guarda el hash de una cuenta sin migrar (no sobreescribe si otra petición ya lo guardó)."""
+    tabla, llave = TABLAS[identidad['rol']]
+    cur.execute(f"UPDATE {tabla} SET password = %s WHERE {llave} = %s AND password IS NULL",
+                (hash_nuevo, identidad['id']))
+
+
+def sembrar_admin(cur, password, reemplazar=False):
+    """(cur con dictionary=True) Crea la cuenta admin con la contraseña hasheada o, si existe sin contraseña (o `reemplazar`),
+    se la asigna. Devuelve 'creado', 'actualizado' o None si no hubo cambios."""
+    cur.execute("SELECT password FROM admin_users WHERE username = %s", ("admin",))
+    fila = cur.fetchone()
+    if fila is None:
+        cur.execute("INSERT INTO admin_users (username, password) VALUES (%s, %s)", ("admin", hashear(password)))
+        return 'creado'
+    if reemplazar or not fila['password']:
+        cur.execute("UPDATE admin_users SET password = %s WHERE username = %s", (hashear(password), "admin"))
+        return 'actualizado'
+    return None
+
+
+def asignar_correo_admin(cur, correo):
+    """Correo de la cuenta admin (destinatario por defecto de /admin/enviar_reportes)."""
+    cur.execute("UPDATE admin_users SET correo = %s WHERE username = %s", (correo, "admin"))
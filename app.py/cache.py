@@ -0,0 +1,70 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Caché en memoria del proceso con expiración (TTL) y límite de entradas (LRU).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheTTL:
+    """Caché clave -> valor segura para hilos. Las entradas expiran a los `ttl` segundos y,
+    si se define `max_entradas`, se descarta la menos usada recientemente al llenarse. Si varios
+    hilos piden a la vez una clave vencida, `obtener_o_calcular` la calcula una sola vez."""
+
+    def __init__(self, ttl=60, max_entradas=None):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self._calculando = {}  # clave -> candado del hilo que la está calculando
+
+    def obtener(self, clave, default=None):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return default
+            expira, valor = entrada
+            if expira < time.monotonic():
+                del self._datos[clave]
+                return default
+            self._datos.move_to_end(clave)
+            return valor
+
+    def guardar(self, clave, valor, ttl=None):
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + (self.ttl if ttl is None else ttl), valor)
+            self._datos.move_to_end(clave)
+            if self.max_entradas is not None:
+                while len(self._datos) > self.max_entradas:
+                    self._datos.popitem(last=False)
+
+    def obtener_o_calcular(self, clave, calcular, ttl=None):
+        """Devuelve el valor en caché o lo calcula con `calcular()` y lo guarda. Los hilos que
+        llegan mientras otro calcula la misma clave esperan y reutilizan su resultado."""
+        valor = self.obtener(clave)
+        if valor is not None:
+            return valor
+        with self._lock:
+            candado = self._calculando.setdefault(clave, threading.Lock())
+        with candado:
+            # Otro hilo pudo haberla calculado mientras se esperaba el candado
+            valor = self.obtener(clave)
+            if valor is None:
+                try:
+                    valor = calcular()
+                    self.guardar(clave, valor, ttl)
+                finally:
+                    with self._lock:
+                        if self._calculando.get(clave) is candado:
+                            del self._calculando[clave]
+        return valor
+
+    def invalidar(self, clave=None):
+        """Elimina una clave, o todo el contenido si no se indica clave."""
+        with self._lock:
+            if clave is None:
+                self._datos.clear()
+            else:
+                self._datos.pop(clave, None)
@@ -0,0 +1,336 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Envío diferido de encuestas para la apertura de la campaña (ENVIOS_MODO=cola).
+/guardar y /guardar_servicios validan el formulario y lo dejan en una cola local durable (SQLite
+en modo WAL con synchronous=FULL); un grupo acotado de hilos por proceso la vacía en MySQL por
+lotes: una transacción por lote y un SAVEPOINT por encuesta, de modo que una encuesta duplicada no
+tumba al resto. Mientras una encuesta está en la cola el alumno ya la ve como contestada
+(ver `combinar`).
+
+También incluye el control de admisión (profundidad máxima de la cola y peticiones simultáneas
+por proceso en las rutas de login y envío) y las métricas de la cola para el panel admin.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from mysql.connector import errors
+
+import conexion
+import envios
+
+# "directo" (cada envío se escribe en MySQL dentro de la petición) o "cola"
+ACTIVA = os.environ.get("ENVIOS_MODO", "directo") == "cola"
+RUTA = os.environ.get("ENVIOS_COLA_RUTA") or os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                          "cola_envios.sqlite3")
+WORKERS = int(os.environ.get("ENVIOS_WORKERS", "2"))
+LOTE = int(os.environ.get("ENVIOS_LOTE", "50"))
+# Encuestas en la cola a partir de las cuales se rechazan envíos nuevos (503 + Retry-After)
+COLA_MAX = int(os.environ.get("ENVIOS_COLA_MAX", "50000"))
+REINTENTOS = int(os.environ.get("ENVIOS_REINTENTOS", "5"))
+# Peticiones simultáneas por proceso en login y envíos (0 = sin límite) y espera por un lugar
+CONCURRENTES_MAX = int(os.environ.get("ADMISION_CONCURRENTES", "0"))
+ADMISION_ESPERA = float(os.environ.get("ADMISION_ESPERA", "2"))
+REINTENTAR_EN = 5
+# Un lote 'procesando' se devuelve a la cola si su toma tiene más de este tiempo (segundos): el
+# proceso o el hilo que lo tomó murió o se quedó colgado
+SEGUNDOS_ABANDONADO = 300
+
+# Espera de bloqueo agotada y deadlock: no son de la encuesta, se reintenta el lote completo (con
+# deadlock MySQL ya deshizo la transacción entera, así que tampoco existe el SAVEPOINT)
+ERRNOS_REINTENTABLES = (1205, 1213)
+# CHECK que no se cumple: igual que IntegrityError y DataError, solo es de esa encuesta
+ERRNOS_DE_FILA = (3819,)
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS envios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tipo TEXT NOT NULL,                        -- 'docente' o 'servicios'
+    id_alumno INTEGER NOT NULL,
+    id_materia INTEGER,                        -- id_materia_impartida (NULL en servicios)
+    datos TEXT NOT NULL,                       -- JSON con el resto de la encuesta
+    estado TEXT NOT NULL DEFAULT 'pendiente',  -- pendiente, procesando o error
+    intentos INTEGER NOT NULL DEFAULT 0,
+    creado REAL NOT NULL,
+    disponible REAL NOT NULL,                  -- no se toma antes de este momento (reintentos)
+    tomado REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_envios_estado ON envios (estado, disponible, id);
+CREATE INDEX IF NOT EXISTS idx_envios_alumno ON envios (id_alumno);
+-- Una sola encuesta en cola por alumno y materia (o por alumno, la de servicios)
+CREATE UNIQUE INDEX IF NOT EXISTS uq_envios_alumno ON envios (tipo, id_alumno, IFNULL(id_materia, 0))
+    WHERE estado <> 'error';
+"""
+
+log = logging.getLogger("evaluacion.cola_envios")
+
+
+class ColaLlena(Exception):
+    """La cola alcanzó ENVIOS_COLA_MAX: el envío se rechaza y el alumno debe reintentar."""
+
+
+_local = threading.local()
+_hay_trabajo = threading.Event()
+_workers_lock = threading.Lock()
+_workers_pid = None
+_admision = threading.BoundedSemaphore(CONCURRENTES_MAX) if CONCURRENTES_MAX > 0 else None
+
+_contadores = {'encoladas': 0, 'aplicadas': 0, 'duplicadas': 0, 'con_error': 0, 'reintentos': 0,
+               'lotes': 0, 'lote_ms_total': 0.0, 'rechazadas_cola_llena': 0, 'rechazadas_concurrencia': 0}
+_contadores_lock = threading.Lock()
+
+
+def _contar(**incrementos):
+    with _contadores_lock:
+        for clave, valor in incrementos.items():
+            _contadores[clave] += valor
+
+
+def _conexion():
+    """Conexión SQLite del hilo (una por hilo y proceso; autocommit con transacciones explícitas)."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid():
+        conn = sqlite3.connect(RUTA, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.executescript(ESQUEMA)
+        _local.conn, _local.pid = conn, os.getpid()
+    return conn
+
+
+def profundidad(conn=None):
+    """Encuestas en la cola sin aplicar (pendientes + procesando)."""
+    conn = conn or _conexion()
+    return conn.execute("SELECT COUNT(*) FROM envios WHERE estado IN ('pendiente', 'procesando')").fetchone()[0]
+
+
+def encolar(tipo, id_alumno, id_materia, datos):
+    """Guarda la encuesta en la cola. Devuelve False si ya hay una igual esperando; ColaLlena si la
+    cola llegó a ENVIOS_COLA_MAX."""
+    conn = _conexion()
+    if profundidad(conn) >= COLA_MAX:
+        _contar(rechazadas_cola_llena=1)
+        raise ColaLlena()
+    ahora = time.time()
+    try:
+        conn.execute("""
+            INSERT INTO envios (tipo, id_alumno, id_materia, datos, creado, disponible)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (tipo, id_alumno, id_materia, json.dumps(datos), ahora, ahora))
+    except sqlite3.IntegrityError:
+        return False
+    _contar(encoladas=1)
+    asegurar_workers()
+    _hay_trabajo.set()
+    return True
+
+
+def en_cola(id_alumno):
+    """(materias con evaluación docente en cola, encuesta de servicios en cola) del alumno."""
+    if not ACTIVA:
+        return set(), False
+    filas = _conexion().execute(
+        "SELECT tipo, id_materia FROM envios WHERE id_alumno = ? AND estado <> 'error'", (id_alumno,)
+    ).fetchall()
+    return {m for tipo, m in filas if tipo == 'docente'}, any(tipo == 'servicios' for tipo, _ in filas)
+
+
+def combinar(estado, id_alumno):
+    """Agrega a un estado_alumno (versión, servicios, evaluadas) lo que el alumno tiene en la cola."""
+    version, servicios_completado, evaluadas = estado
+    materias, servicios = en_cola(id_alumno)
+    return version, servicios_completado or servicios, evaluadas | materias
+
+
+# --- Vaciado de la cola ---
+
+def _tomar_lote(conn):
+    """Toma hasta LOTE encuestas pendientes. Devuelve (tomado, filas); `tomado` identifica la toma
+    y las actualizaciones posteriores del lote solo aplican si la toma sigue vigente."""
+    ahora = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _recuperar_abandonados(conn, ahora)
+        filas = conn.execute("""
+            SELECT id, tipo, id_alumno, id_materia, datos, intentos FROM envios
+            WHERE estado = 'pendiente' AND disponible <= ?
+            ORDER BY id LIMIT ?
+        """, (ahora, LOTE)).fetchall()
+        conn.executemany("UPDATE envios SET estado = 'procesando', tomado = ? WHERE id = ?",
+                         [(ahora, f[0]) for f in filas])
+        conn.execute("COMMIT")
+    except sqlite3.Error:
+        conn.execute("ROLLBACK")
+        raise
+    return ahora, filas
+
+
+def _recuperar_abandonados(conn, ahora):
+    """Devuelve a 'pendiente' los lotes 'procesando' cuya toma venció (proceso muerto o hilo
+    colgado). Se llama en cada toma, dentro de su transacción."""
+    conn.execute("""
+        UPDATE envios SET estado = 'pendiente', tomado = NULL
+        WHERE estado = 'procesando' AND tomado < ?
+    """, (ahora - SEGUNDOS_ABANDONADO,))
+
+
+def _insertar(cur, tipo, id_alumno, id_materia, datos):
+    # Reaplicar es idempotente: uq_evaluacion_alumno_materia y uq_evaluacion_servicios_alumno
+    # rechazan la segunda inserción (envios.es_duplicada)
+    respuestas = [tuple(r) for r in datos['respuestas']]
+    if tipo == 'docente':
+        envios.insertar_evaluacion_docente(cur, datos['id_docente'], id_materia, id_alumno, respuestas,
+                                           datos.get('comentario'), datos.get('id_evaluacion'))
+    else:
+        envios.insertar_evaluacion_servicios(cur, id_alumno, datos['id_campus'], respuestas)
+
+
+def _error_de_fila(e):
+    """True si el error es de los datos de esa encuesta (se descarta solo ella con su SAVEPOINT);
+    cualquier otro (conexión, bloqueo, deadlock, servidor) se reintenta con el lote completo."""
+    if e.errno in ERRNOS_REINTENTABLES:
+        return False
+    return isinstance(e, (errors.IntegrityError, errors.DataError)) or e.errno in ERRNOS_DE_FILA
+
+
+def _aplicar(lote):
+    """Aplica el lote en una transacción de MySQL. Devuelve (aplicadas, duplicadas, con_error)."""
+    aplicadas, duplicadas, con_error = [], [], []
+    db = conexion.tomar_conexion()
+    cur = db.cursor()
+    try:
+        for id_envio, tipo, id_alumno, id_materia, datos, _ in lote:
+            cur.execute("SAVEPOINT envio")
+            try:
+                _insertar(cur, tipo, id_alumno, id_materia, json.loads(datos))
+                cur.execute("RELEASE SAVEPOINT envio")
+                aplicadas.append(id_envio)
+            except errors.DatabaseError as e:
+                if not _error_de_fila(e):
+                    raise
+                # Duplicado, llave foránea, CHECK o dato inválido: solo se descarta esta encuesta
+                cur.execute("ROLLBACK TO SAVEPOINT envio")
+                if envios.es_duplicada(e):
+                    duplicadas.append(id_envio)
+                else:
+                    con_error.append((id_envio, str(e)))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cur.close()
+        db.close()
+    return aplicadas, duplicadas, con_error
+
+
+def _procesar_lote(conn, tomado, lote):
+    # Todas las actualizaciones llevan `tomado = ?`: si la toma venció y otro hilo ya tomó el lote,
+    # las filas son suyas (reaplicarlas es idempotente por las llaves únicas)
+    inicio = time.perf_counter()
+    try:
+        aplicadas, duplicadas, con_error = _aplicar(lote)
+    except Exception as e:
+        # Todo el lote vuelve a la cola con espera creciente; tras REINTENTOS queda en 'error'
+        log.exception("No se pudo aplicar un lote de %s encuestas", len(lote))
+        ahora = time.time()
+        conn.executemany("""
+            UPDATE envios SET estado = CASE WHEN intentos + 1 >= ? THEN 'error' ELSE 'pendiente' END,
+                   intentos = intentos + 1, disponible = ?, error = ?
+            WHERE id = ? AND tomado = ?
+        """, [(REINTENTOS, ahora + REINTENTAR_EN * 2 ** f[5], str(e), f[0], tomado) for f in lote])
+        _contar(reintentos=len(lote))
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    conn.executemany("DELETE FROM envios WHERE id = ? AND tomado = ?",
+                     [(i, tomado) for i in aplicadas + duplicadas])
+    conn.executemany("UPDATE envios SET estado = 'error', error = ? WHERE id = ? AND tomado = ?",
+                     [(error, i, tomado) for i, error in con_error])
+    conn.execute("COMMIT")
+    if duplicadas:
+        log.warning("%s encuestas de la cola ya estaban registradas y se descartaron", len(duplicadas))
+    for id_envio, error in con_error:
+        log.error("La encuesta %s de la cola no se pudo registrar: %s", id_envio, error)
+    _contar(aplicadas=len(aplicadas), duplicadas=len(duplicadas), con_error=len(con_error), lotes=1,
+            lote_ms_total=(time.perf_counter() - inicio) * 1000)
+
+
+def _trabajar():
+    conn = _conexion()
+    while True:
+        _hay_trabajo.clear()
+        try:
+            tomado, lote = _tomar_lote(conn)
+            if lote:
+                _procesar_lote(conn, tomado, lote)
+                continue
+        except sqlite3.Error:
+            log.exception("Error en la cola local de envíos")
+        _hay_trabajo.wait(1)
+
+
+def asegurar_workers():
+    """Arranca (una vez por proceso, también después de un fork) los hilos que vacían la cola."""
+    global _workers_pid
+    if _workers_pid == os.getpid():
+        return
+    with _workers_lock:
+        if _workers_pid == os.getpid():
+            return
+        _workers_pid = os.getpid()
+        for i in range(WORKERS):
+            threading.Thread(target=_trabajar, name=f"cola-envios-{i}", daemon=True).start()
+
+
+# --- Admisión ---
+
+def admitir(vista):
+    """Limita las peticiones simultáneas de la vista (ADMISION_CONCURRENTES); si no hay lugar en
+    ADMISION_ESPERA segundos responde 503 con Retry-After en lugar de encolar más trabajo en la BD."""
+    @wraps(vista)
+    def envuelta(*args, **kwargs):
+        if _admision is None:
+            return vista(*args, **kwargs)
+        if not _admision.acquire(timeout=ADMISION_ESPERA):
+            _contar(rechazadas_concurrencia=1)
+            return rechazo()
+        try:
+            return vista(*args, **kwargs)
+        finally:
+            _admision.release()
+    return envuelta
+
+
+def rechazo():
+    """Respuesta cuando no se admite la petición (cola llena o demasiadas peticiones)."""
+    return ("El sistema está recibiendo muchas encuestas en este momento; intenta de nuevo en unos segundos.",
+            503, {'Retry-After': str(REINTENTAR_EN)})
+
+
+def metricas():
+    """Profundidad de la cola por estado, antigüedad de la más vieja y contadores de este proceso."""
+    with _contadores_lock:
+        salida = dict(_contadores)
+    salida['lote_promedio_ms'] = round(salida['lote_ms_total'] / salida['lotes'], 2) if salida['lotes'] else None
+    salida['modo'] = 'cola' if ACTIVA else 'directo'
+    if ACTIVA:
+        conn = _conexion()
+        salida['por_estado'] = dict(conn.execute("SELECT estado, COUNT(*) FROM envios GROUP BY estado").fetchall())
+        mas_vieja = conn.execute("SELECT MIN(creado) FROM envios WHERE estado <> 'error'").fetchone()[0]
+        salida['segundos_mas_vieja'] = round(time.time() - mas_vieja, 1) if mas_vieja else 0
+        salida['profundidad'] = profundidad(conn)
+        salida['limite'] = COLA_MAX
+    return salida
+
+
+def init_app(app):
+    """En modo cola, arranca los hilos de vaciado con la primera petición de cada proceso (así también
+    se vacía lo que haya quedado en la cola de una ejecución anterior)."""
+    if ACTIVA:
+        app.before_request(asegurar_workers)
@@ -0,0 +1,183 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Búsqueda de comentarios sobre historial_comentarios. El texto se busca con el índice
+FULLTEXT (MATCH ... AGAINST en modo booleano, cada palabra obligatoria y como prefijo) y los filtros
+de docente, materia, campus y fechas usan los índices (columna, fecha_registro). Los resultados van
+del más reciente al más antiguo con paginación por llave, como las tablas del panel admin.
+
+Solo se busca en la tabla caliente (los últimos 180 días que conserva sp_historial_mantenimiento): las
+tablas *_archivo están particionadas y MySQL no admite índices FULLTEXT en tablas particionadas. Cada
+página indica en 'cubre_desde' la fecha del comentario más antiguo que todavía se puede buscar.
+"""
+
+import os
+import re
+from collections import Counter
+from datetime import date, timedelta
+
+from cache import CacheTTL
+from tablas_admin import (LIMITE_DEFECTO, LIMITE_MAXIMO, ParametroInvalido, codificar_cursor, condicion_cursor,
+                          decodificar_cursor)
+
+# Palabras más cortas que innodb_ft_min_token_size (3 por defecto) no están en el índice
+LONGITUD_MINIMA = int(os.environ.get("COMENTARIOS_LONGITUD_MINIMA", "3"))
+MAX_PALABRAS = 8
+# Comentarios más recientes que se consideran para el resumen de términos y términos devueltos
+TERMINOS_COMENTARIOS_MAX = int(os.environ.get("COMENTARIOS_TERMINOS_MAX", "5000"))
+TERMINOS_LIMITE = 30
+
+_cache_terminos = CacheTTL(ttl=float(os.environ.get("COMENTARIOS_CACHE_TTL", "120")), max_entradas=512)
+_cache_cobertura = CacheTTL(ttl=300, max_entradas=1)
+
+_PALABRA = re.compile(r"\w+", re.UNICODE)
+
+# Palabras vacías del español que no aportan al resumen de términos
+PALABRAS_VACIAS = frozenset("""
+    al algo algunas algunos ante antes aunque bien cada como con contra cual cuando del desde donde
+    durante el ella ellas ellos en entre era eres es esa esas ese eso esos esta estaba estan estas
+    este esto estos fue fueron ha hace han hasta hay la las le les lo los mas me mi mis mucho muchos
+    muy nada ni no nos nosotros otra otras otro otros para pero poco por porque que quien quienes se
+    ser si sin sobre solo son su sus tambien tan tanto te tiene tienen todo todos tu tus un una uno
+    unos usted ya yo más qué sí también está están él mí tú sólo
+""".split())
+
+SQL_BUSQUEDA = """
+    SELECT h.id_historial_comentario, h.fecha_registro, h.comentario, h.materia, h.id_materia_impartida,
+           h.id_docente, CONCAT_WS(' ', d.nombre, d.apellidop, d.apellidom) AS docente,
+           h.id_campus, c.nombre AS campus
+    FROM historial_comentarios h
+    LEFT JOIN docentes d ON d.id_docente = h.id_docente
+    LEFT JOIN campus c ON c.id_campus = h.id_campus
+    {where}
+    ORDER BY h.fecha_registro DESC, h.id_historial_comentario DESC
+    LIMIT %s
+"""
+
+# Comentarios recientes del docente para el resumen de términos
+SQL_TERMINOS = """
+    SELECT h.comentario FROM historial_comentarios h
+    {where}
+    ORDER BY h.fecha_registro DESC
+    LIMIT %s
+"""
+
+# Comentario más antiguo de la tabla caliente (idx_historial_comentarios_fecha: lee una sola entrada)
+SQL_COBERTURA = "SELECT MIN(fecha_registro) AS desde FROM historial_comentarios"
+
+# Orden de la búsqueda y del cursor
+ORDEN = ("h.fecha_registro", "h.id_historial_comentario")
+
+# Filtro -> (condición, conversión del parámetro)
+FILTROS = {
+    'docente': ("h.id_docente = %s", int),
+    'materia': ("h.id_materia_impartida = %s", int),
+    'campus': ("h.id_campus = %s", int),
+    'desde': ("h.fecha_registro >= %s", date.fromisoformat),
+    # Fecha final inclusiva
+    'hasta': ("h.fecha_registro < %s", lambda v: date.fromisoformat(v) + timedelta(days=1)),
+}
+
+
+def palabras(texto):
+    """Palabras en minúsculas con la longitud mínima indexada."""
+    return [p for p in _PALABRA.findall(texto.lower()) if len(p) >= LONGITUD_MINIMA]
+
+
+def consulta_booleana(texto):
+    """Texto del usuario -> expresión booleana de MATCH: '+palabra*' por palabra (sin operadores del usuario)."""
+    terminos = palabras(texto)[:MAX_PALABRAS]
+    if not terminos:
+        raise ParametroInvalido(f"La búsqueda necesita palabras de al menos {LONGITUD_MINIMA} letras")
+    return " ".join(f"+{t}*" for t in terminos)
+
+
+def _condiciones(args, id_docente=None):
+    """Condiciones y parámetros de los filtros; `id_docente` fija el docente (vista del profesor)."""
+    condiciones, params = [], []
+    valores = dict(args.items())
+    if id_docente is not None:
+        valores['docente'] = str(id_docente)
+    for nombre, (condicion, conversion) in FILTROS.items():
+        valor = (valores.get(nombre) or '').strip()
+        if not valor:
+            continue
+        try:
+            params.append(conversion(valor))
+        except ValueError:
+            raise ParametroInvalido(f"Filtro {nombre} no válido")
+        condiciones.append(condicion)
+    return condiciones, params
+
+
+def cobertura(cur):
+    """Fecha del comentario más antiguo que se puede buscar (lo anterior ya está en el archivo)."""
+    def calcular():
+        cur.execute(SQL_COBERTURA)
+        return cur.fetchone()['desde']
+    return _cache_cobertura.obtener_o_calcular('desde', calcular)
+
+
+def consulta_busqueda(args, id_docente=None):
+    """(sql, params, limite) de una página de la búsqueda; pide una fila de más para saber si hay otra página.
+
+    args (request.args): q (texto), docente, materia (id_materia_impartida), campus, desde y hasta
+    (AAAA-MM-DD), limite y despues (cursor de la página anterior).
+    """
+    try:
+        limite = min(max(int(args.get('limite', LIMITE_DEFECTO)), 1), LIMITE_MAXIMO)
+    except ValueError:
+        raise ParametroInvalido("Límite no válido")
+    condiciones, params = _condiciones(args, id_docente)
+    texto = (args.get('q') or '').strip()
+    if texto:
+        condiciones.append("MATCH(h.comentario) AGAINST (%s IN BOOLEAN MODE)")
+        params.append(consulta_booleana(texto))
+    if args.get('despues'):
+        # Forma expandida (fecha < x OR (fecha = x AND id < y)): usa el rango de los índices por fecha
+        condicion, valores = condicion_cursor(ORDEN, decodificar_cursor(args['despues'], 2), 'desc')
+        condiciones.append(condicion)
+        params.extend(valores)
+
+    where = "WHERE " + " AND ".join(condiciones) if condiciones else ""
+    return SQL_BUSQUEDA.format(where=where), tuple(params) + (limite + 1,), limite
+
+
+def buscar(cur, args, id_docente=None):
+    """Una página de comentarios: {'filas', 'siguiente', 'cubre_desde'} (argumentos en consulta_busqueda)."""
+    sql, params, limite = consulta_busqueda(args, id_docente)
+    cur.execute(sql, params)
+    filas = cur.fetchall()
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = codificar_cursor([filas[-1]['fecha_registro'], filas[-1]['id_historial_comentario']])
+    return {'filas': filas, 'siguiente': siguiente, 'cubre_desde': cobertura(cur)}
+
+
+def consulta_terminos(id_docente, args):
+    """(sql, params) de los comentarios recientes del docente con los filtros de terminos()."""
+    condiciones, params = _condiciones(args, id_docente)
+    where = "WHERE " + " AND ".join(condiciones)
+    return SQL_TERMINOS.format(where=where), tuple(params) + (TERMINOS_COMENTARIOS_MAX,)
+
+
+def terminos(cur, id_docente, args):
+    """Términos más frecuentes en los comentarios recientes del docente (con los mismos filtros de
+    materia, campus y fechas): {'comentarios', 'terminos': [{'termino', 'frecuencia', 'comentarios'}]}.
+    'frecuencia' cuenta apariciones y 'comentarios' en cuántos comentarios aparece."""
+    sql, params = consulta_terminos(id_docente, args)
+
+    def calcular():
+        cur.execute(sql, params)
+        frecuencia, documentos, total = Counter(), Counter(), 0
+        for fila in cur.fetchall():
+            encontradas = [p for p in palabras(fila['comentario']) if p not in PALABRAS_VACIAS and not p.isdigit()]
+            frecuencia.update(encontradas)
+            documentos.update(set(encontradas))
+            total += 1
+        return {
+            'comentarios': total,
+            'terminos': [{'termino': t, 'frecuencia': n, 'comentarios': documentos[t]}
+                         for t, n in frecuencia.most_common(TERMINOS_LIMITE)],
+        }
+    return _cache_terminos.obtener_o_calcular((sql, params), calcular)
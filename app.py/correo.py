@@ -0,0 +1,338 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Cola de envío de reportes por correo. Los trabajos se guardan en trabajos_correo y se
+procesan en segundo plano: el reporte se genera una vez por trabajo con plantillas, se envía un
+mensaje por destinatario reutilizando la conexión SMTP del hilo y cada destinatario tiene sus
+propios reintentos. Cada destinatario se reclama antes de enviarle ('enviando') y después de cada
+uno se marca actividad en el trabajo, así que un trabajo largo no parece abandonado y, si otro
+hilo lo retoma, no le vuelve a enviar a los destinatarios ya reclamados.
+"""
+
+import logging
+import os
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+
+from mysql.connector import errors
+
+import conexion
+import reportes
+
+# Hilos que procesan trabajos, intentos por destinatario y espera base (segundos) entre intentos
+WORKERS = int(os.environ.get("CORREO_WORKERS", "2"))
+REINTENTOS = int(os.environ.get("CORREO_REINTENTOS", "3"))
+ESPERA_REINTENTO = float(os.environ.get("CORREO_ESPERA", "2"))
+# Un trabajo 'enviando' sin actividad por más de estos minutos se considera abandonado (proceso caído)
+MINUTOS_ABANDONADO = int(os.environ.get("CORREO_MINUTOS_ABANDONADO", "10"))
+
+ESTADOS_FINALES = ("enviado", "parcial", "error")
+
+log = logging.getLogger("evaluacion.correo")
+
+_executor = None
+_executor_lock = threading.Lock()
+_jinja_env = None
+_reanudados = False
+_reanudar_lock = threading.Lock()
+_smtp_local = threading.local()
+
+
+def _pool_hilos():
+    """Crea (una sola vez por proceso) el pool de hilos de envío."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="correo")
+    return _executor
+
+
+def _config_smtp():
+    """Configuración SMTP tomada del entorno (SMTP_SERVER/SMTP_PORT pueden apuntar a un servidor local de pruebas)."""
+    smtp_user = os.environ.get('SMTP_USER')
+    return {
+        'server': os.environ.get('SMTP_SERVER'),
+        'port': int(os.environ.get('SMTP_PORT')) if os.environ.get('SMTP_PORT') else None,
+        'user': smtp_user,
+        'password': os.environ.get('SMTP_PASSWORD'),
+        'sender': os.environ.get('SENDER_EMAIL') or smtp_user or 'no-reply@example.com',
+    }
+
+
+class ConexionSMTP:
+    """Conexión SMTP de un hilo de envío; se abre una vez y se reabre solo si el servidor la cerró."""
+
+    def __init__(self):
+        self._smtp = None
+
+    def _abrir(self):
+        cfg = _config_smtp()
+        server, port = cfg['server'], cfg['port']
+        if server and port:
+            if port == 465:
+                smtp = smtplib.SMTP_SSL(server, port)
+            else:
+                smtp = smtplib.SMTP(server, port)
+                smtp.ehlo()
+                if port == 587:
+                    smtp.starttls()
+            if cfg['user'] and cfg['password']:
+                smtp.login(cfg['user'], cfg['password'])
+        else:
+            smtp = smtplib.SMTP('localhost')
+        self._smtp = smtp
+
+    def enviar(self, msg):
+        if self._smtp is None:
+            self._abrir()
+        try:
+            self._smtp.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            # La conexión reutilizada expiró del lado del servidor: reabrir y reenviar una vez
+            self.cerrar()
+            self._abrir()
+            self._smtp.send_message(msg)
+
+    def cerrar(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+
+def _smtp():
+    if not hasattr(_smtp_local, "conexion"):
+        _smtp_local.conexion = ConexionSMTP()
+    return _smtp_local.conexion
+
+
+def _entero(valor):
+    try:
+        return int(str(valor or '0').strip())
+    except ValueError:
+        return 0
+
+
+def renderizar(datos):
+    """Genera (html, texto) del reporte a partir de reportes.datos_admin()."""
+    stats = datos['stats']
+    contexto = {
+        'stats': stats,
+        'evaluaciones': datos['evaluaciones'],
+        # Solo alumnos con evaluaciones pendientes
+        'alumnos_pendientes': [a for a in stats.get('alumnos_estado') or [] if _entero(a.get('pendientes')) > 0],
+    }
+    # generate() produce el documento por fragmentos; se une una sola vez
+    html = "".join(_jinja_env.get_template("correo_reporte.html").generate(**contexto))
+    texto = "".join(_jinja_env.get_template("correo_reporte.txt").generate(**contexto))
+    return html, texto
+
+
+def _mensaje(destinatario, html, texto):
+    msg = EmailMessage()
+    msg['Subject'] = 'Reportes - Evaluación Docente'
+    msg['From'] = _config_smtp()['sender']
+    msg['To'] = destinatario
+    msg.set_content(texto)
+    msg.add_alternative(html, subtype='html')
+    return msg
+
+
+def encolar(db, destinatarios, solicitado_por=None):
+    """Registra un trabajo de envío, lo manda a procesar en segundo plano y devuelve su id."""
+    destinatarios = list(dict.fromkeys(destinatarios))
+    cur = db.cursor()
+    try:
+        cur.execute("""
+            INSERT INTO trabajos_correo (solicitado_por, total_destinatarios) VALUES (%s, %s)
+        """, (solicitado_por, len(destinatarios)))
+        id_trabajo = cur.lastrowid
+        cur.executemany("""
+            INSERT INTO trabajos_correo_destinatarios (id_trabajo, correo) VALUES (%s, %s)
+        """, [(id_trabajo, d) for d in destinatarios])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cur.close()
+    try:
+        reanudar_pendientes()
+    except errors.Error:
+        # El trabajo nuevo ya está registrado; los pendientes se reanudan en el siguiente encolar
+        log.exception("No se pudieron reanudar los trabajos de correo pendientes")
+    _pool_hilos().submit(procesar, id_trabajo)
+    return id_trabajo
+
+
+def estado(cur, id_trabajo):
+    """Estado de un trabajo y de cada destinatario (None si no existe)."""
+    cur.execute("""
+        SELECT id_trabajo, estado, solicitado_por, total_destinatarios, enviados, fallidos, error,
+               fecha_creacion, ultima_actualizacion
+        FROM trabajos_correo WHERE id_trabajo = %s
+    """, (id_trabajo,))
+    trabajo = cur.fetchone()
+    if not trabajo:
+        return None
+    cur.execute("""
+        SELECT correo, estado, intentos, ultimo_error
+        FROM trabajos_correo_destinatarios WHERE id_trabajo = %s ORDER BY correo
+    """, (id_trabajo,))
+    trabajo['destinatarios'] = cur.fetchall()
+    trabajo['terminado'] = trabajo['estado'] in ESTADOS_FINALES
+    return trabajo
+
+
+def reanudar_pendientes():
+    """Vuelve a encolar (una vez por proceso) los trabajos que quedaron sin terminar por un reinicio.
+
+    Solo se da por hecho si la consulta tuvo éxito; si falla, se vuelve a intentar en la siguiente llamada.
+    """
+    global _reanudados
+    if _reanudados:
+        return
+    with _reanudar_lock:
+        if _reanudados:
+            return
+        pendientes = _reclamar_abandonados()
+        _reanudados = True
+    for id_trabajo in pendientes:
+        _pool_hilos().submit(procesar, id_trabajo)
+
+
+def _reclamar_abandonados():
+    """Devuelve a pendiente los trabajos abandonados y regresa los ids de todos los pendientes."""
+    conn = conexion.tomar_conexion()
+    try:
+        cur = conn.cursor()
+        # Trabajos abandonados: el destinatario que se estaba enviando vuelve a pendiente (puede
+        # recibir el mensaje dos veces si el proceso cayó justo después de enviarlo)
+        cur.execute("""
+            UPDATE trabajos_correo_destinatarios d
+            JOIN trabajos_correo t ON t.id_trabajo = d.id_trabajo
+            SET d.estado = 'pendiente'
+            WHERE t.estado = 'enviando' AND t.ultima_actualizacion < NOW() - INTERVAL %s MINUTE
+              AND d.estado = 'enviando'
+        """, (MINUTOS_ABANDONADO,))
+        cur.execute("""
+            UPDATE trabajos_correo SET estado = 'pendiente'
+            WHERE estado = 'enviando' AND ultima_actualizacion < NOW() - INTERVAL %s MINUTE
+        """, (MINUTOS_ABANDONADO,))
+        cur.execute("SELECT id_trabajo FROM trabajos_correo WHERE estado = 'pendiente'")
+        pendientes = [fila[0] for fila in cur.fetchall()]
+        conn.commit()
+        cur.close()
+    finally:
+        conn.close()
+    return pendientes
+
+
+def _reclamar_destinatario(conn, cur, id_trabajo, destinatario):
+    """Marca al destinatario como 'enviando' si sigue pendiente; False si otro hilo ya lo tomó."""
+    cur.execute("""
+        UPDATE trabajos_correo_destinatarios SET estado = 'enviando'
+        WHERE id_trabajo = %s AND correo = %s AND estado = 'pendiente'
+    """, (id_trabajo, destinatario))
+    conn.commit()
+    return cur.rowcount == 1
+
+
+def _enviar_destinatario(conn, cur, id_trabajo, destinatario, intentos, html, texto):
+    """Envía a un destinatario ya reclamado con reintentos y espera creciente; registra el resultado
+    y marca actividad en el trabajo (ultima_actualizacion) en la misma transacción."""
+    msg = _mensaje(destinatario, html, texto)
+    ultimo_error = None
+    while intentos < REINTENTOS:
+        intentos += 1
+        try:
+            _smtp().enviar(msg)
+            ultimo_error = None
+            break
+        except (smtplib.SMTPException, OSError) as e:
+            ultimo_error = repr(e)
+            log.warning("Trabajo %s: fallo al enviar a %s (intento %s): %s", id_trabajo, destinatario, intentos, ultimo_error)
+            _smtp().cerrar()
+            if intentos < REINTENTOS:
+                time.sleep(ESPERA_REINTENTO * 2 ** (intentos - 1))
+    cur.execute("""
+        UPDATE trabajos_correo_destinatarios SET estado = %s, intentos = %s, ultimo_error = %s
+        WHERE id_trabajo = %s AND correo = %s
+    """, ('error' if ultimo_error else 'enviado', intentos, ultimo_error, id_trabajo, destinatario))
+    cur.execute("UPDATE trabajos_correo SET ultima_actualizacion = CURRENT_TIMESTAMP WHERE id_trabajo = %s",
+                (id_trabajo,))
+    conn.commit()
+
+
+def _datos_reporte():
+    """Datos del reporte, leídos de la réplica de lectura (o del primario si no está disponible)."""
+    conn = conexion.tomar_conexion_lectura()
+    cur = conn.cursor(dictionary=True)
+    try:
+        return reportes.datos_admin(cur)
+    finally:
+        cur.close()
+        conn.close()
+
+
+def procesar(id_trabajo):
+    """Procesa un trabajo: genera el reporte una vez y lo envía a cada destinatario pendiente."""
+    conn = conexion.tomar_conexion()
+    cur = conn.cursor(dictionary=True)
+    try:
+        # Reclamar el trabajo: si otro hilo/proceso ya lo tomó, no hacer nada
+        cur.execute("""
+            UPDATE trabajos_correo SET estado = 'enviando' WHERE id_trabajo = %s AND estado = 'pendiente'
+        """, (id_trabajo,))
+        conn.commit()
+        if cur.rowcount != 1:
+            return
+
+        try:
+            html, texto = renderizar(_datos_reporte())
+        except Exception as e:
+            log.exception("Trabajo %s: no se pudo generar el reporte", id_trabajo)
+            cur.execute("UPDATE trabajos_correo SET estado = 'error', error = %s WHERE id_trabajo = %s",
+                        (repr(e), id_trabajo))
+            conn.commit()
+            return
+
+        cur.execute("""
+            SELECT correo, intentos FROM trabajos_correo_destinatarios
+            WHERE id_trabajo = %s AND estado = 'pendiente'
+        """, (id_trabajo,))
+        for fila in cur.fetchall():
+            if _reclamar_destinatario(conn, cur, id_trabajo, fila['correo']):
+                _enviar_destinatario(conn, cur, id_trabajo, fila['correo'], fila['intentos'], html, texto)
+
+        cur.execute("""
+            SELECT estado, COUNT(*) AS n FROM trabajos_correo_destinatarios
+            WHERE id_trabajo = %s GROUP BY estado
+        """, (id_trabajo,))
+        conteo = {f['estado']: f['n'] for f in cur.fetchall()}
+        enviados, fallidos = conteo.get('enviado', 0), conteo.get('error', 0)
+        final = 'enviado' if not fallidos else ('error' if not enviados else 'parcial')
+        cur.execute("""
+            UPDATE trabajos_correo SET estado = %s, enviados = %s, fallidos = %s WHERE id_trabajo = %s
+        """, (final, enviados, fallidos, id_trabajo))
+        conn.commit()
+    except errors.Error:
+        log.exception("Trabajo %s: error de base de datos", id_trabajo)
+        try:
+            conn.rollback()
+        except errors.Error:
+            pass
+    finally:
+        cur.close()
+        conn.close()
+
+
+def init_app(app):
+    """Usa el entorno Jinja de la app para las plantillas del correo."""
+    global _jinja_env
+    _jinja_env = app.jinja_env
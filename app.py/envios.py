@@ -0,0 +1,119 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Registro de encuestas enviadas (docente y servicios) en una sola transacción,
+con inserción multi-fila de las respuestas.
+"""
+
+# Llaves únicas que indican que el alumno ya había enviado esa encuesta; un 1062 en otra llave (p. ej.
+# la llave primaria de respuestas) es un error del envío, no un duplicado
+ERRNO_DUPLICADO = 1062
+LLAVES_ENCUESTA = ("uq_evaluacion_alumno_materia", "uq_evaluacion_servicios_alumno")
+
+
+def respuestas_del_formulario(form, preguntas):
+    """Convierte los campos pregunta_N / escala_N del formulario en una lista de (id_pregunta, escala).
+
+    Solo se aceptan ids del catálogo recibido (preguntas.activas) y escalas de 1 a 5; una escala
+    vacía o inválida se guarda como NULL. Si una pregunta viene repetida se toma la primera
+    (la llave primaria de respuestas es (evaluación, pregunta)). Quien llama rechaza la lista vacía.
+    """
+    ids_validos = {p['id_pregunta'] for p in preguntas}
+    respuestas = []
+    vistas = set()
+    for key in form:
+        if key.startswith("pregunta_"):
+            idx = key.split('_')[1]
+            try:
+                id_pregunta = int(form.get(key, "").strip())
+            except ValueError:
+                continue
+            if id_pregunta not in ids_validos or id_pregunta in vistas:
+                continue
+            vistas.add(id_pregunta)
+            escala = form.get(f"escala_{idx}", "").strip()
+            escala = int(escala) if escala.isdigit() and 1 <= int(escala) <= 5 else None
+            respuestas.append((id_pregunta, escala))
+    return respuestas
+
+
+def es_duplicada(error):
+    """True si el error de MySQL es el de una encuesta ya registrada (LLAVES_ENCUESTA)."""
+    return error.errno == ERRNO_DUPLICADO and any(llave in (error.msg or "") for llave in LLAVES_ENCUESTA)
+
+
+def insertar_evaluacion_docente(cur, id_docente, id_materia_impartida, id_alumno, respuestas,
+                                comentario=None, id_evaluacion=None):
+    """Sentencias de una evaluación docente sobre `cur`, sin commit (la transacción es de quien llama).
+
+    Si se recibe id_evaluacion se agregan las respuestas a esa evaluación en lugar de crear una.
+    Devuelve el id de la evaluación.
+    """
+    if not id_evaluacion:
+        cur.execute(
+            "INSERT INTO evaluacion (id_docente, id_materia_impartida, id_alumno) VALUES (%s, %s, %s)",
+            (id_docente, id_materia_impartida, id_alumno)
+        )
+        id_evaluacion = cur.lastrowid
+    # executemany sobre INSERT ... VALUES se envía como un solo INSERT multi-fila
+    if respuestas:
+        cur.executemany(
+            "INSERT INTO respuestas (id_evaluacion, id_pregunta, escala) VALUES (%s, %s, %s)",
+            [(id_evaluacion, id_pregunta, escala) for id_pregunta, escala in respuestas]
+        )
+    if comentario:
+        cur.execute(
+            "INSERT INTO comentarios (id_evaluacion, comentario) VALUES (%s, %s)",
+            (id_evaluacion, comentario)
+        )
+    # Una sola instantánea en historial_evaluacion por evaluación enviada
+    cur.callproc("sp_registrar_historial_evaluacion", (id_evaluacion,))
+    return id_evaluacion
+
+
+def insertar_evaluacion_servicios(cur, id_alumno, id_campus, respuestas):
+    """Sentencias de una evaluación de servicios sobre `cur`, sin commit. Devuelve su id."""
+    cur.execute(
+        "INSERT INTO evaluacion_servicios (id_alumno, id_campus) VALUES (%s, %s)",
+        (id_alumno, id_campus)
+    )
+    id_eval_serv = cur.lastrowid
+    if respuestas:
+        cur.executemany(
+            "INSERT INTO respuestas_servicios (id_evaluacion_servicios, id_pregunta, escala) VALUES (%s, %s, %s)",
+            [(id_eval_serv, id_pregunta, escala) for id_pregunta, escala in respuestas]
+        )
+    return id_eval_serv
+
+
+def guardar_evaluacion_docente(db, id_docente, id_materia_impartida, id_alumno, respuestas,
+                               comentario=None, id_evaluacion=None):
+    """Registra encabezado, respuestas y comentario de una evaluación docente en una transacción.
+
+    Si se recibe id_evaluacion se agregan las respuestas a esa evaluación en lugar de crear una.
+    Devuelve el id de la evaluación. Si algo falla se hace rollback y no queda nada visible.
+    """
+    cur = db.cursor()
+    try:
+        id_evaluacion = insertar_evaluacion_docente(cur, id_docente, id_materia_impartida, id_alumno,
+                                                    respuestas, comentario, id_evaluacion)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cur.close()
+    return id_evaluacion
+
+
+def guardar_evaluacion_servicios(db, id_alumno, id_campus, respuestas):
+    """Registra la evaluación de servicios y sus respuestas en una transacción. Devuelve su id."""
+    cur = db.cursor()
+    try:
+        id_eval_serv = insertar_evaluacion_servicios(cur, id_alumno, id_campus, respuestas)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cur.close()
+    return id_eval_serv
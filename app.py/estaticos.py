@@ -0,0 +1,129 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Archivos estáticos con huella de contenido. Al crear la app se leen los archivos de
+static/, se calcula el hash de cada uno y se guardan en memoria junto con su versión gzip (y brotli
+si está instalado) para los tipos de texto. url_for('static', ...) agrega ?v=<hash>; las peticiones
+con el hash vigente se sirven con caché de un año (immutable). Las url(...) de los CSS se reescriben
+con la huella del archivo al que apuntan, así que un cambio en uvm.jpg también cambia la de styles.css.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+from flask import Response, abort, request
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se ofrece gzip
+    brotli = None
+
+CACHE_HUELLA = "public, max-age=31536000, immutable"
+# Sin huella (o con una vieja) se puede reutilizar poco tiempo y luego se revalida con ETag
+CACHE_SIN_HUELLA = "public, max-age=300"
+TIPOS_COMPRIMIBLES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+_URL_CSS = re.compile(r"""url\(\s*(['"]?)([^'")?#]+)\1\s*\)""")
+
+# nombre relativo -> Activo
+_activos = {}
+
+
+class Activo:
+    """Un archivo estático en memoria con su huella y variantes comprimidas."""
+
+    def __init__(self, contenido, tipo):
+        self.tipo = tipo
+        self.huella = hashlib.sha256(contenido).hexdigest()[:12]
+        self.variantes = {'identity': contenido}
+        if tipo.startswith(TIPOS_COMPRIMIBLES):
+            self.variantes['gzip'] = gzip.compress(contenido, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.variantes['br'] = brotli.compress(contenido, quality=11)
+
+
+def comprimir(contenido):
+    """Variantes comprimidas de un contenido de texto ({'identity', 'gzip'[, 'br']})."""
+    variantes = {'identity': contenido, 'gzip': gzip.compress(contenido, compresslevel=6, mtime=0)}
+    if brotli is not None:
+        variantes['br'] = brotli.compress(contenido, quality=5)
+    return variantes
+
+
+def elegir_codificacion(variantes):
+    """La mejor codificación disponible que acepta el cliente (br, luego gzip, si no identity)."""
+    for codificacion in ('br', 'gzip'):
+        if codificacion in variantes and request.accept_encodings[codificacion]:
+            return codificacion
+    return 'identity'
+
+
+def respuesta(variantes, tipo, etag, cache_control):
+    """Respuesta con la variante negociada, ETag por variante y 304 si el cliente ya la tiene."""
+    codificacion = elegir_codificacion(variantes)
+    resp = Response(variantes[codificacion], mimetype=tipo)
+    if codificacion != 'identity':
+        resp.headers['Content-Encoding'] = codificacion
+        etag = f"{etag}-{codificacion}"
+    if len(variantes) > 1:
+        resp.vary.add('Accept-Encoding')
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = cache_control
+    return resp.make_conditional(request)
+
+
+def _reescribir_css(texto, directorio, huellas):
+    def reemplazar(m):
+        comillas, ruta = m.group(1), m.group(2)
+        destino = os.path.normpath(os.path.join(directorio, ruta)).replace(os.sep, "/")
+        if destino not in huellas:
+            return m.group(0)
+        return f"url({comillas}{ruta}?v={huellas[destino]}{comillas})"
+    return _URL_CSS.sub(reemplazar, texto)
+
+
+def cargar(carpeta):
+    """Lee los archivos de `carpeta`. Los CSS van al final para reescribir sus url() con las huellas
+    de los demás archivos."""
+    _activos.clear()
+    nombres = []
+    for raiz, _, archivos in os.walk(carpeta):
+        for archivo in archivos:
+            nombres.append(os.path.relpath(os.path.join(raiz, archivo), carpeta).replace(os.sep, "/"))
+    nombres.sort(key=lambda n: (n.endswith(".css"), n))
+    huellas = {}
+    for nombre in nombres:
+        with open(os.path.join(carpeta, nombre), "rb") as f:
+            contenido = f.read()
+        tipo = mimetypes.guess_type(nombre)[0] or "application/octet-stream"
+        if nombre.endswith(".css"):
+            texto = _reescribir_css(contenido.decode("utf-8"), os.path.dirname(nombre), huellas)
+            contenido = texto.encode("utf-8")
+            tipo = "text/css; charset=utf-8"
+        _activos[nombre] = Activo(contenido, tipo)
+        huellas[nombre] = _activos[nombre].huella
+
+
+def servir(filename):
+    activo = _activos.get(filename)
+    if activo is None:
+        abort(404)
+    vigente = request.args.get('v') == activo.huella
+    return respuesta(activo.variantes, activo.tipo, activo.huella,
+                     CACHE_HUELLA if vigente else CACHE_SIN_HUELLA)
+
+
+def _agregar_huella(endpoint, valores):
+    if endpoint == 'static' and 'v' not in valores:
+        activo = _activos.get(valores.get('filename'))
+        if activo is not None:
+            valores['v'] = activo.huella
+
+
+def init_app(app, carpeta):
+    """Carga los estáticos y registra /static/<filename> (endpoint 'static') con huellas."""
+    cargar(carpeta)
+    app.add_url_rule("/static/<path:filename>", endpoint="static", view_func=servir)
+    app.url_defaults(_agregar_huella)
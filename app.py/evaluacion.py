@@ -4,46 +4,63 @@ Descripción: Archivo principal de la aplicación Flask para la evaluación doce
 """
 
 # Importación de librerías y configuración de la app Flask
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session
-import os
-import smtplib
-from email.message import EmailMessage
-import mysql.connector
+import click
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, session, stream_with_context
 import json
-from werkzeug.security import generate_password_hash, check_password_hash
-
-app = Flask(__name__)
-app.secret_key = "supersecretkey"  
-
-# Conexión a la base de datos MySQL
-db = mysql.connector.connect(
-    host="localhost",
-    user="root",
-    password="Saltamontes71#",
-    database="evaluacion_d"  
-)
-cursor = db.cursor(dictionary=True)
-
-# Asegurar que exista admin en la tabla admin_users y tenga password hasheada por defecto
-try:
-    cursor.execute("SELECT * FROM admin_users WHERE username = %s", ("admin",))
-    admin_row = cursor.fetchone()
-    if not admin_row:
-        pw_hash = generate_password_hash("admin1")
-        cursor.execute("INSERT INTO admin_users (username, password) VALUES (%s, %s)", ("admin", pw_hash))
-        db.commit()
-    else:
-        # si existe pero password NULL, establecer por defecto 'admin1' hasheada
-        if not admin_row.get('password'):
-            pw_hash = generate_password_hash("admin1")
-            cursor.execute("UPDATE admin_users SET password = %s WHERE username = %s", (pw_hash, "admin"))
-            db.commit()
-except Exception:
-    # no bloquear arranque si falla este paso
-    pass
+import logging
+import os
+from mysql.connector import IntegrityError, errors
+from werkzeug.local import LocalProxy
+from werkzeug.security import check_password_hash
+import analitica
+import arranque
+import autenticacion
+import cola_envios
+import comentarios
+import conexion
+import correo
+import envios
+import estaticos
+import exportaciones
+import materias as catalogo_materias
+import panel_alumno
+import paginas
+import perfilado
+import preguntas as catalogo_preguntas
+import reportes
+import tablas_admin
+
+# Conexión a la base de datos MySQL: pool de conexiones con cursor por petición.
+# `db` y `cursor` apuntan a la conexión/cursor de la petición actual en el primario (se liberan en
+# teardown); `cursor_lectura` es para reportes y paneles y va a la réplica si está configurada.
+# El pool se crea con la primera conexión, no al importar este módulo.
+db = LocalProxy(conexion.obtener_conexion)
+cursor = LocalProxy(conexion.obtener_cursor)
+cursor_lectura = LocalProxy(conexion.obtener_cursor_lectura)
+
+log = logging.getLogger("evaluacion")
+
+# Consultas de las rutas (herramientas/verificar_planes.py revisa su plan)
+SQL_CAMPUS_SEMESTRE = "SELECT id_campus, numero_semestre FROM alumnos WHERE id_alumno = %s"
+SQL_EVALUACION_PROPIA = "SELECT id_docente, id_materia_impartida FROM evaluacion WHERE id_evaluacion = %s AND id_alumno = %s"
+SQL_REPORTE_DOCENTE = "SELECT reporte, tendencia FROM reporte_docentes_vm WHERE id_docente = %s"
+SQL_SERVICIOS_CONTESTADA = "SELECT 1 FROM evaluacion_servicios WHERE id_alumno = %s"
+
+# Rutas de la app: se declaran con @ruta y crear_app() las registra
+_rutas = []
+
+
+def ruta(regla, **opciones):
+    """Como @app.route, pero la ruta se registra en la app que construye crear_app()."""
+    def registrar(vista):
+        _rutas.append((regla, vista, opciones))
+        return vista
+    return registrar
+
 
 # Ruta principal: Login de usuario (alumno o docente)
-@app.route("/", methods=["GET", "POST"])
+@ruta("/", methods=["GET", "POST"])
+@cola_envios.admitir
 def login():
     if request.method == "POST":
         matricula = request.form.get("matricula", "").strip()
@@ -61,115 +78,67 @@ def login():
                 else:
                     return render_template("login.html", error="Matrícula o contraseña incorrecta")
             else:
-                # fallback seguro: si por algún motivo no hay hash, rechazar (la app inicializa uno)
+                # fallback seguro: si no hay hash, rechazar (se crea con `flask --app evaluacion crear-admin`)
                 return render_template("login.html", error="Cuenta admin no configurada correctamente")
 
         # Para alumnos y docentes: validar formato de contraseña (DDMMYY) o hash existente
         if not (len(password) == 6 and password.isdigit()):
             return render_template("login.html", error="Formato de contraseña incorrecto para alumnos/docentes (debe ser DDMMYY)")
 
-        # --- ALUMNO: buscar por matrícula y validar ---
-        cursor.execute("SELECT * FROM alumnos WHERE matricula = %s", (matricula,))
-        alumno = cursor.fetchone()
-        if alumno:
-            stored_pw = alumno.get('password')
-            # si hay contraseña hasheada almacenada -> verificar
-            if stored_pw:
-                if check_password_hash(stored_pw, password):
-                    session['tipo_usuario'] = 'alumno'
-                    session['matricula'] = matricula
-                    session['id_alumno'] = alumno['id_alumno']
-                    return redirect(url_for('index'))
-                else:
-                    return render_template("login.html", error="Matrícula o contraseña incorrecta")
-            # si no hay password almacenada -> validar con fecha de nacimiento y migrar a hash
-            fecha_nac = alumno.get('fecha_nacimiento')
-            if fecha_nac:
-                try:
-                    expected = fecha_nac.strftime("%d%m%y")
-                except Exception:
-                    expected = ""
-            else:
-                expected = ""
-            if password == expected and expected != "":
-                # migrar a hash seguro y actualizar BD
-                new_hash = generate_password_hash(password)
-                cursor.execute("UPDATE alumnos SET password = %s WHERE id_alumno = %s", (new_hash, alumno['id_alumno']))
-                db.commit()
-                session['tipo_usuario'] = 'alumno'
-                session['matricula'] = matricula
-                session['id_alumno'] = alumno['id_alumno']
-                return redirect(url_for('index'))
-            return render_template("login.html", error="Matrícula o contraseña incorrecta")
-
-        # --- DOCENTE: buscar por matrícula y validar ---
-        cursor.execute("SELECT * FROM docentes WHERE matricula = %s", (matricula,))
-        docente = cursor.fetchone()
-        if docente:
-            stored_pw = docente.get('password')
-            if stored_pw:
-                if check_password_hash(stored_pw, password):
-                    session['tipo_usuario'] = 'docente'
-                    session['matricula'] = matricula
-                    session['id_docente'] = docente['id_docente']
-                    return redirect(url_for('profesor'))
-                else:
-                    return render_template("login.html", error="Matrícula o contraseña incorrecta")
-            # migración por fecha de nacimiento
-            fecha_nac_doc = docente.get('fecha_nacimiento')
-            if fecha_nac_doc:
-                try:
-                    expected_doc = fecha_nac_doc.strftime("%d%m%y")
-                except Exception:
-                    expected_doc = ""
-            else:
-                expected_doc = ""
-            if password == expected_doc and expected_doc != "":
-                new_hash = generate_password_hash(password)
-                cursor.execute("UPDATE docentes SET password = %s WHERE id_docente = %s", (new_hash, docente['id_docente']))
-                db.commit()
-                session['tipo_usuario'] = 'docente'
-                session['matricula'] = matricula
-                session['id_docente'] = docente['id_docente']
-                return redirect(url_for('profesor'))
+        # --- ALUMNO / DOCENTE: una sola consulta devuelve rol, id y hash ---
+        identidad = autenticacion.buscar_identidad(cursor, matricula)
+        if not identidad:
+            return render_template("login.html", error="Matrícula no encontrada")
+        valida, nuevo_hash = autenticacion.verificar(identidad, password)
+        if not valida:
             return render_template("login.html", error="Matrícula o contraseña incorrecta")
+        if nuevo_hash:
+            # Cuenta que aún no pasó por herramientas/migrar_passwords.py: migrar a hash ahora
+            autenticacion.guardar_hash(cursor, identidad, nuevo_hash)
+            db.commit()
 
-        return render_template("login.html", error="Matrícula no encontrada")
+        session['tipo_usuario'] = identidad['rol']
+        session['matricula'] = matricula
+        if identidad['rol'] == 'alumno':
+            session['id_alumno'] = identidad['id']
+            session['id_campus'] = identidad['id_campus']
+            session['numero_semestre'] = identidad['numero_semestre']
+            return redirect(url_for('index'))
+        session['id_docente'] = identidad['id']
+        return redirect(url_for('profesor'))
     return render_template("login.html")
 
+# Campus y semestre del alumno: se guardan en la sesión al iniciar sesión; si faltan
+# (sesiones anteriores) se consultan una vez y se guardan
+def _campus_semestre_alumno(id_alumno):
+    if 'id_campus' not in session or 'numero_semestre' not in session:
+        cursor.execute(SQL_CAMPUS_SEMESTRE, (id_alumno,))
+        alumno = cursor.fetchone()
+        session['id_campus'] = alumno['id_campus'] if alumno else None
+        session['numero_semestre'] = alumno['numero_semestre'] if alumno else None
+    return session['id_campus'], session['numero_semestre']
+
 # Ruta para alumnos: muestra docentes y semestres contestados
-@app.route("/inicio")
+@ruta("/inicio")
 def index():
     if session.get('tipo_usuario') != 'alumno':
         return redirect(url_for('login'))
     id_alumno = session.get('id_alumno')
 
     # Obtener campus y número de semestre del alumno
-    cursor.execute("SELECT id_campus, numero_semestre FROM alumnos WHERE id_alumno = %s", (id_alumno,))
-    alumno = cursor.fetchone()
-    id_campus = alumno['id_campus'] if alumno else None
-    numero_semestre = alumno['numero_semestre'] if alumno else None
+    id_campus, numero_semestre = _campus_semestre_alumno(id_alumno)
 
     # Si no hay información de campus o semestre -> no hay encuestas disponibles
     if not id_campus or not numero_semestre:
         return render_template("finale.html")
 
-    # Verificar estado de evaluaciones docentes y de servicios
-    cursor.execute("""
-        SELECT 
-            (SELECT COUNT(*) FROM materias_impartidas s 
-             WHERE s.id_campus = %s AND s.numero = %s) as total_docentes,
-            (SELECT COUNT(*) FROM evaluacion e 
-             JOIN materias_impartidas s ON e.id_materia_impartida = s.id_materia_impartida 
-             WHERE e.id_alumno = %s AND s.id_campus = %s AND s.numero = %s) as completadas_docentes,
-            EXISTS(SELECT 1 FROM evaluacion_servicios WHERE id_alumno = %s) as servicios_completado
-    """, (id_campus, numero_semestre, id_alumno, id_campus, numero_semestre, id_alumno))
-    
-    estado = cursor.fetchone()
+    # Avance, estado de servicios y docentes pendientes: catálogo en memoria + una consulta
+    panel = panel_alumno.resolver(cursor, id_alumno, id_campus, numero_semestre)
+    docentes_completos = panel['completadas'] >= panel['total']
     
     # Si no hay más evaluaciones docentes pendientes y falta la de servicios,
     # mostrar la página de selección dentro de index
-    if estado['total_docentes'] == estado['completadas_docentes'] and not estado['servicios_completado']:
+    if docentes_completos and not panel['servicios_completado']:
         # renderizar index con bandera para mostrar la selección de la encuesta de servicios
         return render_template("index.html",
                                docentes=[],
@@ -177,139 +146,97 @@ def index():
                                servicios_pendiente=True)
     
     # Si completó todo (docentes + servicios), mostrar página final
-    if estado['total_docentes'] == estado['completadas_docentes'] and estado['servicios_completado']:
+    if docentes_completos and panel['servicios_completado']:
         return render_template("finale.html")
 
-    # Obtener semestres ya contestados por el alumno -> ahora id_materia_impartida
-    cursor.execute("SELECT id_materia_impartida FROM evaluacion WHERE id_alumno = %s", (id_alumno,))
-    semestres_contestados = {row['id_materia_impartida'] for row in cursor.fetchall()}
-
-    # Obtener materias_impartidas disponibles para el alumno y que no hayan sido contestadas
-    cursor.execute("""
-        SELECT s.* FROM materias_impartidas s
-        WHERE s.id_campus = %s AND s.numero = %s
-        AND s.id_materia_impartida NOT IN (
-            SELECT id_materia_impartida FROM evaluacion WHERE id_alumno = %s
-        )
-    """, (id_campus, numero_semestre, id_alumno))
-    semestres_disponibles = cursor.fetchall()
-
-    # Determinar docente(s) que tienen al menos un semestre disponible
-    docente_ids = {s['id_docente'] for s in semestres_disponibles}
-    if docente_ids:
-        placeholders = ",".join(["%s"] * len(docente_ids))
-        cursor.execute(f"SELECT * FROM docentes WHERE id_docente IN ({placeholders})", tuple(docente_ids))
-        docentes = cursor.fetchall()
-    else:
-        docentes = []
-
     # También pasar el estado de la evaluación de servicios al template (asegurarse bandera presente)
     return render_template("index.html", 
-                         docentes=docentes, 
-                         servicios_completado=estado['servicios_completado'],
+                         docentes=panel['docentes'], 
+                         servicios_completado=panel['servicios_completado'],
                          servicios_pendiente=False)
 
 # Ruta para docentes: muestra reporte de evaluaciones
-@app.route("/profesor")
+@ruta("/profesor")
 def profesor():
     if session.get('tipo_usuario') != 'docente':
         return redirect(url_for('login'))
     id_docente = session.get('id_docente')
-    resultados = []
+    # Reporte precalculado al enviar cada evaluación (reporte_docentes_vm): una lectura por llave primaria
+    cursor_lectura.execute(SQL_REPORTE_DOCENTE, (id_docente,))
+    row = cursor_lectura.fetchone()
+    # mysql-connector devuelve JSON como str; parsear a listas de dicts
+    resultados = json.loads(row['reporte']) if row else []
+    tendencia = json.loads(row['tendencia']) if row else []
+    # Distribución, desviación, percentiles y tasas de respuesta (analítica en memoria, ver analitica.py)
+    return render_template("profesor.html", resultados=resultados, tendencia=tendencia,
+                           analitica=analitica.docente(int(id_docente)))
+
+# Comentarios del docente en sesión: búsqueda y términos frecuentes (mismos parámetros que admin)
+@ruta("/profesor/comentarios")
+def comentarios_profesor():
+    if session.get('tipo_usuario') != 'docente':
+        return jsonify({'error': 'No autorizado'}), 403
     try:
-        # Llamar la función que devuelve JSON
-        cursor.execute("SELECT fn_reporte_evaluacion(%s) AS data", (id_docente,))
-        row = cursor.fetchone()
-        data_json = row['data'] if row else None
-        if data_json:
-            # mysql-connector devuelve JSON como str; parsear a lista de dicts
-            resultados = json.loads(data_json)
-        else:
-            resultados = []
-    except Exception:
-        # Fallback: si la función no está disponible o falla, usar el procedimiento antiguo y filtrar
-        try:
-            cursor.callproc("reporte_evaluacion")
-            for result in cursor.stored_results():
-                for row in result.fetchall():
-                    if row and row.get('nombre_docente'):
-                        cursor2 = db.cursor(dictionary=True)
-                        cursor2.execute(
-                            "SELECT id_docente FROM docentes WHERE nombre = %s AND apellidop = %s AND apellidom = %s",
-                            (row['nombre_docente'], row['apellidop'], row['apellidom'])
-                        )
-                        doc = cursor2.fetchone()
-                        cursor2.close()
-                        if doc and doc.get('id_docente') == id_docente:
-                            resultados.append(row)
-        except Exception:
-            # En caso de error silencioso, dejar resultados vacíos
-            resultados = []
-    return render_template("profesor.html", resultados=resultados)
+        return jsonify(comentarios.buscar(cursor_lectura, request.args, id_docente=session.get('id_docente')))
+    except comentarios.ParametroInvalido as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@ruta("/profesor/comentarios/terminos")
+def terminos_profesor():
+    if session.get('tipo_usuario') != 'docente':
+        return jsonify({'error': 'No autorizado'}), 403
+    try:
+        return jsonify(comentarios.terminos(cursor_lectura, session.get('id_docente'), request.args))
+    except comentarios.ParametroInvalido as e:
+        return jsonify({'error': str(e)}), 400
 
 # Ruta para obtener semestres disponibles para evaluar a un docente
-@app.route("/semestres/<int:id_docente>")
+@ruta("/semestres/<int:id_docente>")
 def semestres_por_docente(id_docente):
     id_alumno = session.get('id_alumno')
     # Obtener el campus y semestre del alumno
-    cursor.execute("SELECT id_campus, numero_semestre FROM alumnos WHERE id_alumno = %s", (id_alumno,))
-    alumno = cursor.fetchone()
-    id_campus = alumno['id_campus'] if alumno else None
-    numero_semestre = alumno['numero_semestre'] if alumno else None
-    # Obtener solo los registros de materias_impartidas del docente que sean del mismo campus y mismo semestre
-    cursor.execute("""
-        SELECT * FROM materias_impartidas WHERE id_docente = %s AND id_campus = %s AND numero = %s
-    """, (id_docente, id_campus, numero_semestre))
-    semestres = cursor.fetchall()
-    # Obtener materias ya contestadas por el alumno
-    cursor.execute("""
-        SELECT id_materia_impartida FROM evaluacion WHERE id_alumno = %s AND id_docente = %s
-    """, (id_alumno, id_docente))
-    semestres_contestados = {row['id_materia_impartida'] for row in cursor.fetchall()}
-    # Filtrar semestres no contestados (usar clave 'id_materia_impartida' en los dicts)
-    semestres_filtrados = [s for s in semestres if s['id_materia_impartida'] not in semestres_contestados]
-    return jsonify(semestres_filtrados)
+    id_campus, numero_semestre = _campus_semestre_alumno(id_alumno)
+    if not id_campus or not numero_semestre:
+        return jsonify([])
+    # Materias ya contestadas por el alumno (única consulta); las del docente en el mismo campus y
+    # semestre salen del catálogo en memoria
+    version, _, evaluadas = cola_envios.combinar(catalogo_materias.estado_alumno(cursor, id_alumno), id_alumno)
+    grupo = catalogo_materias.grupo(cursor, id_campus, numero_semestre, version)
+    return jsonify(grupo.pendientes(id_docente, evaluadas))
 
 # Ruta para mostrar la encuesta de evaluación
-@app.route("/encuesta", methods=["POST"])
+@ruta("/encuesta", methods=["POST"])
 def encuesta():
     id_docente = request.form.get("id_docente")
     id_semestre = request.form.get("id_semestre")  # este valor corresponde a id_materia_impartida en BD
     id_alumno = session.get('id_alumno')
 
-    # Validar que el semestre corresponde al docente, ambos son del mismo campus y mismo semestre que el alumno
-    cursor.execute("SELECT id_campus, numero_semestre FROM alumnos WHERE id_alumno = %s", (id_alumno,))
-    alumno = cursor.fetchone()
-    id_campus = alumno['id_campus'] if alumno else None
-    numero_semestre = alumno['numero_semestre'] if alumno else None
-    cursor.execute("""
-        SELECT * FROM materias_impartidas WHERE id_materia_impartida = %s AND id_docente = %s AND id_campus = %s AND numero = %s
-    """, (id_semestre, id_docente, id_campus, numero_semestre))
-    semestre = cursor.fetchone()
+    # Validar (en el catálogo en memoria) que el semestre corresponde al docente, ambos son del mismo
+    # campus y mismo semestre que el alumno. La versión del catálogo viene con el estado del alumno,
+    # como en /semestres: una materia recién dada de alta no se rechaza mientras la caché no expira
+    id_campus, numero_semestre = _campus_semestre_alumno(id_alumno)
+    semestre = None
+    if id_campus and numero_semestre and (id_docente or "").isdigit() and (id_semestre or "").isdigit():
+        version, _, _ = catalogo_materias.estado_alumno(cursor, id_alumno)
+        grupo = catalogo_materias.grupo(cursor, id_campus, numero_semestre, version)
+        semestre = grupo.materia(int(id_docente), int(id_semestre))
     if not semestre:
         return "No tienes permiso para evaluar este semestre.", 403
 
     # Guardar temporalmente en sesión para que /guardar pueda crear la evaluación si el form no trae los hidden inputs
     session['pending_eval'] = {'id_docente': id_docente, 'id_semestre': id_semestre}
 
-    preguntas = [
-        "¿Qué tan claro y comprensible explica los temas durante la clase?",
-        "¿En qué medida domina el contenido de la materia que imparte?",
-        "¿Qué tan bien responde a las dudas o preguntas de los estudiantes?",
-        "¿Qué tan organizado(a) es al estructurar y presentar los contenidos?",
-        "¿Qué tanto fomenta la participación activa de los alumnos en clase?",
-        "¿En qué medida utiliza ejemplos prácticos o aplicaciones reales para explicar los temas?",
-        "¿Qué tan efectivo(a) es al utilizar recursos didácticos o tecnológicos para apoyar su enseñanza?",
-        "¿Qué tan justo(a) y claro(a) es al evaluar el desempeño de los estudiantes?",
-        "¿Qué tanto motiva a los estudiantes a interesarse en la materia?",
-        "¿Qué tan accesible y disponible está fuera de clase para apoyar a los estudiantes?"
-    ]
-
-    # Enviar id_docente e id_semestre al template; el backend creará la evaluación cuando se guarden las respuestas.
-    return render_template("encuesta.html", id_docente=id_docente, id_semestre=id_semestre, preguntas=preguntas)
+    # Formulario definido por el catálogo de preguntas (tabla preguntas)
+    preguntas = catalogo_preguntas.activas(cursor, 'docente')
+
+    # La página solo depende del catálogo (docente y materia viajan en pending_eval): se sirve desde
+    # la caché de páginas; el backend creará la evaluación cuando se guarden las respuestas.
+    return paginas.renderizar("encuesta.html", preguntas=preguntas)
 
 # Ruta para guardar respuestas y comentarios de la encuesta
-@app.route("/guardar", methods=["POST"])
+@ruta("/guardar", methods=["POST"])
+@cola_envios.admitir
 def guardar():
     # Si la plantilla envía id_eval (por compatibilidad), usarlo; si no, crear la evaluación ahora.
     id_eval = request.form.get("id_eval")
@@ -324,42 +251,61 @@ def guardar():
             id_docente = id_docente or pending.get('id_docente')
             id_semestre = id_semestre or pending.get('id_semestre')
 
-    # Si tenemos id_eval, obtener los ids asociados (por seguridad)
+    # Si tenemos id_eval, obtener los ids asociados (por seguridad, sólo evaluaciones del propio alumno)
     if id_eval and id_eval.strip() != "":
-        try:
-            cursor.execute("SELECT id_docente, id_materia_impartida FROM evaluacion WHERE id_evaluacion = %s", (id_eval,))
-            ev = cursor.fetchone()
-            if ev:
-                id_docente = id_docente or ev.get('id_docente')
-                # ev devuelve id_materia_impartida, mantenemos la variable id_semestre por compatibilidad de formularios
-                id_semestre = id_semestre or ev.get('id_materia_impartida')
-        except Exception:
-            pass
-
-    # Ahora validar que existan los datos necesarios para crear la evaluación si hace falta
-    if not id_eval or id_eval.strip() == "":
+        cursor.execute(SQL_EVALUACION_PROPIA, (id_eval, id_alumno))
+        ev = cursor.fetchone()
+        if not ev:
+            return "No tienes permiso para modificar esta evaluación.", 403
+        id_docente = id_docente or ev.get('id_docente')
+        # ev devuelve id_materia_impartida, mantenemos la variable id_semestre por compatibilidad de formularios
+        id_semestre = id_semestre or ev.get('id_materia_impartida')
+    else:
+        id_eval = None
+        # Validar que existan los datos necesarios para crear la evaluación
         if not id_docente or not id_semestre or not id_alumno:
             return "Datos insuficientes para registrar la evaluación.", 400
-        # Crear la evaluación (id_semestre contiene id_materia_impartida)
-        cursor.callproc("registrar_evaluacion", (int(id_docente), int(id_semestre), int(id_alumno)))
-        db.commit()
-        cursor.execute("SELECT LAST_INSERT_ID() AS id_eval")
-        id_eval = cursor.fetchone()['id_eval']
-
-    # Insertar respuestas
-    for key in request.form:
-        if key.startswith("pregunta_"):
-            pregunta = request.form.get(key, "").strip()
-            idx = key.split('_')[1]
-            escala = request.form.get(f"escala_{idx}", "").strip()
-            cursor.callproc("insertar_respuesta", (int(id_eval), pregunta, escala))
-    db.commit()
-
-    # Insertar comentario si existe
-    comentario = request.form.get("comentario")
-    if comentario and comentario.strip():
-        cursor.callproc("insertar_comentario", (int(id_eval), comentario.strip()))
-        db.commit()
+
+    comentario = (request.form.get("comentario") or "").strip()
+    respuestas = envios.respuestas_del_formulario(request.form, catalogo_preguntas.activas(cursor, 'docente'))
+    if not respuestas:
+        return "La encuesta no trae respuestas válidas.", 400
+    if cola_envios.ACTIVA:
+        # Envío diferido: la materia se valida contra el catálogo en memoria (los errores de la BD
+        # ya no llegarían al alumno) y la encuesta se deja en la cola local. La versión del catálogo
+        # viene con el estado del alumno, como en /semestres, para no rechazar materias recién dadas
+        # de alta mientras la caché no expira
+        id_campus, numero_semestre = _campus_semestre_alumno(id_alumno)
+        if not (str(id_docente).isdigit() and str(id_semestre).isdigit() and id_campus and numero_semestre):
+            return "La materia no corresponde a tu grupo.", 400
+        version, _, evaluadas = cola_envios.combinar(catalogo_materias.estado_alumno(cursor, id_alumno), id_alumno)
+        if not catalogo_materias.grupo(cursor, id_campus, numero_semestre, version).materia(int(id_docente), int(id_semestre)):
+            return "La materia no corresponde a tu grupo.", 400
+        if not id_eval and int(id_semestre) in evaluadas:
+            return "Ya registraste la evaluación de esta materia.", 409
+        try:
+            encolada = cola_envios.encolar('docente', int(id_alumno), int(id_semestre), {
+                'id_docente': int(id_docente), 'respuestas': respuestas, 'comentario': comentario or None,
+                'id_evaluacion': int(id_eval) if id_eval else None,
+            })
+        except cola_envios.ColaLlena:
+            return cola_envios.rechazo()
+        if not encolada:
+            return "Ya registraste la evaluación de esta materia.", 409
+    else:
+        # Encabezado + respuestas + comentario en una sola transacción (id_semestre contiene id_materia_impartida)
+        try:
+            envios.guardar_evaluacion_docente(
+                db, int(id_docente), int(id_semestre), int(id_alumno), respuestas,
+                comentario=comentario or None,
+                id_evaluacion=int(id_eval) if id_eval else None
+            )
+        except IntegrityError as e:
+            # uq_evaluacion_alumno_materia: el alumno ya evaluó esta materia. Cualquier otra
+            # violación (llave foránea, respuesta repetida) es un error del servidor
+            if not envios.es_duplicada(e):
+                raise
+            return "Ya registraste la evaluación de esta materia.", 409
 
     # Limpiar pending_eval de la sesión
     session.pop('pending_eval', None)
@@ -367,73 +313,109 @@ def guardar():
     return render_template("resultado.html")
 
 # Ruta para cerrar sesión
-@app.route("/logout")
+@ruta("/logout")
 def logout():
     session.clear()
     return redirect(url_for('login'))
 
 # Ruta para admin: muestra reporte general y estadísticas
-@app.route("/admin")
+@ruta("/admin")
 def admin():
     if session.get('tipo_usuario') != 'admin':
         return redirect(url_for('login'))
     mail_sent = request.args.get('mail_sent')
-    
-    # Obtener reporte de evaluaciones
-    cursor.callproc("reporte_admin_evaluacion")
-    evaluaciones = []
-    for result in cursor.stored_results():
-        evaluaciones = result.fetchall()
-    
-    # Obtener estadísticas 
-    cursor.callproc("estadisticas_evaluacion")
-    stats = {}
-    results = list(cursor.stored_results())
-    
-    if len(results) >= 6:
-        stats['total_campus'] = results[0].fetchone()['total_campus']
-        stats['total_alumnos'] = results[1].fetchone()['total_alumnos']
-        stats['por_campus'] = results[2].fetchall()
-        stats['por_carrera'] = results[3].fetchall()
-        stats['sin_evaluar'] = results[4].fetchall()            
-        stats['alumnos_estado'] = results[5].fetchall()         
-    else:
-        # Mantener compatibilidad si el procedimiento no devuelve el nuevo conjunto
-        stats['total_campus'] = None
-        stats['total_alumnos'] = None
-        stats['por_campus'] = []
-        stats['por_carrera'] = []
-        stats['sin_evaluar'] = []
-        stats['alumnos_estado'] = []
-
-    # Obtener reporte de maestros
-    maestros = []
+
+    # Primer render: solo contadores; las tablas se cargan por páginas desde /admin/tablas/<tabla>
+    resumen = reportes.resumen_admin(cursor_lectura)
+
+    return render_template("admin.html",
+                         stats=resumen['stats'],
+                         campus=resumen['campus'],
+                         carreras=resumen['carreras'],
+                         mail_sent=mail_sent,
+                         trabajo=request.args.get('trabajo', type=int))
+
+
+# Tablas del panel admin en JSON, por páginas (paginación por llave), con filtros y orden
+@ruta("/admin/tablas/<tabla>")
+def tabla_admin(tabla):
+    if session.get('tipo_usuario') != 'admin':
+        return jsonify({'error': 'No autorizado'}), 403
+    if tabla not in tablas_admin.TABLAS:
+        return jsonify({'error': 'Tabla no encontrada'}), 404
     try:
-        cursor.callproc("reporte_maestros_evaluados")
-        for res in cursor.stored_results():
-            maestros = res.fetchall()
-            break
-    except Exception:
-        maestros = []
+        return jsonify(tablas_admin.pagina(cursor_lectura, tabla, request.args))
+    except tablas_admin.ParametroInvalido as e:
+        return jsonify({'error': str(e)}), 400
 
-    # NUEVO: Obtener reporte de servicios
-    servicios = []
+
+# Búsqueda de comentarios (texto completo + filtros docente/materia/campus/fechas), por páginas
+@ruta("/admin/comentarios")
+def comentarios_admin():
+    if session.get('tipo_usuario') != 'admin':
+        return jsonify({'error': 'No autorizado'}), 403
     try:
-        cursor.callproc("reporte_admin_servicios")
-        for result in cursor.stored_results():
-            servicios = result.fetchall()
-    except Exception:
-        servicios = []
+        return jsonify(comentarios.buscar(cursor_lectura, request.args))
+    except comentarios.ParametroInvalido as e:
+        return jsonify({'error': str(e)}), 400
+
+
+# Términos más frecuentes en los comentarios de un docente
+@ruta("/admin/comentarios/terminos/<int:id_docente>")
+def terminos_admin(id_docente):
+    if session.get('tipo_usuario') != 'admin':
+        return jsonify({'error': 'No autorizado'}), 403
+    try:
+        return jsonify(comentarios.terminos(cursor_lectura, id_docente, request.args))
+    except comentarios.ParametroInvalido as e:
+        return jsonify({'error': str(e)}), 400
+
+
+# Analítica del panel admin en JSON: ranking de campus, distribución por pregunta y por docente
+@ruta("/admin/analitica")
+def analitica_admin():
+    if session.get('tipo_usuario') != 'admin':
+        return jsonify({'error': 'No autorizado'}), 403
+    return jsonify(analitica.resumen_admin() or {})
+
+
+# Métricas por ruta de este proceso (consultas, tiempo en BD, render, sentencia más lenta)
+@ruta("/admin/metricas")
+def metricas():
+    if session.get('tipo_usuario') != 'admin':
+        return redirect(url_for('login'))
+    return jsonify(perfilado.metricas())
+
+
+# Cola de envíos diferidos: profundidad por estado, antigüedad y contadores de admisión del proceso
+@ruta("/admin/cola")
+def metricas_cola():
+    if session.get('tipo_usuario') != 'admin':
+        return jsonify({'error': 'No autorizado'}), 403
+    return jsonify(cola_envios.metricas())
+
 
-    return render_template("admin.html", 
-                         evaluaciones=evaluaciones, 
-                         stats=stats, 
-                         maestros=maestros,
-                         servicios=servicios,
-                         mail_sent=mail_sent)
+# Exportación de reportes en CSV / JSON Lines, enviados por bloques conforme se leen de la BD.
+# Filtros opcionales: ?campus=<id_campus>&carrera=<id_carrera>&semestre=<numero>
+@ruta("/admin/export/<reporte>.<formato>")
+def exportar(reporte, formato):
+    if session.get('tipo_usuario') != 'admin':
+        return redirect(url_for('login'))
+    if reporte not in exportaciones.REPORTES or formato not in exportaciones.FORMATOS:
+        return "Reporte no disponible.", 404
+    # Los filtros se validan antes de empezar la descarga (después ya no se puede responder 400)
+    try:
+        sql, params = exportaciones.consulta(reporte, request.args)
+    except tablas_admin.ParametroInvalido as e:
+        return str(e), 400
+    return Response(
+        stream_with_context(exportaciones.generar(sql, params, formato)),
+        mimetype=exportaciones.FORMATOS[formato],
+        headers={'Content-Disposition': f'attachment; filename="{reporte}.{formato}"'}
+    )
 
 
-@app.route('/admin/enviar_reportes', methods=['POST'])
+@ruta('/admin/enviar_reportes', methods=['POST'])
 def enviar_reportes():
     if session.get('tipo_usuario') != 'admin':
         return redirect(url_for('login'))
@@ -445,185 +427,148 @@ def enviar_reportes():
         try:
             cursor.execute("SELECT correo FROM admin_users WHERE username = %s", ("admin",))
             row = cursor.fetchone()
-            if row:
-                recipients = [row[0]]
-        except Exception:
+            if row and row['correo']:
+                recipients = [row['correo']]
+        except errors.Error:
+            log.exception("No se pudo leer el correo de la cuenta admin")
             recipients = []
 
     if not recipients:
         return redirect(url_for('admin', mail_sent='no_recipients'))
 
-    # Recolectar los mismos datos que la vista admin
+    # Solo se encola: el reporte se genera y envía en segundo plano (ver correo.py)
     try:
-        cursor.callproc("reporte_admin_evaluacion")
-        evaluaciones = []
-        for result in cursor.stored_results():
-            evaluaciones = result.fetchall()
-
-        cursor.callproc("estadisticas_evaluacion")
-        stats = {}
-        results = list(cursor.stored_results())
-        if len(results) >= 6:
-            row0 = results[0].fetchone()
-            stats['total_campus'] = row0.get('total_campus') if row0 else None
-            row1 = results[1].fetchone()
-            stats['total_alumnos'] = row1.get('total_alumnos') if row1 else None
-            stats['por_campus'] = results[2].fetchall()
-            stats['por_carrera'] = results[3].fetchall()
-            stats['sin_evaluar'] = results[4].fetchall()
-            stats['alumnos_estado'] = results[5].fetchall()
-        else:
-            stats = {'total_campus':None,'total_alumnos':None,'por_campus':[],'por_carrera':[],'sin_evaluar':[],'alumnos_estado':[]}
-
-        maestros = []
-        try:
-            cursor.callproc("reporte_maestros_evaluados")
-            for res in cursor.stored_results():
-                maestros = res.fetchall()
-                break
-        except Exception:
-            maestros = []
-
-        servicios = []
-        try:
-            cursor.callproc("reporte_admin_servicios")
-            for result in cursor.stored_results():
-                servicios = result.fetchall()
-        except Exception:
-            servicios = []
-
-    except Exception as e:
-        print("ERROR SMTP REAL >>>", repr(e))
+        id_trabajo = correo.encolar(db, recipients, session.get('matricula'))
+    except Exception:
+        log.exception("No se pudo encolar el envío de reportes")
         return redirect(url_for('admin', mail_sent='error'))
 
-    # Construir contenido del correo
-    html = "<h2>Reporte de Evaluación Docente</h2>"
-
-    # Filtrar solo alumnos con pendientes 
-    alumnos_pendientes = []
-    if stats.get('alumnos_estado'):
-        for a in stats['alumnos_estado']:
-            try:
-                pend = int(a.get('pendientes') or 0)
-            except Exception:
-                try:
-                    pend = int(str(a.get('pendientes') or '0').strip())
-                except Exception:
-                    pend = 0
-            if pend > 0:
-                alumnos_pendientes.append(a)
-
-    if alumnos_pendientes:
-        html += "<h3>Alumnos pendientes</h3><table border='1' cellpadding='4' cellspacing='0'><tr><th>Matrícula</th><th>Nombre</th><th>Correo</th><th>Campus</th><th>Carrera</th><th>Requeridas</th><th>Completadas</th><th>Pendientes</th></tr>"
-        for a in alumnos_pendientes:
-            html += f"<tr><td>{a.get('matricula','')}</td><td>{a.get('nombre','')} {a.get('apellidop','')}</td><td>{a.get('correo','')}</td><td>{a.get('campus','')}</td><td>{a.get('carrera','')}</td><td>{a.get('total_requerido','')}</td><td>{a.get('completadas','')}</td><td>{a.get('pendientes','')}</td></tr>"
-        html += "</table>"
-
-    if evaluaciones:
-        html += "<h3>Evaluaciones</h3><table border='1' cellpadding='4' cellspacing='0'><tr>"
-        first = evaluaciones[0]
-        for k in first.keys():
-            html += f"<th>{k}</th>"
-        html += "</tr>"
-        for row in evaluaciones:
-            html += "<tr>"
-            for v in row.values():
-                html += f"<td>{v}</td>"
-            html += "</tr>"
-        html += "</table>"
-
-    text = "Reporte de Evaluación Docente\n"
-    text += f"Total campus: {stats.get('total_campus')}\nTotal alumnos: {stats.get('total_alumnos')}\n\n"
-    if alumnos_pendientes:
-        text += "Alumnos pendientes:\n"
-        for a in alumnos_pendientes:
-            text += f"- {a.get('matricula','')} {a.get('nombre','')} {a.get('apellidop','')} | {a.get('correo','')} | pendientes: {a.get('pendientes','')}\n"
-
-    smtp_server = os.environ.get('SMTP_SERVER')
-    smtp_port = int(os.environ.get('SMTP_PORT')) if os.environ.get('SMTP_PORT') else None
-    smtp_user = os.environ.get('SMTP_USER')
-    smtp_pass = os.environ.get('SMTP_PASSWORD')
-    sender = os.environ.get('SENDER_EMAIL') or smtp_user or 'no-reply@example.com'
-
-    msg = EmailMessage()
-    msg['Subject'] = 'Reportes - Evaluación Docente'
-    msg['From'] = sender
-    msg['To'] = ', '.join(recipients)
-    msg.set_content(text)
-    msg.add_alternative(html, subtype='html')
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({'id_trabajo': id_trabajo,
+                        'estado': url_for('estado_envio_reportes', id_trabajo=id_trabajo)}), 202
+    return redirect(url_for('admin', mail_sent='encolado', trabajo=id_trabajo))
 
-    try:
-        if smtp_server and smtp_port:
-            if smtp_port == 465:
-                with smtplib.SMTP_SSL(smtp_server, smtp_port) as s:
-                    if smtp_user and smtp_pass:
-                        s.login(smtp_user, smtp_pass)
-                    s.send_message(msg)
-            else:
-                with smtplib.SMTP(smtp_server, smtp_port) as s:
-                    s.ehlo()
-                    if smtp_port == 587:
-                        s.starttls()
-                    if smtp_user and smtp_pass:
-                        s.login(smtp_user, smtp_pass)
-                    s.send_message(msg)
-        else:
-            with smtplib.SMTP('localhost') as s:
-                s.send_message(msg)
-    except Exception:
-        return redirect(url_for('admin', mail_sent='error'))
 
-    return redirect(url_for('admin', mail_sent='ok'))
+# Estado de un envío de reportes encolado (para consultarlo periódicamente desde el panel)
+@ruta('/admin/enviar_reportes/<int:id_trabajo>')
+def estado_envio_reportes(id_trabajo):
+    if session.get('tipo_usuario') != 'admin':
+        return jsonify({'error': 'No autorizado'}), 403
+    trabajo = correo.estado(cursor, id_trabajo)
+    if trabajo is None:
+        return jsonify({'error': 'Trabajo no encontrado'}), 404
+    return jsonify(trabajo)
 
 # Soporte GET y POST para mostrar el formulario de servicios 
-@app.route("/encuesta_servicios", methods=["GET", "POST"])
+@ruta("/encuesta_servicios", methods=["GET", "POST"])
 def encuesta_servicios():
     if session.get('tipo_usuario') != 'alumno':
         return redirect(url_for('login'))
     id_alumno = session.get('id_alumno')
     # comprobar si ya hizo la encuesta de servicios
-    cursor.execute("SELECT 1 FROM evaluacion_servicios WHERE id_alumno = %s", (id_alumno,))
-    if cursor.fetchone():
+    cursor.execute(SQL_SERVICIOS_CONTESTADA, (id_alumno,))
+    if cursor.fetchone() or cola_envios.en_cola(id_alumno)[1]:
         return render_template("finale.html")
-    preguntas = [
-        "¿Cómo califica la limpieza general de las instalaciones?",
-        "¿Qué tan adecuadas son las instalaciones para el desarrollo académico?",
-        "¿Cómo evalúa el servicio de biblioteca?",
-        "¿Qué tan eficiente es el servicio de control escolar?",
-        "¿Cómo califica la atención del personal administrativo?",
-        "¿Qué tan bueno es el servicio de cafetería?",
-        "¿Cómo evalúa la seguridad dentro del campus?",
-        "¿Qué tan adecuado es el equipamiento de los laboratorios?",
-        "¿Cómo califica el servicio de internet y recursos tecnológicos?",
-        "¿Qué tan eficiente es el proceso de inscripción y reinscripción?"
-    ]
-    return render_template("servicios.html", preguntas=preguntas)
+    preguntas = catalogo_preguntas.activas(cursor, 'servicios')
+    return paginas.renderizar("servicios.html", preguntas=preguntas)
 
 # Guardar respuestas de la encuesta de servicios
-@app.route("/guardar_servicios", methods=["POST"])
+@ruta("/guardar_servicios", methods=["POST"])
+@cola_envios.admitir
 def guardar_servicios():
     if session.get('tipo_usuario') != 'alumno':
         return redirect(url_for('login'))
     id_alumno = session.get('id_alumno')
     # obtener campus alumno
-    cursor.execute("SELECT id_campus FROM alumnos WHERE id_alumno = %s", (id_alumno,))
-    row = cursor.fetchone()
-    id_campus = row['id_campus'] if row else None
-    # insertar evaluacion_servicios
-    cursor.execute("INSERT INTO evaluacion_servicios (id_alumno, id_campus) VALUES (%s, %s)", (id_alumno, id_campus))
-    db.commit()
-    id_eval_serv = cursor.lastrowid
-    # insertar respuestas_servicios
-    for key in request.form:
-        if key.startswith("pregunta_"):
-            pregunta = request.form.get(key, "").strip()
-            idx = key.split('_')[1]
-            escala = request.form.get(f"escala_{idx}", "").strip()
-            cursor.execute("INSERT INTO respuestas_servicios (id_evaluacion_servicios, pregunta, escala) VALUES (%s, %s, %s)",
-                           (id_eval_serv, pregunta, escala))
-    db.commit()
+    id_campus, _ = _campus_semestre_alumno(id_alumno)
+    respuestas = envios.respuestas_del_formulario(request.form, catalogo_preguntas.activas(cursor, 'servicios'))
+    if not respuestas:
+        return "La encuesta no trae respuestas válidas.", 400
+    if cola_envios.ACTIVA:
+        if not id_campus:
+            return "Datos insuficientes para registrar la evaluación.", 400
+        try:
+            encolada = cola_envios.encolar('servicios', int(id_alumno), None,
+                                           {'id_campus': id_campus, 'respuestas': respuestas})
+        except cola_envios.ColaLlena:
+            return cola_envios.rechazo()
+        if not encolada:
+            return "Ya registraste la encuesta de servicios.", 409
+        return render_template("resultado.html")
+    # evaluacion_servicios + respuestas_servicios en una sola transacción
+    try:
+        envios.guardar_evaluacion_servicios(db, id_alumno, id_campus, respuestas)
+    except IntegrityError as e:
+        # uq_evaluacion_servicios_alumno: el alumno ya contestó la encuesta de servicios
+        if not envios.es_duplicada(e):
+            raise
+        return "Ya registraste la encuesta de servicios.", 409
     return render_template("resultado.html")
 
+# Liveness: el proceso responde (sin tocar la BD)
+@ruta("/healthz")
+def healthz():
+    return jsonify({'estado': 'ok'})
+
+
+# Readiness: la BD responde y el worker terminó de calentar (si APP_CALENTAR=1)
+@ruta("/readyz")
+def readyz():
+    listo, detalle = arranque.estado_listo(cursor)
+    return jsonify(dict(detalle, estado='ok' if listo else 'no_listo')), 200 if listo else 503
+
+
+# Comando para crear (o restablecer) la cuenta admin; antes se hacía al importar este módulo
+@click.command("crear-admin")
+@click.option("--password", envvar="ADMIN_PASSWORD", default="admin1", show_default=True,
+              help="Contraseña de la cuenta admin (o variable ADMIN_PASSWORD)")
+@click.option("--reemplazar", is_flag=True, help="Cambiar la contraseña aunque ya tenga una")
+@click.option("--correo", help="Correo de la cuenta admin (destinatario por defecto de los reportes)")
+def crear_admin(password, reemplazar, correo):
+    """Crea la cuenta admin en admin_users con la contraseña hasheada."""
+    try:
+        conn = conexion.tomar_conexion()
+        try:
+            cur = conn.cursor(dictionary=True)
+            resultado = autenticacion.sembrar_admin(cur, password, reemplazar)
+            if correo:
+                autenticacion.asignar_correo_admin(cur, correo)
+            conn.commit()
+            cur.close()
+        finally:
+            conn.close()
+    except errors.Error as e:
+        raise click.ClickException(f"No se pudo crear la cuenta admin: {e}")
+    click.echo({'creado': "Cuenta admin creada.", 'actualizado': "Contraseña de admin actualizada."}
+               .get(resultado, "La cuenta admin ya tiene contraseña (usar --reemplazar para cambiarla)."))
+
+
+def crear_app(calentar=None):
+    """Construye la app: registra rutas, hooks y comandos sin abrir conexiones.
+
+    Con `calentar` (por defecto APP_CALENTAR) compila plantillas y carga los catálogos en un hilo.
+    """
+    # Los estáticos se sirven desde memoria con huella de contenido (estaticos.py)
+    app = Flask(__name__, static_folder=None)
+    app.secret_key = "supersecretkey"
+    # Prefijo de la API asíncrona del alumno para index.html ("/api" al servir con asgi.py)
+    app.config['API_ALUMNO_PREFIJO'] = os.environ.get("API_ALUMNO_PREFIJO", "")
+    conexion.init_app(app)
+    perfilado.init_app(app)
+    correo.init_app(app)
+    cola_envios.init_app(app)
+    estaticos.init_app(app, os.path.join(app.root_path, "static"))
+    for regla, vista, opciones in _rutas:
+        app.add_url_rule(regla, view_func=vista, **opciones)
+    app.cli.add_command(crear_admin)
+    if arranque.CALENTAR if calentar is None else calentar:
+        arranque.iniciar_calentamiento(app)
+    return app
+
+
+# Instancia para `gunicorn evaluacion:app` y `flask --app evaluacion`
+app = crear_app()
+
 # Ejecución de la app Flask en modo debug
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Exportación de reportes del panel admin en CSV o JSON Lines. Las filas se leen con un
+cursor sin buffer (del lado del servidor) en bloques y se envían conforme llegan, así que la
+memoria usada no depende del tamaño del reporte. Los filtros por campus, carrera y semestre se
+aplican en el WHERE de la consulta; un valor que no se puede interpretar se rechaza (400) antes de
+empezar la descarga. El reporte de evaluaciones lee los contadores por materia
+(reporte_docente_materias_vm), no agrupa las respuestas.
+"""
+
+import csv
+import io
+import json
+
+from mysql.connector import errors
+
+import conexion
+from tablas_admin import ParametroInvalido
+
+# Filas leídas del servidor por cada vuelta (y por cada fragmento enviado al cliente)
+TAMANO_BLOQUE = 500
+
+SEMESTRES = frozenset("123456789")
+
+
+def _semestre(valor):
+    if valor not in SEMESTRES:
+        raise ValueError(valor)
+    return valor
+
+
+# Filtros de cada reporte: nombre -> (condición, conversión del parámetro), como en tablas_admin
+FILTROS_MATERIA = {
+    'campus': ("s.id_campus = %s", int),
+    'carrera': ("s.id_carrera = %s", int),
+    'semestre': ("s.numero = %s", _semestre),
+}
+FILTROS_ALUMNO = {
+    'campus': ("a.id_campus = %s", int),
+    'carrera': ("a.id_carrera = %s", int),
+    'semestre': ("a.numero_semestre = %s", _semestre),
+}
+
+# Reporte -> (consulta con {filtros}, filtros)
+REPORTES = {
+    # Mismo cálculo que reporte_admin_evaluacion, desde los contadores que mantiene el trigger de respuestas
+    'evaluaciones': ("""
+        SELECT d.id_docente,
+               d.nombre AS nombre_docente,
+               d.apellidop,
+               d.apellidom,
+               s.numero AS semestre_numero,
+               s.materia,
+               s.curso,
+               s.fecha_i,
+               s.fecha_fin,
+               c.nombre AS campus_nombre,
+               rm.suma_puntos AS total_puntos,
+               rm.total_respuestas,
+               ROUND(rm.suma_puntos / NULLIF(rm.total_calificadas, 0), 2) AS promedio,
+               CASE
+                   WHEN rm.suma_puntos / NULLIF(rm.total_calificadas, 0) >= 4.5 THEN 'Asignación de materias'
+                   WHEN rm.suma_puntos / NULLIF(rm.total_calificadas, 0) >= 3.0 THEN 'En valoración'
+                   ELSE 'Sin asignación'
+               END AS estatus_docente
+        FROM reporte_docente_materias_vm rm
+        JOIN docentes d ON d.id_docente = rm.id_docente
+        JOIN materias_impartidas s ON s.id_materia_impartida = rm.id_materia_impartida
+        JOIN campus c ON d.id_campus = c.id_campus
+        {filtros}
+        ORDER BY rm.id_docente, rm.id_materia_impartida
+    """, FILTROS_MATERIA),
+    # Mismo cálculo que el estado por alumno de estadisticas_evaluacion
+    'alumnos': ("""
+        SELECT a.id_alumno,
+               a.matricula,
+               a.nombre,
+               a.apellidop,
+               a.correo,
+               c.nombre AS campus,
+               ca.nombre AS carrera,
+               a.numero_semestre,
+               COALESCE(p.total_requerido, 0) AS total_requerido,
+               COALESCE(p.completadas, 0) AS completadas,
+               COALESCE(p.total_requerido, 0) - COALESCE(p.completadas, 0) AS pendientes,
+               COALESCE(p.servicios_completado, 0) AS servicios_completado
+        FROM alumnos a
+        LEFT JOIN progreso_alumnos p ON p.id_alumno = a.id_alumno
+        LEFT JOIN campus c ON a.id_campus = c.id_campus
+        LEFT JOIN carreras ca ON a.id_carrera = ca.id_carrera
+        {filtros}
+        ORDER BY a.id_alumno
+    """, FILTROS_ALUMNO),
+}
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+def consulta(reporte, args):
+    """SQL y parámetros del reporte con los filtros de `args` (campus, carrera, semestre) que no
+    vengan vacíos. Lanza ParametroInvalido si un valor no se puede interpretar."""
+    sql, filtros = REPORTES[reporte]
+    condiciones, params = [], []
+    for nombre, (condicion, conversion) in filtros.items():
+        valor = (args.get(nombre) or '').strip()
+        if not valor:
+            continue
+        try:
+            params.append(conversion(valor))
+        except ValueError:
+            raise ParametroInvalido(f"Filtro {nombre} no válido: {valor}")
+        condiciones.append(condicion)
+    where = "WHERE " + " AND ".join(condiciones) if condiciones else ""
+    return sql.format(filtros=where), tuple(params)
+
+
+def filas(sql, params):
+    """Generador: primero los nombres de las columnas y después bloques de filas (dict), leídos con
+    un cursor sin buffer y su propia conexión (de la réplica de lectura si está disponible)."""
+    conn = conexion.tomar_conexion_lectura()
+    cur = conn.cursor(dictionary=True, buffered=False)
+    try:
+        cur.execute(sql, params)
+        yield list(cur.column_names)
+        while True:
+            bloque = cur.fetchmany(TAMANO_BLOQUE)
+            if not bloque:
+                break
+            yield bloque
+    finally:
+        # Si el cliente cortó la descarga quedan filas pendientes: descartarlas antes de devolver la conexión
+        try:
+            conn.consume_results()
+            cur.close()
+        except errors.Error:
+            pass
+        conn.close()
+
+
+def _csv(bloques):
+    # El encabezado va aunque el reporte no tenga filas
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=next(bloques))
+    writer.writeheader()
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for bloque in bloques:
+        writer.writerows(bloque)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _jsonl(bloques):
+    next(bloques)
+    for bloque in bloques:
+        yield "".join(json.dumps(fila, default=str, ensure_ascii=False) + "\n" for fila in bloque)
+
+
+def generar(sql, params, formato):
+    """Generador de fragmentos de texto del reporte (sql, params de consulta()) en el formato pedido."""
+    bloques = filas(sql, params)
+    return _csv(bloques) if formato == 'csv' else _jsonl(bloques)
@@ -0,0 +1,121 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Catálogo en memoria de las materias impartidas por (campus, semestre) con sus docentes.
+Cambia una vez por semestre pero se consulta en cada clic del alumno, así que se guarda en una
+caché con TTL y LRU. La tabla catalogo_version (la incrementan los triggers al cambiar materias o
+docentes) viaja en la misma consulta del estado del alumno: si cambió, el grupo se vuelve a leer.
+"""
+
+import os
+
+from cache import CacheTTL
+
+# Segundos que se reutiliza un grupo sin comprobar la versión y grupos (campus, semestre) en memoria
+CACHE_TTL = float(os.environ.get("MATERIAS_CACHE_TTL", "600"))
+CACHE_MAX = int(os.environ.get("MATERIAS_CACHE_MAX", "256"))
+
+_cache = CacheTTL(ttl=CACHE_TTL, max_entradas=CACHE_MAX)
+
+SQL_GRUPO = """
+    SELECT s.id_materia_impartida, s.id_docente, s.numero, s.materia, s.curso, s.fecha_i, s.fecha_fin,
+           s.id_campus, s.id_carrera, d.nombre, d.apellidop, d.apellidom
+    FROM materias_impartidas s
+    JOIN docentes d ON d.id_docente = s.id_docente
+    WHERE s.id_campus = %(id_campus)s AND s.numero = %(numero)s
+    ORDER BY d.nombre, d.apellidop, s.id_materia_impartida
+"""
+
+# Única consulta por petición del alumno: versión del catálogo, encuesta de servicios y materias
+# ya evaluadas (una fila por materia; si no hay, una fila con id_materia_impartida NULL)
+SQL_ALUMNO = """
+    SELECT v.version,
+           EXISTS (SELECT 1 FROM evaluacion_servicios es WHERE es.id_alumno = %(id_alumno)s) AS servicios_completado,
+           e.id_materia_impartida
+    FROM catalogo_version v
+    LEFT JOIN evaluacion e ON e.id_alumno = %(id_alumno)s
+    WHERE v.id = 1
+"""
+
+# Columnas de materias_impartidas (lo que devuelve /semestres); el resto son datos del docente
+COLUMNAS_MATERIA = ('id_materia_impartida', 'id_docente', 'numero', 'materia', 'curso', 'fecha_i',
+                    'fecha_fin', 'id_campus', 'id_carrera')
+
+
+class Grupo:
+    """Materias de un (campus, semestre) indexadas por id y por docente."""
+
+    def __init__(self, version, filas):
+        self.version = version
+        self.materias = {}
+        self.por_docente = {}
+        self.docentes = []
+        for fila in filas:
+            materia = {c: fila[c] for c in COLUMNAS_MATERIA}
+            self.materias[materia['id_materia_impartida']] = materia
+            if materia['id_docente'] not in self.por_docente:
+                self.por_docente[materia['id_docente']] = []
+                self.docentes.append({'id_docente': fila['id_docente'], 'nombre': fila['nombre'],
+                                      'apellidop': fila['apellidop'], 'apellidom': fila['apellidom']})
+            self.por_docente[materia['id_docente']].append(materia)
+
+    def materia(self, id_docente, id_materia):
+        """La materia si pertenece al grupo y la imparte el docente; si no, None."""
+        materia = self.materias.get(id_materia)
+        return materia if materia and materia['id_docente'] == id_docente else None
+
+    def pendientes(self, id_docente, evaluadas):
+        """Materias del docente en el grupo que el alumno no ha evaluado."""
+        return [m for m in self.por_docente.get(id_docente, []) if m['id_materia_impartida'] not in evaluadas]
+
+    def docentes_pendientes(self, evaluadas):
+        """Docentes (ordenados por nombre) con al menos una materia sin evaluar."""
+        return [d for d in self.docentes if self.pendientes(d['id_docente'], evaluadas)]
+
+
+def estado_alumno(cur, id_alumno):
+    """(versión del catálogo, encuesta de servicios contestada, set de materias evaluadas)."""
+    cur.execute(SQL_ALUMNO, {'id_alumno': id_alumno})
+    return estado_de_filas(cur.fetchall())
+
+
+def estado_de_filas(filas):
+    """estado_alumno a partir de las filas de SQL_ALUMNO."""
+    if not filas:
+        return None, False, set()
+    evaluadas = {f['id_materia_impartida'] for f in filas if f['id_materia_impartida'] is not None}
+    return filas[0]['version'], bool(filas[0]['servicios_completado']), evaluadas
+
+
+def vigente(id_campus, numero, version=None):
+    """Grupo en caché si no expiró y su versión coincide con `version` (si se indica); si no, None."""
+    actual = _cache.obtener((int(id_campus), str(numero)))
+    if actual is None or (version is not None and actual.version != version):
+        return None
+    return actual
+
+
+def guardar(id_campus, numero, version, filas):
+    """Construye el Grupo con las filas de SQL_GRUPO y lo deja en la caché."""
+    actual = Grupo(version, filas)
+    _cache.guardar((int(id_campus), str(numero)), actual)
+    return actual
+
+
+def parametros_grupo(id_campus, numero):
+    """Parámetros de SQL_GRUPO."""
+    return {'id_campus': int(id_campus), 'numero': str(numero)}
+
+
+def grupo(cur, id_campus, numero, version=None):
+    """Grupo (campus, semestre) desde la caché; se vuelve a leer si expiró o si `version` (de
+    estado_alumno) no coincide con la versión con la que se cargó."""
+    actual = vigente(id_campus, numero, version)
+    if actual is None:
+        cur.execute(SQL_GRUPO, parametros_grupo(id_campus, numero))
+        actual = guardar(id_campus, numero, version, cur.fetchall())
+    return actual
+
+
+def invalidar(id_campus=None, numero=None):
+    """Descarta un grupo, o todo el catálogo si no se indica grupo."""
+    _cache.invalidar(None if id_campus is None else (int(id_campus), str(numero)))
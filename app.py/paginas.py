@@ -0,0 +1,39 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Caché de páginas renderizadas para las encuestas. encuesta.html y servicios.html solo
+dependen del catálogo de preguntas activas, así que se renderizan una vez por versión del catálogo
+y se guardan ya comprimidas con su ETag; las peticiones siguientes no pasan por Jinja y un GET con
+If-None-Match igual recibe 304.
+"""
+
+import hashlib
+import json
+import os
+
+from flask import render_template
+
+import estaticos
+from cache import CacheTTL
+
+CACHE_TTL = float(os.environ.get("PAGINAS_CACHE_TTL", "600"))
+
+_cache = CacheTTL(ttl=CACHE_TTL, max_entradas=64)
+
+
+def renderizar(plantilla, **contexto):
+    """Como render_template, pero cacheado por (plantilla, contexto). El contexto debe ser el mismo
+    para todos los usuarios que vean la página (nada de datos de la sesión)."""
+    clave = (plantilla, json.dumps(contexto, sort_keys=True, default=str))
+    pagina = _cache.obtener(clave)
+    if pagina is None:
+        cuerpo = render_template(plantilla, **contexto).encode("utf-8")
+        pagina = (estaticos.comprimir(cuerpo), hashlib.sha256(cuerpo).hexdigest()[:32])
+        _cache.guardar(clave, pagina)
+    variantes, etag = pagina
+    # private: la página solo se muestra con sesión; no-cache: el navegador revalida con el ETag
+    return estaticos.respuesta(variantes, "text/html; charset=utf-8", etag, "private, no-cache")
+
+
+def invalidar():
+    """Descarta las páginas en caché (se regeneran en la siguiente petición)."""
+    _cache.invalidar()
@@ -0,0 +1,24 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Página de inicio del alumno: avance, estado de la encuesta de servicios y docentes con
+materias pendientes de evaluar. Las materias del grupo salen del catálogo en memoria (materias.py);
+la única consulta es la del estado del alumno.
+"""
+
+import cola_envios
+import materias as catalogo_materias
+
+
+def resolver(cur, id_alumno, id_campus, numero_semestre):
+    """Devuelve {'total', 'completadas', 'servicios_completado', 'docentes'} en un solo round trip."""
+    # Lo que el alumno tiene en la cola de envíos diferidos cuenta como contestado
+    version, servicios_completado, evaluadas = cola_envios.combinar(
+        catalogo_materias.estado_alumno(cur, id_alumno), id_alumno)
+    grupo = catalogo_materias.grupo(cur, id_campus, numero_semestre, version)
+    return {
+        # Mismo criterio que progreso_alumnos: materias del campus/semestre y cuántas ya evaluó
+        'total': len(grupo.materias),
+        'completadas': len(evaluadas & grupo.materias.keys()),
+        'servicios_completado': servicios_completado,
+        'docentes': grupo.docentes_pendientes(evaluadas),
+    }
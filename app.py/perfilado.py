@@ -0,0 +1,168 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Instrumentación por petición. Envuelve los cursores para contar sentencias y medir el
+tiempo en la BD, mide el tiempo de render de plantillas, agrega la cabecera Server-Timing, acumula
+métricas por ruta para el panel admin y registra las peticiones lentas con su SQL y parámetros.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from flask import g, has_app_context, request, before_render_template, template_rendered
+
+# Peticiones que tarden más que esto (ms) se escriben en el log con todas sus sentencias
+UMBRAL_LENTO_MS = float(os.environ.get("PERFIL_LENTO_MS", "500"))
+# Máximo de sentencias que se conservan por petición para el log de lentas
+MAX_SENTENCIAS = 50
+
+log = logging.getLogger("evaluacion.lentas")
+
+_metricas = {}
+_metricas_lock = threading.Lock()
+
+
+def _perfil():
+    if has_app_context():
+        return g.get("perfil")
+    return None
+
+
+def _registrar(sql, params, segundos):
+    perfil = _perfil()
+    if perfil is None:
+        return
+    perfil["consultas"] += 1
+    perfil["tiempo_db"] += segundos
+    if len(perfil["sentencias"]) < MAX_SENTENCIAS:
+        perfil["sentencias"].append((segundos, sql, params))
+    if perfil["mas_lenta"] is None or segundos > perfil["mas_lenta"][0]:
+        perfil["mas_lenta"] = (segundos, sql, params)
+
+
+class CursorPerfilado:
+    """Cursor que mide execute/executemany/callproc; el resto se delega al cursor original."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            _registrar(operation, params, time.perf_counter() - inicio)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            filas = len(seq_params) if hasattr(seq_params, "__len__") else "?"
+            _registrar(operation, f"<{filas} filas>", time.perf_counter() - inicio)
+
+    def callproc(self, procname, args=()):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.callproc(procname, args)
+        finally:
+            _registrar(f"CALL {procname}", args, time.perf_counter() - inicio)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+
+class ConexionPerfilada:
+    """Conexión cuyos cursores se miden; el resto se delega a la conexión original."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return CursorPerfilado(self._conn.cursor(*args, **kwargs))
+
+    def __getattr__(self, nombre):
+        return getattr(self._conn, nombre)
+
+
+def _iniciar_peticion():
+    g.perfil = {"inicio": time.perf_counter(), "consultas": 0, "tiempo_db": 0.0, "render": 0.0,
+                "render_inicio": None, "mas_lenta": None, "sentencias": []}
+
+
+def _inicio_render(sender, template, context, **extra):
+    perfil = _perfil()
+    if perfil is not None:
+        perfil["render_inicio"] = time.perf_counter()
+
+
+def _fin_render(sender, template, context, **extra):
+    perfil = _perfil()
+    if perfil is not None and perfil["render_inicio"] is not None:
+        perfil["render"] += time.perf_counter() - perfil["render_inicio"]
+        perfil["render_inicio"] = None
+
+
+def _terminar_peticion(response):
+    perfil = _perfil()
+    if perfil is None:
+        return response
+    total = time.perf_counter() - perfil["inicio"]
+    db_ms = perfil["tiempo_db"] * 1000
+    render_ms = perfil["render"] * 1000
+    total_ms = total * 1000
+    response.headers["Server-Timing"] = (
+        f'db;dur={db_ms:.2f};desc="{perfil["consultas"]} consultas", '
+        f'render;dur={render_ms:.2f}, total;dur={total_ms:.2f}'
+    )
+
+    ruta = request.url_rule.rule if request.url_rule else request.path
+    clave = f"{request.method} {ruta}"
+    with _metricas_lock:
+        m = _metricas.setdefault(clave, {"peticiones": 0, "consultas": 0, "tiempo_total_ms": 0.0,
+                                         "tiempo_db_ms": 0.0, "tiempo_render_ms": 0.0, "maximo_ms": 0.0,
+                                         "sentencia_mas_lenta": None, "sentencia_mas_lenta_ms": 0.0})
+        m["peticiones"] += 1
+        m["consultas"] += perfil["consultas"]
+        m["tiempo_total_ms"] += total_ms
+        m["tiempo_db_ms"] += db_ms
+        m["tiempo_render_ms"] += render_ms
+        m["maximo_ms"] = max(m["maximo_ms"], total_ms)
+        if perfil["mas_lenta"] and perfil["mas_lenta"][0] * 1000 > m["sentencia_mas_lenta_ms"]:
+            m["sentencia_mas_lenta_ms"] = perfil["mas_lenta"][0] * 1000
+            m["sentencia_mas_lenta"] = " ".join(str(perfil["mas_lenta"][1]).split())
+
+    if total_ms >= UMBRAL_LENTO_MS:
+        detalle = "\n".join(
+            f"    {seg * 1000:8.2f} ms  {' '.join(str(sql).split())}  {params!r}"
+            for seg, sql, params in perfil["sentencias"]
+        )
+        log.warning("Petición lenta %s: %.2f ms (db %.2f ms en %d consultas, render %.2f ms)\n%s",
+                    clave, total_ms, db_ms, perfil["consultas"], render_ms, detalle)
+    return response
+
+
+def metricas():
+    """Métricas acumuladas por ruta en este proceso (promedios calculados al vuelo)."""
+    with _metricas_lock:
+        salida = {}
+        for clave, m in _metricas.items():
+            n = m["peticiones"] or 1
+            salida[clave] = dict(m,
+                                 consultas_promedio=round(m["consultas"] / n, 2),
+                                 promedio_ms=round(m["tiempo_total_ms"] / n, 2),
+                                 db_promedio_ms=round(m["tiempo_db_ms"] / n, 2),
+                                 render_promedio_ms=round(m["tiempo_render_ms"] / n, 2))
+        return salida
+
+
+def init_app(app):
+    """Registra los hooks de perfilado en la app."""
+    app.before_request(_iniciar_peticion)
+    app.after_request(_terminar_peticion)
+    before_render_template.connect(_inicio_render, app)
+    template_rendered.connect(_fin_render, app)
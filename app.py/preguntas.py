@@ -0,0 +1,34 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Catálogo versionado de preguntas de las encuestas (tabla preguntas). Las preguntas
+activas de cada tipo ('docente', 'servicios') definen los formularios; como casi nunca cambian
+se guardan en una caché con TTL.
+"""
+
+import os
+
+from cache import CacheTTL
+
+# Segundos que se reutiliza el catálogo antes de volver a leerlo
+CACHE_TTL = float(os.environ.get("PREGUNTAS_CACHE_TTL", "300"))
+
+_cache = CacheTTL(ttl=CACHE_TTL)
+
+SQL_ACTIVAS = """
+    SELECT id_pregunta, texto FROM preguntas
+    WHERE tipo = %s AND activa = 1
+    ORDER BY orden
+"""
+
+
+def activas(cur, tipo):
+    """Preguntas activas de un tipo en orden: lista de {'id_pregunta', 'texto'}."""
+    def consultar():
+        cur.execute(SQL_ACTIVAS, (tipo,))
+        return cur.fetchall()
+    return _cache.obtener_o_calcular(tipo, consultar)
+
+
+def invalidar():
+    """Descarta el catálogo en caché (después de publicar una nueva versión de preguntas)."""
+    _cache.invalidar()
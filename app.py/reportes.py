@@ -0,0 +1,79 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Capa de datos de reportes del panel administrativo: contadores del primer render y
+reporte completo para el correo. Los resultados se guardan en una caché con TTL (no se invalida
+por cada encuesta: en campaña eso obligaría a recalcular en casi cada visita al panel); las tablas
+por páginas están en tablas_admin.py.
+"""
+
+import os
+
+from cache import CacheTTL
+
+# Segundos que se reutiliza el reporte del panel admin antes de volver a consultar la BD
+CACHE_TTL = float(os.environ.get("REPORTES_CACHE_TTL", "60"))
+
+_cache = CacheTTL(ttl=CACHE_TTL)
+
+
+def _resultados_procedimiento(cur, nombre, args=()):
+    """Ejecuta un procedimiento y devuelve la lista de result sets (cada uno como lista de filas)."""
+    cur.callproc(nombre, args)
+    return [result.fetchall() for result in cur.stored_results()]
+
+
+def reporte_evaluaciones(cur):
+    """Promedio por docente y materia impartida (reporte_admin_evaluacion)."""
+    resultados = _resultados_procedimiento(cur, "reporte_admin_evaluacion")
+    return resultados[-1] if resultados else []
+
+
+def estadisticas(cur):
+    """Estadísticas generales del procedimiento estadisticas_evaluacion."""
+    results = _resultados_procedimiento(cur, "estadisticas_evaluacion")
+    if len(results) >= 6:
+        return {
+            'total_campus': results[0][0]['total_campus'] if results[0] else None,
+            'total_alumnos': results[1][0]['total_alumnos'] if results[1] else None,
+            'por_campus': results[2],
+            'por_carrera': results[3],
+            'sin_evaluar': results[4],
+            'alumnos_estado': results[5],
+        }
+    # Mantener compatibilidad si el procedimiento no devuelve el nuevo conjunto
+    return {'total_campus': None, 'total_alumnos': None, 'por_campus': [], 'por_carrera': [],
+            'sin_evaluar': [], 'alumnos_estado': []}
+
+
+def resumen_admin(cur):
+    """Contadores del panel admin (estadisticas_resumen) y catálogos para los filtros de las tablas.
+
+    Las tablas completas se piden por páginas a /admin/tablas/<tabla> (ver tablas_admin.py).
+    """
+    def calcular():
+        results = _resultados_procedimiento(cur, "estadisticas_resumen")
+        cur.execute("SELECT id_campus, nombre FROM campus ORDER BY nombre")
+        campus = cur.fetchall()
+        cur.execute("SELECT id_carrera, nombre FROM carreras ORDER BY nombre")
+        carreras = cur.fetchall()
+        return {
+            'stats': {
+                'total_campus': results[0][0]['total_campus'] if results and results[0] else None,
+                'total_alumnos': results[1][0]['total_alumnos'] if len(results) > 1 and results[1] else None,
+                'por_campus': results[2] if len(results) > 2 else [],
+                'por_carrera': results[3] if len(results) > 3 else [],
+            },
+            'campus': campus,
+            'carreras': carreras,
+        }
+    return _cache.obtener_o_calcular('resumen', calcular)
+
+
+def datos_admin(cur):
+    """Reporte de evaluaciones y estadísticas completas (correo de reportes), desde la caché mientras no expire."""
+    def calcular():
+        return {
+            'evaluaciones': reporte_evaluaciones(cur),
+            'stats': estadisticas(cur),
+        }
+    return _cache.obtener_o_calcular('admin', calcular)
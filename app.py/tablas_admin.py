@@ -0,0 +1,273 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Tablas del panel admin servidas por páginas en JSON. Usa paginación por llave
+(keyset): cada página continúa después de la última fila de la anterior usando (columna de orden,
+llave única). Con un orden respaldado por índice (ver TABLAS) pedir la página N no recorre las
+N-1 anteriores. Filtros y orden se resuelven en SQL.
+"""
+
+import base64
+import json
+
+LIMITE_DEFECTO = 50
+LIMITE_MAXIMO = 200
+
+# Cada tabla: consulta base (sin WHERE), llave única, columnas ordenables, orden por defecto,
+# filtros (nombre -> (condición, conversión del parámetro o None si es bandera)), la expresión de
+# la consulta base de cada columna de orden y de la llave, y los órdenes que se leen por índice
+# (herramientas/verificar_planes.py revisa que su plan no ordene las filas). Filtros, cursor y ORDER BY se aplican
+# sobre esas expresiones en la consulta base (no sobre una tabla derivada, que MySQL tendría que
+# materializar completa en cada página), así que un orden sobre una columna indexada de la tabla
+# conductora lee solo las filas de la página:
+#   - alumnos por matrícula, también con filtro de campus o carrera (idx_alumnos_campus_matricula,
+#     idx_alumnos_carrera_matricula), o por nombre (alumnos.nombre_completo, columna generada);
+#   - maestros por id o nombre (docentes.nombre_completo).
+# Los demás órdenes (nombres de otras tablas, contadores) ordenan las filas filtradas (filesort):
+# alumnos es la única tabla que crece con la matrícula; el resto está acotado por el catálogo
+# (materias, docentes, campus, preguntas). Las columnas de orden no pueden ser NULL (la comparación
+# del cursor con un NULL nunca es verdadera y la paginación se cortaría): las que pueden serlo van
+# con COALESCE. Las consultas leen tablas de resumen, no agrupan respuestas.
+TABLAS = {
+    'alumnos': {
+        'sql': """
+            SELECT a.id_alumno, a.matricula,
+                   a.nombre_completo AS nombre,
+                   COALESCE(c.nombre, '') AS campus,
+                   COALESCE(ca.nombre, '') AS carrera,
+                   a.correo,
+                   COALESCE(p.total_requerido, 0) AS total_requerido,
+                   COALESCE(p.completadas, 0) AS completadas,
+                   COALESCE(p.total_requerido, 0) - COALESCE(p.completadas, 0) AS pendientes,
+                   a.id_campus, a.id_carrera
+            FROM alumnos a
+            LEFT JOIN progreso_alumnos p ON p.id_alumno = a.id_alumno
+            LEFT JOIN campus c ON a.id_campus = c.id_campus
+            LEFT JOIN carreras ca ON a.id_carrera = ca.id_carrera
+        """,
+        'llave': ('id_alumno',),
+        'orden': ('matricula', 'nombre', 'campus', 'carrera', 'pendientes'),
+        'orden_defecto': ('matricula', 'asc'),
+        'filtros': {
+            'pendientes': ("p.total_requerido > p.completadas", None),
+            'campus': ("a.id_campus = %s", int),
+            'carrera': ("a.id_carrera = %s", int),
+        },
+        'columnas': {
+            'id_alumno': "a.id_alumno",
+            'matricula': "a.matricula",
+            'nombre': "a.nombre_completo",
+            'campus': "COALESCE(c.nombre, '')",
+            'carrera': "COALESCE(ca.nombre, '')",
+            'pendientes': "COALESCE(p.total_requerido, 0) - COALESCE(p.completadas, 0)",
+        },
+        'indexados': ('matricula', 'nombre'),
+    },
+    'evaluaciones': {
+        'sql': """
+            SELECT rm.id_materia_impartida, rm.id_docente,
+                   d.nombre_completo AS docente,
+                   COALESCE(c.nombre, '') AS campus_nombre,
+                   COALESCE(s.materia, '') AS materia,
+                   COALESCE(ROUND(rm.suma_puntos / NULLIF(rm.total_calificadas, 0), 2), 0) AS promedio,
+                   CASE
+                       WHEN rm.suma_puntos / NULLIF(rm.total_calificadas, 0) >= 4.5 THEN 'Asignación de materias'
+                       WHEN rm.suma_puntos / NULLIF(rm.total_calificadas, 0) >= 3.0 THEN 'En valoración'
+                       ELSE 'Sin asignación'
+                   END AS estatus_docente,
+                   s.id_campus, s.id_carrera
+            FROM reporte_docente_materias_vm rm
+            JOIN docentes d ON d.id_docente = rm.id_docente
+            JOIN materias_impartidas s ON s.id_materia_impartida = rm.id_materia_impartida
+            JOIN campus c ON d.id_campus = c.id_campus
+        """,
+        'llave': ('id_materia_impartida', 'id_docente'),
+        'orden': ('docente', 'campus_nombre', 'materia', 'promedio'),
+        'orden_defecto': ('docente', 'asc'),
+        'filtros': {
+            'campus': ("s.id_campus = %s", int),
+            'carrera': ("s.id_carrera = %s", int),
+        },
+        'columnas': {
+            'id_materia_impartida': "rm.id_materia_impartida",
+            'id_docente': "rm.id_docente",
+            'docente': "d.nombre_completo",
+            'campus_nombre': "COALESCE(c.nombre, '')",
+            'materia': "COALESCE(s.materia, '')",
+            'promedio': "COALESCE(ROUND(rm.suma_puntos / NULLIF(rm.total_calificadas, 0), 2), 0)",
+        },
+        'indexados': (),
+    },
+    'maestros': {
+        'sql': """
+            SELECT d.id_docente,
+                   d.nombre_completo AS nombre_docente,
+                   COALESCE(rd.total_evaluaciones, 0) AS total_evaluaciones,
+                   IF(rd.id_docente IS NULL, 'No evaluado', 'Evaluado') AS estado,
+                   d.id_campus
+            FROM docentes d
+            LEFT JOIN resumen_docentes_vm rd ON rd.id_docente = d.id_docente
+        """,
+        'llave': ('id_docente',),
+        'orden': ('id_docente', 'nombre_docente', 'total_evaluaciones', 'estado'),
+        'orden_defecto': ('nombre_docente', 'asc'),
+        'filtros': {
+            'campus': ("d.id_campus = %s", int),
+        },
+        'columnas': {
+            'id_docente': "d.id_docente",
+            'nombre_docente': "d.nombre_completo",
+            'total_evaluaciones': "COALESCE(rd.total_evaluaciones, 0)",
+            'estado': "IF(rd.id_docente IS NULL, 'No evaluado', 'Evaluado')",
+        },
+        'indexados': ('id_docente', 'nombre_docente'),
+    },
+    'servicios': {
+        'sql': """
+            SELECT rs.id_campus, c.nombre AS campus_nombre, rs.total_evaluaciones, rs.promedio,
+                   CASE
+                       WHEN rs.promedio >= 4.5 THEN 'Excelente'
+                       WHEN rs.promedio >= 3.5 THEN 'Satisfactorio'
+                       ELSE 'Requiere Atención'
+                   END AS estatus_servicios
+            FROM resumen_servicios_vm rs
+            JOIN campus c ON rs.id_campus = c.id_campus
+        """,
+        'llave': ('id_campus',),
+        'orden': ('campus_nombre', 'total_evaluaciones', 'promedio'),
+        'orden_defecto': ('campus_nombre', 'asc'),
+        'filtros': {
+            'campus': ("rs.id_campus = %s", int),
+        },
+        'columnas': {
+            'id_campus': "rs.id_campus",
+            'campus_nombre': "c.nombre",
+            'total_evaluaciones': "rs.total_evaluaciones",
+            'promedio': "rs.promedio",
+        },
+        'indexados': (),
+    },
+    'preguntas': {
+        # Mismo cálculo que reporte_preguntas (suma las 16 filas de cada pregunta)
+        'sql': """
+            SELECT p.id_pregunta, p.tipo, p.version, p.texto,
+                   CAST(t.total_calificadas AS UNSIGNED) AS total_respuestas,
+                   COALESCE(ROUND(t.suma_puntos / NULLIF(t.total_calificadas, 0), 2), 0) AS promedio
+            FROM preguntas p
+            JOIN (
+                SELECT id_pregunta, SUM(suma_puntos) AS suma_puntos, SUM(total_calificadas) AS total_calificadas
+                FROM resumen_preguntas_vm GROUP BY id_pregunta
+            ) t ON t.id_pregunta = p.id_pregunta
+        """,
+        'llave': ('id_pregunta',),
+        'orden': ('id_pregunta', 'texto', 'total_respuestas', 'promedio'),
+        'orden_defecto': ('id_pregunta', 'asc'),
+        'filtros': {},
+        'columnas': {
+            'id_pregunta': "p.id_pregunta",
+            'texto': "p.texto",
+            'total_respuestas': "CAST(t.total_calificadas AS UNSIGNED)",
+            'promedio': "COALESCE(ROUND(t.suma_puntos / NULLIF(t.total_calificadas, 0), 2), 0)",
+        },
+        'indexados': (),
+    },
+}
+
+
+class ParametroInvalido(ValueError):
+    """Parámetro de paginación, orden o filtro no válido (se responde 400)."""
+
+
+def codificar_cursor(valores):
+    """Cursor de paginación opaco con los valores de la última fila."""
+    texto = json.dumps(valores, default=str)
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(token, esperados):
+    """Valores del cursor; ParametroInvalido si está mal formado o no trae `esperados` valores."""
+    try:
+        relleno = "=" * (-len(token) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(token + relleno))
+    except (ValueError, TypeError):
+        raise ParametroInvalido("Cursor de paginación inválido")
+    if not isinstance(valores, list) or len(valores) != esperados:
+        raise ParametroInvalido("Cursor de paginación inválido")
+    return valores
+
+
+def condicion_cursor(expresiones, valores, direccion):
+    """(condición, params) para continuar después de `valores` en el orden (expresiones, direccion).
+
+    Se escribe expandida, a > x OR (a = x AND b > y), en lugar de comparar filas (a, b) > (x, y):
+    MySQL solo usa el rango del índice (a, b) con la forma expandida.
+    """
+    comparador = '>' if direccion == 'asc' else '<'
+    alternativas, params = [], []
+    for i, expresion in enumerate(expresiones):
+        iguales = [f"{e} = %s" for e in expresiones[:i]]
+        alternativas.append("(" + " AND ".join(iguales + [f"{expresion} {comparador} %s"]) + ")")
+        params.extend(valores[:i + 1])
+    return "(" + " OR ".join(alternativas) + ")", params
+
+
+def consulta(tabla, args):
+    """(sql, params, columnas de orden, límite) de la página que piden `args`; la usa `pagina` y
+    herramientas/verificar_planes.py para revisar el plan de la misma consulta.
+
+    args (request.args): limite, orden, dir (asc/desc), despues (cursor de la página anterior) y
+    los filtros de la tabla (pendientes=1, campus=<id>, carrera=<id>).
+    """
+    spec = TABLAS[tabla]
+    orden = args.get('orden') or spec['orden_defecto'][0]
+    direccion = (args.get('dir') or spec['orden_defecto'][1]).lower()
+    if orden not in spec['orden'] or direccion not in ('asc', 'desc'):
+        raise ParametroInvalido("Orden no válido")
+    try:
+        limite = min(max(int(args.get('limite', LIMITE_DEFECTO)), 1), LIMITE_MAXIMO)
+    except ValueError:
+        raise ParametroInvalido("Límite no válido")
+
+    condiciones, params = [], []
+    for nombre, (condicion, conversion) in spec['filtros'].items():
+        valor = args.get(nombre)
+        if valor in (None, '') or (conversion is None and valor == '0'):
+            continue
+        if conversion is not None:
+            try:
+                params.append(conversion(valor))
+            except ValueError:
+                raise ParametroInvalido(f"Filtro {nombre} no válido")
+        condiciones.append(condicion)
+
+    # Orden total: columna pedida + llave única, misma dirección en todas
+    columnas = [orden] + [c for c in spec['llave'] if c != orden]
+    expresiones = [spec['columnas'][c] for c in columnas]
+    if args.get('despues'):
+        valores = decodificar_cursor(args['despues'], len(columnas))
+        condicion, valores_condicion = condicion_cursor(expresiones, valores, direccion)
+        condiciones.append(condicion)
+        params.extend(valores_condicion)
+
+    where = "WHERE " + " AND ".join(condiciones) if condiciones else ""
+    orden_sql = ", ".join(f"{e} {direccion.upper()}" for e in expresiones)
+    # Se pide una fila de más para saber si hay otra página
+    sql = f"""{spec['sql']}
+        {where}
+        ORDER BY {orden_sql}
+        LIMIT %s
+    """
+    return sql, tuple(params) + (limite + 1,), columnas, limite
+
+
+def pagina(cur, tabla, args):
+    """Una página de la tabla: {'filas', 'siguiente'} ('siguiente' es None en la última página).
+    Parámetros como en `consulta`."""
+    sql, params, columnas, limite = consulta(tabla, args)
+    cur.execute(sql, params)
+    filas = cur.fetchall()
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = codificar_cursor([filas[-1][c] for c in columnas])
+    return {'filas': filas, 'siguiente': siguiente}
@@ -0,0 +1,351 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Generador de carga y benchmark del flujo del alumno. Siembra una base MySQL con
+campus, carreras, docentes, materias y alumnos sintéticos (esquema de Base.sql) y recorre las rutas
+reales de la app con alumnos virtuales concurrentes:
+
+    /  ->  /inicio  ->  /semestres/<id>  ->  /encuesta  ->  /guardar  ->  /encuesta_servicios  ->  /guardar_servicios
+
+Reporta latencia p50/p95/p99 por ruta, throughput y consultas a la BD por petición (total del
+servidor y, por ruta, de la cabecera Server-Timing), y guarda el resultado en JSON (uno por commit)
+para comparar entre versiones.
+
+Uso (apuntar DB_NAME a una base de pruebas creada con Base.sql):
+    python herramientas/benchmark_encuesta.py --sembrar --campus 5 --docentes 8 --alumnos 2000
+    python herramientas/benchmark_encuesta.py --usuarios 500 --concurrencia 32
+    python herramientas/benchmark_encuesta.py --url http://localhost:8000 --usuarios 500
+    python herramientas/benchmark_encuesta.py --comparar bench_resultados/a.json bench_resultados/b.json
+"""
+
+import argparse
+import datetime
+import http.cookiejar
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+DIR_APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app.py")
+sys.path.insert(0, DIR_APP)
+
+import mysql.connector  # noqa: E402
+from conexion import DB_CONFIG  # noqa: E402
+
+# Prefijo de las matrículas sintéticas (VARCHAR(10))
+PREFIJO = "BN"
+FECHA_NACIMIENTO = datetime.date(2003, 1, 1)
+PASSWORD = FECHA_NACIMIENTO.strftime("%d%m%y")
+
+
+# --- Siembra de datos ---
+
+def sembrar(num_campus, num_carreras, docentes_por_grupo, num_alumnos, semestres=9, lote=1000):
+    """Inserta datos sintéticos con INSERT multi-fila. No hace nada si ya existen."""
+    db = mysql.connector.connect(**DB_CONFIG)
+    cur = db.cursor()
+    cur.execute("SELECT 1 FROM alumnos WHERE matricula = %s", (f"{PREFIJO}A000001",))
+    if cur.fetchone():
+        print("Datos sintéticos ya presentes; se omite la siembra.")
+        db.close()
+        return
+
+    cur.executemany("INSERT INTO campus (nombre) VALUES (%s)",
+                    [(f"Bench Campus {i}",) for i in range(1, num_campus + 1)])
+    cur.execute("SELECT id_campus FROM campus WHERE nombre LIKE 'Bench Campus %' ORDER BY id_campus")
+    campus = [r[0] for r in cur.fetchall()]
+
+    cur.executemany("INSERT INTO carreras (clave, nombre, duracion_semestres) VALUES (%s, %s, %s)",
+                    [(f"{PREFIJO}-{i}", f"Bench Carrera {i}", semestres) for i in range(1, num_carreras + 1)])
+    cur.execute("SELECT id_carrera FROM carreras WHERE clave LIKE %s ORDER BY id_carrera", (f"{PREFIJO}-%",))
+    carreras = [r[0] for r in cur.fetchall()]
+
+    cur.executemany("INSERT INTO campus_carrera (campus_id, carrera_id) VALUES (%s, %s)",
+                    [(c, ca) for c in campus for ca in carreras])
+
+    # Un grupo de docentes por campus y semestre, cada uno con una materia
+    docentes = []
+    n = 0
+    for c in campus:
+        for sem in range(1, semestres + 1):
+            for _ in range(docentes_por_grupo):
+                n += 1
+                docentes.append((f"{PREFIJO}D{n:06d}", "Docente", f"Bench{n}", "Sintético",
+                                 f"{PREFIJO.lower()}.docente{n}@example.com", "Bench", FECHA_NACIMIENTO, c, sem))
+    cur.executemany(
+        "INSERT INTO docentes (matricula, nombre, apellidop, apellidom, correo, departamento, fecha_nacimiento, id_campus) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+        [d[:8] for d in docentes]
+    )
+    cur.execute("SELECT matricula, id_docente FROM docentes WHERE matricula LIKE %s", (f"{PREFIJO}D%",))
+    ids_docente = dict(cur.fetchall())
+    cur.executemany(
+        "INSERT INTO materias_impartidas (id_docente, numero, materia, curso, id_campus, id_carrera) "
+        "VALUES (%s, %s, %s, %s, %s, %s)",
+        [(ids_docente[d[0]], str(d[8]), f"Materia {d[0]}", d[0], d[7], random.choice(carreras)) for d in docentes]
+    )
+    db.commit()
+
+    filas = []
+    for i in range(1, num_alumnos + 1):
+        filas.append((f"{PREFIJO}A{i:06d}", "Alumno", f"Bench{i}", "Sintético",
+                      f"{PREFIJO.lower()}.alumno{i}@example.com", random.choice(campus), random.choice(carreras),
+                      str(random.randint(1, semestres)), FECHA_NACIMIENTO))
+        if len(filas) >= lote:
+            _insertar_alumnos(cur, filas)
+            db.commit()
+            filas = []
+    if filas:
+        _insertar_alumnos(cur, filas)
+        db.commit()
+    cur.close()
+    db.close()
+    print(f"Sembrados: {len(campus)} campus, {len(carreras)} carreras, {len(docentes)} docentes/materias, "
+          f"{num_alumnos} alumnos")
+
+
+def _insertar_alumnos(cur, filas):
+    cur.executemany(
+        "INSERT INTO alumnos (matricula, nombre, apellidop, apellidom, correo, id_campus, id_carrera, "
+        "numero_semestre, fecha_nacimiento) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+        filas
+    )
+
+
+# --- Clientes: app en proceso (test_client) o servidor HTTP real ---
+
+class ClienteLocal:
+    """Alumno virtual contra la app importada en este proceso."""
+
+    def __init__(self, app):
+        self.cliente = app.test_client()
+
+    def pedir(self, metodo, ruta, datos=None):
+        resp = self.cliente.open(ruta, method=metodo, data=datos)
+        return resp.status_code, resp.get_data(as_text=True), dict(resp.headers)
+
+
+class ClienteHTTP:
+    """Alumno virtual contra un servidor en ejecución (gunicorn, waitress, ...)."""
+
+    def __init__(self, url_base):
+        self.url_base = url_base.rstrip("/")
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def pedir(self, metodo, ruta, datos=None):
+        cuerpo = urllib.parse.urlencode(datos).encode() if datos is not None else None
+        req = urllib.request.Request(self.url_base + ruta, data=cuerpo, method=metodo)
+        try:
+            with self.opener.open(req) as resp:
+                return resp.status, resp.read().decode("utf-8", "replace"), dict(resp.headers)
+        except urllib.error.HTTPError as e:
+            return e.code, e.read().decode("utf-8", "replace"), dict(e.headers)
+
+
+# --- Recorrido del alumno ---
+
+class Medicion:
+    """Latencias por ruta (segundos), segura para hilos."""
+
+    def __init__(self):
+        self.latencias = {}
+        self.errores = {}
+        self.consultas = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, ruta, segundos, status, consultas=None):
+        with self._lock:
+            self.latencias.setdefault(ruta, []).append(segundos)
+            if status >= 400:
+                self.errores[ruta] = self.errores.get(ruta, 0) + 1
+            if consultas is not None:
+                self.consultas.setdefault(ruta, []).append(consultas)
+
+
+# Cabecera agregada por perfilado.py: db;dur=..;desc="N consultas"
+_RE_CONSULTAS = re.compile(r'db;dur=[\d.]+;desc="(\d+) consultas"')
+
+
+def _medir(cliente, medicion, nombre, metodo, ruta, datos=None):
+    inicio = time.perf_counter()
+    status, cuerpo, headers = cliente.pedir(metodo, ruta, datos)
+    coincidencia = _RE_CONSULTAS.search(headers.get("Server-Timing", ""))
+    medicion.registrar(nombre, time.perf_counter() - inicio, status,
+                       int(coincidencia.group(1)) if coincidencia else None)
+    return status, cuerpo
+
+
+def _contestar(html):
+    """Respuestas aleatorias para las preguntas del formulario (ids del catálogo en los campos ocultos)."""
+    datos = {}
+    for idx, id_pregunta in re.findall(r'name="pregunta_(\d+)" value="(\d+)"', html):
+        datos[f"pregunta_{idx}"] = id_pregunta
+        datos[f"escala_{idx}"] = str(random.randint(1, 5))
+    return datos
+
+
+def recorrido_alumno(cliente, matricula, medicion):
+    """Login, todas las evaluaciones docentes pendientes y la de servicios."""
+    _medir(cliente, medicion, "POST /", "POST", "/", {"matricula": matricula, "password": PASSWORD})
+    _, html = _medir(cliente, medicion, "GET /inicio", "GET", "/inicio")
+    ids_docente = re.findall(r'<option value="(\d+)"', html)
+    for id_docente in ids_docente:
+        _, cuerpo = _medir(cliente, medicion, "GET /semestres/<id>", "GET", f"/semestres/{id_docente}")
+        try:
+            materias = json.loads(cuerpo)
+        except ValueError:
+            materias = []
+        for m in materias:
+            datos = {"id_docente": id_docente, "id_semestre": m["id_materia_impartida"]}
+            _, formulario = _medir(cliente, medicion, "POST /encuesta", "POST", "/encuesta", datos)
+            datos.update(_contestar(formulario))
+            datos["comentario"] = "Comentario de prueba"
+            _medir(cliente, medicion, "POST /guardar", "POST", "/guardar", datos)
+    _, formulario = _medir(cliente, medicion, "GET /encuesta_servicios", "GET", "/encuesta_servicios")
+    datos = _contestar(formulario)
+    _medir(cliente, medicion, "POST /guardar_servicios", "POST", "/guardar_servicios", datos)
+    cliente.pedir("GET", "/logout")
+
+
+def _consultas_servidor():
+    """Contador global de sentencias del servidor MySQL (Questions)."""
+    db = mysql.connector.connect(**DB_CONFIG)
+    cur = db.cursor()
+    cur.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+    valor = int(cur.fetchone()[1])
+    db.close()
+    return valor
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    k = max(0, min(len(ordenados) - 1, int(round(p / 100.0 * len(ordenados) + 0.5)) - 1))
+    return ordenados[k]
+
+
+def ejecutar(usuarios, concurrencia, url=None):
+    if url:
+        nuevo_cliente = lambda: ClienteHTTP(url)  # noqa: E731
+    else:
+        from evaluacion import app
+        nuevo_cliente = lambda: ClienteLocal(app)  # noqa: E731
+
+    db = mysql.connector.connect(**DB_CONFIG)
+    cur = db.cursor()
+    cur.execute("SELECT matricula FROM alumnos WHERE matricula LIKE %s ORDER BY matricula LIMIT %s",
+                (f"{PREFIJO}A%", usuarios))
+    matriculas = [r[0] for r in cur.fetchall()]
+    db.close()
+    if not matriculas:
+        sys.exit("No hay alumnos sintéticos; ejecutar primero con --sembrar")
+
+    medicion = Medicion()
+    consultas_inicio = _consultas_servidor()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        for f in [pool.submit(recorrido_alumno, nuevo_cliente(), m, medicion) for m in matriculas]:
+            f.result()
+    duracion = time.perf_counter() - inicio
+    consultas = _consultas_servidor() - consultas_inicio
+
+    total = sum(len(v) for v in medicion.latencias.values())
+    rutas = {}
+    for ruta, valores in medicion.latencias.items():
+        rutas[ruta] = {
+            "peticiones": len(valores),
+            "errores": medicion.errores.get(ruta, 0),
+            "media_ms": round(statistics.mean(valores) * 1000, 2),
+            "p50_ms": round(_percentil(valores, 50) * 1000, 2),
+            "p95_ms": round(_percentil(valores, 95) * 1000, 2),
+            "p99_ms": round(_percentil(valores, 99) * 1000, 2),
+            "consultas_promedio": (round(statistics.mean(medicion.consultas[ruta]), 2)
+                                   if medicion.consultas.get(ruta) else None),
+        }
+    return {
+        "commit": _commit_actual(),
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "modo": url or "local",
+        "usuarios": len(matriculas),
+        "concurrencia": concurrencia,
+        "duracion_s": round(duracion, 3),
+        "peticiones": total,
+        "throughput_rps": round(total / duracion, 2) if duracion else None,
+        "consultas_por_peticion": round(consultas / total, 2) if total else None,
+        "rutas": rutas,
+    }
+
+
+def _commit_actual():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocido"
+
+
+def imprimir(resultado):
+    print(f"\nCommit {resultado['commit']} | {resultado['usuarios']} alumnos, concurrencia {resultado['concurrencia']}")
+    print(f"{resultado['peticiones']} peticiones en {resultado['duracion_s']} s -> {resultado['throughput_rps']} req/s, "
+          f"{resultado['consultas_por_peticion']} consultas/petición\n")
+    print(f"{'ruta':28} {'n':>7} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'consultas':>10}")
+    for ruta, r in resultado["rutas"].items():
+        consultas = r.get("consultas_promedio")
+        print(f"{ruta:28} {r['peticiones']:>7} {r['errores']:>5} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} "
+              f"{consultas if consultas is not None else '-':>10}")
+
+
+def comparar(archivo_a, archivo_b):
+    with open(archivo_a, encoding="utf-8") as f:
+        a = json.load(f)
+    with open(archivo_b, encoding="utf-8") as f:
+        b = json.load(f)
+    print(f"{'ruta':28} {'p95 ' + a['commit']:>14} {'p95 ' + b['commit']:>14} {'cambio':>9}")
+    for ruta in sorted(set(a["rutas"]) | set(b["rutas"])):
+        pa = a["rutas"].get(ruta, {}).get("p95_ms")
+        pb = b["rutas"].get(ruta, {}).get("p95_ms")
+        cambio = f"{(pb - pa) / pa * 100:+.1f}%" if pa and pb else "-"
+        print(f"{ruta:28} {pa if pa is not None else '-':>14} {pb if pb is not None else '-':>14} {cambio:>9}")
+    print(f"\nthroughput: {a['throughput_rps']} -> {b['throughput_rps']} req/s; "
+          f"consultas/petición: {a['consultas_por_peticion']} -> {b['consultas_por_peticion']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sembrar", action="store_true", help="insertar datos sintéticos antes de medir")
+    parser.add_argument("--campus", type=int, default=5)
+    parser.add_argument("--carreras", type=int, default=3)
+    parser.add_argument("--docentes", type=int, default=6, help="docentes por campus y semestre")
+    parser.add_argument("--alumnos", type=int, default=2000, help="alumnos a sembrar")
+    parser.add_argument("--usuarios", type=int, default=200, help="alumnos virtuales a simular")
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--url", help="URL de un servidor en ejecución (por defecto, la app en este proceso)")
+    parser.add_argument("--salida", help="archivo JSON de resultados (default bench_resultados/<commit>.json)")
+    parser.add_argument("--comparar", nargs=2, metavar=("A", "B"), help="comparar dos resultados guardados")
+    args = parser.parse_args()
+
+    if args.comparar:
+        comparar(*args.comparar)
+        return
+    if args.sembrar:
+        sembrar(args.campus, args.carreras, args.docentes, args.alumnos)
+    if args.usuarios <= 0:
+        return
+
+    resultado = ejecutar(args.usuarios, args.concurrencia, args.url)
+    imprimir(resultado)
+    salida = args.salida or os.path.join("bench_resultados", f"{resultado['commit']}.json")
+    os.makedirs(os.path.dirname(salida) or ".", exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en {salida}")
+
+
+if __name__ == "__main__":
+    main()
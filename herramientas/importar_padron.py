@@ -0,0 +1,277 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Importación masiva del padrón del semestre (docentes, materias impartidas y alumnos)
+desde archivos CSV, en lugar de un CALL insertar_*_con_vinculos por fila. Los catálogos
+(campus, campus_carrera, matrículas y correos existentes) se cargan una sola vez y cada fila se
+valida en memoria; las filas válidas se insertan con INSERT multi-fila en lotes, una transacción
+por lote. Las filas rechazadas se reportan con su archivo, línea y motivo.
+
+Columnas de cada CSV (con encabezado):
+    docentes: matricula,nombre,apellidop,apellidom,correo,departamento,fecha_nacimiento,id_campus
+    materias: matricula_docente,numero,materia,curso,fecha_i,fecha_fin,id_campus,id_carrera
+    alumnos:  matricula,nombre,apellidop,apellidom,correo,id_campus,id_carrera,numero_semestre,
+              fecha_nacimiento,tipo_alumno
+
+Las contraseñas quedan en NULL (contraseña inicial); después conviene correr migrar_passwords.py.
+Termina con código 1 si hubo filas rechazadas.
+
+Uso (con la BD de Base.sql cargada):
+    python herramientas/importar_padron.py [--docentes d.csv] [--materias m.csv] [--alumnos a.csv]
+        [--lote 1000] [--rechazados rechazados.csv] [--validar]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app.py"))
+
+import mysql.connector  # noqa: E402
+from conexion import DB_CONFIG  # noqa: E402
+
+SEMESTRES = {str(n) for n in range(1, 10)}
+TIPOS_ALUMNO = {'regular', 'intercambio'}
+
+SQL_DOCENTES = """
+    INSERT INTO docentes (matricula, nombre, apellidop, apellidom, correo, departamento, fecha_nacimiento, id_campus)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+SQL_MATERIAS = """
+    INSERT INTO materias_impartidas (id_docente, numero, materia, curso, fecha_i, fecha_fin, id_campus, id_carrera)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+SQL_ALUMNOS = """
+    INSERT INTO alumnos (matricula, nombre, apellidop, apellidom, correo, id_campus, id_carrera, numero_semestre,
+                         fecha_nacimiento, tipo_alumno)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+class FilaInvalida(ValueError):
+    """Fila del CSV que no pasa la validación (el mensaje es el motivo del rechazo)."""
+
+
+class Catalogos:
+    """Datos de la BD contra los que se valida, cargados una sola vez por importación."""
+
+    def __init__(self, cur):
+        cur.execute("SELECT id_campus FROM campus")
+        self.campus = {fila[0] for fila in cur.fetchall()}
+        cur.execute("SELECT campus_id, carrera_id FROM campus_carrera")
+        self.campus_carrera = set(cur.fetchall())
+        # Matrícula -> id_docente para resolver las materias sin una subconsulta por fila
+        cur.execute("SELECT matricula, id_docente FROM docentes")
+        self.docentes = dict(cur.fetchall())
+        cur.execute("SELECT matricula FROM alumnos")
+        self.alumnos = {fila[0] for fila in cur.fetchall()}
+        cur.execute("SELECT correo FROM docentes WHERE correo IS NOT NULL UNION SELECT correo FROM alumnos")
+        self.correos = {fila[0].lower() for fila in cur.fetchall()}
+
+
+def _texto(fila, campo, obligatorio=True, maximo=256):
+    valor = (fila.get(campo) or "").strip()
+    if not valor:
+        if obligatorio:
+            raise FilaInvalida(f"falta {campo}")
+        return None
+    if len(valor) > maximo:
+        raise FilaInvalida(f"{campo} excede {maximo} caracteres")
+    return valor
+
+
+def _entero(fila, campo, obligatorio=True):
+    valor = _texto(fila, campo, obligatorio)
+    if valor is None:
+        return None
+    try:
+        return int(valor)
+    except ValueError:
+        raise FilaInvalida(f"{campo} no es un número: {valor}")
+
+
+def _fecha(fila, campo, obligatorio=False):
+    valor = _texto(fila, campo, obligatorio)
+    if valor is None:
+        return None
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise FilaInvalida(f"{campo} no es una fecha AAAA-MM-DD: {valor}")
+
+
+def _semestre(fila, campo):
+    valor = _texto(fila, campo)
+    if valor not in SEMESTRES:
+        raise FilaInvalida(f"{campo} fuera de rango (1-9): {valor}")
+    return valor
+
+
+def _campus_carrera(catalogos, id_campus, id_carrera, vinculo):
+    """Misma regla que los procedimientos insertar_*_con_vinculos."""
+    if id_campus is not None and id_campus not in catalogos.campus:
+        raise FilaInvalida(f"campus inexistente: {id_campus}")
+    if vinculo and id_campus is not None and id_carrera is not None \
+            and (id_campus, id_carrera) not in catalogos.campus_carrera:
+        raise FilaInvalida("la carrera no está disponible en el campus seleccionado")
+
+
+def _correo(catalogos, fila, obligatorio):
+    correo = _texto(fila, 'correo', obligatorio)
+    if correo is not None:
+        if correo.lower() in catalogos.correos:
+            raise FilaInvalida(f"correo duplicado: {correo}")
+        catalogos.correos.add(correo.lower())
+    return correo
+
+
+def validar_docente(catalogos, fila):
+    matricula = _texto(fila, 'matricula', maximo=10)
+    if matricula in catalogos.docentes:
+        raise FilaInvalida(f"matrícula de docente duplicada: {matricula}")
+    id_campus = _entero(fila, 'id_campus')
+    _campus_carrera(catalogos, id_campus, None, vinculo=False)
+    nombre = (_texto(fila, 'nombre'), _texto(fila, 'apellidop'), _texto(fila, 'apellidom'))
+    departamento, fecha_nacimiento = _texto(fila, 'departamento'), _fecha(fila, 'fecha_nacimiento')
+    # El correo se valida al final: al aceptarse queda reservado para el resto del padrón
+    valores = (matricula,) + nombre + (_correo(catalogos, fila, obligatorio=False), departamento,
+                                       fecha_nacimiento, id_campus)
+    # Se reserva la matrícula; el id real se asigna después de insertar el lote
+    catalogos.docentes[matricula] = None
+    return valores
+
+
+def validar_materia(catalogos, fila):
+    matricula = _texto(fila, 'matricula_docente', maximo=10)
+    if matricula not in catalogos.docentes:
+        raise FilaInvalida(f"docente inexistente: {matricula}")
+    # Con --validar los docentes del mismo padrón solo están reservados (id None)
+    id_docente = catalogos.docentes[matricula]
+    id_campus = _entero(fila, 'id_campus', obligatorio=False)
+    id_carrera = _entero(fila, 'id_carrera', obligatorio=False)
+    _campus_carrera(catalogos, id_campus, id_carrera, vinculo=True)
+    return (id_docente, _semestre(fila, 'numero'), _texto(fila, 'materia'), _texto(fila, 'curso', False),
+            _fecha(fila, 'fecha_i'), _fecha(fila, 'fecha_fin'), id_campus, id_carrera)
+
+
+def validar_alumno(catalogos, fila):
+    matricula = _texto(fila, 'matricula', maximo=10)
+    if matricula in catalogos.alumnos:
+        raise FilaInvalida(f"matrícula de alumno duplicada: {matricula}")
+    id_campus = _entero(fila, 'id_campus', obligatorio=False)
+    id_carrera = _entero(fila, 'id_carrera', obligatorio=False)
+    _campus_carrera(catalogos, id_campus, id_carrera, vinculo=True)
+    tipo = _texto(fila, 'tipo_alumno', obligatorio=False) or 'regular'
+    if tipo not in TIPOS_ALUMNO:
+        raise FilaInvalida(f"tipo_alumno no válido: {tipo}")
+    numero_semestre = _semestre(fila, 'numero_semestre') if (fila.get('numero_semestre') or "").strip() else None
+    nombre = (_texto(fila, 'nombre'), _texto(fila, 'apellidop'), _texto(fila, 'apellidom'))
+    fecha_nacimiento = _fecha(fila, 'fecha_nacimiento')
+    # El correo se valida al final: al aceptarse queda reservado para el resto del padrón
+    valores = (matricula,) + nombre + (_correo(catalogos, fila, obligatorio=True), id_campus, id_carrera,
+                                       numero_semestre, fecha_nacimiento, tipo)
+    catalogos.alumnos.add(matricula)
+    return valores
+
+
+def leer(ruta, validar, catalogos, rechazados):
+    """Valida el CSV en memoria. Devuelve [(línea, valores)] de las filas válidas."""
+    validas = []
+    with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+        # La línea 1 es el encabezado
+        for linea, fila in enumerate(csv.DictReader(archivo), start=2):
+            try:
+                validas.append((linea, validar(catalogos, fila)))
+            except FilaInvalida as e:
+                rechazados.append((ruta, linea, str(e)))
+    return validas
+
+
+def cargar(db, sql, validas, lote, ruta, rechazados):
+    """Inserta las filas válidas en lotes multi-fila, una transacción por lote.
+
+    Si un lote falla (p. ej. un duplicado insertado por otro proceso) se revierte y se reintenta
+    fila por fila para rechazar solo las filas con error. Devuelve las filas insertadas.
+    """
+    cur = db.cursor()
+    insertadas = 0
+    for inicio in range(0, len(validas), lote):
+        bloque = validas[inicio:inicio + lote]
+        try:
+            # executemany sobre INSERT ... VALUES se envía como un solo INSERT multi-fila
+            cur.executemany(sql, [valores for _, valores in bloque])
+            db.commit()
+            insertadas += len(bloque)
+        except mysql.connector.Error:
+            db.rollback()
+            for linea, valores in bloque:
+                try:
+                    cur.execute(sql, valores)
+                    db.commit()
+                    insertadas += 1
+                except mysql.connector.Error as e:
+                    db.rollback()
+                    rechazados.append((ruta, linea, e.msg))
+    cur.close()
+    return insertadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docentes", help="CSV de docentes")
+    parser.add_argument("--materias", help="CSV de materias impartidas (docente por matrícula)")
+    parser.add_argument("--alumnos", help="CSV de alumnos")
+    parser.add_argument("--lote", type=int, default=1000, help="filas por INSERT multi-fila y transacción")
+    parser.add_argument("--rechazados", help="escribir las filas rechazadas en este CSV (archivo, linea, motivo)")
+    parser.add_argument("--validar", action="store_true", help="solo validar, sin insertar")
+    args = parser.parse_args()
+    if not (args.docentes or args.materias or args.alumnos):
+        parser.error("indica al menos uno de --docentes, --materias o --alumnos")
+
+    db = mysql.connector.connect(**DB_CONFIG)
+    cur = db.cursor()
+    inicio = time.monotonic()
+    catalogos = Catalogos(cur)
+    rechazados = []
+
+    # Docentes antes que materias: las materias se resuelven por matrícula del docente
+    if args.docentes:
+        validas = leer(args.docentes, validar_docente, catalogos, rechazados)
+        if not args.validar:
+            total = cargar(db, SQL_DOCENTES, validas, args.lote, args.docentes, rechazados)
+            print(f"docentes: {total} de {len(validas)} filas válidas insertadas")
+            # Ids asignados a las matrículas nuevas (una sola consulta); los docentes rechazados
+            # al insertar dejan de contar como existentes
+            cur.execute("SELECT matricula, id_docente FROM docentes")
+            catalogos.docentes = dict(cur.fetchall())
+    if args.materias:
+        validas = leer(args.materias, validar_materia, catalogos, rechazados)
+        if not args.validar:
+            total = cargar(db, SQL_MATERIAS, validas, args.lote, args.materias, rechazados)
+            print(f"materias: {total} de {len(validas)} filas válidas insertadas")
+    if args.alumnos:
+        validas = leer(args.alumnos, validar_alumno, catalogos, rechazados)
+        if not args.validar:
+            total = cargar(db, SQL_ALUMNOS, validas, args.lote, args.alumnos, rechazados)
+            print(f"alumnos: {total} de {len(validas)} filas válidas insertadas")
+    cur.close()
+    db.close()
+
+    for ruta, linea, motivo in rechazados[:20]:
+        print(f"RECHAZADA  {ruta}:{linea}: {motivo}")
+    if len(rechazados) > 20:
+        print(f"... y {len(rechazados) - 20} más")
+    if args.rechazados:
+        with open(args.rechazados, "w", newline='', encoding='utf-8') as archivo:
+            writer = csv.writer(archivo)
+            writer.writerow(["archivo", "linea", "motivo"])
+            writer.writerows(rechazados)
+
+    print(f"\n{len(rechazados)} filas rechazadas; {time.monotonic() - inicio:.1f} s")
+    return 1 if rechazados else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Migración masiva de contraseñas antes de abrir la encuesta. Las cuentas de alumnos y
+docentes sin hash (password NULL) se convierten al hash de su contraseña inicial (fecha de
+nacimiento DDMMYY) usando un pool de procesos, para que en el login solo se verifique un hash.
+
+Usa el mismo método de hash (con su costo, PASSWORD_HASH_METODO) y la misma longitud de sal
+(PASSWORD_HASH_SAL) que la app.
+
+Uso (con la BD de Base.sql cargada):
+    python herramientas/migrar_passwords.py [--procesos N] [--lote 500] [--tabla alumnos|docentes]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app.py"))
+
+import mysql.connector  # noqa: E402
+from autenticacion import TABLAS, hashear, password_inicial  # noqa: E402
+from conexion import DB_CONFIG  # noqa: E402
+
+
+def _hashear_fila(fila):
+    """(id, fecha_nacimiento) -> (hash, id); se ejecuta en los procesos del pool."""
+    id_cuenta, fecha_nacimiento = fila
+    return hashear(password_inicial(fecha_nacimiento)), id_cuenta
+
+
+def migrar_tabla(db, pool, procesos, tabla, llave, lote):
+    """Migra por lotes (paginando por llave primaria) las cuentas sin hash de una tabla."""
+    cur = db.cursor()
+    migradas = 0
+    ultimo = 0
+    while True:
+        cur.execute(f"""
+            SELECT {llave}, fecha_nacimiento FROM {tabla}
+            WHERE {llave} > %s AND password IS NULL AND fecha_nacimiento IS NOT NULL
+            ORDER BY {llave}
+            LIMIT %s
+        """, (ultimo, lote))
+        filas = cur.fetchall()
+        if not filas:
+            break
+        ultimo = filas[-1][0]
+        # El costo del hash se reparte entre los procesos
+        hashes = list(pool.map(_hashear_fila, filas, chunksize=max(1, len(filas) // (procesos * 4))))
+        # Un solo UPDATE por lote, unido a la lista (id, hash) del lote; no sobreescribe cuentas que
+        # ya se migraron en un login mientras corría el lote
+        valores = " UNION ALL ".join(["SELECT %s AS id, %s AS hash"] + ["SELECT %s, %s"] * (len(hashes) - 1))
+        cur.execute(f"""
+            UPDATE {tabla} t
+            JOIN ({valores}) v ON t.{llave} = v.id
+            SET t.password = v.hash
+            WHERE t.password IS NULL
+        """, [valor for hash_, id_cuenta in hashes for valor in (id_cuenta, hash_)])
+        db.commit()
+        migradas += len(hashes)
+        print(f"  {tabla}: {migradas} cuentas migradas (hasta {llave}={ultimo})")
+    cur.close()
+    return migradas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1,
+                        help="procesos que calculan hashes (por defecto, uno por CPU)")
+    parser.add_argument("--lote", type=int, default=500, help="cuentas por lote (SELECT + UPDATE)")
+    parser.add_argument("--tabla", choices=[t for t, _ in TABLAS.values()],
+                        help="migrar solo alumnos o solo docentes")
+    args = parser.parse_args()
+
+    db = mysql.connector.connect(**DB_CONFIG)
+    inicio = time.monotonic()
+    total = 0
+    with ProcessPoolExecutor(max_workers=args.procesos) as pool:
+        for tabla, llave in TABLAS.values():
+            if args.tabla and tabla != args.tabla:
+                continue
+            total += migrar_tabla(db, pool, args.procesos, tabla, llave, args.lote)
+    db.close()
+
+    print(f"\n{total} cuentas migradas en {time.monotonic() - inicio:.1f} s con {args.procesos} procesos")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
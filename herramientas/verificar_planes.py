@@ -0,0 +1,271 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Verificación de planes de ejecución (EXPLAIN) de las consultas que emite la app y de
+las consultas internas de los procedimientos/triggers de Base.sql. Termina con código 1 si alguna
+consulta recorre completa una tabla sin índice utilizable (regresión de índices). Las consultas de
+la app se toman de las constantes y constructores de sus módulos, no de copias; las pruebas
+(tests/test_planes.py) corren la misma verificación cuando hay una BD disponible.
+
+Uso (con la BD de Base.sql cargada):
+    python herramientas/verificar_planes.py [--filas-max 1000]
+"""
+
+import argparse
+import os
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app.py"))
+
+import mysql.connector  # noqa: E402
+import comentarios  # noqa: E402
+import evaluacion  # noqa: E402
+import exportaciones  # noqa: E402
+import materias  # noqa: E402
+import preguntas  # noqa: E402
+import tablas_admin  # noqa: E402
+from autenticacion import SQL_IDENTIDAD  # noqa: E402
+from conexion import DB_CONFIG  # noqa: E402
+
+# Catálogos pequeños que se pueden recorrer completos sin problema
+TABLAS_CATALOGO = {"campus", "carreras", "admin_users"}
+
+# Valores de ejemplo para los parámetros de las consultas (se toman de la BD)
+MUESTRA_SQL = {
+    "id_alumno": "SELECT MIN(id_alumno) AS v FROM alumnos",
+    "matricula_alumno": "SELECT MIN(matricula) AS v FROM alumnos",
+    "id_docente": "SELECT MIN(id_docente) AS v FROM docentes",
+    "id_campus": "SELECT MIN(id_campus) AS v FROM materias_impartidas",
+    "id_carrera": "SELECT COALESCE(MIN(id_carrera), 0) AS v FROM carreras",
+    "numero": "SELECT MIN(numero) AS v FROM materias_impartidas",
+    "id_materia": "SELECT MIN(id_materia_impartida) AS v FROM materias_impartidas",
+    "id_evaluacion": "SELECT COALESCE(MIN(id_evaluacion), 0) AS v FROM evaluacion",
+}
+
+# Consultas internas de funciones, procedimientos y triggers de Base.sql (no tienen constante en
+# Python): (nombre, sql, escaneos completos permitidos). Los reportes globales recorren por
+# naturaleza una tabla "conductora"; lo que se verifica es que el resto de los accesos use índices.
+CONSULTAS_BASE = [
+    ("fn_reporte_evaluacion", """
+        SELECT s.id_materia_impartida, COUNT(r.id_pregunta)
+        FROM docentes d
+        JOIN evaluacion e ON d.id_docente = e.id_docente
+        JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+        JOIN materias_impartidas s ON e.id_materia_impartida = s.id_materia_impartida
+        WHERE d.id_docente = %(id_docente)s
+        GROUP BY d.id_docente, s.id_materia_impartida
+    """, 0),
+    ("reporte_admin_evaluacion", """
+        SELECT d.id_docente, s.id_materia_impartida, AVG(r.escala)
+        FROM docentes d
+        JOIN evaluacion e ON d.id_docente = e.id_docente
+        JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+        JOIN materias_impartidas s ON e.id_materia_impartida = s.id_materia_impartida
+        JOIN campus c ON d.id_campus = c.id_campus
+        GROUP BY d.id_docente, s.id_materia_impartida
+    """, 1),
+    ("reporte_preguntas: contadores por pregunta", """
+        SELECT id_pregunta, SUM(suma_puntos), SUM(total_calificadas) FROM resumen_preguntas_vm GROUP BY id_pregunta
+    """, 0),
+    ("estadisticas_evaluacion: completos por campus", """
+        SELECT COUNT(DISTINCT a.id_campus) FROM progreso_alumnos p
+        JOIN alumnos a ON a.id_alumno = p.id_alumno
+        WHERE p.completadas >= p.total_requerido AND p.servicios_completado = 1
+    """, 1),
+    ("estadisticas_evaluacion: estado por alumno", """
+        SELECT a.id_alumno, p.total_requerido, p.completadas
+        FROM alumnos a
+        LEFT JOIN progreso_alumnos p ON p.id_alumno = a.id_alumno
+        LEFT JOIN campus c ON a.id_campus = c.id_campus
+        LEFT JOIN carreras ca ON a.id_carrera = ca.id_carrera
+    """, 1),
+    ("trg_actualizar_historial_evaluacion: primera respuesta", """
+        SELECT 1 FROM respuestas r WHERE r.id_evaluacion = %(id_evaluacion)s AND r.id_pregunta <> 0
+    """, 0),
+    ("sp_refrescar_reporte_docente: materias del docente", """
+        SELECT s.numero, rm.suma_puntos FROM reporte_docente_materias_vm rm
+        JOIN docentes d ON d.id_docente = rm.id_docente
+        JOIN materias_impartidas s ON s.id_materia_impartida = rm.id_materia_impartida
+        WHERE rm.id_docente = %(id_docente)s
+    """, 0),
+    ("sp_refrescar_reporte_docente: tendencia", """
+        SELECT fecha, promedio, total_evaluaciones FROM historial_evaluacion_diario
+        WHERE id_docente = %(id_docente)s ORDER BY fecha DESC LIMIT 30
+    """, 0),
+    ("sp_historial_archivar: lote de evaluaciones", """
+        SELECT id_historial FROM historial_evaluacion
+        WHERE fecha_registro < NOW() - INTERVAL 180 DAY ORDER BY fecha_registro LIMIT 5000
+    """, 0),
+    ("sp_historial_archivar: lote de comentarios", """
+        SELECT id_historial_comentario FROM historial_comentarios
+        WHERE fecha_registro < NOW() - INTERVAL 180 DAY ORDER BY fecha_registro LIMIT 5000
+    """, 0),
+    ("trg_historial_comentarios: datos de la evaluación", """
+        SELECT e.id_docente, e.id_alumno, m.materia, m.id_materia_impartida, m.id_campus FROM evaluacion e
+        JOIN materias_impartidas m ON e.id_materia_impartida = m.id_materia_impartida
+        WHERE e.id_evaluacion = %(id_evaluacion)s
+    """, 0),
+    ("trg_progreso_evaluacion: materia ya evaluada", """
+        SELECT 1 FROM evaluacion e
+        WHERE e.id_alumno = %(id_alumno)s AND e.id_materia_impartida = %(id_materia)s AND e.id_evaluacion <> 0
+    """, 0),
+    ("trg_progreso_alta_materia: alumnos del grupo", """
+        SELECT p.id_alumno FROM progreso_alumnos p
+        JOIN alumnos a ON a.id_alumno = p.id_alumno
+        WHERE a.id_campus = %(id_campus)s AND a.numero_semestre = %(numero)s
+    """, 0),
+]
+
+
+def consultas_app(cur, muestra):
+    """Las consultas de las rutas, tomadas de las constantes y constructores de sus módulos; las
+    búsquedas de comentarios incluyen la segunda página (cursor de una página real de una fila).
+    Devuelve (nombre, sql, escaneos permitidos, params, sin ordenar)."""
+    id_alumno, id_docente = muestra['id_alumno'], muestra['id_docente']
+    consultas = [
+        ("login: identidad por matrícula (autenticacion.SQL_IDENTIDAD)",
+         SQL_IDENTIDAD, {'matricula': muestra['matricula_alumno']}),
+        ("inicio/semestres/encuesta: campus y semestre del alumno (evaluacion.SQL_CAMPUS_SEMESTRE)",
+         evaluacion.SQL_CAMPUS_SEMESTRE, (id_alumno,)),
+        ("inicio/semestres: estado del alumno (materias.SQL_ALUMNO)",
+         materias.SQL_ALUMNO, {'id_alumno': id_alumno}),
+        ("inicio/semestres/encuesta: catálogo del grupo (materias.SQL_GRUPO)",
+         materias.SQL_GRUPO, materias.parametros_grupo(muestra['id_campus'], muestra['numero'])),
+        ("guardar: evaluación propia (evaluacion.SQL_EVALUACION_PROPIA)",
+         evaluacion.SQL_EVALUACION_PROPIA, (muestra['id_evaluacion'], id_alumno)),
+        ("profesor: reporte precalculado (evaluacion.SQL_REPORTE_DOCENTE)",
+         evaluacion.SQL_REPORTE_DOCENTE, (id_docente,)),
+        ("encuesta_servicios: ya contestada (evaluacion.SQL_SERVICIOS_CONTESTADA)",
+         evaluacion.SQL_SERVICIOS_CONTESTADA, (id_alumno,)),
+        ("encuesta/encuesta_servicios: catálogo de preguntas activas (preguntas.SQL_ACTIVAS)",
+         preguntas.SQL_ACTIVAS, ('docente',)),
+        ("comentarios: cobertura de la búsqueda (comentarios.SQL_COBERTURA)", comentarios.SQL_COBERTURA, ()),
+        ("comentarios: términos del docente (comentarios.SQL_TERMINOS)",
+         *comentarios.consulta_terminos(id_docente, {})),
+    ]
+    busquedas = [
+        ("búsqueda por texto", {'q': 'profesor'}, None),
+        ("por docente y fecha", {'desde': (date.today() - timedelta(days=30)).isoformat()}, id_docente),
+    ]
+    for descripcion, args, docente in busquedas:
+        sql, params, _ = comentarios.consulta_busqueda(args, docente)
+        consultas.append((f"comentarios: {descripcion} (comentarios.SQL_BUSQUEDA)", sql, params))
+        siguiente = comentarios.buscar(cur, dict(args, limite='1'), docente)['siguiente']
+        if siguiente:
+            sql, params, _ = comentarios.consulta_busqueda(dict(args, despues=siguiente), docente)
+            consultas.append((f"comentarios: {descripcion}, segunda página (comentarios.SQL_BUSQUEDA)", sql, params))
+    consultas = [(nombre, sql, 0, params, False) for nombre, sql, params in consultas]
+    # Exportaciones: recorren la tabla conductora (contadores por materia o alumnos); con filtro de
+    # campus también deben usar índices en el resto de los accesos
+    for reporte in exportaciones.REPORTES:
+        for descripcion, args in (("completo", {}), ("por campus", {'campus': str(muestra['id_campus'])})):
+            sql, params = exportaciones.consulta(reporte, args)
+            consultas.append((f"admin/export/{reporte}: {descripcion} (exportaciones.REPORTES)", sql, 1, params, False))
+    return consultas
+
+
+def consultas_tablas(cur, muestra):
+    """Las consultas de /admin/tablas/<tabla> tal como las arma tablas_admin.consulta: primera y
+    segunda página (con el cursor de una página real de una fila) del orden por defecto y de cada
+    orden de spec['indexados'], y primera página con filtros. Se permite recorrer la tabla
+    conductora de los órdenes no indexados; los indexados no pueden recorrerla ni ordenar las filas
+    (Using filesort). Devuelve (nombre, sql, escaneos permitidos, params, sin ordenar)."""
+    filtros = {'pendientes': '1', 'campus': muestra['id_campus'], 'carrera': muestra['id_carrera']}
+    consultas = []
+    for tabla, spec in tablas_admin.TABLAS.items():
+        defecto = spec['orden_defecto'][0]
+        variantes = []
+        for orden in dict.fromkeys((defecto,) + spec['indexados']):
+            args = {'orden': orden}
+            variantes.append((f"orden {orden}, primera página", args, orden in spec['indexados']))
+            siguiente = tablas_admin.pagina(cur, tabla, dict(args, limite='1'))['siguiente']
+            if siguiente:
+                variantes.append((f"orden {orden}, segunda página", dict(args, despues=siguiente),
+                                  orden in spec['indexados']))
+        disponibles = {k: str(filtros[k]) for k in spec['filtros'] if filtros[k] is not None}
+        if disponibles:
+            variantes.append(("con filtros", disponibles, False))
+        if defecto in spec['indexados']:
+            # Un filtro de igualdad con el orden por defecto también se lee por índice
+            for nombre in ('campus', 'carrera'):
+                if nombre in disponibles:
+                    variantes.append((f"filtro {nombre}", {nombre: disponibles[nombre]}, True))
+        for descripcion, args, indexado in variantes:
+            sql, params, _, _ = tablas_admin.consulta(tabla, args)
+            consultas.append((f"admin/tablas/{tabla}: {descripcion} (tablas_admin.TABLAS)", sql,
+                              0 if indexado else 1, params, indexado))
+    return consultas
+
+
+def obtener_muestra(cur):
+    muestra = {}
+    for clave, sql in MUESTRA_SQL.items():
+        cur.execute(sql)
+        muestra[clave] = cur.fetchone()["v"]
+    return muestra
+
+
+def escaneos_completos(plan, filas_max):
+    """Filas del plan que recorren completa una tabla: sin índice utilizable o con más de filas_max filas."""
+    escaneos = []
+    for fila in plan:
+        tabla = fila.get("table") or ""
+        if fila.get("type") != "ALL" or tabla.startswith("<") or tabla in TABLAS_CATALOGO:
+            continue
+        if not fila.get("possible_keys") or (fila.get("rows") or 0) > filas_max:
+            escaneos.append(fila)
+    return escaneos
+
+
+def ordena_filas(plan):
+    """True si el plan ordena las filas en lugar de leerlas en el orden de un índice."""
+    return any("Using filesort" in (fila.get("Extra") or "") for fila in plan)
+
+
+def verificar(cur, filas_max=1000):
+    """Revisa el plan de todas las consultas. Devuelve [(nombre, falla o None)]."""
+    muestra = obtener_muestra(cur)
+    consultas = consultas_app(cur, muestra)
+    consultas += [(nombre, sql, permitidos, muestra, False) for nombre, sql, permitidos in CONSULTAS_BASE]
+    consultas += consultas_tablas(cur, muestra)
+
+    resultados = []
+    for nombre, sql, permitidos, params, sin_ordenar in consultas:
+        cur.execute("EXPLAIN " + sql, params)
+        plan = cur.fetchall()
+        escaneos = escaneos_completos(plan, filas_max)
+        falla = None
+        if len(escaneos) > permitidos:
+            tablas = ", ".join(f"{f['table']} (~{f.get('rows')} filas)" for f in escaneos)
+            falla = f"escaneo completo de {tablas}"
+        elif sin_ordenar and ordena_filas(plan):
+            falla = "ordena las filas (Using filesort) en lugar de leerlas por índice"
+        resultados.append((nombre, falla))
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas-max", type=int, default=1000,
+                        help="filas estimadas a partir de las cuales un escaneo con índice posible también falla")
+    args = parser.parse_args()
+
+    db = mysql.connector.connect(**DB_CONFIG)
+    cur = db.cursor(dictionary=True)
+    resultados = verificar(cur, args.filas_max)
+    cur.close()
+    db.close()
+
+    fallas = 0
+    for nombre, falla in resultados:
+        if falla:
+            fallas += 1
+            print(f"FALLA  {nombre}: {falla}")
+        else:
+            print(f"OK     {nombre}")
+    print(f"\n{len(resultados) - fallas}/{len(resultados)} consultas sin escaneos completos no permitidos")
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
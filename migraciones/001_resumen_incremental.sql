@@ -0,0 +1,309 @@
+/***
+Descripción: Migración para bases existentes. Contadores incrementales en resumen_docentes_vm y
+resumen_servicios_vm, una instantánea de historial_evaluacion por evaluación enviada y
+procedimiento de verificación sp_vm_verificar_resumen.
+***/
+
+USE evaluacion_d;
+
+ALTER TABLE resumen_docentes_vm
+    ADD COLUMN suma_puntos BIGINT NOT NULL DEFAULT 0 AFTER id_docente,
+    ADD COLUMN total_calificadas INT NOT NULL DEFAULT 0 AFTER suma_puntos,
+    ADD COLUMN total_evaluaciones INT NOT NULL DEFAULT 0 AFTER total_respuestas;
+
+ALTER TABLE resumen_servicios_vm
+    ADD COLUMN suma_puntos BIGINT NOT NULL DEFAULT 0 AFTER id_campus,
+    ADD COLUMN total_calificadas INT NOT NULL DEFAULT 0 AFTER suma_puntos,
+    ADD COLUMN total_evaluaciones INT NOT NULL DEFAULT 0 AFTER total_respuestas;
+
+ALTER TABLE historial_evaluacion
+    ADD COLUMN id_evaluacion INT NULL AFTER id_docente,
+    ADD UNIQUE KEY uq_historial_evaluacion (id_evaluacion);
+
+DROP TRIGGER IF EXISTS trg_actualizar_historial_evaluacion;
+DROP TRIGGER IF EXISTS trg_refrescar_resumen_servicios;
+DROP PROCEDURE IF EXISTS sp_vm_refrescar_docente_individual;
+DROP PROCEDURE IF EXISTS sp_vm_refrescar_campus_servicio_individual;
+DROP PROCEDURE IF EXISTS sp_vm_refrescar_resumen_completo;
+DROP PROCEDURE IF EXISTS sp_vm_verificar_resumen;
+DROP PROCEDURE IF EXISTS sp_registrar_historial_evaluacion;
+
+-- Procedimiento granular (recalcula desde cero los datos para 1 docente; los triggers usan contadores incrementales)
+DELIMITER $$
+CREATE PROCEDURE sp_vm_refrescar_docente_individual(IN p_id_docente INT)
+BEGIN
+    DECLARE v_suma BIGINT DEFAULT 0;
+    DECLARE v_calificadas INT DEFAULT 0;
+    DECLARE v_total INT DEFAULT 0;
+    DECLARE v_evaluaciones INT DEFAULT 0;
+
+    SELECT COALESCE(SUM(CAST(r.escala AS UNSIGNED)),0), COUNT(r.escala),
+           COUNT(r.id_respuesta), COUNT(DISTINCT e.id_evaluacion)
+    INTO v_suma, v_calificadas, v_total, v_evaluaciones
+    FROM evaluacion e
+    JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+    WHERE e.id_docente = p_id_docente;
+
+    IF v_total IS NULL OR v_total = 0 THEN
+        DELETE FROM resumen_docentes_vm WHERE id_docente = p_id_docente;
+    ELSE
+        INSERT INTO resumen_docentes_vm (id_docente, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+        VALUES (p_id_docente, v_suma, v_calificadas, v_total, v_evaluaciones,
+                IF(v_calificadas = 0, 0.00, ROUND(v_suma / v_calificadas, 2)))
+        ON DUPLICATE KEY UPDATE
+            suma_puntos = VALUES(suma_puntos),
+            total_calificadas = VALUES(total_calificadas),
+            total_respuestas = VALUES(total_respuestas),
+            total_evaluaciones = VALUES(total_evaluaciones),
+            promedio = VALUES(promedio);
+    END IF;
+END$$
+DELIMITER ;
+
+-- Procedimiento granular para servicios por campus (recalcula desde cero)
+DELIMITER $$
+CREATE PROCEDURE sp_vm_refrescar_campus_servicio_individual(IN p_id_campus INT)
+BEGIN
+    DECLARE v_suma BIGINT DEFAULT 0;
+    DECLARE v_calificadas INT DEFAULT 0;
+    DECLARE v_total INT DEFAULT 0;
+    DECLARE v_evaluaciones INT DEFAULT 0;
+
+    SELECT COALESCE(SUM(CAST(rs.escala AS UNSIGNED)),0), COUNT(rs.escala),
+           COUNT(rs.id_respuesta), COUNT(DISTINCT es.id_evaluacion_servicios)
+    INTO v_suma, v_calificadas, v_total, v_evaluaciones
+    FROM evaluacion_servicios es
+    JOIN respuestas_servicios rs ON es.id_evaluacion_servicios = rs.id_evaluacion_servicios
+    WHERE es.id_campus = p_id_campus;
+
+    IF v_total IS NULL OR v_total = 0 THEN
+        DELETE FROM resumen_servicios_vm WHERE id_campus = p_id_campus;
+    ELSE
+        INSERT INTO resumen_servicios_vm (id_campus, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+        VALUES (p_id_campus, v_suma, v_calificadas, v_total, v_evaluaciones,
+                IF(v_calificadas = 0, 0.00, ROUND(v_suma / v_calificadas, 2)))
+        ON DUPLICATE KEY UPDATE
+            suma_puntos = VALUES(suma_puntos),
+            total_calificadas = VALUES(total_calificadas),
+            total_respuestas = VALUES(total_respuestas),
+            total_evaluaciones = VALUES(total_evaluaciones),
+            promedio = VALUES(promedio);
+    END IF;
+END$$
+DELIMITER ;
+
+-- Procedimiento de refresco completo (reconcilia todo: docentes + servicios)
+DELIMITER $$
+CREATE PROCEDURE sp_vm_refrescar_resumen_completo()
+BEGIN
+    -- Docentes: resumen completo
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_doc;
+    CREATE TEMPORARY TABLE tmp_vm_doc AS
+    SELECT e.id_docente,
+           COALESCE(SUM(CAST(r.escala AS UNSIGNED)),0) AS suma_puntos,
+           COUNT(r.escala) AS total_calificadas,
+           COUNT(r.id_respuesta) AS total_respuestas,
+           COUNT(DISTINCT e.id_evaluacion) AS total_evaluaciones
+    FROM evaluacion e
+    JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+    GROUP BY e.id_docente;
+
+    INSERT INTO resumen_docentes_vm (id_docente, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    SELECT id_docente, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones,
+           IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2))
+    FROM tmp_vm_doc
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = VALUES(suma_puntos),
+        total_calificadas = VALUES(total_calificadas),
+        total_respuestas = VALUES(total_respuestas),
+        total_evaluaciones = VALUES(total_evaluaciones),
+        promedio = VALUES(promedio);
+
+    DELETE rd FROM resumen_docentes_vm rd
+    LEFT JOIN tmp_vm_doc t ON rd.id_docente = t.id_docente
+    WHERE t.id_docente IS NULL;
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_doc;
+
+    -- Servicios: resumen completo por campus
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_serv;
+    CREATE TEMPORARY TABLE tmp_vm_serv AS
+    SELECT es.id_campus,
+           COALESCE(SUM(CAST(rs.escala AS UNSIGNED)),0) AS suma_puntos,
+           COUNT(rs.escala) AS total_calificadas,
+           COUNT(rs.id_respuesta) AS total_respuestas,
+           COUNT(DISTINCT es.id_evaluacion_servicios) AS total_evaluaciones
+    FROM evaluacion_servicios es
+    JOIN respuestas_servicios rs ON es.id_evaluacion_servicios = rs.id_evaluacion_servicios
+    GROUP BY es.id_campus;
+
+    INSERT INTO resumen_servicios_vm (id_campus, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    SELECT id_campus, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones,
+           IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2))
+    FROM tmp_vm_serv
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = VALUES(suma_puntos),
+        total_calificadas = VALUES(total_calificadas),
+        total_respuestas = VALUES(total_respuestas),
+        total_evaluaciones = VALUES(total_evaluaciones),
+        promedio = VALUES(promedio);
+
+    DELETE rs FROM resumen_servicios_vm rs
+    LEFT JOIN tmp_vm_serv t ON rs.id_campus = t.id_campus
+    WHERE t.id_campus IS NULL;
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_serv;
+END$$
+DELIMITER ;
+
+-- Verificación de consistencia: compara los contadores incrementales contra el mismo recálculo
+-- que hace sp_vm_refrescar_resumen_completo. Devuelve 2 result sets (docentes, servicios)
+-- con las filas que difieren; si ambos vienen vacíos el resumen está reconciliado.
+DELIMITER $$
+CREATE PROCEDURE sp_vm_verificar_resumen()
+BEGIN
+    SELECT t.id_docente,
+           rd.suma_puntos, t.suma_puntos AS suma_esperada,
+           rd.total_respuestas, t.total_respuestas AS total_respuestas_esperado,
+           rd.total_evaluaciones, t.total_evaluaciones AS total_evaluaciones_esperado
+    FROM (
+        SELECT e.id_docente,
+               COALESCE(SUM(CAST(r.escala AS UNSIGNED)),0) AS suma_puntos,
+               COUNT(r.escala) AS total_calificadas,
+               COUNT(r.id_respuesta) AS total_respuestas,
+               COUNT(DISTINCT e.id_evaluacion) AS total_evaluaciones
+        FROM evaluacion e
+        JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+        GROUP BY e.id_docente
+    ) t
+    LEFT JOIN resumen_docentes_vm rd ON rd.id_docente = t.id_docente
+    WHERE rd.id_docente IS NULL
+       OR rd.suma_puntos <> t.suma_puntos
+       OR rd.total_calificadas <> t.total_calificadas
+       OR rd.total_respuestas <> t.total_respuestas
+       OR rd.total_evaluaciones <> t.total_evaluaciones
+    UNION ALL
+    SELECT rd.id_docente, rd.suma_puntos, 0, rd.total_respuestas, 0, rd.total_evaluaciones, 0
+    FROM resumen_docentes_vm rd
+    WHERE NOT EXISTS (
+        SELECT 1 FROM evaluacion e
+        JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+        WHERE e.id_docente = rd.id_docente
+    );
+
+    SELECT t.id_campus,
+           rs.suma_puntos, t.suma_puntos AS suma_esperada,
+           rs.total_respuestas, t.total_respuestas AS total_respuestas_esperado,
+           rs.total_evaluaciones, t.total_evaluaciones AS total_evaluaciones_esperado
+    FROM (
+        SELECT es.id_campus,
+               COALESCE(SUM(CAST(rsv.escala AS UNSIGNED)),0) AS suma_puntos,
+               COUNT(rsv.escala) AS total_calificadas,
+               COUNT(rsv.id_respuesta) AS total_respuestas,
+               COUNT(DISTINCT es.id_evaluacion_servicios) AS total_evaluaciones
+        FROM evaluacion_servicios es
+        JOIN respuestas_servicios rsv ON es.id_evaluacion_servicios = rsv.id_evaluacion_servicios
+        GROUP BY es.id_campus
+    ) t
+    LEFT JOIN resumen_servicios_vm rs ON rs.id_campus = t.id_campus
+    WHERE rs.id_campus IS NULL
+       OR rs.suma_puntos <> t.suma_puntos
+       OR rs.total_calificadas <> t.total_calificadas
+       OR rs.total_respuestas <> t.total_respuestas
+       OR rs.total_evaluaciones <> t.total_evaluaciones
+    UNION ALL
+    SELECT rs.id_campus, rs.suma_puntos, 0, rs.total_respuestas, 0, rs.total_evaluaciones, 0
+    FROM resumen_servicios_vm rs
+    WHERE NOT EXISTS (
+        SELECT 1 FROM evaluacion_servicios es
+        JOIN respuestas_servicios rsv ON es.id_evaluacion_servicios = rsv.id_evaluacion_servicios
+        WHERE es.id_campus = rs.id_campus
+    );
+END$$
+DELIMITER ;
+
+-- Procedimiento que registra una sola instantánea en el historial por evaluación enviada.
+-- Lee el promedio ya acumulado en resumen_docentes_vm (lectura por llave primaria).
+DELIMITER $$
+CREATE PROCEDURE sp_registrar_historial_evaluacion(IN p_id_evaluacion INT)
+BEGIN
+    INSERT INTO historial_evaluacion (id_docente, id_evaluacion, promedio, total_evaluaciones)
+    SELECT e.id_docente, e.id_evaluacion, rd.promedio, rd.total_evaluaciones
+    FROM evaluacion e
+    JOIN resumen_docentes_vm rd ON rd.id_docente = e.id_docente
+    WHERE e.id_evaluacion = p_id_evaluacion
+    ON DUPLICATE KEY UPDATE id_historial = id_historial;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+-- Trigger que acumula la respuesta en el resumen del docente en tiempo constante
+-- (sin recorrer el resto de las respuestas). El historial se registra una vez por
+-- evaluación con sp_registrar_historial_evaluacion.
+CREATE TRIGGER trg_actualizar_historial_evaluacion 
+AFTER INSERT ON respuestas
+FOR EACH ROW
+BEGIN
+    DECLARE v_id_docente INT;
+    DECLARE v_puntos INT;
+    DECLARE v_nueva_evaluacion TINYINT DEFAULT 0;
+
+    -- Obtener el id_docente de la evaluación
+    SELECT e.id_docente INTO v_id_docente
+    FROM evaluacion e
+    WHERE e.id_evaluacion = NEW.id_evaluacion;
+
+    SET v_puntos = COALESCE(CAST(NEW.escala AS UNSIGNED), 0);
+
+    -- Primera respuesta de la evaluación -> cuenta como una evaluación más del docente
+    SET v_nueva_evaluacion = NOT EXISTS (
+        SELECT 1 FROM respuestas r
+        WHERE r.id_evaluacion = NEW.id_evaluacion AND r.id_respuesta <> NEW.id_respuesta
+    );
+
+    -- Actualizar contadores del docente (las asignaciones se evalúan en orden, promedio usa los nuevos valores)
+    INSERT INTO resumen_docentes_vm (id_docente, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    VALUES (v_id_docente, v_puntos, NEW.escala IS NOT NULL, 1, v_nueva_evaluacion, v_puntos)
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + 1,
+        total_evaluaciones = total_evaluaciones + VALUES(total_evaluaciones),
+        promedio = IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2));
+END$$
+
+-- Trigger que acumula la respuesta de servicios en el resumen del campus en tiempo constante
+CREATE TRIGGER trg_refrescar_resumen_servicios
+AFTER INSERT ON respuestas_servicios
+FOR EACH ROW
+BEGIN
+    DECLARE v_id_campus INT;
+    DECLARE v_puntos INT;
+    DECLARE v_nueva_evaluacion TINYINT DEFAULT 0;
+
+    -- Obtener el id_campus de la evaluación de servicios
+    SELECT es.id_campus INTO v_id_campus
+    FROM evaluacion_servicios es
+    WHERE es.id_evaluacion_servicios = NEW.id_evaluacion_servicios;
+
+    SET v_puntos = COALESCE(CAST(NEW.escala AS UNSIGNED), 0);
+
+    SET v_nueva_evaluacion = NOT EXISTS (
+        SELECT 1 FROM respuestas_servicios rs
+        WHERE rs.id_evaluacion_servicios = NEW.id_evaluacion_servicios AND rs.id_respuesta <> NEW.id_respuesta
+    );
+
+    -- Actualizar contadores del campus
+    INSERT INTO resumen_servicios_vm (id_campus, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    VALUES (v_id_campus, v_puntos, NEW.escala IS NOT NULL, 1, v_nueva_evaluacion, v_puntos)
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + 1,
+        total_evaluaciones = total_evaluaciones + VALUES(total_evaluaciones),
+        promedio = IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2));
+END$$
+DELIMITER ;
+
+-- Llenar los contadores nuevos a partir de los datos existentes
+CALL sp_vm_refrescar_resumen_completo();
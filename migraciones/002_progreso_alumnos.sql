@@ -0,0 +1,253 @@
+/***
+Descripción: Migración para bases existentes. Tabla progreso_alumnos mantenida por triggers y
+estadisticas_evaluacion reescrito para leerla con agregados simples.
+***/
+
+USE evaluacion_d;
+
+-- Progreso por alumno (se mantiene con triggers): materias requeridas en su campus/semestre,
+-- materias distintas ya evaluadas, evaluaciones docentes registradas y encuesta de servicios
+CREATE TABLE IF NOT EXISTS progreso_alumnos (
+    id_alumno INT PRIMARY KEY,
+    total_requerido INT NOT NULL DEFAULT 0,
+    completadas INT NOT NULL DEFAULT 0,
+    evaluaciones_realizadas INT NOT NULL DEFAULT 0,
+    servicios_completado TINYINT(1) NOT NULL DEFAULT 0,
+    ultima_actualizacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ON UPDATE CURRENT_TIMESTAMP,
+    CONSTRAINT fk_progreso_alumnos_alumnos FOREIGN KEY (id_alumno) REFERENCES alumnos(id_alumno)
+) ENGINE=InnoDB;
+
+DROP PROCEDURE IF EXISTS estadisticas_evaluacion;
+DROP PROCEDURE IF EXISTS sp_refrescar_progreso_alumno;
+DROP PROCEDURE IF EXISTS sp_refrescar_progreso_alumnos;
+DROP TRIGGER IF EXISTS trg_progreso_alta_alumno;
+DROP TRIGGER IF EXISTS trg_progreso_cambio_alumno;
+DROP TRIGGER IF EXISTS trg_progreso_alta_materia;
+DROP TRIGGER IF EXISTS trg_progreso_cambio_materia;
+DROP TRIGGER IF EXISTS trg_progreso_baja_materia;
+DROP TRIGGER IF EXISTS trg_progreso_evaluacion;
+DROP TRIGGER IF EXISTS trg_progreso_servicios;
+
+DELIMITER $$
+-- Procedimiento para estadísticas generales (lee progreso_alumnos, sin subconsultas por alumno)
+CREATE PROCEDURE estadisticas_evaluacion()
+BEGIN
+    -- Total de campus que evalúan (solo alumnos que completaron todo, incluyendo servicios)
+    SELECT COUNT(DISTINCT a.id_campus) as total_campus 
+    FROM progreso_alumnos p
+    JOIN alumnos a ON a.id_alumno = p.id_alumno
+    WHERE p.completadas >= p.total_requerido
+      AND p.servicios_completado = 1;
+    
+    -- Total de alumnos que han completado todas las evaluaciones (docentes + servicios)
+    SELECT COUNT(*) as total_alumnos 
+    FROM progreso_alumnos p
+    WHERE p.completadas >= p.total_requerido
+      AND p.servicios_completado = 1;
+    
+    -- Alumnos por campus que han evaluado (sólo con evaluaciones docentes)
+    SELECT c.nombre as campus, COUNT(*) as alumnos
+    FROM progreso_alumnos p
+    JOIN alumnos a ON a.id_alumno = p.id_alumno
+    JOIN campus c ON a.id_campus = c.id_campus
+    WHERE p.evaluaciones_realizadas > 0
+    GROUP BY a.id_campus;
+    
+    -- Alumnos por carrera que han evaluado
+    SELECT ca.nombre as carrera, COUNT(*) as alumnos
+    FROM progreso_alumnos p
+    JOIN alumnos a ON a.id_alumno = p.id_alumno
+    JOIN carreras ca ON a.id_carrera = ca.id_carrera
+    WHERE p.evaluaciones_realizadas > 0
+    GROUP BY a.id_carrera;
+    
+    -- Alumnos que no han evaluado (sin evaluacion docente alguna)
+    SELECT a.*, c.nombre as campus, ca.nombre as carrera
+    FROM progreso_alumnos p
+    JOIN alumnos a ON a.id_alumno = p.id_alumno
+    JOIN campus c ON a.id_campus = c.id_campus
+    JOIN carreras ca ON a.id_carrera = ca.id_carrera
+    WHERE p.evaluaciones_realizadas = 0;
+
+    -- Estado por alumno: total requerido / completadas / pendientes 
+    SELECT 
+        a.id_alumno,
+        a.matricula,
+        a.nombre,
+        a.apellidop,
+        a.correo,
+        c.nombre as campus,
+        ca.nombre as carrera,
+        COALESCE(p.total_requerido, 0) AS total_requerido,
+        COALESCE(p.completadas, 0) AS completadas,
+        COALESCE(p.total_requerido, 0) - COALESCE(p.completadas, 0) AS pendientes
+    FROM alumnos a
+    LEFT JOIN progreso_alumnos p ON p.id_alumno = a.id_alumno
+    LEFT JOIN campus c ON a.id_campus = c.id_campus
+    LEFT JOIN carreras ca ON a.id_carrera = ca.id_carrera;
+END$$
+DELIMITER ;
+
+-- Recalcula desde cero el progreso de un alumno
+DELIMITER $$
+CREATE PROCEDURE sp_refrescar_progreso_alumno(IN p_id_alumno INT)
+BEGIN
+    INSERT INTO progreso_alumnos (id_alumno, total_requerido, completadas, evaluaciones_realizadas, servicios_completado)
+    SELECT a.id_alumno,
+           (SELECT COUNT(*) FROM materias_impartidas m
+            WHERE m.id_campus = a.id_campus AND m.numero = a.numero_semestre),
+           (SELECT COUNT(DISTINCT e.id_materia_impartida) FROM evaluacion e
+            JOIN materias_impartidas m ON e.id_materia_impartida = m.id_materia_impartida
+            WHERE e.id_alumno = a.id_alumno AND m.id_campus = a.id_campus AND m.numero = a.numero_semestre),
+           (SELECT COUNT(*) FROM evaluacion e WHERE e.id_alumno = a.id_alumno),
+           EXISTS (SELECT 1 FROM evaluacion_servicios es WHERE es.id_alumno = a.id_alumno)
+    FROM alumnos a
+    WHERE a.id_alumno = p_id_alumno
+    ON DUPLICATE KEY UPDATE
+        total_requerido = VALUES(total_requerido),
+        completadas = VALUES(completadas),
+        evaluaciones_realizadas = VALUES(evaluaciones_realizadas),
+        servicios_completado = VALUES(servicios_completado);
+END$$
+DELIMITER ;
+
+-- Reconstruye progreso_alumnos completo con agregados por grupo (carga inicial / reconciliación)
+DELIMITER $$
+CREATE PROCEDURE sp_refrescar_progreso_alumnos()
+BEGIN
+    INSERT INTO progreso_alumnos (id_alumno, total_requerido, completadas, evaluaciones_realizadas, servicios_completado)
+    SELECT a.id_alumno,
+           COALESCE(req.total, 0),
+           COALESCE(comp.completadas, 0),
+           COALESCE(ev.total, 0),
+           es.id_alumno IS NOT NULL
+    FROM alumnos a
+    LEFT JOIN (
+        SELECT id_campus, numero, COUNT(*) AS total
+        FROM materias_impartidas
+        GROUP BY id_campus, numero
+    ) req ON req.id_campus = a.id_campus AND req.numero = a.numero_semestre
+    LEFT JOIN (
+        SELECT e.id_alumno, COUNT(DISTINCT e.id_materia_impartida) AS completadas
+        FROM evaluacion e
+        JOIN alumnos a2 ON a2.id_alumno = e.id_alumno
+        JOIN materias_impartidas m ON e.id_materia_impartida = m.id_materia_impartida
+        WHERE m.id_campus = a2.id_campus AND m.numero = a2.numero_semestre
+        GROUP BY e.id_alumno
+    ) comp ON comp.id_alumno = a.id_alumno
+    LEFT JOIN (
+        SELECT id_alumno, COUNT(*) AS total FROM evaluacion GROUP BY id_alumno
+    ) ev ON ev.id_alumno = a.id_alumno
+    LEFT JOIN (
+        SELECT DISTINCT id_alumno FROM evaluacion_servicios
+    ) es ON es.id_alumno = a.id_alumno
+    ON DUPLICATE KEY UPDATE
+        total_requerido = VALUES(total_requerido),
+        completadas = VALUES(completadas),
+        evaluaciones_realizadas = VALUES(evaluaciones_realizadas),
+        servicios_completado = VALUES(servicios_completado);
+END$$
+DELIMITER ;
+
+DELIMITER $$
+-- Triggers que mantienen progreso_alumnos
+CREATE TRIGGER trg_progreso_alta_alumno
+AFTER INSERT ON alumnos
+FOR EACH ROW
+BEGIN
+    INSERT INTO progreso_alumnos (id_alumno, total_requerido)
+    VALUES (
+        NEW.id_alumno,
+        (SELECT COUNT(*) FROM materias_impartidas m
+         WHERE m.id_campus = NEW.id_campus AND m.numero = NEW.numero_semestre)
+    );
+END$$
+
+CREATE TRIGGER trg_progreso_cambio_alumno
+AFTER UPDATE ON alumnos
+FOR EACH ROW
+BEGIN
+    -- Sólo si cambió el campus o el semestre del alumno
+    IF NOT (NEW.id_campus <=> OLD.id_campus) OR NOT (NEW.numero_semestre <=> OLD.numero_semestre) THEN
+        CALL sp_refrescar_progreso_alumno(NEW.id_alumno);
+    END IF;
+END$$
+
+CREATE TRIGGER trg_progreso_alta_materia
+AFTER INSERT ON materias_impartidas
+FOR EACH ROW
+BEGIN
+    UPDATE progreso_alumnos p
+    JOIN alumnos a ON a.id_alumno = p.id_alumno
+    SET p.total_requerido = p.total_requerido + 1
+    WHERE a.id_campus = NEW.id_campus AND a.numero_semestre = NEW.numero;
+END$$
+
+CREATE TRIGGER trg_progreso_cambio_materia
+AFTER UPDATE ON materias_impartidas
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.id_campus <=> OLD.id_campus) OR NOT (NEW.numero <=> OLD.numero) THEN
+        UPDATE progreso_alumnos p
+        JOIN alumnos a ON a.id_alumno = p.id_alumno
+        SET p.total_requerido = (
+                SELECT COUNT(*) FROM materias_impartidas m
+                WHERE m.id_campus = a.id_campus AND m.numero = a.numero_semestre),
+            p.completadas = (
+                SELECT COUNT(DISTINCT e.id_materia_impartida) FROM evaluacion e
+                JOIN materias_impartidas m ON e.id_materia_impartida = m.id_materia_impartida
+                WHERE e.id_alumno = a.id_alumno AND m.id_campus = a.id_campus AND m.numero = a.numero_semestre)
+        WHERE (a.id_campus = OLD.id_campus AND a.numero_semestre = OLD.numero)
+           OR (a.id_campus = NEW.id_campus AND a.numero_semestre = NEW.numero);
+    END IF;
+END$$
+
+CREATE TRIGGER trg_progreso_baja_materia
+AFTER DELETE ON materias_impartidas
+FOR EACH ROW
+BEGIN
+    UPDATE progreso_alumnos p
+    JOIN alumnos a ON a.id_alumno = p.id_alumno
+    SET p.total_requerido = p.total_requerido - 1
+    WHERE a.id_campus = OLD.id_campus AND a.numero_semestre = OLD.numero;
+END$$
+
+CREATE TRIGGER trg_progreso_evaluacion
+AFTER INSERT ON evaluacion
+FOR EACH ROW
+BEGIN
+    DECLARE v_cuenta TINYINT DEFAULT 0;
+
+    -- La materia cuenta si es del campus/semestre del alumno y es la primera evaluación de esa materia
+    SELECT COALESCE(m.id_campus = a.id_campus AND m.numero = a.numero_semestre, 0) INTO v_cuenta
+    FROM alumnos a
+    JOIN materias_impartidas m ON m.id_materia_impartida = NEW.id_materia_impartida
+    WHERE a.id_alumno = NEW.id_alumno;
+
+    IF v_cuenta = 1 AND EXISTS (
+        SELECT 1 FROM evaluacion e
+        WHERE e.id_alumno = NEW.id_alumno
+          AND e.id_materia_impartida = NEW.id_materia_impartida
+          AND e.id_evaluacion <> NEW.id_evaluacion
+    ) THEN
+        SET v_cuenta = 0;
+    END IF;
+
+    UPDATE progreso_alumnos
+    SET completadas = completadas + v_cuenta,
+        evaluaciones_realizadas = evaluaciones_realizadas + 1
+    WHERE id_alumno = NEW.id_alumno;
+END$$
+
+CREATE TRIGGER trg_progreso_servicios
+AFTER INSERT ON evaluacion_servicios
+FOR EACH ROW
+BEGIN
+    UPDATE progreso_alumnos SET servicios_completado = 1 WHERE id_alumno = NEW.id_alumno;
+END$$
+
+DELIMITER ;
+
+-- Carga inicial del progreso a partir de los datos existentes
+CALL sp_refrescar_progreso_alumnos();
@@ -0,0 +1,23 @@
+/***
+Descripción: Migración para bases existentes. Índices compuestos para las búsquedas frecuentes
+(login, /inicio, /semestres, /encuesta) y UNIQUE para evitar evaluaciones duplicadas.
+alumnos.matricula, docentes.matricula y evaluacion_servicios.id_alumno ya tienen índice
+(UNIQUE y llave foránea respectivamente).
+***/
+
+USE evaluacion_d;
+
+-- Antes de crear el UNIQUE, revisar que no existan evaluaciones duplicadas:
+-- SELECT id_alumno, id_materia_impartida, COUNT(*) FROM evaluacion
+-- GROUP BY id_alumno, id_materia_impartida HAVING COUNT(*) > 1;
+
+ALTER TABLE evaluacion
+    ADD UNIQUE KEY uq_evaluacion_alumno_materia (id_alumno, id_materia_impartida),
+    ADD KEY idx_evaluacion_alumno_docente (id_alumno, id_docente, id_materia_impartida);
+
+ALTER TABLE materias_impartidas
+    ADD KEY idx_materias_campus_numero (id_campus, numero),
+    ADD KEY idx_materias_docente_campus_numero (id_docente, id_campus, numero);
+
+ALTER TABLE alumnos
+    ADD KEY idx_alumnos_campus_semestre (id_campus, numero_semestre);
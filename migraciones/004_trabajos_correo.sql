@@ -0,0 +1,30 @@
+/***
+Descripción: Migración para bases existentes. Cola persistente de envíos de reportes por correo.
+***/
+
+USE evaluacion_d;
+
+-- Trabajos de envío de reportes por correo (cola persistente) y su estado por destinatario
+CREATE TABLE IF NOT EXISTS trabajos_correo (
+    id_trabajo INT AUTO_INCREMENT PRIMARY KEY,
+    estado ENUM('pendiente','enviando','enviado','parcial','error') NOT NULL DEFAULT 'pendiente',
+    solicitado_por VARCHAR(100) NULL,
+    total_destinatarios INT NOT NULL DEFAULT 0,
+    enviados INT NOT NULL DEFAULT 0,
+    fallidos INT NOT NULL DEFAULT 0,
+    error TEXT NULL,
+    fecha_creacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    ultima_actualizacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ON UPDATE CURRENT_TIMESTAMP,
+    KEY idx_trabajos_correo_estado (estado)
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS trabajos_correo_destinatarios (
+    id_trabajo INT NOT NULL,
+    correo VARCHAR(256) NOT NULL,
+    estado ENUM('pendiente','enviado','error') NOT NULL DEFAULT 'pendiente',
+    intentos INT NOT NULL DEFAULT 0,
+    ultimo_error TEXT NULL,
+    PRIMARY KEY (id_trabajo, correo),
+    CONSTRAINT fk_destinatarios_trabajo FOREIGN KEY (id_trabajo) REFERENCES trabajos_correo(id_trabajo)
+) ENGINE=InnoDB;
@@ -0,0 +1,481 @@
+/***
+Descripción: Migración para bases existentes. Catálogo versionado de preguntas y respuestas
+compactas (id_pregunta SMALLINT, escala TINYINT) en lugar del texto de la pregunta y el ENUM
+por fila. Las tablas anteriores se conservan como *_texto_anterior para poder verificar la
+conversión; se pueden eliminar después.
+***/
+
+USE evaluacion_d;
+
+CREATE TABLE IF NOT EXISTS preguntas (
+    id_pregunta SMALLINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+    tipo ENUM('docente','servicios') NOT NULL,
+    version SMALLINT UNSIGNED NOT NULL DEFAULT 1,
+    orden SMALLINT UNSIGNED NOT NULL,
+    texto VARCHAR(500) NOT NULL,
+    activa TINYINT(1) NOT NULL DEFAULT 1,
+    UNIQUE KEY uq_preguntas_tipo_version_orden (tipo, version, orden),
+    KEY idx_preguntas_tipo_activa (tipo, activa, orden)
+);
+
+INSERT IGNORE INTO preguntas (tipo, version, orden, texto) VALUES
+('docente', 1, 1, '¿Qué tan claro y comprensible explica los temas durante la clase?'),
+('docente', 1, 2, '¿En qué medida domina el contenido de la materia que imparte?'),
+('docente', 1, 3, '¿Qué tan bien responde a las dudas o preguntas de los estudiantes?'),
+('docente', 1, 4, '¿Qué tan organizado(a) es al estructurar y presentar los contenidos?'),
+('docente', 1, 5, '¿Qué tanto fomenta la participación activa de los alumnos en clase?'),
+('docente', 1, 6, '¿En qué medida utiliza ejemplos prácticos o aplicaciones reales para explicar los temas?'),
+('docente', 1, 7, '¿Qué tan efectivo(a) es al utilizar recursos didácticos o tecnológicos para apoyar su enseñanza?'),
+('docente', 1, 8, '¿Qué tan justo(a) y claro(a) es al evaluar el desempeño de los estudiantes?'),
+('docente', 1, 9, '¿Qué tanto motiva a los estudiantes a interesarse en la materia?'),
+('docente', 1, 10, '¿Qué tan accesible y disponible está fuera de clase para apoyar a los estudiantes?'),
+('servicios', 1, 1, '¿Cómo califica la limpieza general de las instalaciones?'),
+('servicios', 1, 2, '¿Qué tan adecuadas son las instalaciones para el desarrollo académico?'),
+('servicios', 1, 3, '¿Cómo evalúa el servicio de biblioteca?'),
+('servicios', 1, 4, '¿Qué tan eficiente es el servicio de control escolar?'),
+('servicios', 1, 5, '¿Cómo califica la atención del personal administrativo?'),
+('servicios', 1, 6, '¿Qué tan bueno es el servicio de cafetería?'),
+('servicios', 1, 7, '¿Cómo evalúa la seguridad dentro del campus?'),
+('servicios', 1, 8, '¿Qué tan adecuado es el equipamiento de los laboratorios?'),
+('servicios', 1, 9, '¿Cómo califica el servicio de internet y recursos tecnológicos?'),
+('servicios', 1, 10, '¿Qué tan eficiente es el proceso de inscripción y reinscripción?');
+
+-- Preguntas ya contestadas que no están en el catálogo (cuestionarios anteriores): versión 0, inactivas
+INSERT INTO preguntas (tipo, version, orden, texto, activa)
+SELECT 'docente', 0, ROW_NUMBER() OVER (ORDER BY t.texto), t.texto, 0
+FROM (SELECT DISTINCT LEFT(pregunta, 500) AS texto FROM respuestas) t
+WHERE NOT EXISTS (SELECT 1 FROM preguntas p WHERE p.tipo = 'docente' AND p.texto = t.texto);
+
+INSERT INTO preguntas (tipo, version, orden, texto, activa)
+SELECT 'servicios', 0, ROW_NUMBER() OVER (ORDER BY t.texto), t.texto, 0
+FROM (SELECT DISTINCT LEFT(pregunta, 500) AS texto FROM respuestas_servicios) t
+WHERE NOT EXISTS (SELECT 1 FROM preguntas p WHERE p.tipo = 'servicios' AND p.texto = t.texto);
+
+-- Copiar las respuestas con su id de pregunta; CAST de un ENUM('1'..'5') devuelve su posición (= valor).
+-- Si una evaluación repitió la misma pregunta se conserva la primera respuesta.
+CREATE TABLE respuestas_compactas (
+    id_evaluacion INT NOT NULL,
+    id_pregunta SMALLINT UNSIGNED NOT NULL,
+    escala TINYINT UNSIGNED NULL,
+    PRIMARY KEY (id_evaluacion, id_pregunta),
+    KEY idx_respuestas_pregunta (id_pregunta, escala),
+    CONSTRAINT chk_respuestas_escala CHECK (escala BETWEEN 1 AND 5),
+    FOREIGN KEY (id_evaluacion) REFERENCES evaluacion(id_evaluacion),
+    FOREIGN KEY (id_pregunta) REFERENCES preguntas(id_pregunta)
+);
+
+INSERT IGNORE INTO respuestas_compactas (id_evaluacion, id_pregunta, escala)
+SELECT r.id_evaluacion, p.id_pregunta, NULLIF(CAST(r.escala AS UNSIGNED), 0)
+FROM respuestas r
+JOIN preguntas p ON p.tipo = 'docente' AND p.texto = LEFT(r.pregunta, 500)
+ORDER BY r.id_respuesta;
+
+CREATE TABLE respuestas_servicios_compactas (
+    id_evaluacion_servicios INT NOT NULL,
+    id_pregunta SMALLINT UNSIGNED NOT NULL,
+    escala TINYINT UNSIGNED NULL,
+    PRIMARY KEY (id_evaluacion_servicios, id_pregunta),
+    KEY idx_respuestas_servicios_pregunta (id_pregunta, escala),
+    CONSTRAINT chk_respuestas_servicios_escala CHECK (escala BETWEEN 1 AND 5),
+    FOREIGN KEY (id_evaluacion_servicios) REFERENCES evaluacion_servicios(id_evaluacion_servicios),
+    FOREIGN KEY (id_pregunta) REFERENCES preguntas(id_pregunta)
+);
+
+INSERT IGNORE INTO respuestas_servicios_compactas (id_evaluacion_servicios, id_pregunta, escala)
+SELECT r.id_evaluacion_servicios, p.id_pregunta, NULLIF(CAST(r.escala AS UNSIGNED), 0)
+FROM respuestas_servicios r
+JOIN preguntas p ON p.tipo = 'servicios' AND p.texto = LEFT(r.pregunta, 500)
+ORDER BY r.id_respuesta;
+
+-- Los triggers viajan con la tabla al renombrarla: se quitan antes y se recrean sobre las nuevas
+DROP TRIGGER IF EXISTS trg_actualizar_historial_evaluacion;
+DROP TRIGGER IF EXISTS trg_refrescar_resumen_servicios;
+
+RENAME TABLE respuestas TO respuestas_texto_anterior,
+             respuestas_compactas TO respuestas,
+             respuestas_servicios TO respuestas_servicios_texto_anterior,
+             respuestas_servicios_compactas TO respuestas_servicios;
+
+DROP FUNCTION IF EXISTS fn_reporte_evaluacion;
+DROP PROCEDURE IF EXISTS insertar_respuesta;
+DROP PROCEDURE IF EXISTS reporte_admin_evaluacion;
+DROP PROCEDURE IF EXISTS reporte_admin_servicios;
+DROP PROCEDURE IF EXISTS reporte_preguntas;
+DROP PROCEDURE IF EXISTS sp_vm_refrescar_docente_individual;
+DROP PROCEDURE IF EXISTS sp_vm_refrescar_campus_servicio_individual;
+DROP PROCEDURE IF EXISTS sp_vm_refrescar_resumen_completo;
+DROP PROCEDURE IF EXISTS sp_vm_verificar_resumen;
+
+DELIMITER $$
+
+-- Función que devuelve el reporte de evaluaciones para un docente en formato JSON
+CREATE FUNCTION fn_reporte_evaluacion(p_id_docente INT) 
+RETURNS JSON
+DETERMINISTIC
+READS SQL DATA
+BEGIN
+    DECLARE res JSON;
+
+    SELECT JSON_ARRAYAGG(obj) INTO res
+    FROM (
+        SELECT JSON_OBJECT(
+            'id_docente', d.id_docente,
+            'nombre_docente', d.nombre,
+            'apellidop', d.apellidop,
+            'apellidom', d.apellidom,
+            'id_materia_impartida', s.id_materia_impartida,
+            'semestre_numero', s.numero,
+            'materia', s.materia,
+            'curso', s.curso,
+            'fecha_i', DATE_FORMAT(s.fecha_i, '%Y-%m-%d'),
+            'fecha_fin', DATE_FORMAT(s.fecha_fin, '%Y-%m-%d'),
+            'total_puntos', COALESCE(SUM(r.escala), 0),
+            'total_respuestas', COUNT(r.id_pregunta),
+            'promedio', ROUND(AVG(r.escala),2),
+            'evaluacion_final',
+                CASE
+                    WHEN AVG(r.escala) >= 4.5 THEN 'Excelente profesor'
+                    WHEN AVG(r.escala) >= 4.0 THEN 'Muy buen profesor'
+                    WHEN AVG(r.escala) >= 3.0 THEN 'Buen profesor'
+                    WHEN AVG(r.escala) >= 2.0 THEN 'Profesor regular'
+                    ELSE 'Mal profesor'
+                END
+        ) AS obj
+        FROM docentes d
+        JOIN evaluacion e ON d.id_docente = e.id_docente
+        JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+        JOIN materias_impartidas s ON e.id_materia_impartida = s.id_materia_impartida
+        WHERE d.id_docente = p_id_docente
+        GROUP BY d.id_docente, s.id_materia_impartida
+        ORDER BY s.numero, s.fecha_i
+    ) AS sub;
+
+    RETURN COALESCE(res, JSON_ARRAY());
+END$$
+
+-- Procedimiento para insertar respuestas
+CREATE PROCEDURE insertar_respuesta(
+    IN p_id_evaluacion INT,
+    IN p_id_pregunta SMALLINT UNSIGNED,
+    IN p_escala TINYINT UNSIGNED
+)
+BEGIN
+    INSERT INTO respuestas (id_evaluacion, id_pregunta, escala)
+    VALUES (p_id_evaluacion, p_id_pregunta, p_escala);
+END$$
+
+-- Procedimiento para reporte administrativo de evaluaciones
+CREATE PROCEDURE reporte_admin_evaluacion()
+BEGIN
+    SELECT 
+        d.id_docente,
+        d.nombre AS nombre_docente,
+        d.apellidop,
+        d.apellidom,
+        s.numero AS semestre_numero,
+        s.materia,
+        s.curso,
+        s.fecha_i,
+        s.fecha_fin,
+        c.nombre AS campus_nombre,
+        SUM(r.escala) AS total_puntos,
+        COUNT(r.id_pregunta) AS total_respuestas,
+        ROUND(AVG(r.escala),2) AS promedio,
+        CASE
+            WHEN AVG(r.escala) >= 4.5 THEN 'Asignación de materias'
+            WHEN AVG(r.escala) >= 3.0 THEN 'En valoración'
+            ELSE 'Sin asignación'
+        END AS estatus_docente
+    FROM docentes d
+    JOIN evaluacion e ON d.id_docente = e.id_docente
+    JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+    JOIN materias_impartidas s ON e.id_materia_impartida = s.id_materia_impartida
+    JOIN campus c ON d.id_campus = c.id_campus
+    GROUP BY d.id_docente, s.id_materia_impartida;
+END$$
+
+-- Procedimiento para reporte administrativo de evaluación de servicios
+CREATE PROCEDURE reporte_admin_servicios()
+BEGIN
+    SELECT 
+        c.nombre AS campus_nombre,
+        COUNT(DISTINCT es.id_alumno) AS total_evaluaciones,
+        ROUND(AVG(rs.escala), 2) AS promedio,
+        CASE
+            WHEN AVG(rs.escala) >= 4.5 THEN 'Excelente'
+            WHEN AVG(rs.escala) >= 3.5 THEN 'Satisfactorio'
+            ELSE 'Requiere Atención'
+        END AS estatus_servicios
+    FROM evaluacion_servicios es
+    JOIN campus c ON es.id_campus = c.id_campus
+    JOIN respuestas_servicios rs ON es.id_evaluacion_servicios = rs.id_evaluacion_servicios
+    GROUP BY c.id_campus;
+END$$
+
+-- Procedimiento para reporte por pregunta del catálogo (agrega sobre el índice (id_pregunta, escala))
+CREATE PROCEDURE reporte_preguntas()
+BEGIN
+    SELECT p.id_pregunta, p.tipo, p.version, p.orden, p.texto, p.activa,
+           t.total_respuestas, t.promedio
+    FROM preguntas p
+    JOIN (
+        SELECT id_pregunta, COUNT(escala) AS total_respuestas, ROUND(AVG(escala), 2) AS promedio
+        FROM respuestas GROUP BY id_pregunta
+        UNION ALL
+        SELECT id_pregunta, COUNT(escala), ROUND(AVG(escala), 2)
+        FROM respuestas_servicios GROUP BY id_pregunta
+    ) t ON t.id_pregunta = p.id_pregunta
+    ORDER BY p.tipo, p.version, p.orden;
+END$$
+
+CREATE PROCEDURE sp_vm_refrescar_docente_individual(IN p_id_docente INT)
+BEGIN
+    DECLARE v_suma BIGINT DEFAULT 0;
+    DECLARE v_calificadas INT DEFAULT 0;
+    DECLARE v_total INT DEFAULT 0;
+    DECLARE v_evaluaciones INT DEFAULT 0;
+
+    SELECT COALESCE(SUM(r.escala),0), COUNT(r.escala),
+           COUNT(r.id_pregunta), COUNT(DISTINCT e.id_evaluacion)
+    INTO v_suma, v_calificadas, v_total, v_evaluaciones
+    FROM evaluacion e
+    JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+    WHERE e.id_docente = p_id_docente;
+
+    IF v_total IS NULL OR v_total = 0 THEN
+        DELETE FROM resumen_docentes_vm WHERE id_docente = p_id_docente;
+    ELSE
+        INSERT INTO resumen_docentes_vm (id_docente, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+        VALUES (p_id_docente, v_suma, v_calificadas, v_total, v_evaluaciones,
+                IF(v_calificadas = 0, 0.00, ROUND(v_suma / v_calificadas, 2)))
+        ON DUPLICATE KEY UPDATE
+            suma_puntos = VALUES(suma_puntos),
+            total_calificadas = VALUES(total_calificadas),
+            total_respuestas = VALUES(total_respuestas),
+            total_evaluaciones = VALUES(total_evaluaciones),
+            promedio = VALUES(promedio);
+    END IF;
+END$$
+
+CREATE PROCEDURE sp_vm_refrescar_campus_servicio_individual(IN p_id_campus INT)
+BEGIN
+    DECLARE v_suma BIGINT DEFAULT 0;
+    DECLARE v_calificadas INT DEFAULT 0;
+    DECLARE v_total INT DEFAULT 0;
+    DECLARE v_evaluaciones INT DEFAULT 0;
+
+    SELECT COALESCE(SUM(rs.escala),0), COUNT(rs.escala),
+           COUNT(rs.id_pregunta), COUNT(DISTINCT es.id_evaluacion_servicios)
+    INTO v_suma, v_calificadas, v_total, v_evaluaciones
+    FROM evaluacion_servicios es
+    JOIN respuestas_servicios rs ON es.id_evaluacion_servicios = rs.id_evaluacion_servicios
+    WHERE es.id_campus = p_id_campus;
+
+    IF v_total IS NULL OR v_total = 0 THEN
+        DELETE FROM resumen_servicios_vm WHERE id_campus = p_id_campus;
+    ELSE
+        INSERT INTO resumen_servicios_vm (id_campus, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+        VALUES (p_id_campus, v_suma, v_calificadas, v_total, v_evaluaciones,
+                IF(v_calificadas = 0, 0.00, ROUND(v_suma / v_calificadas, 2)))
+        ON DUPLICATE KEY UPDATE
+            suma_puntos = VALUES(suma_puntos),
+            total_calificadas = VALUES(total_calificadas),
+            total_respuestas = VALUES(total_respuestas),
+            total_evaluaciones = VALUES(total_evaluaciones),
+            promedio = VALUES(promedio);
+    END IF;
+END$$
+
+CREATE PROCEDURE sp_vm_refrescar_resumen_completo()
+BEGIN
+    -- Docentes: resumen completo
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_doc;
+    CREATE TEMPORARY TABLE tmp_vm_doc AS
+    SELECT e.id_docente,
+           COALESCE(SUM(r.escala),0) AS suma_puntos,
+           COUNT(r.escala) AS total_calificadas,
+           COUNT(r.id_pregunta) AS total_respuestas,
+           COUNT(DISTINCT e.id_evaluacion) AS total_evaluaciones
+    FROM evaluacion e
+    JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+    GROUP BY e.id_docente;
+
+    INSERT INTO resumen_docentes_vm (id_docente, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    SELECT id_docente, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones,
+           IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2))
+    FROM tmp_vm_doc
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = VALUES(suma_puntos),
+        total_calificadas = VALUES(total_calificadas),
+        total_respuestas = VALUES(total_respuestas),
+        total_evaluaciones = VALUES(total_evaluaciones),
+        promedio = VALUES(promedio);
+
+    DELETE rd FROM resumen_docentes_vm rd
+    LEFT JOIN tmp_vm_doc t ON rd.id_docente = t.id_docente
+    WHERE t.id_docente IS NULL;
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_doc;
+
+    -- Servicios: resumen completo por campus
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_serv;
+    CREATE TEMPORARY TABLE tmp_vm_serv AS
+    SELECT es.id_campus,
+           COALESCE(SUM(rs.escala),0) AS suma_puntos,
+           COUNT(rs.escala) AS total_calificadas,
+           COUNT(rs.id_pregunta) AS total_respuestas,
+           COUNT(DISTINCT es.id_evaluacion_servicios) AS total_evaluaciones
+    FROM evaluacion_servicios es
+    JOIN respuestas_servicios rs ON es.id_evaluacion_servicios = rs.id_evaluacion_servicios
+    GROUP BY es.id_campus;
+
+    INSERT INTO resumen_servicios_vm (id_campus, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    SELECT id_campus, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones,
+           IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2))
+    FROM tmp_vm_serv
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = VALUES(suma_puntos),
+        total_calificadas = VALUES(total_calificadas),
+        total_respuestas = VALUES(total_respuestas),
+        total_evaluaciones = VALUES(total_evaluaciones),
+        promedio = VALUES(promedio);
+
+    DELETE rs FROM resumen_servicios_vm rs
+    LEFT JOIN tmp_vm_serv t ON rs.id_campus = t.id_campus
+    WHERE t.id_campus IS NULL;
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_serv;
+END$$
+
+CREATE PROCEDURE sp_vm_verificar_resumen()
+BEGIN
+    SELECT t.id_docente,
+           rd.suma_puntos, t.suma_puntos AS suma_esperada,
+           rd.total_respuestas, t.total_respuestas AS total_respuestas_esperado,
+           rd.total_evaluaciones, t.total_evaluaciones AS total_evaluaciones_esperado
+    FROM (
+        SELECT e.id_docente,
+               COALESCE(SUM(r.escala),0) AS suma_puntos,
+               COUNT(r.escala) AS total_calificadas,
+               COUNT(r.id_pregunta) AS total_respuestas,
+               COUNT(DISTINCT e.id_evaluacion) AS total_evaluaciones
+        FROM evaluacion e
+        JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+        GROUP BY e.id_docente
+    ) t
+    LEFT JOIN resumen_docentes_vm rd ON rd.id_docente = t.id_docente
+    WHERE rd.id_docente IS NULL
+       OR rd.suma_puntos <> t.suma_puntos
+       OR rd.total_calificadas <> t.total_calificadas
+       OR rd.total_respuestas <> t.total_respuestas
+       OR rd.total_evaluaciones <> t.total_evaluaciones
+    UNION ALL
+    SELECT rd.id_docente, rd.suma_puntos, 0, rd.total_respuestas, 0, rd.total_evaluaciones, 0
+    FROM resumen_docentes_vm rd
+    WHERE NOT EXISTS (
+        SELECT 1 FROM evaluacion e
+        JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+        WHERE e.id_docente = rd.id_docente
+    );
+
+    SELECT t.id_campus,
+           rs.suma_puntos, t.suma_puntos AS suma_esperada,
+           rs.total_respuestas, t.total_respuestas AS total_respuestas_esperado,
+           rs.total_evaluaciones, t.total_evaluaciones AS total_evaluaciones_esperado
+    FROM (
+        SELECT es.id_campus,
+               COALESCE(SUM(rsv.escala),0) AS suma_puntos,
+               COUNT(rsv.escala) AS total_calificadas,
+               COUNT(rsv.id_pregunta) AS total_respuestas,
+               COUNT(DISTINCT es.id_evaluacion_servicios) AS total_evaluaciones
+        FROM evaluacion_servicios es
+        JOIN respuestas_servicios rsv ON es.id_evaluacion_servicios = rsv.id_evaluacion_servicios
+        GROUP BY es.id_campus
+    ) t
+    LEFT JOIN resumen_servicios_vm rs ON rs.id_campus = t.id_campus
+    WHERE rs.id_campus IS NULL
+       OR rs.suma_puntos <> t.suma_puntos
+       OR rs.total_calificadas <> t.total_calificadas
+       OR rs.total_respuestas <> t.total_respuestas
+       OR rs.total_evaluaciones <> t.total_evaluaciones
+    UNION ALL
+    SELECT rs.id_campus, rs.suma_puntos, 0, rs.total_respuestas, 0, rs.total_evaluaciones, 0
+    FROM resumen_servicios_vm rs
+    WHERE NOT EXISTS (
+        SELECT 1 FROM evaluacion_servicios es
+        JOIN respuestas_servicios rsv ON es.id_evaluacion_servicios = rsv.id_evaluacion_servicios
+        WHERE es.id_campus = rs.id_campus
+    );
+END$$
+
+-- Trigger que acumula la respuesta en el resumen del docente en tiempo constante
+-- (sin recorrer el resto de las respuestas). El historial se registra una vez por
+-- evaluación con sp_registrar_historial_evaluacion.
+CREATE TRIGGER trg_actualizar_historial_evaluacion 
+AFTER INSERT ON respuestas
+FOR EACH ROW
+BEGIN
+    DECLARE v_id_docente INT;
+    DECLARE v_puntos INT;
+    DECLARE v_nueva_evaluacion TINYINT DEFAULT 0;
+
+    -- Obtener el id_docente de la evaluación
+    SELECT e.id_docente INTO v_id_docente
+    FROM evaluacion e
+    WHERE e.id_evaluacion = NEW.id_evaluacion;
+
+    SET v_puntos = COALESCE(NEW.escala, 0);
+
+    -- Primera respuesta de la evaluación -> cuenta como una evaluación más del docente
+    SET v_nueva_evaluacion = NOT EXISTS (
+        SELECT 1 FROM respuestas r
+        WHERE r.id_evaluacion = NEW.id_evaluacion AND r.id_pregunta <> NEW.id_pregunta
+    );
+
+    -- Actualizar contadores del docente (las asignaciones se evalúan en orden, promedio usa los nuevos valores)
+    INSERT INTO resumen_docentes_vm (id_docente, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    VALUES (v_id_docente, v_puntos, NEW.escala IS NOT NULL, 1, v_nueva_evaluacion, v_puntos)
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + 1,
+        total_evaluaciones = total_evaluaciones + VALUES(total_evaluaciones),
+        promedio = IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2));
+END$$
+
+-- Trigger que acumula la respuesta de servicios en el resumen del campus en tiempo constante
+CREATE TRIGGER trg_refrescar_resumen_servicios
+AFTER INSERT ON respuestas_servicios
+FOR EACH ROW
+BEGIN
+    DECLARE v_id_campus INT;
+    DECLARE v_puntos INT;
+    DECLARE v_nueva_evaluacion TINYINT DEFAULT 0;
+
+    -- Obtener el id_campus de la evaluación de servicios
+    SELECT es.id_campus INTO v_id_campus
+    FROM evaluacion_servicios es
+    WHERE es.id_evaluacion_servicios = NEW.id_evaluacion_servicios;
+
+    SET v_puntos = COALESCE(NEW.escala, 0);
+
+    SET v_nueva_evaluacion = NOT EXISTS (
+        SELECT 1 FROM respuestas_servicios rs
+        WHERE rs.id_evaluacion_servicios = NEW.id_evaluacion_servicios AND rs.id_pregunta <> NEW.id_pregunta
+    );
+
+    -- Actualizar contadores del campus
+    INSERT INTO resumen_servicios_vm (id_campus, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    VALUES (v_id_campus, v_puntos, NEW.escala IS NOT NULL, 1, v_nueva_evaluacion, v_puntos)
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + 1,
+        total_evaluaciones = total_evaluaciones + VALUES(total_evaluaciones),
+        promedio = IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2));
+END$$
+
+DELIMITER ;
+
+-- Reconciliar los contadores de resumen con las respuestas convertidas
+CALL sp_vm_refrescar_resumen_completo();
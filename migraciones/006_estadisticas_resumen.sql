@@ -0,0 +1,78 @@
+/***
+Descripción: Migración para bases existentes. Separa los contadores del panel admin
+(estadisticas_resumen) de los listados por alumno; estadisticas_evaluacion los sigue devolviendo.
+***/
+
+USE evaluacion_d;
+
+DROP PROCEDURE IF EXISTS estadisticas_resumen;
+DROP PROCEDURE IF EXISTS estadisticas_evaluacion;
+
+DELIMITER $$
+
+-- Procedimiento con los contadores del panel admin (lee progreso_alumnos, sin subconsultas por alumno).
+-- Devuelve 4 result sets acotados por el número de campus y carreras.
+CREATE PROCEDURE estadisticas_resumen()
+BEGIN
+    -- Total de campus que evalúan (solo alumnos que completaron todo, incluyendo servicios)
+    SELECT COUNT(DISTINCT a.id_campus) as total_campus 
+    FROM progreso_alumnos p
+    JOIN alumnos a ON a.id_alumno = p.id_alumno
+    WHERE p.completadas >= p.total_requerido
+      AND p.servicios_completado = 1;
+    
+    -- Total de alumnos que han completado todas las evaluaciones (docentes + servicios)
+    SELECT COUNT(*) as total_alumnos 
+    FROM progreso_alumnos p
+    WHERE p.completadas >= p.total_requerido
+      AND p.servicios_completado = 1;
+    
+    -- Alumnos por campus que han evaluado (sólo con evaluaciones docentes)
+    SELECT c.nombre as campus, COUNT(*) as alumnos
+    FROM progreso_alumnos p
+    JOIN alumnos a ON a.id_alumno = p.id_alumno
+    JOIN campus c ON a.id_campus = c.id_campus
+    WHERE p.evaluaciones_realizadas > 0
+    GROUP BY a.id_campus;
+    
+    -- Alumnos por carrera que han evaluado
+    SELECT ca.nombre as carrera, COUNT(*) as alumnos
+    FROM progreso_alumnos p
+    JOIN alumnos a ON a.id_alumno = p.id_alumno
+    JOIN carreras ca ON a.id_carrera = ca.id_carrera
+    WHERE p.evaluaciones_realizadas > 0
+    GROUP BY a.id_carrera;
+END$$
+
+-- Procedimiento para estadísticas generales: contadores + listados por alumno
+CREATE PROCEDURE estadisticas_evaluacion()
+BEGIN
+    CALL estadisticas_resumen();
+
+    -- Alumnos que no han evaluado (sin evaluacion docente alguna)
+    SELECT a.*, c.nombre as campus, ca.nombre as carrera
+    FROM progreso_alumnos p
+    JOIN alumnos a ON a.id_alumno = p.id_alumno
+    JOIN campus c ON a.id_campus = c.id_campus
+    JOIN carreras ca ON a.id_carrera = ca.id_carrera
+    WHERE p.evaluaciones_realizadas = 0;
+
+    -- Estado por alumno: total requerido / completadas / pendientes 
+    SELECT 
+        a.id_alumno,
+        a.matricula,
+        a.nombre,
+        a.apellidop,
+        a.correo,
+        c.nombre as campus,
+        ca.nombre as carrera,
+        COALESCE(p.total_requerido, 0) AS total_requerido,
+        COALESCE(p.completadas, 0) AS completadas,
+        COALESCE(p.total_requerido, 0) - COALESCE(p.completadas, 0) AS pendientes
+    FROM alumnos a
+    LEFT JOIN progreso_alumnos p ON p.id_alumno = a.id_alumno
+    LEFT JOIN campus c ON a.id_campus = c.id_campus
+    LEFT JOIN carreras ca ON a.id_carrera = ca.id_carrera;
+END$$
+
+DELIMITER ;
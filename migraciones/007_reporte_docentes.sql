@@ -0,0 +1,354 @@
+/***
+Descripción: Migración para bases existentes. Reporte precalculado por docente para la página
+/profesor: contadores por materia en reporte_docente_materias_vm (trigger de respuestas) y el
+documento JSON con la tendencia en reporte_docentes_vm (sp_registrar_historial_evaluacion).
+***/
+
+USE evaluacion_d;
+
+CREATE TABLE IF NOT EXISTS reporte_docente_materias_vm (
+    id_docente INT NOT NULL,
+    id_materia_impartida INT NOT NULL,
+    suma_puntos BIGINT NOT NULL DEFAULT 0,
+    total_calificadas INT NOT NULL DEFAULT 0,
+    total_respuestas INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (id_docente, id_materia_impartida),
+    CONSTRAINT fk_reporte_materias_docente FOREIGN KEY (id_docente) REFERENCES docentes(id_docente),
+    CONSTRAINT fk_reporte_materias_materia FOREIGN KEY (id_materia_impartida) REFERENCES materias_impartidas(id_materia_impartida)
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS reporte_docentes_vm (
+    id_docente INT PRIMARY KEY,
+    reporte JSON NOT NULL,
+    tendencia JSON NOT NULL,
+    ultima_actualizacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ON UPDATE CURRENT_TIMESTAMP,
+    CONSTRAINT fk_reporte_docentes_docentes FOREIGN KEY (id_docente) REFERENCES docentes(id_docente)
+) ENGINE=InnoDB;
+
+ALTER TABLE historial_evaluacion
+    ADD KEY idx_historial_docente_fecha (id_docente, fecha_registro);
+
+DROP TRIGGER IF EXISTS trg_actualizar_historial_evaluacion;
+DROP PROCEDURE IF EXISTS sp_registrar_historial_evaluacion;
+DROP PROCEDURE IF EXISTS sp_refrescar_reporte_docente;
+DROP PROCEDURE IF EXISTS sp_refrescar_reportes_docentes;
+DROP PROCEDURE IF EXISTS sp_reconciliar_reportes_docentes;
+DROP PROCEDURE IF EXISTS sp_vm_refrescar_resumen_completo;
+
+-- Procedimiento que registra una sola instantánea en el historial por evaluación enviada.
+-- Lee el promedio ya acumulado en resumen_docentes_vm (lectura por llave primaria) y
+-- reconstruye el reporte precalculado del docente.
+DELIMITER $$
+CREATE PROCEDURE sp_registrar_historial_evaluacion(IN p_id_evaluacion INT)
+BEGIN
+    DECLARE v_id_docente INT;
+
+    INSERT INTO historial_evaluacion (id_docente, id_evaluacion, promedio, total_evaluaciones)
+    SELECT e.id_docente, e.id_evaluacion, rd.promedio, rd.total_evaluaciones
+    FROM evaluacion e
+    JOIN resumen_docentes_vm rd ON rd.id_docente = e.id_docente
+    WHERE e.id_evaluacion = p_id_evaluacion
+    ON DUPLICATE KEY UPDATE id_historial = id_historial;
+
+    SELECT id_docente INTO v_id_docente FROM evaluacion WHERE id_evaluacion = p_id_evaluacion;
+    IF v_id_docente IS NOT NULL THEN
+        CALL sp_refrescar_reporte_docente(v_id_docente);
+    END IF;
+END$$
+DELIMITER ;
+
+-- Reconstruye el documento de reporte_docentes_vm de un docente. Lee sus contadores por materia
+-- (una fila por materia impartida) y los últimos 30 días con evaluaciones de historial_evaluacion
+-- (la última instantánea de cada día), sin recorrer las respuestas.
+DELIMITER $$
+CREATE PROCEDURE sp_refrescar_reporte_docente(IN p_id_docente INT)
+BEGIN
+    DECLARE v_reporte JSON;
+    DECLARE v_tendencia JSON;
+
+    -- Mismos campos y umbrales que fn_reporte_evaluacion
+    SELECT JSON_ARRAYAGG(obj) INTO v_reporte
+    FROM (
+        SELECT JSON_OBJECT(
+            'id_docente', d.id_docente,
+            'nombre_docente', d.nombre,
+            'apellidop', d.apellidop,
+            'apellidom', d.apellidom,
+            'id_materia_impartida', s.id_materia_impartida,
+            'semestre_numero', s.numero,
+            'materia', s.materia,
+            'curso', s.curso,
+            'fecha_i', DATE_FORMAT(s.fecha_i, '%Y-%m-%d'),
+            'fecha_fin', DATE_FORMAT(s.fecha_fin, '%Y-%m-%d'),
+            'total_puntos', rm.suma_puntos,
+            'total_respuestas', rm.total_respuestas,
+            'promedio', IF(rm.total_calificadas = 0, NULL, ROUND(rm.suma_puntos / rm.total_calificadas, 2)),
+            'evaluacion_final',
+                CASE
+                    WHEN rm.suma_puntos / rm.total_calificadas >= 4.5 THEN 'Excelente profesor'
+                    WHEN rm.suma_puntos / rm.total_calificadas >= 4.0 THEN 'Muy buen profesor'
+                    WHEN rm.suma_puntos / rm.total_calificadas >= 3.0 THEN 'Buen profesor'
+                    WHEN rm.suma_puntos / rm.total_calificadas >= 2.0 THEN 'Profesor regular'
+                    ELSE 'Mal profesor'
+                END
+        ) AS obj
+        FROM reporte_docente_materias_vm rm
+        JOIN docentes d ON d.id_docente = rm.id_docente
+        JOIN materias_impartidas s ON s.id_materia_impartida = rm.id_materia_impartida
+        WHERE rm.id_docente = p_id_docente
+        ORDER BY s.numero, s.fecha_i
+    ) AS sub;
+
+    SELECT JSON_ARRAYAGG(obj) INTO v_tendencia
+    FROM (
+        SELECT JSON_OBJECT(
+            'fecha', DATE_FORMAT(h.fecha_registro, '%Y-%m-%d'),
+            'promedio', h.promedio,
+            'total_evaluaciones', h.total_evaluaciones
+        ) AS obj
+        FROM historial_evaluacion h
+        JOIN (
+            SELECT MAX(id_historial) AS id_historial
+            FROM historial_evaluacion
+            WHERE id_docente = p_id_docente
+            GROUP BY DATE(fecha_registro)
+            ORDER BY id_historial DESC
+            LIMIT 30
+        ) u ON u.id_historial = h.id_historial
+        ORDER BY h.id_historial
+    ) AS sub;
+
+    INSERT INTO reporte_docentes_vm (id_docente, reporte, tendencia)
+    VALUES (p_id_docente, COALESCE(v_reporte, JSON_ARRAY()), COALESCE(v_tendencia, JSON_ARRAY()))
+    ON DUPLICATE KEY UPDATE
+        reporte = VALUES(reporte),
+        tendencia = VALUES(tendencia);
+END$$
+DELIMITER ;
+
+-- Reconstruye desde cero los contadores por materia y el reporte de todos los docentes. Solo para
+-- la carga inicial en las migraciones: vacía la tabla, así que no debe correr con envíos en curso
+DELIMITER $$
+CREATE PROCEDURE sp_refrescar_reportes_docentes()
+BEGIN
+    DECLARE v_fin TINYINT DEFAULT 0;
+    DECLARE v_id_docente INT;
+    DECLARE cur_docentes CURSOR FOR SELECT id_docente FROM reporte_docente_materias_vm GROUP BY id_docente;
+    DECLARE CONTINUE HANDLER FOR NOT FOUND SET v_fin = 1;
+
+    DELETE FROM reporte_docente_materias_vm;
+    INSERT INTO reporte_docente_materias_vm (id_docente, id_materia_impartida, suma_puntos, total_calificadas, total_respuestas)
+    SELECT e.id_docente, e.id_materia_impartida,
+           COALESCE(SUM(r.escala), 0), COUNT(r.escala), COUNT(r.id_pregunta)
+    FROM evaluacion e
+    JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+    GROUP BY e.id_docente, e.id_materia_impartida;
+
+    DELETE rd FROM reporte_docentes_vm rd
+    LEFT JOIN reporte_docente_materias_vm rm ON rm.id_docente = rd.id_docente
+    WHERE rm.id_docente IS NULL;
+
+    OPEN cur_docentes;
+    docentes: LOOP
+        FETCH cur_docentes INTO v_id_docente;
+        IF v_fin THEN
+            LEAVE docentes;
+        END IF;
+        CALL sp_refrescar_reporte_docente(v_id_docente);
+    END LOOP;
+    CLOSE cur_docentes;
+END$$
+DELIMITER ;
+
+-- Reconciliación horaria de los contadores por materia (la llama sp_vm_refrescar_resumen_completo,
+-- que deja el recálculo en tmp_vm_doc_materia). A diferencia de la carga inicial no vacía la
+-- tabla: hace upsert, como el resumen por docente, así que el trigger de respuestas puede seguir
+-- acumulando mientras corre. Solo reconstruye el documento de los docentes con diferencias.
+DELIMITER $$
+CREATE PROCEDURE sp_reconciliar_reportes_docentes()
+BEGIN
+    DECLARE v_fin TINYINT DEFAULT 0;
+    DECLARE v_id_docente INT;
+    DECLARE cur_cambios CURSOR FOR SELECT id_docente FROM tmp_vm_doc_cambios;
+    DECLARE CONTINUE HANDLER FOR NOT FOUND SET v_fin = 1;
+
+    -- Docentes con alguna materia distinta, nueva o sin respuestas
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_doc_cambios;
+    CREATE TEMPORARY TABLE tmp_vm_doc_cambios (id_docente INT PRIMARY KEY);
+
+    INSERT IGNORE INTO tmp_vm_doc_cambios (id_docente)
+    SELECT t.id_docente
+    FROM tmp_vm_doc_materia t
+    LEFT JOIN reporte_docente_materias_vm rm
+        ON rm.id_docente = t.id_docente AND rm.id_materia_impartida = t.id_materia_impartida
+    WHERE rm.id_docente IS NULL
+       OR rm.suma_puntos <> t.suma_puntos
+       OR rm.total_calificadas <> t.total_calificadas
+       OR rm.total_respuestas <> t.total_respuestas;
+
+    INSERT IGNORE INTO tmp_vm_doc_cambios (id_docente)
+    SELECT rm.id_docente
+    FROM reporte_docente_materias_vm rm
+    LEFT JOIN tmp_vm_doc_materia t
+        ON t.id_docente = rm.id_docente AND t.id_materia_impartida = rm.id_materia_impartida
+    WHERE t.id_docente IS NULL;
+
+    INSERT INTO reporte_docente_materias_vm (id_docente, id_materia_impartida, suma_puntos, total_calificadas, total_respuestas)
+    SELECT id_docente, id_materia_impartida, suma_puntos, total_calificadas, total_respuestas
+    FROM tmp_vm_doc_materia
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = VALUES(suma_puntos),
+        total_calificadas = VALUES(total_calificadas),
+        total_respuestas = VALUES(total_respuestas);
+
+    DELETE rm FROM reporte_docente_materias_vm rm
+    LEFT JOIN tmp_vm_doc_materia t
+        ON t.id_docente = rm.id_docente AND t.id_materia_impartida = rm.id_materia_impartida
+    WHERE t.id_docente IS NULL;
+
+    DELETE rd FROM reporte_docentes_vm rd
+    LEFT JOIN reporte_docente_materias_vm rm ON rm.id_docente = rd.id_docente
+    WHERE rm.id_docente IS NULL;
+
+    OPEN cur_cambios;
+    docentes: LOOP
+        FETCH cur_cambios INTO v_id_docente;
+        IF v_fin THEN
+            LEAVE docentes;
+        END IF;
+        IF EXISTS (SELECT 1 FROM reporte_docente_materias_vm WHERE id_docente = v_id_docente) THEN
+            CALL sp_refrescar_reporte_docente(v_id_docente);
+        END IF;
+    END LOOP;
+    CLOSE cur_cambios;
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_doc_cambios;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE PROCEDURE sp_vm_refrescar_resumen_completo()
+BEGIN
+    -- Docentes: un solo recorrido de las respuestas por (docente, materia); el resumen por docente
+    -- se suma desde ahí (cada evaluación es de una sola materia) y el reporte por materia lo
+    -- reconcilia sp_reconciliar_reportes_docentes
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_doc_materia;
+    CREATE TEMPORARY TABLE tmp_vm_doc_materia (PRIMARY KEY (id_docente, id_materia_impartida)) AS
+    SELECT e.id_docente, e.id_materia_impartida,
+           COALESCE(SUM(r.escala),0) AS suma_puntos,
+           COUNT(r.escala) AS total_calificadas,
+           COUNT(r.id_pregunta) AS total_respuestas,
+           COUNT(DISTINCT e.id_evaluacion) AS total_evaluaciones
+    FROM evaluacion e
+    JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+    GROUP BY e.id_docente, e.id_materia_impartida;
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_doc;
+    CREATE TEMPORARY TABLE tmp_vm_doc AS
+    SELECT id_docente,
+           SUM(suma_puntos) AS suma_puntos,
+           SUM(total_calificadas) AS total_calificadas,
+           SUM(total_respuestas) AS total_respuestas,
+           SUM(total_evaluaciones) AS total_evaluaciones
+    FROM tmp_vm_doc_materia
+    GROUP BY id_docente;
+
+    INSERT INTO resumen_docentes_vm (id_docente, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    SELECT id_docente, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones,
+           IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2))
+    FROM tmp_vm_doc
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = VALUES(suma_puntos),
+        total_calificadas = VALUES(total_calificadas),
+        total_respuestas = VALUES(total_respuestas),
+        total_evaluaciones = VALUES(total_evaluaciones),
+        promedio = VALUES(promedio);
+
+    DELETE rd FROM resumen_docentes_vm rd
+    LEFT JOIN tmp_vm_doc t ON rd.id_docente = t.id_docente
+    WHERE t.id_docente IS NULL;
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_doc;
+
+    -- Servicios: resumen completo por campus
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_serv;
+    CREATE TEMPORARY TABLE tmp_vm_serv AS
+    SELECT es.id_campus,
+           COALESCE(SUM(rs.escala),0) AS suma_puntos,
+           COUNT(rs.escala) AS total_calificadas,
+           COUNT(rs.id_pregunta) AS total_respuestas,
+           COUNT(DISTINCT es.id_evaluacion_servicios) AS total_evaluaciones
+    FROM evaluacion_servicios es
+    JOIN respuestas_servicios rs ON es.id_evaluacion_servicios = rs.id_evaluacion_servicios
+    GROUP BY es.id_campus;
+
+    INSERT INTO resumen_servicios_vm (id_campus, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    SELECT id_campus, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones,
+           IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2))
+    FROM tmp_vm_serv
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = VALUES(suma_puntos),
+        total_calificadas = VALUES(total_calificadas),
+        total_respuestas = VALUES(total_respuestas),
+        total_evaluaciones = VALUES(total_evaluaciones),
+        promedio = VALUES(promedio);
+
+    DELETE rs FROM resumen_servicios_vm rs
+    LEFT JOIN tmp_vm_serv t ON rs.id_campus = t.id_campus
+    WHERE t.id_campus IS NULL;
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_serv;
+
+    -- Reporte precalculado por docente (página /profesor)
+    CALL sp_reconciliar_reportes_docentes();
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_doc_materia;
+END$$
+
+-- Trigger que acumula la respuesta en el resumen del docente en tiempo constante
+-- (sin recorrer el resto de las respuestas). El historial se registra una vez por
+-- evaluación con sp_registrar_historial_evaluacion.
+CREATE TRIGGER trg_actualizar_historial_evaluacion 
+AFTER INSERT ON respuestas
+FOR EACH ROW
+BEGIN
+    DECLARE v_id_docente INT;
+    DECLARE v_id_materia INT;
+    DECLARE v_puntos INT;
+    DECLARE v_nueva_evaluacion TINYINT DEFAULT 0;
+
+    -- Obtener el docente y la materia de la evaluación
+    SELECT e.id_docente, e.id_materia_impartida INTO v_id_docente, v_id_materia
+    FROM evaluacion e
+    WHERE e.id_evaluacion = NEW.id_evaluacion;
+
+    SET v_puntos = COALESCE(NEW.escala, 0);
+
+    -- Primera respuesta de la evaluación -> cuenta como una evaluación más del docente
+    SET v_nueva_evaluacion = NOT EXISTS (
+        SELECT 1 FROM respuestas r
+        WHERE r.id_evaluacion = NEW.id_evaluacion AND r.id_pregunta <> NEW.id_pregunta
+    );
+
+    -- Actualizar contadores del docente (las asignaciones se evalúan en orden, promedio usa los nuevos valores)
+    INSERT INTO resumen_docentes_vm (id_docente, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    VALUES (v_id_docente, v_puntos, NEW.escala IS NOT NULL, 1, v_nueva_evaluacion, v_puntos)
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + 1,
+        total_evaluaciones = total_evaluaciones + VALUES(total_evaluaciones),
+        promedio = IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2));
+
+    -- Contadores por materia del reporte precalculado del docente
+    INSERT INTO reporte_docente_materias_vm (id_docente, id_materia_impartida, suma_puntos, total_calificadas, total_respuestas)
+    VALUES (v_id_docente, v_id_materia, v_puntos, NEW.escala IS NOT NULL, 1)
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + 1;
+END$$
+DELIMITER ;
+
+-- Carga inicial del reporte con los datos existentes
+CALL sp_refrescar_reportes_docentes();
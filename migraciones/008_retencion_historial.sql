@@ -0,0 +1,324 @@
+/***
+Descripción: Migración para bases existentes. Retención del historial: agregado diario por docente
+(historial_evaluacion_diario, fuente de la tendencia de /profesor), tablas de archivo particionadas
+por semestre y mantenimiento diario (sp_historial_mantenimiento) que mueve al archivo lo que tenga
+más de 180 días para que historial_evaluacion e historial_comentarios se mantengan pequeñas.
+***/
+
+USE evaluacion_d;
+
+ALTER TABLE historial_evaluacion
+    ADD KEY idx_historial_fecha (fecha_registro);
+
+ALTER TABLE historial_comentarios
+    ADD KEY idx_historial_comentarios_fecha (fecha_registro);
+-- Historial: las tablas "calientes" (historial_evaluacion, historial_comentarios) solo guardan el
+-- periodo reciente; sp_historial_mantenimiento mueve lo anterior a las tablas *_archivo,
+-- particionadas por semestre (pAAAA_1 = enero-junio, pAAAA_2 = julio-diciembre), donde un semestre
+-- completo se puede descartar con DROP PARTITION. Las tablas particionadas no admiten llaves foráneas.
+CREATE TABLE IF NOT EXISTS historial_evaluacion_archivo (
+    id_historial INT NOT NULL,
+    id_docente INT,
+    id_evaluacion INT NULL,
+    fecha_registro DATETIME NOT NULL,
+    promedio DECIMAL(4,2),
+    total_evaluaciones INT,
+    PRIMARY KEY (id_historial, fecha_registro),
+    KEY idx_historial_archivo_docente (id_docente, fecha_registro)
+) ENGINE=InnoDB
+PARTITION BY RANGE COLUMNS (fecha_registro) (
+    PARTITION p2026_1 VALUES LESS THAN ('2026-07-01'),
+    PARTITION p2026_2 VALUES LESS THAN ('2027-01-01'),
+    PARTITION p2027_1 VALUES LESS THAN ('2027-07-01'),
+    PARTITION p_futuro VALUES LESS THAN (MAXVALUE)
+);
+
+CREATE TABLE IF NOT EXISTS historial_comentarios_archivo (
+    id_historial_comentario INT NOT NULL,
+    id_docente INT,
+    id_alumno INT,
+    comentario TEXT NOT NULL,
+    fecha_registro DATETIME NOT NULL,
+    materia VARCHAR(256),
+    PRIMARY KEY (id_historial_comentario, fecha_registro),
+    KEY idx_historial_comentarios_archivo_docente (id_docente, fecha_registro)
+) ENGINE=InnoDB
+PARTITION BY RANGE COLUMNS (fecha_registro) (
+    PARTITION p2026_1 VALUES LESS THAN ('2026-07-01'),
+    PARTITION p2026_2 VALUES LESS THAN ('2027-01-01'),
+    PARTITION p2027_1 VALUES LESS THAN ('2027-07-01'),
+    PARTITION p_futuro VALUES LESS THAN (MAXVALUE)
+);
+
+-- Agregado diario del historial por docente (última instantánea del día y evaluaciones del día).
+-- Se actualiza en sp_registrar_historial_evaluacion y no se archiva: es la serie de tendencia.
+CREATE TABLE IF NOT EXISTS historial_evaluacion_diario (
+    id_docente INT NOT NULL,
+    fecha DATE NOT NULL,
+    promedio DECIMAL(4,2),
+    total_evaluaciones INT,
+    evaluaciones_dia INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (id_docente, fecha),
+    CONSTRAINT fk_historial_diario_docentes FOREIGN KEY (id_docente) REFERENCES docentes(id_docente)
+) ENGINE=InnoDB;
+
+-- Agregado diario con el historial existente (última instantánea de cada día)
+INSERT INTO historial_evaluacion_diario (id_docente, fecha, promedio, total_evaluaciones, evaluaciones_dia)
+SELECT h.id_docente, DATE(h.fecha_registro), h.promedio, h.total_evaluaciones, d.evaluaciones_dia
+FROM historial_evaluacion h
+JOIN (
+    SELECT MAX(id_historial) AS id_historial, COUNT(*) AS evaluaciones_dia
+    FROM historial_evaluacion
+    WHERE id_docente IS NOT NULL
+    GROUP BY id_docente, DATE(fecha_registro)
+) d ON d.id_historial = h.id_historial;
+
+DROP PROCEDURE IF EXISTS sp_registrar_historial_evaluacion;
+DROP PROCEDURE IF EXISTS sp_refrescar_reporte_docente;
+DROP PROCEDURE IF EXISTS sp_historial_archivar;
+DROP PROCEDURE IF EXISTS sp_historial_crear_particion;
+DROP PROCEDURE IF EXISTS sp_historial_descartar_particiones;
+DROP PROCEDURE IF EXISTS sp_historial_mantenimiento;
+DROP EVENT IF EXISTS ev_historial_mantenimiento_diario;
+
+-- Procedimiento que registra una sola instantánea en el historial por evaluación enviada.
+-- Lee el promedio ya acumulado en resumen_docentes_vm (lectura por llave primaria), lo acumula en
+-- el agregado diario y reconstruye el reporte precalculado del docente.
+DELIMITER $$
+CREATE PROCEDURE sp_registrar_historial_evaluacion(IN p_id_evaluacion INT)
+BEGIN
+    DECLARE v_id_docente INT;
+
+    -- Solo si la instantánea es nueva (una llamada repetida no cuenta dos veces en el día)
+    IF NOT EXISTS (SELECT 1 FROM historial_evaluacion WHERE id_evaluacion = p_id_evaluacion) THEN
+        INSERT INTO historial_evaluacion (id_docente, id_evaluacion, promedio, total_evaluaciones)
+        SELECT e.id_docente, e.id_evaluacion, rd.promedio, rd.total_evaluaciones
+        FROM evaluacion e
+        JOIN resumen_docentes_vm rd ON rd.id_docente = e.id_docente
+        WHERE e.id_evaluacion = p_id_evaluacion
+        ON DUPLICATE KEY UPDATE id_historial = id_historial;
+
+        INSERT INTO historial_evaluacion_diario (id_docente, fecha, promedio, total_evaluaciones, evaluaciones_dia)
+        SELECT e.id_docente, CURDATE(), rd.promedio, rd.total_evaluaciones, 1
+        FROM evaluacion e
+        JOIN resumen_docentes_vm rd ON rd.id_docente = e.id_docente
+        WHERE e.id_evaluacion = p_id_evaluacion
+        ON DUPLICATE KEY UPDATE
+            promedio = VALUES(promedio),
+            total_evaluaciones = VALUES(total_evaluaciones),
+            evaluaciones_dia = evaluaciones_dia + 1;
+    END IF;
+
+    SELECT id_docente INTO v_id_docente FROM evaluacion WHERE id_evaluacion = p_id_evaluacion;
+    IF v_id_docente IS NOT NULL THEN
+        CALL sp_refrescar_reporte_docente(v_id_docente);
+    END IF;
+END$$
+DELIMITER ;
+
+-- Reconstruye el documento de reporte_docentes_vm de un docente. Lee sus contadores por materia
+-- (una fila por materia impartida) y los últimos 30 días con evaluaciones del agregado diario,
+-- sin recorrer las respuestas.
+DELIMITER $$
+CREATE PROCEDURE sp_refrescar_reporte_docente(IN p_id_docente INT)
+BEGIN
+    DECLARE v_reporte JSON;
+    DECLARE v_tendencia JSON;
+
+    -- Mismos campos y umbrales que fn_reporte_evaluacion
+    SELECT JSON_ARRAYAGG(obj) INTO v_reporte
+    FROM (
+        SELECT JSON_OBJECT(
+            'id_docente', d.id_docente,
+            'nombre_docente', d.nombre,
+            'apellidop', d.apellidop,
+            'apellidom', d.apellidom,
+            'id_materia_impartida', s.id_materia_impartida,
+            'semestre_numero', s.numero,
+            'materia', s.materia,
+            'curso', s.curso,
+            'fecha_i', DATE_FORMAT(s.fecha_i, '%Y-%m-%d'),
+            'fecha_fin', DATE_FORMAT(s.fecha_fin, '%Y-%m-%d'),
+            'total_puntos', rm.suma_puntos,
+            'total_respuestas', rm.total_respuestas,
+            'promedio', IF(rm.total_calificadas = 0, NULL, ROUND(rm.suma_puntos / rm.total_calificadas, 2)),
+            'evaluacion_final',
+                CASE
+                    WHEN rm.suma_puntos / rm.total_calificadas >= 4.5 THEN 'Excelente profesor'
+                    WHEN rm.suma_puntos / rm.total_calificadas >= 4.0 THEN 'Muy buen profesor'
+                    WHEN rm.suma_puntos / rm.total_calificadas >= 3.0 THEN 'Buen profesor'
+                    WHEN rm.suma_puntos / rm.total_calificadas >= 2.0 THEN 'Profesor regular'
+                    ELSE 'Mal profesor'
+                END
+        ) AS obj
+        FROM reporte_docente_materias_vm rm
+        JOIN docentes d ON d.id_docente = rm.id_docente
+        JOIN materias_impartidas s ON s.id_materia_impartida = rm.id_materia_impartida
+        WHERE rm.id_docente = p_id_docente
+        ORDER BY s.numero, s.fecha_i
+    ) AS sub;
+
+    SELECT JSON_ARRAYAGG(obj) INTO v_tendencia
+    FROM (
+        SELECT JSON_OBJECT(
+            'fecha', DATE_FORMAT(hd.fecha, '%Y-%m-%d'),
+            'promedio', hd.promedio,
+            'total_evaluaciones', hd.total_evaluaciones
+        ) AS obj
+        FROM (
+            SELECT fecha, promedio, total_evaluaciones
+            FROM historial_evaluacion_diario
+            WHERE id_docente = p_id_docente
+            ORDER BY fecha DESC
+            LIMIT 30
+        ) hd
+        ORDER BY hd.fecha
+    ) AS sub;
+
+    INSERT INTO reporte_docentes_vm (id_docente, reporte, tendencia)
+    VALUES (p_id_docente, COALESCE(v_reporte, JSON_ARRAY()), COALESCE(v_tendencia, JSON_ARRAY()))
+    ON DUPLICATE KEY UPDATE
+        reporte = VALUES(reporte),
+        tendencia = VALUES(tendencia);
+END$$
+DELIMITER ;
+
+-- Mueve al archivo (en lotes, una transacción por lote) las filas del historial con más de
+-- p_dias días. Las filas viejas son un prefijo por fecha_registro, así que cada lote se localiza
+-- con el índice de fecha sin recorrer la tabla.
+DELIMITER $$
+CREATE PROCEDURE sp_historial_archivar(IN p_dias INT)
+BEGIN
+    DECLARE v_limite DATETIME DEFAULT NOW() - INTERVAL p_dias DAY;
+    DECLARE v_hasta INT;
+
+    evaluaciones: LOOP
+        SELECT MAX(id_historial) INTO v_hasta
+        FROM (
+            SELECT id_historial FROM historial_evaluacion
+            WHERE fecha_registro < v_limite
+            ORDER BY fecha_registro
+            LIMIT 5000
+        ) lote;
+        IF v_hasta IS NULL THEN
+            LEAVE evaluaciones;
+        END IF;
+        START TRANSACTION;
+        INSERT INTO historial_evaluacion_archivo (id_historial, id_docente, id_evaluacion, fecha_registro, promedio, total_evaluaciones)
+        SELECT id_historial, id_docente, id_evaluacion, fecha_registro, promedio, total_evaluaciones
+        FROM historial_evaluacion
+        WHERE id_historial <= v_hasta AND fecha_registro < v_limite;
+        DELETE FROM historial_evaluacion
+        WHERE id_historial <= v_hasta AND fecha_registro < v_limite;
+        COMMIT;
+    END LOOP;
+
+    comentarios: LOOP
+        SELECT MAX(id_historial_comentario) INTO v_hasta
+        FROM (
+            SELECT id_historial_comentario FROM historial_comentarios
+            WHERE fecha_registro < v_limite
+            ORDER BY fecha_registro
+            LIMIT 5000
+        ) lote;
+        IF v_hasta IS NULL THEN
+            LEAVE comentarios;
+        END IF;
+        START TRANSACTION;
+        INSERT INTO historial_comentarios_archivo (id_historial_comentario, id_docente, id_alumno, comentario, fecha_registro, materia)
+        SELECT id_historial_comentario, id_docente, id_alumno, comentario, fecha_registro, materia
+        FROM historial_comentarios
+        WHERE id_historial_comentario <= v_hasta AND fecha_registro < v_limite;
+        DELETE FROM historial_comentarios
+        WHERE id_historial_comentario <= v_hasta AND fecha_registro < v_limite;
+        COMMIT;
+    END LOOP;
+END$$
+DELIMITER ;
+
+-- Crea en una tabla de archivo la partición del semestre que empieza en p_inicio (1 de enero o
+-- 1 de julio) si aún no existe, separándola de p_futuro.
+DELIMITER $$
+CREATE PROCEDURE sp_historial_crear_particion(IN p_tabla VARCHAR(64), IN p_inicio DATE)
+BEGIN
+    DECLARE v_nombre VARCHAR(64) DEFAULT CONCAT('p', YEAR(p_inicio), '_', IF(MONTH(p_inicio) <= 6, 1, 2));
+
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = p_tabla AND PARTITION_NAME = v_nombre
+    ) THEN
+        SET @sql_particion = CONCAT(
+            'ALTER TABLE ', p_tabla, ' REORGANIZE PARTITION p_futuro INTO (',
+            'PARTITION ', v_nombre, ' VALUES LESS THAN (''', p_inicio + INTERVAL 6 MONTH, '''), ',
+            'PARTITION p_futuro VALUES LESS THAN (MAXVALUE))');
+        PREPARE stmt FROM @sql_particion;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END$$
+DELIMITER ;
+
+-- Descarta de una tabla de archivo las particiones de semestres anteriores a p_antes_de
+-- (compactación de semestres pasados).
+DELIMITER $$
+CREATE PROCEDURE sp_historial_descartar_particiones(IN p_tabla VARCHAR(64), IN p_antes_de DATE)
+BEGIN
+    DECLARE v_fin TINYINT DEFAULT 0;
+    DECLARE v_nombre VARCHAR(64);
+    -- pAAAA_S ordena igual que el semestre; la partición vence antes del semestre de p_antes_de
+    DECLARE cur_particiones CURSOR FOR
+        SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = p_tabla
+          AND PARTITION_NAME REGEXP '^p[0-9]{4}_[12]$'
+          AND PARTITION_NAME < CONCAT('p', YEAR(p_antes_de), '_', IF(MONTH(p_antes_de) <= 6, 1, 2));
+    DECLARE CONTINUE HANDLER FOR NOT FOUND SET v_fin = 1;
+
+    OPEN cur_particiones;
+    particiones: LOOP
+        FETCH cur_particiones INTO v_nombre;
+        IF v_fin THEN
+            LEAVE particiones;
+        END IF;
+        SET @sql_particion = CONCAT('ALTER TABLE ', p_tabla, ' DROP PARTITION ', v_nombre);
+        PREPARE stmt FROM @sql_particion;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END LOOP;
+    CLOSE cur_particiones;
+END$$
+DELIMITER ;
+
+-- Mantenimiento del historial: archiva lo que tenga más de p_dias_retencion días, prepara las
+-- particiones del semestre actual y el siguiente y, si p_semestres_archivo > 0, conserva en el
+-- archivo solo ese número de semestres anteriores al actual.
+DELIMITER $$
+CREATE PROCEDURE sp_historial_mantenimiento(IN p_dias_retencion INT, IN p_semestres_archivo INT)
+BEGIN
+    DECLARE v_semestre DATE DEFAULT MAKEDATE(YEAR(CURDATE()), 1) + INTERVAL IF(MONTH(CURDATE()) <= 6, 0, 6) MONTH;
+
+    CALL sp_historial_crear_particion('historial_evaluacion_archivo', v_semestre);
+    CALL sp_historial_crear_particion('historial_evaluacion_archivo', v_semestre + INTERVAL 6 MONTH);
+    CALL sp_historial_crear_particion('historial_comentarios_archivo', v_semestre);
+    CALL sp_historial_crear_particion('historial_comentarios_archivo', v_semestre + INTERVAL 6 MONTH);
+
+    CALL sp_historial_archivar(p_dias_retencion);
+
+    IF p_semestres_archivo > 0 THEN
+        CALL sp_historial_descartar_particiones('historial_evaluacion_archivo', v_semestre - INTERVAL 6 * p_semestres_archivo MONTH);
+        CALL sp_historial_descartar_particiones('historial_comentarios_archivo', v_semestre - INTERVAL 6 * p_semestres_archivo MONTH);
+    END IF;
+END$$
+DELIMITER ;
+
+-- Evento diario: mantenimiento del historial (retención de 180 días en las tablas calientes;
+-- el archivo conserva todos los semestres)
+CREATE EVENT IF NOT EXISTS ev_historial_mantenimiento_diario
+ON SCHEDULE EVERY 1 DAY
+STARTS CURRENT_DATE + INTERVAL 1 DAY + INTERVAL 3 HOUR
+ON COMPLETION PRESERVE
+DO
+  CALL sp_historial_mantenimiento(180, 0);
+
+-- Tendencia desde el agregado diario y primer archivado
+CALL sp_refrescar_reportes_docentes();
+CALL sp_historial_mantenimiento(180, 0);
@@ -0,0 +1,55 @@
+/***
+Descripción: Migración para bases existentes. Versión del catálogo de materias (catalogo_version),
+incrementada por triggers al cambiar materias_impartidas o los nombres de docentes; la app la usa
+para saber cuándo volver a leer su catálogo en memoria por (campus, semestre).
+***/
+
+USE evaluacion_d;
+
+CREATE TABLE IF NOT EXISTS catalogo_version (
+    id TINYINT PRIMARY KEY,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0
+) ENGINE=InnoDB;
+
+INSERT IGNORE INTO catalogo_version (id, version) VALUES (1, 0);
+
+DROP TRIGGER IF EXISTS trg_catalogo_alta_materia;
+DROP TRIGGER IF EXISTS trg_catalogo_cambio_materia;
+DROP TRIGGER IF EXISTS trg_catalogo_baja_materia;
+DROP TRIGGER IF EXISTS trg_catalogo_cambio_docente;
+
+DELIMITER $$
+-- Versión del catálogo de materias: la app guarda en memoria las materias de cada (campus, semestre)
+-- y las vuelve a leer cuando cambia este número (altas, cambios y bajas de materias o de docentes,
+-- vengan de insertar_semestre_con_vinculos, de la importación del padrón o de cualquier otro proceso)
+CREATE TRIGGER trg_catalogo_alta_materia
+AFTER INSERT ON materias_impartidas
+FOR EACH ROW FOLLOWS trg_progreso_alta_materia
+BEGIN
+    UPDATE catalogo_version SET version = version + 1 WHERE id = 1;
+END$$
+
+CREATE TRIGGER trg_catalogo_cambio_materia
+AFTER UPDATE ON materias_impartidas
+FOR EACH ROW FOLLOWS trg_progreso_cambio_materia
+BEGIN
+    UPDATE catalogo_version SET version = version + 1 WHERE id = 1;
+END$$
+
+CREATE TRIGGER trg_catalogo_baja_materia
+AFTER DELETE ON materias_impartidas
+FOR EACH ROW FOLLOWS trg_progreso_baja_materia
+BEGIN
+    UPDATE catalogo_version SET version = version + 1 WHERE id = 1;
+END$$
+
+CREATE TRIGGER trg_catalogo_cambio_docente
+AFTER UPDATE ON docentes
+FOR EACH ROW
+BEGIN
+    -- Solo cambia el catálogo si cambia el nombre que ven los alumnos
+    IF NOT (NEW.nombre <=> OLD.nombre) OR NOT (NEW.apellidop <=> OLD.apellidop) OR NOT (NEW.apellidom <=> OLD.apellidom) THEN
+        UPDATE catalogo_version SET version = version + 1 WHERE id = 1;
+    END IF;
+END$$
+DELIMITER ;
@@ -0,0 +1,132 @@
+/***
+Descripción: Migración para bases existentes. Búsqueda de comentarios: índice FULLTEXT sobre
+historial_comentarios.comentario, columnas id_materia_impartida e id_campus (también en el archivo)
+para filtrar por materia y campus, índices (columna, fecha_registro) para los filtros, y el trigger
+y el procedimiento de archivo actualizados para copiar las columnas nuevas.
+***/
+
+USE evaluacion_d;
+
+-- El primer índice FULLTEXT reconstruye la tabla (agrega la columna oculta FTS_DOC_ID); conviene
+-- ejecutarla fuera del periodo de encuestas
+ALTER TABLE historial_comentarios
+    ADD COLUMN id_materia_impartida INT NULL,
+    ADD COLUMN id_campus INT NULL,
+    ADD KEY idx_historial_comentarios_docente (id_docente, fecha_registro),
+    ADD KEY idx_historial_comentarios_materia (id_materia_impartida, fecha_registro),
+    ADD KEY idx_historial_comentarios_campus (id_campus, fecha_registro);
+
+ALTER TABLE historial_comentarios
+    ADD FULLTEXT KEY ft_historial_comentarios (comentario);
+
+ALTER TABLE historial_comentarios_archivo
+    ADD COLUMN id_materia_impartida INT NULL,
+    ADD COLUMN id_campus INT NULL;
+
+-- Completar los comentarios existentes: la evaluación del mismo alumno y docente cuya materia
+-- tiene ese nombre (una por alumno y materia impartida)
+UPDATE historial_comentarios h
+JOIN evaluacion e ON e.id_alumno = h.id_alumno AND e.id_docente = h.id_docente
+JOIN materias_impartidas m ON m.id_materia_impartida = e.id_materia_impartida AND m.materia = h.materia
+SET h.id_materia_impartida = m.id_materia_impartida,
+    h.id_campus = m.id_campus
+WHERE h.id_materia_impartida IS NULL;
+
+DROP TRIGGER IF EXISTS trg_historial_comentarios;
+DROP PROCEDURE IF EXISTS sp_historial_archivar;
+
+DELIMITER $$
+-- Trigger que registra el comentario en el historial cuando se inserta un nuevo comentario
+CREATE TRIGGER trg_historial_comentarios
+AFTER INSERT ON comentarios
+FOR EACH ROW
+BEGIN
+    DECLARE v_id_docente INT;
+    DECLARE v_id_alumno INT;
+    DECLARE v_materia VARCHAR(256);
+    DECLARE v_id_materia INT;
+    DECLARE v_id_campus INT;
+    
+    -- Obtener datos de la evaluación relacionada
+    SELECT 
+        e.id_docente,
+        e.id_alumno,
+        m.materia,
+        m.id_materia_impartida,
+        m.id_campus
+    INTO 
+        v_id_docente,
+        v_id_alumno,
+        v_materia,
+        v_id_materia,
+        v_id_campus
+    FROM evaluacion e
+    JOIN materias_impartidas m ON e.id_materia_impartida = m.id_materia_impartida
+    WHERE e.id_evaluacion = NEW.id_evaluacion;
+
+    -- Registrar en el historial
+    INSERT INTO historial_comentarios (
+        id_docente,
+        id_alumno, 
+        comentario,
+        materia,
+        id_materia_impartida,
+        id_campus
+    ) VALUES (
+        v_id_docente,
+        v_id_alumno,
+        NEW.comentario,
+        v_materia,
+        v_id_materia,
+        v_id_campus
+    );
+END$$
+
+CREATE PROCEDURE sp_historial_archivar(IN p_dias INT)
+BEGIN
+    DECLARE v_limite DATETIME DEFAULT NOW() - INTERVAL p_dias DAY;
+    DECLARE v_hasta INT;
+
+    evaluaciones: LOOP
+        SELECT MAX(id_historial) INTO v_hasta
+        FROM (
+            SELECT id_historial FROM historial_evaluacion
+            WHERE fecha_registro < v_limite
+            ORDER BY fecha_registro
+            LIMIT 5000
+        ) lote;
+        IF v_hasta IS NULL THEN
+            LEAVE evaluaciones;
+        END IF;
+        START TRANSACTION;
+        INSERT INTO historial_evaluacion_archivo (id_historial, id_docente, id_evaluacion, fecha_registro, promedio, total_evaluaciones)
+        SELECT id_historial, id_docente, id_evaluacion, fecha_registro, promedio, total_evaluaciones
+        FROM historial_evaluacion
+        WHERE id_historial <= v_hasta AND fecha_registro < v_limite;
+        DELETE FROM historial_evaluacion
+        WHERE id_historial <= v_hasta AND fecha_registro < v_limite;
+        COMMIT;
+    END LOOP;
+
+    comentarios: LOOP
+        SELECT MAX(id_historial_comentario) INTO v_hasta
+        FROM (
+            SELECT id_historial_comentario FROM historial_comentarios
+            WHERE fecha_registro < v_limite
+            ORDER BY fecha_registro
+            LIMIT 5000
+        ) lote;
+        IF v_hasta IS NULL THEN
+            LEAVE comentarios;
+        END IF;
+        START TRANSACTION;
+        INSERT INTO historial_comentarios_archivo (id_historial_comentario, id_docente, id_alumno, comentario, fecha_registro, materia, id_materia_impartida, id_campus)
+        SELECT id_historial_comentario, id_docente, id_alumno, comentario, fecha_registro, materia, id_materia_impartida, id_campus
+        FROM historial_comentarios
+        WHERE id_historial_comentario <= v_hasta AND fecha_registro < v_limite;
+        DELETE FROM historial_comentarios
+        WHERE id_historial_comentario <= v_hasta AND fecha_registro < v_limite;
+        COMMIT;
+    END LOOP;
+END$$
+DELIMITER ;
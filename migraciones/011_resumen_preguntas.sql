@@ -0,0 +1,172 @@
+/***
+Descripción: Migración para bases existentes. Contadores por pregunta (resumen_preguntas_vm) que
+mantienen los triggers de respuestas; la tabla 'preguntas' del panel admin y reporte_preguntas los
+suman en lugar de agrupar todas las respuestas.
+***/
+
+USE evaluacion_d;
+
+-- Contadores por pregunta del catálogo (docente y servicios), mantenidos por los triggers de
+-- respuestas. Cada pregunta se reparte en 16 filas (particion = id de la evaluación MOD 16) para
+-- que los envíos simultáneos, que contestan todas las mismas preguntas, no esperen por una sola
+-- fila; los reportes suman las 16.
+CREATE TABLE IF NOT EXISTS resumen_preguntas_vm (
+    id_pregunta SMALLINT UNSIGNED NOT NULL,
+    particion TINYINT UNSIGNED NOT NULL,
+    suma_puntos BIGINT NOT NULL DEFAULT 0,
+    total_calificadas INT NOT NULL DEFAULT 0,
+    total_respuestas INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (id_pregunta, particion),
+    CONSTRAINT fk_resumen_preguntas_preguntas FOREIGN KEY (id_pregunta) REFERENCES preguntas(id_pregunta)
+) ENGINE=InnoDB;
+
+DROP TRIGGER IF EXISTS trg_actualizar_historial_evaluacion;
+DROP TRIGGER IF EXISTS trg_refrescar_resumen_servicios;
+DROP PROCEDURE IF EXISTS reporte_preguntas;
+DROP PROCEDURE IF EXISTS sp_refrescar_resumen_preguntas;
+
+-- Recalcula resumen_preguntas_vm desde las respuestas (carga inicial en la migración 011 o
+-- reconciliación manual). Hace upsert, así que puede correr con envíos en curso.
+DELIMITER $$
+CREATE PROCEDURE sp_refrescar_resumen_preguntas()
+BEGIN
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_preg;
+    CREATE TEMPORARY TABLE tmp_vm_preg (PRIMARY KEY (id_pregunta, particion)) AS
+    SELECT id_pregunta, id_evaluacion % 16 AS particion,
+           COALESCE(SUM(escala), 0) AS suma_puntos,
+           COUNT(escala) AS total_calificadas,
+           COUNT(*) AS total_respuestas
+    FROM respuestas
+    GROUP BY id_pregunta, id_evaluacion % 16
+    UNION ALL
+    SELECT id_pregunta, id_evaluacion_servicios % 16,
+           COALESCE(SUM(escala), 0), COUNT(escala), COUNT(*)
+    FROM respuestas_servicios
+    GROUP BY id_pregunta, id_evaluacion_servicios % 16;
+
+    INSERT INTO resumen_preguntas_vm (id_pregunta, particion, suma_puntos, total_calificadas, total_respuestas)
+    SELECT id_pregunta, particion, suma_puntos, total_calificadas, total_respuestas
+    FROM tmp_vm_preg
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = VALUES(suma_puntos),
+        total_calificadas = VALUES(total_calificadas),
+        total_respuestas = VALUES(total_respuestas);
+
+    DELETE rp FROM resumen_preguntas_vm rp
+    LEFT JOIN tmp_vm_preg t ON t.id_pregunta = rp.id_pregunta AND t.particion = rp.particion
+    WHERE t.id_pregunta IS NULL;
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_preg;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+-- Procedimiento para reporte por pregunta del catálogo (suma los contadores de resumen_preguntas_vm)
+CREATE PROCEDURE reporte_preguntas()
+BEGIN
+    SELECT p.id_pregunta, p.tipo, p.version, p.orden, p.texto, p.activa,
+           t.total_calificadas AS total_respuestas,
+           ROUND(t.suma_puntos / NULLIF(t.total_calificadas, 0), 2) AS promedio
+    FROM preguntas p
+    JOIN (
+        SELECT id_pregunta, SUM(suma_puntos) AS suma_puntos, SUM(total_calificadas) AS total_calificadas
+        FROM resumen_preguntas_vm GROUP BY id_pregunta
+    ) t ON t.id_pregunta = p.id_pregunta
+    ORDER BY p.tipo, p.version, p.orden;
+END$$
+
+-- Trigger que acumula la respuesta en el resumen del docente en tiempo constante
+-- (sin recorrer el resto de las respuestas). El historial se registra una vez por
+-- evaluación con sp_registrar_historial_evaluacion.
+CREATE TRIGGER trg_actualizar_historial_evaluacion 
+AFTER INSERT ON respuestas
+FOR EACH ROW
+BEGIN
+    DECLARE v_id_docente INT;
+    DECLARE v_id_materia INT;
+    DECLARE v_puntos INT;
+    DECLARE v_nueva_evaluacion TINYINT DEFAULT 0;
+
+    -- Obtener el docente y la materia de la evaluación
+    SELECT e.id_docente, e.id_materia_impartida INTO v_id_docente, v_id_materia
+    FROM evaluacion e
+    WHERE e.id_evaluacion = NEW.id_evaluacion;
+
+    SET v_puntos = COALESCE(NEW.escala, 0);
+
+    -- Primera respuesta de la evaluación -> cuenta como una evaluación más del docente
+    SET v_nueva_evaluacion = NOT EXISTS (
+        SELECT 1 FROM respuestas r
+        WHERE r.id_evaluacion = NEW.id_evaluacion AND r.id_pregunta <> NEW.id_pregunta
+    );
+
+    -- Actualizar contadores del docente (las asignaciones se evalúan en orden, promedio usa los nuevos valores)
+    INSERT INTO resumen_docentes_vm (id_docente, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    VALUES (v_id_docente, v_puntos, NEW.escala IS NOT NULL, 1, v_nueva_evaluacion, v_puntos)
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + 1,
+        total_evaluaciones = total_evaluaciones + VALUES(total_evaluaciones),
+        promedio = IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2));
+
+    -- Contadores por materia del reporte precalculado del docente
+    INSERT INTO reporte_docente_materias_vm (id_docente, id_materia_impartida, suma_puntos, total_calificadas, total_respuestas)
+    VALUES (v_id_docente, v_id_materia, v_puntos, NEW.escala IS NOT NULL, 1)
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + 1;
+
+    -- Contadores de la pregunta (una de sus 16 filas)
+    INSERT INTO resumen_preguntas_vm (id_pregunta, particion, suma_puntos, total_calificadas, total_respuestas)
+    VALUES (NEW.id_pregunta, NEW.id_evaluacion % 16, v_puntos, NEW.escala IS NOT NULL, 1)
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + 1;
+END$$
+
+-- Trigger que acumula la respuesta de servicios en el resumen del campus en tiempo constante
+CREATE TRIGGER trg_refrescar_resumen_servicios
+AFTER INSERT ON respuestas_servicios
+FOR EACH ROW
+BEGIN
+    DECLARE v_id_campus INT;
+    DECLARE v_puntos INT;
+    DECLARE v_nueva_evaluacion TINYINT DEFAULT 0;
+
+    -- Obtener el id_campus de la evaluación de servicios
+    SELECT es.id_campus INTO v_id_campus
+    FROM evaluacion_servicios es
+    WHERE es.id_evaluacion_servicios = NEW.id_evaluacion_servicios;
+
+    SET v_puntos = COALESCE(NEW.escala, 0);
+
+    SET v_nueva_evaluacion = NOT EXISTS (
+        SELECT 1 FROM respuestas_servicios rs
+        WHERE rs.id_evaluacion_servicios = NEW.id_evaluacion_servicios AND rs.id_pregunta <> NEW.id_pregunta
+    );
+
+    -- Actualizar contadores del campus
+    INSERT INTO resumen_servicios_vm (id_campus, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    VALUES (v_id_campus, v_puntos, NEW.escala IS NOT NULL, 1, v_nueva_evaluacion, v_puntos)
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + 1,
+        total_evaluaciones = total_evaluaciones + VALUES(total_evaluaciones),
+        promedio = IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2));
+
+    -- Contadores de la pregunta (una de sus 16 filas)
+    INSERT INTO resumen_preguntas_vm (id_pregunta, particion, suma_puntos, total_calificadas, total_respuestas)
+    VALUES (NEW.id_pregunta, NEW.id_evaluacion_servicios % 16, v_puntos, NEW.escala IS NOT NULL, 1)
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + 1;
+END$$
+DELIMITER ;
+
+-- Carga inicial de los contadores con las respuestas existentes
+CALL sp_refrescar_resumen_preguntas();
@@ -0,0 +1,14 @@
+/***
+Descripción: Migración para bases existentes. UNIQUE sobre evaluacion_servicios.id_alumno: una sola
+encuesta de servicios por alumno, tanto en el envío directo como al vaciar la cola de envíos
+diferidos (el duplicado se rechaza con el error 1062 en lugar de comprobarse antes de insertar).
+***/
+
+USE evaluacion_d;
+
+-- Antes de crear el UNIQUE, revisar que no existan encuestas de servicios duplicadas:
+-- SELECT id_alumno, COUNT(*) FROM evaluacion_servicios
+-- GROUP BY id_alumno HAVING COUNT(*) > 1;
+
+ALTER TABLE evaluacion_servicios
+    ADD UNIQUE KEY uq_evaluacion_servicios_alumno (id_alumno);
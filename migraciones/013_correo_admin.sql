@@ -0,0 +1,10 @@
+/***
+Descripción: Migración para bases existentes. Correo de la cuenta admin: /admin/enviar_reportes lo
+usa como destinatario cuando el formulario no trae ninguno (se asigna con
+`flask --app evaluacion crear-admin --correo ...`).
+***/
+
+USE evaluacion_d;
+
+ALTER TABLE admin_users
+    ADD COLUMN correo VARCHAR(256) NULL;
@@ -0,0 +1,19 @@
+/***
+Descripción: Migración para bases existentes. Columnas generadas con el nombre completo de alumnos
+y docentes, e índices para que /admin/tablas/alumnos y /admin/tablas/maestros pidan cada página
+por índice (orden por matrícula o nombre, también con filtro de campus o carrera) en lugar de
+ordenar toda la tabla.
+***/
+
+USE evaluacion_d;
+
+ALTER TABLE docentes
+    ADD COLUMN nombre_completo VARCHAR(768)
+        GENERATED ALWAYS AS (LEFT(CONCAT_WS(' ', nombre, apellidop, apellidom), 768)) VIRTUAL,
+    ADD KEY idx_docentes_nombre_completo (nombre_completo);
+
+ALTER TABLE alumnos
+    ADD COLUMN nombre_completo VARCHAR(513) GENERATED ALWAYS AS (CONCAT_WS(' ', nombre, apellidop)) VIRTUAL,
+    ADD KEY idx_alumnos_nombre_completo (nombre_completo),
+    ADD KEY idx_alumnos_campus_matricula (id_campus, matricula),
+    ADD KEY idx_alumnos_carrera_matricula (id_carrera, matricula);
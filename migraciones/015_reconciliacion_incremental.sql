@@ -0,0 +1,400 @@
+/***
+Descripción: Migración para bases existentes. La reconciliación de los resúmenes (evento horario y
+procedimientos manuales) ya no sobrescribe los contadores con un recálculo tomado antes: calcula la
+diferencia contra el contador en la misma instantánea y la suma, así que los incrementos que los
+triggers confirman mientras corre no se pierden.
+***/
+
+USE evaluacion_d;
+
+DROP PROCEDURE IF EXISTS sp_vm_iniciar_reconciliacion;
+DROP PROCEDURE IF EXISTS sp_vm_terminar_reconciliacion;
+DROP PROCEDURE IF EXISTS sp_vm_refrescar_docente_individual;
+DROP PROCEDURE IF EXISTS sp_vm_refrescar_campus_servicio_individual;
+DROP PROCEDURE IF EXISTS sp_refrescar_resumen_preguntas;
+DROP PROCEDURE IF EXISTS sp_vm_refrescar_resumen_completo;
+DROP PROCEDURE IF EXISTS sp_reconciliar_reportes_docentes;
+
+-- Las reconciliaciones no sobrescriben los contadores: calculan en UNA sola sentencia
+-- (INSERT ... SELECT con READ COMMITTED, una sola instantánea y sin bloquear las respuestas)
+-- la diferencia entre el recálculo y el contador y la suman. Lo que los triggers acumulan
+-- mientras corren se conserva. El candado con nombre evita que dos reconciliaciones sumen
+-- dos veces la misma diferencia. READ COMMITTED requiere binlog_format ROW o MIXED (el predeterminado).
+DELIMITER $$
+CREATE PROCEDURE sp_vm_iniciar_reconciliacion(OUT p_aislamiento VARCHAR(32))
+BEGIN
+    IF GET_LOCK('evaluacion_d.reconciliar_resumen', 0) <> 1 THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Ya hay una reconciliación de los resúmenes en curso.';
+    END IF;
+    SET p_aislamiento = @@SESSION.transaction_isolation;
+    SET SESSION transaction_isolation = 'READ-COMMITTED';
+END$$
+
+CREATE PROCEDURE sp_vm_terminar_reconciliacion(IN p_aislamiento VARCHAR(32))
+BEGIN
+    IF p_aislamiento IS NOT NULL THEN
+        SET SESSION transaction_isolation = p_aislamiento;
+    END IF;
+    DO RELEASE_LOCK('evaluacion_d.reconciliar_resumen');
+END$$
+DELIMITER ;
+
+-- Procedimiento granular (reconcilia los datos de 1 docente; los triggers usan contadores incrementales)
+DELIMITER $$
+CREATE PROCEDURE sp_vm_refrescar_docente_individual(IN p_id_docente INT)
+BEGIN
+    DECLARE v_aislamiento VARCHAR(32);
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        CALL sp_vm_terminar_reconciliacion(v_aislamiento);
+        RESIGNAL;
+    END;
+    CALL sp_vm_iniciar_reconciliacion(v_aislamiento);
+
+    INSERT INTO resumen_docentes_vm (id_docente, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    SELECT p_id_docente,
+           t.suma_puntos - COALESCE(rd.suma_puntos, 0),
+           t.total_calificadas - COALESCE(rd.total_calificadas, 0),
+           t.total_respuestas - COALESCE(rd.total_respuestas, 0),
+           t.total_evaluaciones - COALESCE(rd.total_evaluaciones, 0),
+           IF(t.total_calificadas = 0, 0.00, ROUND(t.suma_puntos / t.total_calificadas, 2))
+    FROM (
+        SELECT COALESCE(SUM(r.escala),0) AS suma_puntos, COUNT(r.escala) AS total_calificadas,
+               COUNT(r.id_pregunta) AS total_respuestas, COUNT(DISTINCT e.id_evaluacion) AS total_evaluaciones
+        FROM evaluacion e
+        JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+        WHERE e.id_docente = p_id_docente
+    ) t
+    LEFT JOIN resumen_docentes_vm rd ON rd.id_docente = p_id_docente
+    WHERE t.total_respuestas > 0 OR rd.id_docente IS NOT NULL
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + VALUES(total_respuestas),
+        total_evaluaciones = total_evaluaciones + VALUES(total_evaluaciones),
+        promedio = IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2));
+
+    DELETE FROM resumen_docentes_vm WHERE id_docente = p_id_docente AND total_respuestas = 0;
+
+    CALL sp_vm_terminar_reconciliacion(v_aislamiento);
+END$$
+DELIMITER ;
+
+-- Procedimiento granular para servicios por campus (reconcilia con la misma diferencia)
+DELIMITER $$
+CREATE PROCEDURE sp_vm_refrescar_campus_servicio_individual(IN p_id_campus INT)
+BEGIN
+    DECLARE v_aislamiento VARCHAR(32);
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        CALL sp_vm_terminar_reconciliacion(v_aislamiento);
+        RESIGNAL;
+    END;
+    CALL sp_vm_iniciar_reconciliacion(v_aislamiento);
+
+    INSERT INTO resumen_servicios_vm (id_campus, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    SELECT p_id_campus,
+           t.suma_puntos - COALESCE(rs.suma_puntos, 0),
+           t.total_calificadas - COALESCE(rs.total_calificadas, 0),
+           t.total_respuestas - COALESCE(rs.total_respuestas, 0),
+           t.total_evaluaciones - COALESCE(rs.total_evaluaciones, 0),
+           IF(t.total_calificadas = 0, 0.00, ROUND(t.suma_puntos / t.total_calificadas, 2))
+    FROM (
+        SELECT COALESCE(SUM(r.escala),0) AS suma_puntos, COUNT(r.escala) AS total_calificadas,
+               COUNT(r.id_pregunta) AS total_respuestas, COUNT(DISTINCT es.id_evaluacion_servicios) AS total_evaluaciones
+        FROM evaluacion_servicios es
+        JOIN respuestas_servicios r ON es.id_evaluacion_servicios = r.id_evaluacion_servicios
+        WHERE es.id_campus = p_id_campus
+    ) t
+    LEFT JOIN resumen_servicios_vm rs ON rs.id_campus = p_id_campus
+    WHERE t.total_respuestas > 0 OR rs.id_campus IS NOT NULL
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + VALUES(total_respuestas),
+        total_evaluaciones = total_evaluaciones + VALUES(total_evaluaciones),
+        promedio = IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2));
+
+    DELETE FROM resumen_servicios_vm WHERE id_campus = p_id_campus AND total_respuestas = 0;
+
+    CALL sp_vm_terminar_reconciliacion(v_aislamiento);
+END$$
+DELIMITER ;
+
+-- Reconcilia resumen_preguntas_vm con las respuestas (carga inicial en la migración 011 o
+-- reconciliación manual). Suma la diferencia, así que puede correr con envíos en curso.
+DELIMITER $$
+CREATE PROCEDURE sp_refrescar_resumen_preguntas()
+BEGIN
+    DECLARE v_aislamiento VARCHAR(32);
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        CALL sp_vm_terminar_reconciliacion(v_aislamiento);
+        RESIGNAL;
+    END;
+    CALL sp_vm_iniciar_reconciliacion(v_aislamiento);
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_preg_dif;
+    CREATE TEMPORARY TABLE tmp_vm_preg_dif (
+        id_pregunta INT NOT NULL,
+        particion TINYINT UNSIGNED NOT NULL,
+        suma_puntos BIGINT NOT NULL,
+        total_calificadas INT NOT NULL,
+        total_respuestas INT NOT NULL,
+        PRIMARY KEY (id_pregunta, particion)
+    );
+
+    INSERT INTO tmp_vm_preg_dif
+    WITH recalculo AS (
+        SELECT id_pregunta, particion,
+               SUM(suma_puntos) AS suma_puntos,
+               SUM(total_calificadas) AS total_calificadas,
+               SUM(total_respuestas) AS total_respuestas
+        FROM (
+            SELECT id_pregunta, id_evaluacion % 16 AS particion,
+                   COALESCE(SUM(escala), 0) AS suma_puntos,
+                   COUNT(escala) AS total_calificadas,
+                   COUNT(*) AS total_respuestas
+            FROM respuestas
+            GROUP BY id_pregunta, id_evaluacion % 16
+            UNION ALL
+            SELECT id_pregunta, id_evaluacion_servicios % 16,
+                   COALESCE(SUM(escala), 0), COUNT(escala), COUNT(*)
+            FROM respuestas_servicios
+            GROUP BY id_pregunta, id_evaluacion_servicios % 16
+        ) x
+        GROUP BY id_pregunta, particion
+    )
+    SELECT t.id_pregunta, t.particion,
+           t.suma_puntos - COALESCE(rp.suma_puntos, 0),
+           t.total_calificadas - COALESCE(rp.total_calificadas, 0),
+           t.total_respuestas - COALESCE(rp.total_respuestas, 0)
+    FROM recalculo t
+    LEFT JOIN resumen_preguntas_vm rp ON rp.id_pregunta = t.id_pregunta AND rp.particion = t.particion
+    UNION ALL
+    SELECT rp.id_pregunta, rp.particion, -rp.suma_puntos, -rp.total_calificadas, -rp.total_respuestas
+    FROM resumen_preguntas_vm rp
+    LEFT JOIN recalculo t ON t.id_pregunta = rp.id_pregunta AND t.particion = rp.particion
+    WHERE t.id_pregunta IS NULL;
+
+    DELETE FROM tmp_vm_preg_dif
+    WHERE suma_puntos = 0 AND total_calificadas = 0 AND total_respuestas = 0;
+
+    INSERT INTO resumen_preguntas_vm (id_pregunta, particion, suma_puntos, total_calificadas, total_respuestas)
+    SELECT id_pregunta, particion, suma_puntos, total_calificadas, total_respuestas
+    FROM tmp_vm_preg_dif
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + VALUES(total_respuestas);
+
+    DELETE rp FROM resumen_preguntas_vm rp
+    JOIN tmp_vm_preg_dif t ON t.id_pregunta = rp.id_pregunta AND t.particion = rp.particion
+    WHERE rp.total_respuestas = 0;
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_preg_dif;
+    CALL sp_vm_terminar_reconciliacion(v_aislamiento);
+END$$
+DELIMITER ;
+
+-- Procedimiento de refresco completo (reconcilia todo: docentes + servicios)
+DELIMITER $$
+CREATE PROCEDURE sp_vm_refrescar_resumen_completo()
+BEGIN
+    DECLARE v_aislamiento VARCHAR(32);
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        CALL sp_vm_terminar_reconciliacion(v_aislamiento);
+        RESIGNAL;
+    END;
+    CALL sp_vm_iniciar_reconciliacion(v_aislamiento);
+
+    -- Docentes: un solo recorrido de las respuestas por (docente, materia); el resumen por docente
+    -- se suma desde ahí (cada evaluación es de una sola materia). Las diferencias por materia las
+    -- aplica sp_reconciliar_reportes_docentes
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_doc_dif;
+    CREATE TEMPORARY TABLE tmp_vm_doc_dif (
+        tipo ENUM('docente', 'materia') NOT NULL,
+        id_docente INT NOT NULL,
+        id_materia_impartida INT NOT NULL,          -- 0 en las filas por docente
+        suma_puntos BIGINT NOT NULL,
+        total_calificadas INT NOT NULL,
+        total_respuestas INT NOT NULL,
+        total_evaluaciones INT NOT NULL,
+        PRIMARY KEY (tipo, id_docente, id_materia_impartida)
+    );
+
+    INSERT INTO tmp_vm_doc_dif
+    WITH por_materia AS (
+        SELECT e.id_docente, e.id_materia_impartida,
+               COALESCE(SUM(r.escala),0) AS suma_puntos,
+               COUNT(r.escala) AS total_calificadas,
+               COUNT(r.id_pregunta) AS total_respuestas,
+               COUNT(DISTINCT e.id_evaluacion) AS total_evaluaciones
+        FROM evaluacion e
+        JOIN respuestas r ON e.id_evaluacion = r.id_evaluacion
+        GROUP BY e.id_docente, e.id_materia_impartida
+    ), por_docente AS (
+        SELECT id_docente,
+               SUM(suma_puntos) AS suma_puntos,
+               SUM(total_calificadas) AS total_calificadas,
+               SUM(total_respuestas) AS total_respuestas,
+               SUM(total_evaluaciones) AS total_evaluaciones
+        FROM por_materia
+        GROUP BY id_docente
+    )
+    SELECT 'materia', t.id_docente, t.id_materia_impartida,
+           t.suma_puntos - COALESCE(rm.suma_puntos, 0),
+           t.total_calificadas - COALESCE(rm.total_calificadas, 0),
+           t.total_respuestas - COALESCE(rm.total_respuestas, 0),
+           0
+    FROM por_materia t
+    LEFT JOIN reporte_docente_materias_vm rm
+        ON rm.id_docente = t.id_docente AND rm.id_materia_impartida = t.id_materia_impartida
+    UNION ALL
+    SELECT 'materia', rm.id_docente, rm.id_materia_impartida,
+           -rm.suma_puntos, -rm.total_calificadas, -rm.total_respuestas, 0
+    FROM reporte_docente_materias_vm rm
+    LEFT JOIN por_materia t
+        ON t.id_docente = rm.id_docente AND t.id_materia_impartida = rm.id_materia_impartida
+    WHERE t.id_docente IS NULL
+    UNION ALL
+    SELECT 'docente', t.id_docente, 0,
+           t.suma_puntos - COALESCE(rd.suma_puntos, 0),
+           t.total_calificadas - COALESCE(rd.total_calificadas, 0),
+           t.total_respuestas - COALESCE(rd.total_respuestas, 0),
+           t.total_evaluaciones - COALESCE(rd.total_evaluaciones, 0)
+    FROM por_docente t
+    LEFT JOIN resumen_docentes_vm rd ON rd.id_docente = t.id_docente
+    UNION ALL
+    SELECT 'docente', rd.id_docente, 0,
+           -rd.suma_puntos, -rd.total_calificadas, -rd.total_respuestas, -rd.total_evaluaciones
+    FROM resumen_docentes_vm rd
+    LEFT JOIN por_docente t ON t.id_docente = rd.id_docente
+    WHERE t.id_docente IS NULL;
+
+    DELETE FROM tmp_vm_doc_dif
+    WHERE suma_puntos = 0 AND total_calificadas = 0 AND total_respuestas = 0 AND total_evaluaciones = 0;
+
+    INSERT INTO resumen_docentes_vm (id_docente, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    SELECT id_docente, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones,
+           IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2))
+    FROM tmp_vm_doc_dif
+    WHERE tipo = 'docente'
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + VALUES(total_respuestas),
+        total_evaluaciones = total_evaluaciones + VALUES(total_evaluaciones),
+        promedio = IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2));
+
+    DELETE rd FROM resumen_docentes_vm rd
+    JOIN tmp_vm_doc_dif t ON t.tipo = 'docente' AND t.id_docente = rd.id_docente
+    WHERE rd.total_respuestas = 0;
+
+    -- Servicios: resumen completo por campus
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_serv_dif;
+    CREATE TEMPORARY TABLE tmp_vm_serv_dif (
+        id_campus INT PRIMARY KEY,
+        suma_puntos BIGINT NOT NULL,
+        total_calificadas INT NOT NULL,
+        total_respuestas INT NOT NULL,
+        total_evaluaciones INT NOT NULL
+    );
+
+    INSERT INTO tmp_vm_serv_dif
+    WITH por_campus AS (
+        SELECT es.id_campus,
+               COALESCE(SUM(rs.escala),0) AS suma_puntos,
+               COUNT(rs.escala) AS total_calificadas,
+               COUNT(rs.id_pregunta) AS total_respuestas,
+               COUNT(DISTINCT es.id_evaluacion_servicios) AS total_evaluaciones
+        FROM evaluacion_servicios es
+        JOIN respuestas_servicios rs ON es.id_evaluacion_servicios = rs.id_evaluacion_servicios
+        GROUP BY es.id_campus
+    )
+    SELECT t.id_campus,
+           t.suma_puntos - COALESCE(r.suma_puntos, 0),
+           t.total_calificadas - COALESCE(r.total_calificadas, 0),
+           t.total_respuestas - COALESCE(r.total_respuestas, 0),
+           t.total_evaluaciones - COALESCE(r.total_evaluaciones, 0)
+    FROM por_campus t
+    LEFT JOIN resumen_servicios_vm r ON r.id_campus = t.id_campus
+    UNION ALL
+    SELECT r.id_campus, -r.suma_puntos, -r.total_calificadas, -r.total_respuestas, -r.total_evaluaciones
+    FROM resumen_servicios_vm r
+    LEFT JOIN por_campus t ON t.id_campus = r.id_campus
+    WHERE t.id_campus IS NULL;
+
+    DELETE FROM tmp_vm_serv_dif
+    WHERE suma_puntos = 0 AND total_calificadas = 0 AND total_respuestas = 0 AND total_evaluaciones = 0;
+
+    INSERT INTO resumen_servicios_vm (id_campus, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones, promedio)
+    SELECT id_campus, suma_puntos, total_calificadas, total_respuestas, total_evaluaciones,
+           IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2))
+    FROM tmp_vm_serv_dif
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + VALUES(total_respuestas),
+        total_evaluaciones = total_evaluaciones + VALUES(total_evaluaciones),
+        promedio = IF(total_calificadas = 0, 0.00, ROUND(suma_puntos / total_calificadas, 2));
+
+    DELETE r FROM resumen_servicios_vm r
+    JOIN tmp_vm_serv_dif t ON t.id_campus = r.id_campus
+    WHERE r.total_respuestas = 0;
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_serv_dif;
+
+    -- Reporte precalculado por docente (página /profesor)
+    CALL sp_reconciliar_reportes_docentes();
+    DROP TEMPORARY TABLE IF EXISTS tmp_vm_doc_dif;
+
+    CALL sp_vm_terminar_reconciliacion(v_aislamiento);
+END$$
+DELIMITER ;
+
+-- Reconciliación horaria de los contadores por materia (la llama sp_vm_refrescar_resumen_completo,
+-- que deja en tmp_vm_doc_dif las diferencias contra el recálculo y tiene el candado de la
+-- reconciliación). Suma la diferencia en lugar de sobrescribir, así que el trigger de respuestas
+-- puede seguir acumulando mientras corre. Solo reconstruye el documento de los docentes con diferencias.
+DELIMITER $$
+CREATE PROCEDURE sp_reconciliar_reportes_docentes()
+BEGIN
+    DECLARE v_fin TINYINT DEFAULT 0;
+    DECLARE v_id_docente INT;
+    DECLARE cur_cambios CURSOR FOR
+        SELECT DISTINCT id_docente FROM tmp_vm_doc_dif WHERE tipo = 'materia';
+    DECLARE CONTINUE HANDLER FOR NOT FOUND SET v_fin = 1;
+
+    INSERT INTO reporte_docente_materias_vm (id_docente, id_materia_impartida, suma_puntos, total_calificadas, total_respuestas)
+    SELECT id_docente, id_materia_impartida, suma_puntos, total_calificadas, total_respuestas
+    FROM tmp_vm_doc_dif
+    WHERE tipo = 'materia'
+    ON DUPLICATE KEY UPDATE
+        suma_puntos = suma_puntos + VALUES(suma_puntos),
+        total_calificadas = total_calificadas + VALUES(total_calificadas),
+        total_respuestas = total_respuestas + VALUES(total_respuestas);
+
+    DELETE rm FROM reporte_docente_materias_vm rm
+    JOIN tmp_vm_doc_dif t
+        ON t.tipo = 'materia' AND t.id_docente = rm.id_docente AND t.id_materia_impartida = rm.id_materia_impartida
+    WHERE rm.total_respuestas = 0;
+
+    DELETE rd FROM reporte_docentes_vm rd
+    LEFT JOIN reporte_docente_materias_vm rm ON rm.id_docente = rd.id_docente
+    WHERE rm.id_docente IS NULL;
+
+    OPEN cur_cambios;
+    docentes: LOOP
+        FETCH cur_cambios INTO v_id_docente;
+        IF v_fin THEN
+            LEAVE docentes;
+        END IF;
+        IF EXISTS (SELECT 1 FROM reporte_docente_materias_vm WHERE id_docente = v_id_docente) THEN
+            CALL sp_refrescar_reporte_docente(v_id_docente);
+        END IF;
+    END LOOP;
+    CLOSE cur_cambios;
+END$$
+DELIMITER ;
@@ -0,0 +1,10 @@
+/***
+Descripción: Migración para bases existentes. Estado 'enviando' de cada destinatario de un trabajo
+de correo: el hilo lo reclama antes de enviarle, así que un trabajo retomado (abandonado por
+inactividad) no le vuelve a enviar a los destinatarios que otro hilo ya tomó.
+***/
+
+USE evaluacion_d;
+
+ALTER TABLE trabajos_correo_destinatarios
+    MODIFY estado ENUM('pendiente','enviando','enviado','error') NOT NULL DEFAULT 'pendiente';
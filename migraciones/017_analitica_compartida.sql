@@ -0,0 +1,17 @@
+/***
+Descripción: Migración para bases existentes. Resultado compartido de la analítica: un solo worker
+recorre las respuestas por vencimiento de ANALITICA_TTL y guarda el resultado; los demás lo leen.
+***/
+
+USE evaluacion_d;
+
+-- Último resultado de la analítica (analitica.py), compartido por todos los workers: lo calcula
+-- uno solo (el que reclama calculando_desde) y los demás lo leen (una sola fila)
+CREATE TABLE IF NOT EXISTS analitica_resultado (
+    id TINYINT PRIMARY KEY,
+    resultado JSON NULL,
+    generado TIMESTAMP NULL,
+    calculando_desde TIMESTAMP NULL
+) ENGINE=InnoDB;
+
+INSERT IGNORE INTO analitica_resultado (id) VALUES (1);
@@ -0,0 +1,59 @@
+/***
+Descripción: Migración para bases existentes. La primera partición de las tablas de archivo del
+historial (p2026_1) juntaba todo lo anterior a julio de 2026; se divide por semestre desde 2024
+(p_anterior se queda con lo previo) para que los semestres pasados también se puedan descartar
+uno por uno.
+***/
+
+USE evaluacion_d;
+
+ALTER TABLE historial_evaluacion_archivo REORGANIZE PARTITION p2026_1 INTO (
+    PARTITION p_anterior VALUES LESS THAN ('2024-01-01'),
+    PARTITION p2024_1 VALUES LESS THAN ('2024-07-01'),
+    PARTITION p2024_2 VALUES LESS THAN ('2025-01-01'),
+    PARTITION p2025_1 VALUES LESS THAN ('2025-07-01'),
+    PARTITION p2025_2 VALUES LESS THAN ('2026-01-01'),
+    PARTITION p2026_1 VALUES LESS THAN ('2026-07-01')
+);
+
+ALTER TABLE historial_comentarios_archivo REORGANIZE PARTITION p2026_1 INTO (
+    PARTITION p_anterior VALUES LESS THAN ('2024-01-01'),
+    PARTITION p2024_1 VALUES LESS THAN ('2024-07-01'),
+    PARTITION p2024_2 VALUES LESS THAN ('2025-01-01'),
+    PARTITION p2025_1 VALUES LESS THAN ('2025-07-01'),
+    PARTITION p2025_2 VALUES LESS THAN ('2026-01-01'),
+    PARTITION p2026_1 VALUES LESS THAN ('2026-07-01')
+);
+
+DROP PROCEDURE IF EXISTS sp_historial_descartar_particiones;
+
+-- Descarta de una tabla de archivo las particiones de semestres anteriores a p_antes_de
+-- (compactación de semestres pasados); p_anterior termina el 1 de enero de 2024.
+DELIMITER $$
+CREATE PROCEDURE sp_historial_descartar_particiones(IN p_tabla VARCHAR(64), IN p_antes_de DATE)
+BEGIN
+    DECLARE v_fin TINYINT DEFAULT 0;
+    DECLARE v_nombre VARCHAR(64);
+    -- pAAAA_S ordena igual que el semestre; la partición vence antes del semestre de p_antes_de
+    DECLARE cur_particiones CURSOR FOR
+        SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = p_tabla
+          AND (PARTITION_NAME = 'p_anterior' AND p_antes_de >= '2024-01-01'
+               OR PARTITION_NAME REGEXP '^p[0-9]{4}_[12]$'
+                  AND PARTITION_NAME < CONCAT('p', YEAR(p_antes_de), '_', IF(MONTH(p_antes_de) <= 6, 1, 2)));
+    DECLARE CONTINUE HANDLER FOR NOT FOUND SET v_fin = 1;
+
+    OPEN cur_particiones;
+    particiones: LOOP
+        FETCH cur_particiones INTO v_nombre;
+        IF v_fin THEN
+            LEAVE particiones;
+        END IF;
+        SET @sql_particion = CONCAT('ALTER TABLE ', p_tabla, ' DROP PARTITION ', v_nombre);
+        PREPARE stmt FROM @sql_particion;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END LOOP;
+    CLOSE cur_particiones;
+END$$
+DELIMITER ;
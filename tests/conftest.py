@@ -0,0 +1,15 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Configuración de las pruebas unitarias (pytest). Los módulos de la app (app.py/) y de
+las herramientas (herramientas/) se importan por nombre, como lo hacen ellos mismos.
+
+Uso (desde la raíz del repositorio):
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for carpeta in ("app.py", "herramientas"):
+    sys.path.insert(0, os.path.join(RAIZ, carpeta))
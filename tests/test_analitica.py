@@ -0,0 +1,164 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Pruebas de las estadísticas de analitica.py a partir de histogramas de la escala
+(columna 0 = respuesta sin escala, 1..5 = escala).
+"""
+
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+# analitica importa conexion (Flask y mysql-connector)
+pytest.importorskip("flask")
+pytest.importorskip("mysql.connector")
+
+import analitica  # noqa: E402
+from analitica import estadisticas  # noqa: E402
+
+
+def test_promedio_desviacion_y_tasa():
+    st = estadisticas(np.array([[2, 1, 0, 0, 0, 1]]))
+    assert st['respuestas'][0] == 4
+    assert st['calificadas'][0] == 2
+    assert st['promedio'][0] == pytest.approx(3.0)
+    assert st['desviacion'][0] == pytest.approx(2.0)
+    assert st['tasa_respuesta'][0] == pytest.approx(0.5)
+
+
+def test_percentiles():
+    st = estadisticas(np.array([[0, 10, 10, 10, 10, 10],
+                                [2, 1, 0, 0, 0, 1]]))
+    assert [st[f'p{p}'][0] for p in analitica.PERCENTILES] == [2, 3, 4, 5]
+    assert [st[f'p{p}'][1] for p in analitica.PERCENTILES] == [1, 1, 5, 5]
+    assert st['promedio'][0] == pytest.approx(3.0)
+    assert st['desviacion'][0] == pytest.approx(np.sqrt(2))
+
+
+def test_grupo_sin_respuestas():
+    st = estadisticas(np.zeros((1, analitica.ESCALAS), dtype=np.int64))
+    assert st['respuestas'][0] == 0
+    for clave in ('promedio', 'desviacion', 'tasa_respuesta') + tuple(f'p{p}' for p in analitica.PERCENTILES):
+        assert np.isnan(st[clave][0]), clave
+
+
+def test_grupo_solo_sin_escala():
+    st = estadisticas(np.array([[3, 0, 0, 0, 0, 0]]))
+    assert st['respuestas'][0] == 3
+    assert st['tasa_respuesta'][0] == 0
+    assert np.isnan(st['promedio'][0])
+    assert np.isnan(st['p50'][0])
+
+
+def test_conserva_la_forma_de_los_grupos():
+    hist = np.zeros((2, 3, analitica.ESCALAS), dtype=np.int64)
+    hist[1, 2, 4] = 7
+    st = estadisticas(hist)
+    assert st['promedio'].shape == (2, 3)
+    assert st['promedio'][1, 2] == pytest.approx(4.0)
+    assert np.isnan(st['promedio'][0, 0])
+
+
+def test_percentil_rango():
+    rango = analitica._percentil_rango(np.array([1.0, 2.0, 3.0, np.nan]))
+    assert rango[:3] == pytest.approx([100 / 6, 50, 250 / 3])
+    assert np.isnan(rango[3])
+
+
+def test_percentil_rango_empates_cuentan_la_mitad():
+    assert analitica._percentil_rango(np.array([2.0, 2.0, 4.0])) == pytest.approx([100 / 3, 100 / 3, 250 / 3])
+
+
+def test_percentil_rango_sin_valores():
+    assert np.isnan(analitica._percentil_rango(np.array([np.nan, np.nan]))).all()
+
+
+def test_indices_densos():
+    mapa = analitica._indice([5, 2, 9])
+    assert analitica._densos(mapa, np.array([2, 9, 5, 3, 50])).tolist() == [1, 2, 0, -1, -1]
+
+
+class CursorFalso:
+    """Cursor de una conexión falsa: devuelve las filas de la primera consulta conocida que coincide."""
+
+    def __init__(self, datos):
+        self.datos = datos
+        self.filas = []
+
+    def execute(self, sql, params=()):
+        self.filas = list(next(filas for clave, filas in self.datos.items() if clave in sql))
+
+    def fetchall(self):
+        filas, self.filas = self.filas, []
+        return filas
+
+    def fetchmany(self, n):
+        filas, self.filas = self.filas[:n], self.filas[n:]
+        return filas
+
+    def close(self):
+        pass
+
+
+class ConexionFalsa:
+    def __init__(self, datos):
+        self.datos = datos
+
+    def cursor(self, **kwargs):
+        return CursorFalso(self.datos)
+
+    def consume_results(self):
+        pass
+
+
+def test_calcular_se_puede_guardar_en_json():
+    conn = ConexionFalsa({
+        "FROM docentes": [{'id_docente': 1, 'nombre': 'Ana', 'apellidop': 'Ruiz', 'apellidom': None}],
+        "FROM materias_impartidas": [{'id_materia_impartida': 10, 'id_docente': 1, 'id_campus': 1,
+                                      'numero': '1', 'materia': 'Cálculo'}],
+        "FROM campus": [{'id_campus': 1, 'nombre': 'Centro'}],
+        "FROM preguntas": [{'id_pregunta': 3, 'texto': '¿Explica bien?'}],
+        "FROM alumnos": [{'id_campus': 1, 'numero': '1', 'alumnos': 4}],
+        "FROM respuestas": [(1, 10, 3, 5), (1, 10, 3, 4), (1, 10, 3, 0)],
+        "FROM evaluacion": [(10,), (10,), (10,)],
+    })
+    datos = analitica.calcular(conn)
+    guardado = analitica._desde_json(json.dumps(datos, ensure_ascii=False))
+    assert guardado == datos
+    assert guardado['docentes'][1]['promedio'] == 4.5
+    assert guardado['docentes'][1]['materias'][0]['tasa_evaluacion'] == 0.75
+
+
+@pytest.fixture
+def compartido(monkeypatch):
+    """Estado de la analítica en memoria limpio y sin BD: cada prueba define el resultado compartido."""
+    monkeypatch.setattr(analitica, "_resultado", None)
+    monkeypatch.setattr(analitica, "_calculado", float("-inf"))
+    monkeypatch.setattr(analitica, "_calculando", True)
+    calculos = []
+    monkeypatch.setattr(analitica, "_calcular_y_guardar", lambda: calculos.append(1) or {'respuestas': 1, 'segundos': 0})
+    return calculos
+
+
+def test_resultado_vigente_de_otro_worker_no_se_recalcula(compartido, monkeypatch):
+    monkeypatch.setattr(analitica, "_leer_compartido", lambda: ({'respuestas': 9}, 5))
+    monkeypatch.setattr(analitica, "_reclamar", lambda: pytest.fail("no debe reclamar"))
+    analitica._recalcular()
+    assert analitica._resultado == {'respuestas': 9}
+    assert not compartido and not analitica._calculando
+
+
+def test_resultado_vencido_lo_calcula_quien_lo_reclama(compartido, monkeypatch):
+    monkeypatch.setattr(analitica, "_leer_compartido", lambda: ({'respuestas': 9}, analitica.TTL + 1))
+    monkeypatch.setattr(analitica, "_reclamar", lambda: True)
+    analitica._recalcular()
+    assert compartido == [1]
+    assert analitica._resultado == {'respuestas': 1, 'segundos': 0}
+
+
+def test_si_otro_worker_calcula_se_sirve_el_anterior(compartido, monkeypatch):
+    monkeypatch.setattr(analitica, "_leer_compartido", lambda: ({'respuestas': 9}, analitica.TTL + 1))
+    monkeypatch.setattr(analitica, "_reclamar", lambda: False)
+    analitica._recalcular()
+    assert not compartido
+    assert analitica._resultado == {'respuestas': 9}
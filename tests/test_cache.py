@@ -0,0 +1,58 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Pruebas de la caché en memoria (cache.py): expiración y cálculo único por clave
+cuando varios hilos la piden a la vez.
+"""
+
+import threading
+import time
+
+import pytest
+
+from cache import CacheTTL
+
+
+def test_expira_y_recalcula():
+    cache = CacheTTL(ttl=0.01)
+    cache.guardar('a', 1)
+    assert cache.obtener('a') == 1
+    time.sleep(0.02)
+    assert cache.obtener('a') is None
+    assert cache.obtener_o_calcular('a', lambda: 2) == 2
+
+
+def test_calcula_una_sola_vez_con_hilos_concurrentes():
+    cache = CacheTTL(ttl=60)
+    llamadas = []
+    entrada = threading.Barrier(8)
+
+    def calcular():
+        llamadas.append(1)
+        time.sleep(0.05)
+        return 'valor'
+
+    resultados = []
+
+    def pedir():
+        entrada.wait()
+        resultados.append(cache.obtener_o_calcular('clave', calcular))
+
+    hilos = [threading.Thread(target=pedir) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert resultados == ['valor'] * 8
+    assert len(llamadas) == 1
+
+
+def test_error_al_calcular_no_deja_la_clave_bloqueada():
+    cache = CacheTTL(ttl=60)
+
+    def fallar():
+        raise RuntimeError("sin BD")
+
+    with pytest.raises(RuntimeError):
+        cache.obtener_o_calcular('clave', fallar)
+    assert cache.obtener_o_calcular('clave', lambda: 3) == 3
+    assert cache._calculando == {}
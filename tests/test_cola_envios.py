@@ -0,0 +1,60 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Pruebas de la cola de envíos diferidos (cola_envios.py): qué errores de MySQL descartan
+solo una encuesta y cuáles reintentan el lote, y la recuperación de tomas vencidas.
+"""
+
+import time
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("mysql.connector")
+
+from mysql.connector import errors  # noqa: E402
+
+import cola_envios  # noqa: E402
+
+
+@pytest.fixture
+def cola(tmp_path, monkeypatch):
+    monkeypatch.setattr(cola_envios, "RUTA", str(tmp_path / "cola.sqlite3"))
+    monkeypatch.setattr(cola_envios._local, "conn", None, raising=False)
+    # Sin hilos de vaciado: la prueba toma los lotes a mano
+    monkeypatch.setattr(cola_envios, "asegurar_workers", lambda: None)
+    return cola_envios._conexion()
+
+
+@pytest.mark.parametrize("errno, sqlstate", [(1062, "23000"), (1452, "23000"), (1406, "22001"), (3819, "HY000")])
+def test_errores_de_la_encuesta_se_descartan_solos(errno, sqlstate):
+    assert cola_envios._error_de_fila(errors.get_mysql_exception(errno, "x", sqlstate))
+
+
+@pytest.mark.parametrize("errno, sqlstate", [(1205, "HY000"), (1213, "40001"), (2013, "HY000"), (1290, "HY000")])
+def test_bloqueos_y_conexion_reintentan_el_lote(errno, sqlstate):
+    assert not cola_envios._error_de_fila(errors.get_mysql_exception(errno, "x", sqlstate))
+
+
+def test_toma_vencida_vuelve_a_la_cola(cola):
+    assert cola_envios.encolar('docente', 1, 10, {'respuestas': []})
+    tomado, lote = cola_envios._tomar_lote(cola)
+    assert [f[0] for f in lote] == [1]
+    assert cola_envios._tomar_lote(cola)[1] == []
+    # El hilo que lo tomó se colgó: la siguiente toma después del plazo lo recupera
+    cola.execute("UPDATE envios SET tomado = ?", (time.time() - cola_envios.SEGUNDOS_ABANDONADO - 1,))
+    nuevo, lote = cola_envios._tomar_lote(cola)
+    assert [f[0] for f in lote] == [1] and nuevo != tomado
+
+
+def test_toma_vencida_no_se_modifica_con_la_toma_anterior(cola, monkeypatch):
+    cola_envios.encolar('servicios', 2, None, {'respuestas': []})
+    anterior, lote = cola_envios._tomar_lote(cola)
+    vencido = anterior - cola_envios.SEGUNDOS_ABANDONADO - 1
+    cola.execute("UPDATE envios SET tomado = ?", (vencido,))
+    vigente, _ = cola_envios._tomar_lote(cola)
+    # El hilo original termina tarde: su DELETE ya no aplica porque la toma es de otro
+    monkeypatch.setattr(cola_envios, "_aplicar", lambda lote: ([f[0] for f in lote], [], []))
+    cola_envios._procesar_lote(cola, vencido, lote)
+    assert cola.execute("SELECT estado, tomado FROM envios").fetchall() == [('procesando', vigente)]
+    cola_envios._procesar_lote(cola, vigente, lote)
+    assert cola.execute("SELECT COUNT(*) FROM envios").fetchone()[0] == 0
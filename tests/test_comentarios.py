@@ -0,0 +1,67 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Pruebas de la expresión booleana de MATCH ... AGAINST que arma comentarios.py.
+"""
+
+import pytest
+
+import comentarios
+from comentarios import consulta_booleana
+from tablas_admin import ParametroInvalido
+
+
+def test_cada_palabra_obligatoria_y_como_prefijo():
+    assert consulta_booleana("Explica muy bien") == "+explica* +muy* +bien*"
+
+
+def test_palabras_cortas_se_descartan():
+    # innodb_ft_min_token_size: las de menos de 3 letras no están en el índice
+    assert consulta_booleana("el profe es bueno") == "+profe* +bueno*"
+
+
+def test_operadores_del_usuario_se_ignoran():
+    assert consulta_booleana('-mal +"buen profe" (clase)~ @8') == "+mal* +buen* +profe* +clase*"
+
+
+def test_acentos_y_enies():
+    assert consulta_booleana("Enseñanza CLARÍSIMA") == "+enseñanza* +clarísima*"
+
+
+def test_limite_de_palabras():
+    texto = " ".join(f"palabra{i}" for i in range(comentarios.MAX_PALABRAS + 5))
+    assert consulta_booleana(texto).count("+") == comentarios.MAX_PALABRAS
+
+
+@pytest.mark.parametrize("texto", ["", "   ", "a de el", "+ - * \"\""])
+def test_sin_palabras_validas(texto):
+    with pytest.raises(ParametroInvalido):
+        consulta_booleana(texto)
+
+
+class CursorFalso:
+    """Guarda las consultas y devuelve las filas indicadas (y la fecha de cobertura)."""
+
+    def __init__(self, filas=()):
+        self.filas = list(filas)
+        self.consultas = []
+
+    def execute(self, sql, params=None):
+        self.consultas.append((sql, params))
+
+    def fetchall(self):
+        return self.filas
+
+    def fetchone(self):
+        return {'desde': "2025-01-01 08:00:00"}
+
+
+def test_cursor_de_busqueda_en_forma_expandida():
+    comentarios._cache_cobertura.invalidar()
+    cur = CursorFalso()
+    despues = comentarios.codificar_cursor(["2025-03-01 10:00:00", 40])
+    resultado = comentarios.buscar(cur, {'q': "profesor", 'despues': despues, 'limite': '5'})
+    sql, params = cur.consultas[0]
+    assert ("((h.fecha_registro < %s) OR (h.fecha_registro = %s AND h.id_historial_comentario < %s))"
+            in sql)
+    assert params == ("+profesor*", "2025-03-01 10:00:00", "2025-03-01 10:00:00", 40, 6)
+    assert resultado['cubre_desde'] == "2025-01-01 08:00:00"
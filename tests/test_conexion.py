@@ -0,0 +1,107 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Pruebas de la capa de conexión (conexion.py) sin servidor MySQL: cuándo las lecturas
+de reportes comparten la conexión de la petición.
+"""
+
+import pytest
+
+flask = pytest.importorskip("flask")
+pytest.importorskip("mysql.connector")
+
+from mysql.connector import errors  # noqa: E402
+
+import conexion  # noqa: E402
+
+
+class ConexionFalsa:
+    def __init__(self):
+        self.cerrada = False
+
+    def cursor(self, **kwargs):
+        return CursorFalso()
+
+    def close(self):
+        self.cerrada = True
+
+
+class CursorFalso:
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def contexto(monkeypatch):
+    tomadas = []
+
+    def tomar():
+        conn = ConexionFalsa()
+        tomadas.append(conn)
+        return conn
+
+    monkeypatch.setattr(conexion, "tomar_conexion", tomar)
+    app = flask.Flask(__name__)
+    with app.app_context():
+        yield tomadas
+
+
+def test_sin_replica_la_lectura_reutiliza_la_conexion_de_la_peticion(contexto, monkeypatch):
+    monkeypatch.setattr(conexion, "REPLICA_CONFIG", None)
+    assert conexion.obtener_cursor_lectura() is conexion.obtener_cursor()
+    assert len(contexto) == 1
+    conexion.liberar_conexion()
+    assert contexto[0].cerrada
+
+
+def test_con_replica_disponible_la_lectura_usa_otra_conexion(contexto, monkeypatch):
+    replica = ConexionFalsa()
+    monkeypatch.setattr(conexion, "_tomar_replica", lambda: replica)
+    assert conexion.obtener_cursor_lectura() is not conexion.obtener_cursor()
+    conexion.liberar_conexion()
+    assert replica.cerrada and contexto[0].cerrada
+
+
+class ConexionCaida(ConexionFalsa):
+    """Conexión del pool cuyo servidor ya no responde: el ping falla y el reset de la sesión también."""
+
+    def __init__(self):
+        super().__init__()
+        self.pings = []
+
+    def ping(self, **kwargs):
+        self.pings.append(kwargs)
+        raise errors.InterfaceError(msg="Can't connect to MySQL server")
+
+    def close(self):
+        super().close()
+        raise errors.OperationalError(msg="MySQL Connection not available")
+
+
+class PoolFalso:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def get_connection(self):
+        return self.conn
+
+
+def test_conexion_caida_falla_sin_esperar_entre_intentos():
+    conn = ConexionCaida()
+    with pytest.raises(conexion.BaseDatosNoDisponible):
+        conexion._tomar(PoolFalso(conn))
+    assert conn.pings == [{'reconnect': True, 'attempts': conexion.PING_INTENTOS, 'delay': 0}]
+    assert conn.cerrada
+
+
+@pytest.mark.parametrize("error", [conexion.BaseDatosNoDisponible(msg="caída"), errors.PoolError(msg="agotado")])
+def test_sin_conexion_la_peticion_responde_503(error):
+    app = flask.Flask(__name__)
+    conexion.init_app(app)
+
+    @app.route("/")
+    def vista():
+        raise error
+
+    respuesta = app.test_client().get("/")
+    assert respuesta.status_code == 503
+    assert respuesta.headers["Retry-After"] == str(conexion.REINTENTAR_EN)
@@ -0,0 +1,53 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Pruebas de la cola de correo (correo.py) sin BD ni SMTP: la reanudación de trabajos
+pendientes solo se da por hecha cuando la consulta tiene éxito.
+"""
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("mysql.connector")
+
+from mysql.connector import errors  # noqa: E402
+
+import correo  # noqa: E402
+
+
+class HilosFalsos:
+    def __init__(self):
+        self.enviados = []
+
+    def submit(self, funcion, *args):
+        self.enviados.append(args)
+
+
+@pytest.fixture
+def hilos(monkeypatch):
+    falsos = HilosFalsos()
+    monkeypatch.setattr(correo, "_reanudados", False)
+    monkeypatch.setattr(correo, "_pool_hilos", lambda: falsos)
+    return falsos
+
+
+def test_reanudar_se_reintenta_si_falla_la_bd(hilos, monkeypatch):
+    def sin_bd():
+        raise errors.InterfaceError("sin conexión")
+
+    monkeypatch.setattr(correo, "_reclamar_abandonados", sin_bd)
+    with pytest.raises(errors.Error):
+        correo.reanudar_pendientes()
+    assert not correo._reanudados
+
+    monkeypatch.setattr(correo, "_reclamar_abandonados", lambda: [4, 7])
+    correo.reanudar_pendientes()
+    assert correo._reanudados
+    assert hilos.enviados == [(4,), (7,)]
+
+
+def test_reanudar_una_sola_vez_por_proceso(hilos, monkeypatch):
+    llamadas = []
+    monkeypatch.setattr(correo, "_reclamar_abandonados", lambda: llamadas.append(1) or [])
+    correo.reanudar_pendientes()
+    correo.reanudar_pendientes()
+    assert len(llamadas) == 1
@@ -0,0 +1,41 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Pruebas de la lectura del formulario de la encuesta y de la detección de duplicados
+(envios.py).
+"""
+
+from types import SimpleNamespace
+
+import envios
+
+PREGUNTAS = [{'id_pregunta': 3}, {'id_pregunta': 7}]
+
+
+def test_respuestas_del_catalogo_con_escala():
+    form = {'pregunta_1': "3", 'escala_1': "5", 'pregunta_2': "7", 'escala_2': ""}
+    assert envios.respuestas_del_formulario(form, PREGUNTAS) == [(3, 5), (7, None)]
+
+
+def test_pregunta_repetida_se_toma_una_vez():
+    form = {'pregunta_1': "3", 'escala_1': "4", 'pregunta_2': "3", 'escala_2': "1", 'pregunta_3': "7"}
+    assert envios.respuestas_del_formulario(form, PREGUNTAS) == [(3, 4), (7, None)]
+
+
+def test_descarta_ids_fuera_del_catalogo_y_escalas_invalidas():
+    form = {'pregunta_1': "99", 'escala_1': "5", 'pregunta_2': "x", 'pregunta_3': "7", 'escala_3': "6"}
+    assert envios.respuestas_del_formulario(form, PREGUNTAS) == [(7, None)]
+
+
+def test_sin_preguntas_validas_devuelve_lista_vacia():
+    assert envios.respuestas_del_formulario({'pregunta_1': "99", 'comentario': "hola"}, PREGUNTAS) == []
+
+
+def _error(errno, msg):
+    return SimpleNamespace(errno=errno, msg=msg)
+
+
+def test_duplicada_solo_en_la_llave_de_la_encuesta():
+    assert envios.es_duplicada(_error(1062, "Duplicate entry '5-9' for key 'evaluacion.uq_evaluacion_alumno_materia'"))
+    assert envios.es_duplicada(_error(1062, "Duplicate entry '5' for key 'uq_evaluacion_servicios_alumno'"))
+    assert not envios.es_duplicada(_error(1062, "Duplicate entry '12-3' for key 'respuestas.PRIMARY'"))
+    assert not envios.es_duplicada(_error(1452, "Cannot add or update a child row: uq_evaluacion_alumno_materia"))
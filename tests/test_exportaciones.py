@@ -0,0 +1,41 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Pruebas de las exportaciones del panel admin (exportaciones.py): validación de los
+filtros y encabezado del CSV aunque el reporte no tenga filas.
+"""
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("mysql.connector")
+
+import exportaciones  # noqa: E402
+from tablas_admin import ParametroInvalido  # noqa: E402
+
+
+def test_filtros_en_el_where():
+    sql, params = exportaciones.consulta('evaluaciones', {'campus': '3', 'semestre': '2', 'carrera': ''})
+    assert "WHERE s.id_campus = %s AND s.numero = %s" in sql
+    assert params == (3, '2')
+
+
+def test_evaluaciones_lee_los_contadores_por_materia():
+    sql, _ = exportaciones.consulta('evaluaciones', {})
+    assert "FROM reporte_docente_materias_vm rm" in sql
+    assert "JOIN respuestas" not in sql and "GROUP BY" not in sql
+
+
+@pytest.mark.parametrize("args", [{'campus': 'abc'}, {'carrera': '1.5'}, {'semestre': '10'}, {'semestre': 'x'}])
+def test_filtro_no_valido(args):
+    with pytest.raises(ParametroInvalido):
+        exportaciones.consulta('alumnos', args)
+
+
+def test_csv_sin_filas_lleva_encabezado():
+    assert "".join(exportaciones._csv(iter([['id_alumno', 'matricula']]))) == "id_alumno,matricula\r\n"
+
+
+def test_csv_y_jsonl_con_filas():
+    bloques = [['a', 'b'], [{'a': 1, 'b': 'x'}], [{'a': 2, 'b': 'y'}]]
+    assert "".join(exportaciones._csv(iter(bloques))) == "a,b\r\n1,x\r\n2,y\r\n"
+    assert "".join(exportaciones._jsonl(iter(bloques))) == '{"a": 1, "b": "x"}\n{"a": 2, "b": "y"}\n'
@@ -0,0 +1,139 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Pruebas de la validación en memoria de las filas del padrón (importar_padron.py).
+"""
+
+from datetime import date
+
+import pytest
+
+# importar_padron importa mysql-connector y conexion (Flask)
+pytest.importorskip("flask")
+pytest.importorskip("mysql.connector")
+
+from importar_padron import Catalogos, FilaInvalida, validar_alumno, validar_docente, validar_materia  # noqa: E402
+
+
+class CursorFalso:
+    """Devuelve, en orden, los resultados de las consultas que hace Catalogos."""
+
+    def __init__(self, resultados):
+        self._resultados = list(resultados)
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchall(self):
+        return self._resultados.pop(0)
+
+
+@pytest.fixture
+def catalogos():
+    return Catalogos(CursorFalso([
+        [(1,), (2,)],                                  # campus
+        [(1, 10), (2, 20)],                            # campus_carrera
+        [("D001", 7)],                                 # docentes (matrícula -> id)
+        [("A001",)],                                   # alumnos
+        [("docente@uvm.mx",), ("Alumno@UVM.mx",)],     # correos
+    ]))
+
+
+def _docente(**cambios):
+    fila = {'matricula': "D002", 'nombre': "Ana", 'apellidop': "López", 'apellidom': "Ruiz",
+            'correo': "ana@uvm.mx", 'departamento': "Ciencias", 'fecha_nacimiento': "1980-05-17",
+            'id_campus': "1"}
+    fila.update(cambios)
+    return fila
+
+
+def _materia(**cambios):
+    fila = {'matricula_docente': "D001", 'numero': "3", 'materia': "Cálculo", 'curso': "",
+            'fecha_i': "2025-01-13", 'fecha_fin': "2025-05-30", 'id_campus': "1", 'id_carrera': "10"}
+    fila.update(cambios)
+    return fila
+
+
+def _alumno(**cambios):
+    fila = {'matricula': "A002", 'nombre': "Luis", 'apellidop': "Pérez", 'apellidom': "Soto",
+            'correo': "luis@uvm.mx", 'id_campus': "2", 'id_carrera': "20", 'numero_semestre': "5",
+            'fecha_nacimiento': "2004-02-29", 'tipo_alumno': ""}
+    fila.update(cambios)
+    return fila
+
+
+def test_docente_valido_reserva_matricula_y_correo(catalogos):
+    valores = validar_docente(catalogos, _docente())
+    assert valores == ("D002", "Ana", "López", "Ruiz", "ana@uvm.mx", "Ciencias", date(1980, 5, 17), 1)
+    assert "D002" in catalogos.docentes
+    with pytest.raises(FilaInvalida, match="matrícula de docente duplicada"):
+        validar_docente(catalogos, _docente(correo="otra@uvm.mx"))
+    with pytest.raises(FilaInvalida, match="correo duplicado"):
+        validar_docente(catalogos, _docente(matricula="D003", correo="ANA@uvm.mx"))
+
+
+@pytest.mark.parametrize("cambios, motivo", [
+    ({'matricula': "D001"}, "matrícula de docente duplicada"),
+    ({'matricula': "D0000000001"}, "matricula excede 10"),
+    ({'nombre': "  "}, "falta nombre"),
+    ({'id_campus': "9"}, "campus inexistente"),
+    ({'id_campus': "uno"}, "id_campus no es un número"),
+    ({'fecha_nacimiento': "17/05/1980"}, "no es una fecha"),
+    ({'correo': "alumno@uvm.mx"}, "correo duplicado"),
+])
+def test_docente_invalido(catalogos, cambios, motivo):
+    with pytest.raises(FilaInvalida, match=motivo):
+        validar_docente(catalogos, _docente(**cambios))
+
+
+def test_docente_sin_correo_ni_fecha(catalogos):
+    valores = validar_docente(catalogos, _docente(correo="", fecha_nacimiento=""))
+    assert valores[4] is None and valores[6] is None
+
+
+def test_materia_valida(catalogos):
+    assert validar_materia(catalogos, _materia()) == (
+        7, "3", "Cálculo", None, date(2025, 1, 13), date(2025, 5, 30), 1, 10)
+
+
+def test_materia_de_docente_del_mismo_padron(catalogos):
+    validar_docente(catalogos, _docente())
+    # El docente recién validado aún no tiene id (se asigna al insertar su lote)
+    assert validar_materia(catalogos, _materia(matricula_docente="D002"))[0] is None
+
+
+@pytest.mark.parametrize("cambios, motivo", [
+    ({'matricula_docente': "D999"}, "docente inexistente"),
+    ({'numero': "10"}, "fuera de rango"),
+    ({'numero': ""}, "falta numero"),
+    ({'id_carrera': "20"}, "no está disponible en el campus"),
+    ({'materia': ""}, "falta materia"),
+])
+def test_materia_invalida(catalogos, cambios, motivo):
+    with pytest.raises(FilaInvalida, match=motivo):
+        validar_materia(catalogos, _materia(**cambios))
+
+
+def test_alumno_valido(catalogos):
+    valores = validar_alumno(catalogos, _alumno())
+    assert valores == ("A002", "Luis", "Pérez", "Soto", "luis@uvm.mx", 2, 20, "5", date(2004, 2, 29), "regular")
+    assert "A002" in catalogos.alumnos
+
+
+def test_alumno_sin_semestre_ni_campus(catalogos):
+    valores = validar_alumno(catalogos, _alumno(id_campus="", id_carrera="", numero_semestre="",
+                                                tipo_alumno="intercambio"))
+    assert valores[5:8] == (None, None, None)
+    assert valores[-1] == "intercambio"
+
+
+@pytest.mark.parametrize("cambios, motivo", [
+    ({'matricula': "A001"}, "matrícula de alumno duplicada"),
+    ({'correo': ""}, "falta correo"),
+    ({'correo': "alumno@uvm.mx"}, "correo duplicado"),
+    ({'tipo_alumno': "oyente"}, "tipo_alumno no válido"),
+    ({'numero_semestre': "0"}, "fuera de rango"),
+    ({'id_carrera': "10"}, "no está disponible en el campus"),
+])
+def test_alumno_invalido(catalogos, cambios, motivo):
+    with pytest.raises(FilaInvalida, match=motivo):
+        validar_alumno(catalogos, _alumno(**cambios))
@@ -0,0 +1,47 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Regresión de planes de ejecución (herramientas/verificar_planes.py). La revisión con
+EXPLAIN necesita la BD de Base.sql (variables DB_*) y se omite si no hay servidor; la clasificación
+de los planes se prueba sin BD.
+"""
+
+import pytest
+
+pytest.importorskip("flask")
+mysql_connector = pytest.importorskip("mysql.connector")
+
+import verificar_planes  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def cur():
+    try:
+        db = mysql_connector.connect(connection_timeout=2, **verificar_planes.DB_CONFIG)
+    except mysql_connector.Error as e:
+        pytest.skip(f"Sin BD para revisar los planes: {e}")
+    cur = db.cursor(dictionary=True)
+    yield cur
+    cur.close()
+    db.close()
+
+
+def test_escaneo_sin_indice_o_con_muchas_filas():
+    plan = [
+        {'table': 'alumnos', 'type': 'ALL', 'possible_keys': None, 'rows': 10},
+        {'table': 'evaluacion', 'type': 'ALL', 'possible_keys': 'idx', 'rows': 5000},
+        {'table': 'docentes', 'type': 'ALL', 'possible_keys': 'idx', 'rows': 10},
+        {'table': 'campus', 'type': 'ALL', 'possible_keys': None, 'rows': 10},
+        {'table': '<derived2>', 'type': 'ALL', 'possible_keys': None, 'rows': 10},
+        {'table': 'respuestas', 'type': 'ref', 'possible_keys': 'PRIMARY', 'rows': 9},
+    ]
+    assert [f['table'] for f in verificar_planes.escaneos_completos(plan, 1000)] == ['alumnos', 'evaluacion']
+
+
+def test_ordena_filas():
+    assert verificar_planes.ordena_filas([{'Extra': 'Using where; Using filesort'}])
+    assert not verificar_planes.ordena_filas([{'Extra': 'Using where'}, {'Extra': None}])
+
+
+def test_ninguna_consulta_recorre_tablas_completas(cur):
+    fallas = [f"{nombre}: {falla}" for nombre, falla in verificar_planes.verificar(cur) if falla]
+    assert not fallas, "\n".join(fallas)
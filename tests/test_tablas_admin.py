@@ -0,0 +1,140 @@
+"""
+Autores: Axel Castañeda Sánchez y Luis Roberto Rodríguez Marroquin
+Descripción: Pruebas de la paginación por llave de tablas_admin (cursor, orden, filtros y límite).
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+import tablas_admin
+from tablas_admin import LIMITE_MAXIMO, ParametroInvalido, codificar_cursor, decodificar_cursor, pagina
+
+
+class CursorFalso:
+    """Cursor que guarda la última consulta y devuelve las filas indicadas."""
+
+    def __init__(self, filas=()):
+        self.filas = list(filas)
+        self.sql = self.params = None
+
+    def execute(self, sql, params=None):
+        self.sql, self.params = sql, params
+
+    def fetchall(self):
+        return self.filas
+
+
+def _evaluaciones(n):
+    return [{'id_materia_impartida': i, 'id_docente': 100 + i, 'docente': f"Docente {i:02d}",
+             'promedio': Decimal("4.50") - i} for i in range(n)]
+
+
+def test_cursor_ida_y_vuelta():
+    valores = ["Docente 03", 7, 107]
+    assert decodificar_cursor(codificar_cursor(valores), 3) == valores
+
+
+def test_cursor_con_fecha_se_codifica_como_texto():
+    assert decodificar_cursor(codificar_cursor([date(2025, 1, 31), 5]), 2) == ["2025-01-31", 5]
+
+
+@pytest.mark.parametrize("token", ["no-es-base64!", codificar_cursor({'a': 1}), codificar_cursor([1, 2])])
+def test_cursor_invalido(token):
+    with pytest.raises(ParametroInvalido):
+        decodificar_cursor(token, 3)
+
+
+def test_primera_pagina_con_siguiente():
+    cur = CursorFalso(_evaluaciones(3))
+    resultado = pagina(cur, 'evaluaciones', {'limite': '2'})
+
+    assert [f['id_materia_impartida'] for f in resultado['filas']] == [0, 1]
+    # Orden pedido + llave única, en ese orden
+    assert decodificar_cursor(resultado['siguiente'], 3) == ["Docente 01", 1, 101]
+    assert "ORDER BY d.nombre_completo ASC, rm.id_materia_impartida ASC, rm.id_docente ASC" in cur.sql
+    # Sin tabla derivada: el orden y el cursor van sobre las columnas de la consulta base
+    assert ") t\n" not in cur.sql
+    # Se pide una fila de más para saber si hay otra página
+    assert cur.params == (3,)
+
+
+def test_ultima_pagina_sin_siguiente():
+    resultado = pagina(CursorFalso(_evaluaciones(2)), 'evaluaciones', {'limite': '2'})
+    assert len(resultado['filas']) == 2
+    assert resultado['siguiente'] is None
+
+
+def test_pagina_siguiente_continua_despues_del_cursor():
+    cur = CursorFalso()
+    despues = codificar_cursor(["4.50", 0, 100])
+    pagina(cur, 'evaluaciones', {'orden': 'promedio', 'dir': 'desc', 'despues': despues, 'limite': '10'})
+
+    promedio = tablas_admin.TABLAS['evaluaciones']['columnas']['promedio']
+    # Forma expandida a < x OR (a = x AND b < y) ..., no comparación de filas
+    assert (f"(({promedio} < %s) OR ({promedio} = %s AND rm.id_materia_impartida < %s)"
+            f" OR ({promedio} = %s AND rm.id_materia_impartida = %s AND rm.id_docente < %s))") in cur.sql
+    assert f"ORDER BY {promedio} DESC, rm.id_materia_impartida DESC, rm.id_docente DESC" in cur.sql
+    assert cur.params == ("4.50", "4.50", 0, "4.50", 0, 100, 11)
+
+
+def test_orden_por_la_llave_no_la_repite():
+    cur = CursorFalso()
+    pagina(cur, 'preguntas', {'orden': 'id_pregunta', 'despues': codificar_cursor([12])})
+    assert "WHERE ((p.id_pregunta > %s))" in cur.sql
+    assert "ORDER BY p.id_pregunta ASC\n" in cur.sql
+
+
+def test_cursor_con_filtro_usa_indice_de_la_tabla_conductora():
+    cur = CursorFalso()
+    pagina(cur, 'alumnos', {'campus': '2', 'despues': codificar_cursor(["A0100", 9])})
+    assert "WHERE a.id_campus = %s AND ((a.matricula > %s) OR (a.matricula = %s AND a.id_alumno > %s))" in cur.sql
+    assert "ORDER BY a.matricula ASC, a.id_alumno ASC" in cur.sql
+    assert cur.params == (2, "A0100", "A0100", 9, tablas_admin.LIMITE_DEFECTO + 1)
+
+
+@pytest.mark.parametrize("tabla", sorted(tablas_admin.TABLAS))
+def test_columnas_de_orden_y_llave_tienen_expresion(tabla):
+    spec = tablas_admin.TABLAS[tabla]
+    assert set(spec['orden']) | set(spec['llave']) <= set(spec['columnas'])
+    assert set(spec['indexados']) <= set(spec['orden'])
+
+
+def test_cursor_de_otro_orden_se_rechaza():
+    # Cursor de dos columnas para un orden que necesita tres
+    with pytest.raises(ParametroInvalido):
+        pagina(CursorFalso(), 'evaluaciones', {'despues': codificar_cursor(["Docente 01", 1])})
+
+
+def test_filtros():
+    cur = CursorFalso()
+    pagina(cur, 'alumnos', {'pendientes': '1', 'campus': '2', 'carrera': ''})
+    assert "WHERE p.total_requerido > p.completadas AND a.id_campus = %s" in cur.sql
+    assert "a.id_carrera = %s" not in cur.sql
+    assert cur.params == (2, tablas_admin.LIMITE_DEFECTO + 1)
+
+
+def test_bandera_en_cero_no_filtra():
+    cur = CursorFalso()
+    pagina(cur, 'alumnos', {'pendientes': '0'})
+    assert "p.total_requerido > p.completadas" not in cur.sql
+
+
+def test_limite_se_acota():
+    cur = CursorFalso()
+    pagina(cur, 'alumnos', {'limite': '100000'})
+    assert cur.params == (LIMITE_MAXIMO + 1,)
+    pagina(cur, 'alumnos', {'limite': '0'})
+    assert cur.params == (2,)
+
+
+@pytest.mark.parametrize("args", [
+    {'orden': 'correo'},
+    {'dir': 'arriba'},
+    {'limite': 'diez'},
+    {'campus': 'uno'},
+])
+def test_parametros_invalidos(args):
+    with pytest.raises(ParametroInvalido):
+        pagina(CursorFalso(), 'alumnos', args)